@@ -28,7 +28,8 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics import renderPDF, renderPM
 
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from style_registry import shared_stylesheet, StyleSheetOverlay, sample_styles
 
 logger = logging.getLogger(__name__)
 
@@ -266,7 +267,7 @@ class PrescriptionOnlyPMXBasePage:
 
     def __init__(self):
         # Initialize ReportLab's built-in styles
-        self.styles = getSampleStyleSheet()
+        self.styles = sample_styles()
         # Set base path for static assets
         self.base_path = (
             Path(__file__).parent.parent.parent.parent.parent / "staticfiles" / "icons"
@@ -334,7 +335,7 @@ class PrescriptionOnlySVGImage(Flowable):
         super().__init__()
         # Convert SVG to ReportLab drawing
         self.filename = svg_path
-        self.svg = svg2rlg(svg_path)
+        self.svg = load_svg(svg_path)
         self.svg_width = self.svg.width
         self.svg_height = self.svg.height
 
@@ -421,7 +422,7 @@ class PrescriptionOnlyTemplate(PrescriptionOnlyPMXBasePage):
             try:
                 if os.path.exists(logo_path):
                     # Try to load SVG
-                    svg = svg2rlg(logo_path)
+                    svg = load_svg(logo_path)
                     if svg is not None:
                         return PrescriptionOnlySVGImage(logo_path, width=60)
                     # If SVG loading failed, try to load as regular image
@@ -664,18 +665,19 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         super().__init__()
         # Initialize with standard margins
         self.PAGE_MARGIN = 0.25 * inch  # Use consistent margins
-        self.init_styles()
+        self.styles = StyleSheetOverlay(PRESCRIPTION_STYLES)
         self.content_background_color = PMX_BACKGROUND
         logger.debug(
             "Initialized PrescriptionPage with margins: %.2f inches",
             self.PAGE_MARGIN / inch,
         )
 
-    def init_styles(self):
+    @staticmethod
+    def init_styles(styles):
         """Initialize all custom text styles used in the prescription."""
 
         #PrescriptionEnds here
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PrescriptionEnds",
                 fontName=FONT_INTER_REGULAR,
@@ -689,7 +691,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Patient name style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PatientName",
                 fontName=FONT_INTER_REGULAR,
@@ -704,7 +706,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Date style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "DateStyle",
                 fontName=FONT_INTER_REGULAR,
@@ -716,7 +718,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Patient info style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PatientInfo",
                 fontName=FONT_INTER_LIGHT,
@@ -729,7 +731,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Prescription title style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PrescriptionTitle",
                 fontName=FONT_INTER_REGULAR,
@@ -743,7 +745,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table header style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableHeader",
                 fontName=FONT_INTER_BOLD,
@@ -756,7 +758,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table cell style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableCell",
                 fontName=FONT_INTER_REGULAR,
@@ -769,7 +771,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
                 wordWrap="CJK",
             )
         )
-        # self.styles.add(
+        # styles.add(
         #     ParagraphStyle(
         #         name="RowNumber",
         #         fontName="Courier",        # Monospaced font
@@ -782,7 +784,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         #     )
         # )
         # Row number style - prevents character splitting
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "RowNumber",
                 fontName=FONT_INTER_REGULAR,
@@ -799,7 +801,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Section title style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "SectionTitle",
                 fontName=FONT_INTER_BOLD,
@@ -811,7 +813,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Body text style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXBodyText",
                 fontName=FONT_INTER_REGULAR,
@@ -824,7 +826,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Italic text style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXItalicText",
                 fontName=FONT_INTER_LIGHT,
@@ -837,7 +839,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Button style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXButton",
                 fontName=FONT_INTER_REGULAR,
@@ -854,10 +856,10 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Available button style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXAvailableButton",
-                parent=self.styles["TableCell"],
+                parent=styles["TableCell"],
                 fontName=FONT_INTER_REGULAR,
                 fontSize=8,
                 textColor=PMX_GREEN,
@@ -1644,7 +1646,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         # ---- Logo Drawing ----
         logo = self._get_logo()
         if isinstance(logo, PrescriptionOnlySVGImage):
-            drawing = svg2rlg(logo.filename)
+            drawing = load_svg(logo.filename)
             if drawing:
                 logo_width = drawing.width
                 renderPDF.draw(drawing, canvas, x=logo_x, y=logo_y)
@@ -1672,6 +1674,9 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         text_x = logo_x + logo_width + text_padding
         text_y = logo_y + 5
         canvas.drawString(text_x, text_y, footer_text)
+
+
+PRESCRIPTION_STYLES = shared_stylesheet(f"{__name__}.PrescriptionPage", PrescriptionPage.init_styles)
     
 # ------------------ Flask App ------------------
 app = Flask(__name__)
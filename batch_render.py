@@ -0,0 +1,254 @@
+# === batch_render.py ===
+"""
+Batch report generation for patient cohorts.
+
+Renders a list of payloads (or a directory of JSON / xlsx inputs) through a
+RenderPool, so documents are spread over all cores while every worker keeps
+its fonts, parsed SVGs, image assets and styles warm between documents.
+Finished PDFs are written as they complete, either into an output directory
+or into a zip, together with a ``manifest.json`` holding per-document
+timings and errors.
+
+Over HTTP (render_batch_zip) only a JSON list of payload dicts is accepted,
+at most BATCH_MAX_DOCUMENTS of them since the zip is built in memory;
+reading inputs from paths is left to the command line.
+
+Usage:
+    python batch_render.py --report roadmap --input cohort_dir/ --out out_dir/
+    python batch_render.py --report genome --input exports/ --zip cohort.zip --workers 8
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import re
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+from render_pool import RenderPool, RENDER_TIMEOUT
+
+# Report name -> render target. JSON inputs are passed to the target as a
+# dict, xlsx inputs as their file path (only to targets in EXCEL_TARGETS).
+REPORT_TARGETS = {
+    "roadmap": "final_roadmap:render_roadmap_pdf",
+    "roadmap_toc": "stash:render_roadmap_pdf",
+    "nutrition": "nutrition_report:render_nutrition_pdf",
+    "genome": "genome:render_genome_pdf",
+    "prescription": "latest_prescription:render_prescription_pdf",
+}
+
+# Targets that read an Excel export (first sheet), and the columns it must have
+EXCEL_TARGETS = {
+    "genome:render_genome_pdf": ("GROUP", "CONDITION", "DEFINITION", "RISK LEVEL", "TOP LIST OF GENES ANALYZED",
+                                 "INTERPRETATION"),
+}
+
+INPUT_SUFFIXES = (".json", ".xlsx")
+# Most documents one HTTP batch may hold: the zip is built in memory and returned whole
+BATCH_MAX_DOCUMENTS = int(os.environ.get("BATCH_MAX_DOCUMENTS", 50))
+PAYLOAD_ID_KEYS = ("user_id", "samplecode", "patient_id", "user_name", "name")
+
+
+def _safe_name(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_") or "report"
+
+
+def _payload_name(index, payload):
+    if isinstance(payload, dict):
+        for key in PAYLOAD_ID_KEYS:
+            if payload.get(key):
+                return f"{index:04d}_{_safe_name(payload[key])}"
+    return f"{index:04d}"
+
+
+def check_excel_input(file, target):
+    """
+    Raise ValueError unless ``target`` renders Excel exports and ``file`` has
+    the columns it reads (the per-patient KHPMXGPTTL exports, a "Report"
+    sheet of Patient Info / Data, do not).
+    """
+    required = EXCEL_TARGETS.get(target)
+    if required is None:
+        takes = ", ".join(sorted(EXCEL_TARGETS))
+        raise ValueError(f"{file}: {target} does not render Excel inputs (Excel renderers: {takes}); "
+                         f"pass JSON payloads")
+    import pandas as pd
+
+    columns = [str(column).strip() for column in pd.read_excel(file, nrows=0).columns]
+    missing = [column for column in required if column not in columns]
+    if missing:
+        raise ValueError(f"{file}: not an export {target} can render; missing columns {', '.join(missing)} "
+                         f"(found {', '.join(columns) or 'none'})")
+
+
+def payload_jobs(payloads):
+    """``(name, payload)`` jobs for in-memory payloads."""
+    return [(_payload_name(i, payload), payload) for i, payload in enumerate(payloads)]
+
+
+def check_batch_payloads(payloads, max_documents=BATCH_MAX_DOCUMENTS):
+    """Raise ValueError unless ``payloads`` is a non-empty list of at most ``max_documents`` dicts."""
+    if not isinstance(payloads, list) or not payloads:
+        raise ValueError("expected a non-empty JSON list of report payloads")
+    if not all(isinstance(payload, dict) for payload in payloads):
+        raise ValueError("every payload in the batch must be a JSON object")
+    if len(payloads) > max_documents:
+        raise ValueError(f"{len(payloads)} payloads in one batch; at most {max_documents} are accepted")
+
+
+def collect_jobs(inputs, target=None):
+    """
+    Turn the CLI's ``inputs`` path into a list of ``(name, payload)`` jobs.
+
+    ``inputs`` is a JSON file (one payload or a list of payloads), an xlsx
+    file, or a directory of such files. With a ``target``, xlsx files are
+    checked up front (check_excel_input), so a batch is refused before
+    anything is queued rather than failing per document inside the workers.
+    Only the CLI reads paths; HTTP batches go through render_batch_zip.
+    """
+    path = Path(inputs)
+    files = sorted(p for p in path.iterdir() if p.suffix.lower() in INPUT_SUFFIXES) if path.is_dir() else [path]
+
+    jobs = []
+    for file in files:
+        if file.suffix.lower() == ".xlsx":
+            if target is not None:
+                check_excel_input(file, target)
+            jobs.append((_safe_name(file.stem), str(file)))
+            continue
+        with open(file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            jobs.extend((f"{_safe_name(file.stem)}_{name}", payload)
+                        for name, payload in payload_jobs(data))
+        else:
+            jobs.append((_safe_name(file.stem), data))
+    return jobs
+
+
+class DirectorySink:
+    def __init__(self, out_dir):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name, pdf_bytes):
+        path = self.out_dir / f"{name}.pdf"
+        path.write_bytes(pdf_bytes)
+        return str(path)
+
+    def write_manifest(self, manifest):
+        with open(self.out_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    def close(self):
+        pass
+
+
+class ZipSink:
+    def __init__(self, fileobj):
+        self.zip = zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name, pdf_bytes):
+        arcname = f"{name}.pdf"
+        self.zip.writestr(arcname, pdf_bytes)
+        return arcname
+
+    def write_manifest(self, manifest):
+        self.zip.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+    def close(self):
+        self.zip.close()
+
+
+async def render_jobs(pool, target, jobs, sink, timeout=None):
+    """Render ``jobs`` through ``pool`` into ``sink``; returns the manifest dict."""
+    # Never queue more than the pool can run, so a shared pool's queue limit
+    # still leaves room for interactive requests.
+    in_flight = asyncio.Semaphore(pool.workers)
+    batch_started = time.perf_counter()
+
+    async def render_one(name, payload):
+        entry = {"name": name, "status": "ok"}
+        async with in_flight:
+            started = time.perf_counter()
+            try:
+                pdf_bytes, render_seconds = await pool.submit_timed(target, payload, timeout=timeout)
+                entry["output"] = sink.write(name, pdf_bytes)
+                entry["bytes"] = len(pdf_bytes)
+                entry["render_seconds"] = round(render_seconds, 3)
+            except asyncio.TimeoutError:
+                entry["status"] = "timeout"
+            except Exception as e:
+                entry["status"] = "error"
+                entry["error"] = str(e).strip().splitlines()[-1] if str(e).strip() else repr(e)
+            entry["wall_seconds"] = round(time.perf_counter() - started, 3)
+        print(f"[batch] {entry['status']:7s} {name} ({entry['wall_seconds']}s)")
+        return entry
+
+    documents = await asyncio.gather(*(render_one(name, payload) for name, payload in jobs))
+    manifest = {
+        "target": target,
+        "total": len(documents),
+        "succeeded": sum(1 for d in documents if d["status"] == "ok"),
+        "failed": sum(1 for d in documents if d["status"] != "ok"),
+        "wall_seconds": round(time.perf_counter() - batch_started, 3),
+        "documents": documents,
+    }
+    sink.write_manifest(manifest)
+    return manifest
+
+
+async def render_batch_zip(pool, target, payloads, timeout=None):
+    """
+    Render a list of in-memory payload dicts and return ``(zip_bytes, manifest)``.
+
+    The zip is built in memory, so a batch is limited to BATCH_MAX_DOCUMENTS
+    payloads; ValueError if ``payloads`` is anything else (check_batch_payloads).
+    """
+    check_batch_payloads(payloads)
+    buffer = io.BytesIO()
+    sink = ZipSink(buffer)
+    try:
+        manifest = await render_jobs(pool, target, payload_jobs(payloads), sink, timeout=timeout)
+    finally:
+        sink.close()
+    return buffer.getvalue(), manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a cohort of reports in parallel.")
+    parser.add_argument("--report", choices=sorted(REPORT_TARGETS), default="roadmap")
+    parser.add_argument("--input", required=True, help="JSON/xlsx file or directory of inputs")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", help="directory to write PDFs and manifest.json into")
+    output.add_argument("--zip", help="zip file to write PDFs and manifest.json into")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--timeout", type=float, default=RENDER_TIMEOUT, help="per-document timeout (s)")
+    args = parser.parse_args(argv)
+
+    target = REPORT_TARGETS[args.report]
+    try:
+        jobs = collect_jobs(args.input, target)
+    except ValueError as e:
+        print(f"[batch] {e}")
+        return 2
+    pool = RenderPool(warm_modules=(target.split(":")[0],), workers=args.workers,
+                      max_queue=len(jobs) + 1, timeout=args.timeout)
+    sink = DirectorySink(args.out) if args.out else ZipSink(args.zip)
+    print(f"[batch] rendering {len(jobs)} {args.report} report(s) on {pool.workers} worker(s)")
+    try:
+        manifest = asyncio.run(render_jobs(pool, target, jobs, sink))
+    finally:
+        sink.close()
+        pool.shutdown()
+
+    print(f"[batch] {manifest['succeeded']}/{manifest['total']} succeeded in {manifest['wall_seconds']}s")
+    return 0 if manifest["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
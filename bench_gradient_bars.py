@@ -0,0 +1,212 @@
+# === bench_gradient_bars.py ===
+"""
+Raster regression + benchmark for the shaded gradient bars.
+
+Builds the same score bars twice: with ``GradientBar`` (one PDF axial
+shading) and with the Rect-per-segment loops the report modules used
+before gradient_bars.py. Both PDFs are rasterised and compared pixel by
+pixel, then draw time and output size are reported for a report-sized
+document.
+
+    python bench_gradient_bars.py [--bars 200] [--dpi 144] [--tolerance 8]
+
+The old bars are rebuilt with the original per-segment colour code
+(copied here from the baseline modules), not with gradient_bars. Exits
+non-zero if any bar differs by more than ``--tolerance`` (0-255) on the
+mean of its worst pixel column, or has more than ``--max-changed`` pixels
+off by more than 8, i.e. if the new bars are not visually equivalent to
+the old ones.
+"""
+
+import argparse
+import io
+import sys
+import time
+
+from reportlab.graphics.shapes import Group, Rect
+from reportlab.lib import colors
+from reportlab.lib.colors import Color
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Spacer
+
+from gradient_bars import GradientBar
+from final_roadmap import GradientScoreBar, GradientScoreBarr
+
+
+def _interpolate_color(c1, c2, t):
+    return Color(c1.red + (c2.red - c1.red) * t, c1.green + (c2.green - c1.green) * t,
+                 c1.blue + (c2.blue - c1.blue) * t)
+
+
+def _heavy_metal_color(value):
+    """get_color from heavy_metal_test_report.generate_heavy_metal_chart."""
+    abs_val = abs(value)
+    if abs_val <= 33:
+        return _interpolate_color(colors.HexColor("#98CA3C"), colors.HexColor("#FCB318"), abs_val / 33.0)
+    return _interpolate_color(colors.HexColor("#FCB318"), colors.HexColor("#EF3B32"),
+                              (abs_val - 33.0) / (100.0 - 33.0))
+
+
+def _heavy_metal_bar():
+    """The gradient strip from heavy_metal_test_report.generate_heavy_metal_chart."""
+    from reportlab.graphics.shapes import Drawing
+
+    bar_width = 227
+    d = Drawing(bar_width + 10, 5)
+    gradient_stops = [(0.5 + pct / 200.0, _heavy_metal_color(pct)) for pct in (-100, -33, 0, 33, 100)]
+    d.add(GradientBar(0, 0, bar_width, 5, gradient_stops, extent=bar_width * 1.01))
+    return d
+
+
+# === Legacy rendering: the loops the modules drew before gradient_bars.py, copied from the baseline ===
+
+def _get_multicolor_gradient(t, gradient_colors):
+    for i in range(len(gradient_colors) - 1):
+        if gradient_colors[i][0] <= t <= gradient_colors[i + 1][0]:
+            t_local = (t - gradient_colors[i][0]) / (gradient_colors[i + 1][0] - gradient_colors[i][0])
+            return _interpolate_color(gradient_colors[i][1], gradient_colors[i + 1][1], t_local)
+    return gradient_colors[-1][1]
+
+
+def _hex_to_color(hex_code):
+    hex_code = hex_code.lstrip("#")
+    return Color(int(hex_code[0:2], 16) / 255.0, int(hex_code[2:4], 16) / 255.0, int(hex_code[4:6], 16) / 255.0)
+
+
+def _score_bar_rects(gradient_colors):
+    """GradientScoreBar / GradientScoreBarr / gradient_line: 600 overlapping segments."""
+    gradient_colors = [(pos, _hex_to_color(color)) for pos, color in gradient_colors]
+
+    def rects(bar):
+        segments = 600
+        result = []
+        for i in range(segments):
+            t = i / (segments - 1)
+            color = _get_multicolor_gradient(t, gradient_colors)
+            x = t * bar.width
+            seg_width = bar.width / segments
+            result.append(Rect(bar.x + x, bar.y, seg_width + 1, bar.height, fillColor=color, strokeColor=None))
+        return result
+
+    return rects
+
+
+def _heavy_metal_rects(bar):
+    """heavy_metal_test_report: 101 abutting segments coloured by get_color(pct)."""
+    bar_width = bar.width
+    x_center = bar.x + bar_width / 2
+    segments = 100
+    result = []
+    for i in range(segments + 1):
+        pct = -100 + (i / segments) * 200
+        col = _heavy_metal_color(pct)
+        seg_x = x_center + (pct / 200.0) * bar_width
+        seg_width = bar_width / segments
+        result.append(Rect(seg_x, bar.y, seg_width, bar.height, fillColor=col, strokeColor=None))
+    return result
+
+
+DEFAULT_STOPS = [(0.0, "#ED005F"), (0.351, "#F49E5C"), (0.7019, "#F4CE5C"), (1.0, "#488F31")]
+CUSTOM_STOPS = [(0.0, "#488F31"), (0.5, "#F4CE5C"), (1.0, "#ED005F")]
+
+# name -> (new drawing, the legacy Rects for its gradient bar, built from the original inputs)
+CASES = {
+    "GradientScoreBar": (lambda: GradientScoreBar(score=102, data_min=80, data_max=120).draw()[0],
+                         _score_bar_rects(DEFAULT_STOPS)),
+    "GradientScoreBar(custom stops)": (lambda: GradientScoreBar(
+        width=467, score=30, data_min=0, data_max=100, gradient_colors=CUSTOM_STOPS).draw()[0],
+        _score_bar_rects(CUSTOM_STOPS)),
+    "GradientScoreBarr": (lambda: GradientScoreBarr(width=467, pill_text="75").draw()[0],
+                          _score_bar_rects(DEFAULT_STOPS)),
+    "heavy metal strip": (_heavy_metal_bar, _heavy_metal_rects),
+}
+
+
+def legacy(node, legacy_rects):
+    """Replace (in place) every GradientBar in ``node`` with ``legacy_rects(bar)``."""
+    for i, child in enumerate(list(node.contents)):
+        if isinstance(child, GradientBar):
+            g = Group()
+            for rect in legacy_rects(child):
+                g.add(rect)
+            node.contents[i] = g
+        elif isinstance(child, Group):
+            legacy(child, legacy_rects)
+    return node
+
+
+def build(drawings):
+    buffer = io.BytesIO()
+    story = []
+    for d in drawings:
+        story += [d, Spacer(1, 6)]
+    started = time.perf_counter()
+    SimpleDocTemplate(buffer, pagesize=A4).build(story)
+    return buffer.getvalue(), time.perf_counter() - started
+
+
+def rasterise(pdf_bytes, dpi):
+    """First page of ``pdf_bytes`` as a PIL RGB image (PyMuPDF, else pypdfium2)."""
+    from PIL import Image
+
+    try:
+        import fitz
+        page = fitz.open(stream=pdf_bytes, filetype="pdf")[0]
+        pix = page.get_pixmap(dpi=dpi, alpha=False)
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    except ImportError:
+        import pypdfium2
+        return pypdfium2.PdfDocument(pdf_bytes)[0].render(scale=dpi / 72).to_pil().convert("RGB")
+
+
+def compare(name, make, legacy_rects, dpi):
+    from PIL import ImageChops
+
+    new_pdf, _ = build([make()])
+    old_pdf, _ = build([legacy(make(), legacy_rects)])
+    diff = ImageChops.difference(rasterise(new_pdf, dpi), rasterise(old_pdf, dpi)).convert("L")
+    width, height = diff.size
+    pixels = diff.load()
+    # Column means: a step-vs-smooth edge is one bright pixel, a wrong colour is a whole column
+    worst_column = max(sum(pixels[x, y] for y in range(height)) / height for x in range(width))
+    return {
+        "name": name,
+        "max_pixel": diff.getextrema()[1],
+        "worst_column": worst_column,
+        "changed_pixels": sum(diff.histogram()[9:]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=200, help="bars in the benchmark document")
+    parser.add_argument("--dpi", type=int, default=144)
+    parser.add_argument("--tolerance", type=float, default=8)
+    parser.add_argument("--max-changed", type=int, default=50, help="pixels allowed to differ by more than 8")
+    args = parser.parse_args(argv)
+
+    print("Raster regression (new vs old, grey-level difference 0-255)")
+    print(f"{'bar':32s} {'max px':>7s} {'worst col':>10s} {'px > 8':>8s}")
+    failed = False
+    for name, (make, legacy_rects) in CASES.items():
+        r = compare(name, make, legacy_rects, args.dpi)
+        failed |= r["worst_column"] > args.tolerance or r["changed_pixels"] > args.max_changed
+        print(f"{r['name']:32s} {r['max_pixel']:7d} {r['worst_column']:10.2f} {r['changed_pixels']:8d}")
+
+    print()
+    print(f"Benchmark: {args.bars} bars")
+    print(f"{'bars':10s} {'build s':>8s} {'bytes':>10s}")
+    cases = list(CASES.values())
+    for kind in ("segments", "shading"):
+        drawings = []
+        for i in range(args.bars):
+            make, legacy_rects = cases[i % len(cases)]
+            drawings.append(legacy(make(), legacy_rects) if kind == "segments" else make())
+        pdf_bytes, seconds = build(drawings)
+        print(f"{kind:10s} {seconds:8.3f} {len(pdf_bytes):10d}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+# === bench_header_match.py ===
+"""
+Benchmark of table-header location: the SequenceMatcher scan extract_table_header
+did before, against the OcrIndex lines and fuzzy_match bounds it uses now.
+
+Input is ocr_info payloads: JSON files holding the ``ocr_data`` column (a list
+of pages, each a list of word dicts with word/top/bottom/left/right/pg_no),
+or the whole row as a dict with an ``ocr_data`` key. Without inputs the PDFs
+in this directory are turned into the same shape with pdfplumber (at 300 dpi
+pixel coordinates, like the OCR).
+
+The trained headers are lines taken from each document, with OCR-like
+character noise, plus lines of the other documents (which should not match).
+Every header is located both ways, in the normal and the letters-only
+("foot") mode; the matched lines and ratios must be identical, and so must
+the table window (the words within 100 px of the matched lines on their
+page), scanned word by word before and selected with OcrIndex's
+PageLines.words_in now.
+
+    python bench_header_match.py                              # the PDFs in this directory
+    python bench_header_match.py ocr_info_1234.json --headers 40 --repeat 3
+"""
+
+import argparse
+import glob
+import json
+import random
+import re
+import sys
+import time
+from difflib import SequenceMatcher
+
+from fuzzy_match import FuzzyText
+from ocr_index import OcrIndex, group_lines
+
+THRESHOLD = 0.65
+PDF_TO_OCR = 300 / 72
+
+
+def load_payload(path):
+    """Pages of OCR words from an ocr_info JSON file, or from a PDF's words via pdfplumber."""
+    if path.lower().endswith(".pdf"):
+        import pdfplumber
+
+        pages = []
+        with pdfplumber.open(path) as pdf:
+            for pg_no, page in enumerate(pdf.pages, start=1):
+                pages.append([{"word": w["text"], "pg_no": pg_no,
+                               "top": round(float(w["top"]) * PDF_TO_OCR), "bottom": round(float(w["bottom"]) * PDF_TO_OCR),
+                               "left": round(float(w["x0"]) * PDF_TO_OCR), "right": round(float(w["x1"]) * PDF_TO_OCR)}
+                              for w in page.extract_words()])
+        return pages
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    if isinstance(payload, dict):
+        payload = payload["ocr_data"]
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return payload
+
+
+def noisy(text, rng, rate=0.08):
+    """``text`` with some characters dropped, doubled or replaced, as OCR gets headers wrong."""
+    out = []
+    for char in text:
+        roll = rng.random()
+        if roll < rate / 3:
+            continue
+        if roll < 2 * rate / 3:
+            out.append(char + char)
+        elif roll < rate:
+            out.append(rng.choice("Il1|0O.,"))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def trained_headers(documents, per_document, rng):
+    """``{path: [header line text]}``: noisy lines of the document and clean lines of the others."""
+    lines = {path: [" ".join(w["word"] for w in line) for page in pages for line in group_lines(page)]
+             for path, pages in documents.items()}
+    headers = {}
+    for path, own in lines.items():
+        others = [text for other, texts in lines.items() if other != path for text in texts]
+        picked = rng.sample(own, min(len(own), per_document // 2))
+        picked = [noisy(text, rng) for text in picked]
+        picked += rng.sample(others, min(len(others), per_document - len(picked)))
+        headers[path] = picked
+    return headers
+
+
+# === Header location before and after (the matching loop of extract_table_header) ===
+
+def legacy_locate(ocr_data, top, table_line_words, foot):
+    table_lines, found, ratios = [], [], []
+    for table_line_word in table_line_words:
+        temp_line = []
+        max_match = 0
+        for ocr in ocr_data:
+            sorted_words = sorted(ocr, key=lambda x: x["top"])
+            for line in [list(line) for line in group_lines(sorted_words)]:
+                if line[0]["top"] < top:
+                    continue
+                line_words = " ".join(word["word"] for word in line)
+                if foot:
+                    similarity = SequenceMatcher(None, re.sub(r"[^a-zA-Z]", "", line_words),
+                                                 re.sub(r"[^a-zA-Z]", "", table_line_word)).ratio()
+                else:
+                    similarity = SequenceMatcher(None, line_words, table_line_word).ratio()
+                if similarity > max_match and similarity > THRESHOLD:
+                    max_match = similarity
+                    temp_line = line
+                    ratios.append(similarity)
+            if temp_line:
+                table_lines.extend(temp_line)
+        if temp_line:
+            found.append(table_line_word)
+    return [id(word) for word in table_lines], found, ratios, legacy_window(ocr_data, table_lines)
+
+
+def window_box(table_lines):
+    """Page, top and bottom of the window around the matched lines (extract_table_header's +-100 px)."""
+    return (table_lines[0]["pg_no"], min(word["top"] for word in table_lines) - 100,
+            max(word["bottom"] for word in table_lines) + 100)
+
+
+def legacy_window(ocr_data, table_lines):
+    if not table_lines:
+        return []
+    pg_no, top, bottom = window_box(table_lines)
+    window = []
+    for page in ocr_data:
+        if page and page[0]["pg_no"] == pg_no:
+            for word in page:
+                if top <= word["top"] and bottom >= word["bottom"]:
+                    window.append(word)
+    return [id(word) for word in window]
+
+
+def indexed_window(ocr_data, table_lines, ocr_index):
+    if not table_lines:
+        return []
+    pg_no, top, bottom = window_box(table_lines)
+    window = []
+    for page in ocr_data:
+        if page and page[0]["pg_no"] == pg_no:
+            window.extend(ocr_index.page(page).words_in(top, bottom))
+    return [id(word) for word in window]
+
+
+def locate(ocr_data, top, table_line_words, foot, ocr_index):
+    table_lines, found, ratios = [], [], []
+    page_lines = [ocr_index.page(ocr) for ocr in ocr_data]
+    for table_line_word in table_line_words:
+        temp_line = []
+        max_match = 0
+        table_line_profile = FuzzyText(re.sub(r"[^a-zA-Z]", "", table_line_word) if foot else table_line_word)
+        for page in page_lines:
+            line_profiles = page.letter_profiles if foot else page.text_profiles
+            for line_no, line in enumerate(page.lines):
+                if line[0]["top"] < top:
+                    continue
+                similarity = line_profiles[line_no].ratio(table_line_profile, minimum=max(max_match, THRESHOLD))
+                if similarity > max_match and similarity > THRESHOLD:
+                    max_match = similarity
+                    temp_line = list(line)
+                    ratios.append(similarity)
+            if temp_line:
+                table_lines.extend(temp_line)
+        if temp_line:
+            found.append(table_line_word)
+    return [id(word) for word in table_lines], found, ratios, indexed_window(ocr_data, table_lines, ocr_index)
+
+
+def run_legacy(pages, headers):
+    # One trained table (one header line) at a time, as ionic_extraction calls it
+    return [legacy_locate(pages, 0, [header], foot) for foot in (False, True) for header in headers]
+
+
+def run_current(pages, headers):
+    ocr_index = OcrIndex(pages)
+    return [locate(pages, 0, [header], foot, ocr_index) for foot in (False, True) for header in headers]
+
+
+def best_time(func, repeat, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="*", help="ocr_info JSON payloads or PDFs (default: *.pdf here)")
+    parser.add_argument("--headers", type=int, default=20, help="Trained header lines per document")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per timing (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    documents = {}
+    for path in args.inputs or sorted(glob.glob("*.pdf")):
+        try:
+            pages = load_payload(path)
+        except Exception as e:
+            print(f"skipping {path}: {e}")
+            continue
+        if any(pages):
+            documents[path] = pages
+    headers = trained_headers(documents, args.headers, random.Random(args.seed))
+
+    mismatches = 0
+    total_old = total_new = 0.0
+    print(f"{'document':42s} {'words':>6s} {'lines':>6s} {'matched':>8s} {'legacy ms':>10s} {'indexed ms':>11s} "
+          f"{'speedup':>8s}")
+    for path, pages in documents.items():
+        old_result = run_legacy(pages, headers[path])
+        new_result = run_current(pages, headers[path])
+        if old_result != new_result:
+            mismatches += 1
+            print(f"MISMATCH on {path}")
+        old = best_time(run_legacy, args.repeat, pages, headers[path])
+        new = best_time(run_current, args.repeat, pages, headers[path])
+        total_old += old
+        total_new += new
+        words = sum(len(page) for page in pages)
+        lines = sum(len(group_lines(page)) for page in pages)
+        matched = sum(1 for _, found, _, _ in new_result if found)
+        print(f"{path[-42:]:42s} {words:6d} {lines:6d} {matched:4d}/{len(new_result):<3d} {old:10.1f} {new:11.1f} "
+              f"{old / new:7.2f}x")
+
+    if total_new:
+        print(f"\n{'total over ' + str(len(documents)) + ' documents':67s} {total_old:10.1f} {total_new:11.1f} "
+              f"{total_old / total_new:7.2f}x")
+    if mismatches:
+        print(f"\n{mismatches} documents differ")
+        return 1
+    print("\nall header matches and table windows identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
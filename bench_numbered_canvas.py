@@ -0,0 +1,129 @@
+# === bench_numbered_canvas.py ===
+"""
+Peak RSS / time benchmark for the "Page X - Y" canvases.
+
+Compares the old snapshot-every-page NumberedCanvas with the
+DeferredPageCountCanvas from page_numbering.py on 10, 50 and 200-page
+documents. Each measurement runs in a fresh subprocess so ru_maxrss is the
+peak for that build alone.
+
+    python bench_numbered_canvas.py [--pages 10 50 200] > bench_output.txt
+"""
+
+import argparse
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, PageBreak, Paragraph, SimpleDocTemplate
+
+from page_numbering import DeferredPageCountCanvas
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+PARAGRAPHS_PER_PAGE = 12
+SEGMENTS_PER_BAR = 600  # same as GradientScoreBar
+BARS_PER_PAGE = 4
+TEXT = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. " * 6
+
+
+def _draw_page_number(canvas, total_pages):
+    page_number = canvas.getPageNumber()
+    text = f"Page {page_number:02d} - {total_pages:02d}"
+    text_width = stringWidth(text, "Helvetica", 12)
+    canvas.setFont("Helvetica", 12)
+    canvas.drawString(PAGE_WIDTH - 32 - text_width, 31, text)
+
+
+class SegmentedBar(Flowable):
+    """Stand-in for the roadmap score bars: one filled rect per gradient segment."""
+
+    def wrap(self, availWidth, availHeight):
+        self.width = availWidth
+        return availWidth, 20
+
+    def draw(self):
+        step = self.width / SEGMENTS_PER_BAR
+        for i in range(SEGMENTS_PER_BAR):
+            t = i / SEGMENTS_PER_BAR
+            self.canv.setFillColorRGB(t, 0.4, 1 - t)
+            self.canv.rect(i * step, 0, step + 0.5, 12, fill=1, stroke=0)
+
+
+class LegacyNumberedCanvas(Canvas):
+    """The implementation the report modules used before page_numbering.py."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._saved_page_states = []
+
+    def showPage(self):
+        self._saved_page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        total_pages = len(self._saved_page_states)
+        for state in self._saved_page_states:
+            self.__dict__.update(state)
+            _draw_page_number(self, total_pages)
+            super().showPage()
+        super().save()
+
+
+class DeferredNumberedCanvas(DeferredPageCountCanvas):
+    def draw_page_number(self, total_pages):
+        _draw_page_number(self, total_pages)
+
+
+CANVASES = {"legacy": LegacyNumberedCanvas, "deferred": DeferredNumberedCanvas}
+
+
+def build(kind, pages):
+    styles = getSampleStyleSheet()
+    story = []
+    for page in range(pages):
+        story.extend(Paragraph(f"{page}.{i} {TEXT}", styles["BodyText"]) for i in range(PARAGRAPHS_PER_PAGE))
+        story.extend(SegmentedBar() for _ in range(BARS_PER_PAGE))
+        if page < pages - 1:
+            story.append(PageBreak())
+    buffer = io.BytesIO()
+    started = time.perf_counter()
+    SimpleDocTemplate(buffer, pagesize=A4).build(story, canvasmaker=CANVASES[kind])
+    return {
+        "kind": kind,
+        "pages": pages,
+        "seconds": round(time.perf_counter() - started, 3),
+        "bytes": len(buffer.getvalue()),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--child", nargs=2, metavar=("KIND", "PAGES"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(build(args.child[0], int(args.child[1]))))
+        return
+
+    print(f"{'canvas':10s} {'pages':>6s} {'seconds':>8s} {'bytes':>10s} {'peak RSS MB':>12s}")
+    for pages in args.pages:
+        for kind in CANVASES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", kind, str(pages)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print(f"{r['kind']:10s} {r['pages']:6d} {r['seconds']:8.3f} {r['bytes']:10d} {r['peak_rss_mb']:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
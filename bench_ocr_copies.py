@@ -0,0 +1,118 @@
+# === bench_ocr_copies.py ===
+"""
+Time and memory of the per-field OCR copies in get_template_extraction_values,
+before (three deepcopies of the pages per field) and after (one freeze_ocr per
+call, the read-only words shared by every field).
+
+The case is built from an ocr_info payload (JSON ``ocr_data``, or the row
+with an ``ocr_data`` key) or, by default, from the words of the PDFs here
+(pdfplumber), repeated up to ``--pages`` pages. Each field runs the same
+read-only stand-in for finalise_headers (a scan for the field's header
+words); both variants must find the same words.
+
+    python bench_ocr_copies.py                                  # 40-page case from the PDFs here
+    python bench_ocr_copies.py ocr_info_1234.json --fields 30
+"""
+
+import argparse
+import copy
+import glob
+import sys
+import time
+import tracemalloc
+
+from bench_header_match import load_payload
+from ocr_words import field_ocr, freeze_ocr
+
+
+def build_case(inputs, pages):
+    source = []
+    for path in inputs:
+        try:
+            source.extend(page for page in load_payload(path) if page)
+        except Exception as e:
+            print(f"skipping {path}: {e}")
+    case = []
+    while source and len(case) < pages:
+        page = source[len(case) % len(source)]
+        pg_no = len(case) + 1
+        case.append([dict(word, pg_no=pg_no) for word in page])
+    return case
+
+
+def find_header(pages, header):
+    """Stand-in for finalise_headers: the words of ``header`` on the pages, by position."""
+    wanted = set(header.lower().split())
+    return [(word["pg_no"], word["top"], word["left"]) for page in pages for word in page
+            if word["word"].lower() in wanted]
+
+
+def headers_for(case, fields):
+    words = [word["word"] for page in case for word in page if word["word"].isalpha()]
+    step = max(1, len(words) // (fields + 1))
+    return [" ".join(words[i:i + 2]) for i in range(0, step * fields, step)][:fields]
+
+
+def legacy_fields(ocr_data_all_got, ocr_raw_pages, headers):
+    results = []
+    for header in headers:
+        ocr_data_all = copy.deepcopy(ocr_data_all_got)
+        results.append(find_header(copy.deepcopy(ocr_data_all_got), header))
+        copy.deepcopy(ocr_raw_pages)
+        del ocr_data_all
+    return results
+
+
+def shared_fields(ocr_data_all_got, ocr_raw_pages, headers):
+    shared_ocr_data = freeze_ocr(ocr_data_all_got)
+    shared_raw_pages = freeze_ocr(ocr_raw_pages)
+    results = []
+    for header in headers:
+        results.append(find_header(field_ocr(shared_ocr_data), header))
+        field_ocr(shared_raw_pages)
+    return results
+
+
+def measure(func, *args):
+    """``(result, seconds, peak MB)`` of one call; the peak is measured in a second, traced run."""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 2 ** 20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="*", help="ocr_info JSON payloads or PDFs (default: *.pdf here)")
+    parser.add_argument("--pages", type=int, default=40, help="Pages in the case")
+    parser.add_argument("--fields", type=int, default=20, help="Trained fields extracted")
+    args = parser.parse_args(argv)
+
+    case = build_case(args.inputs or sorted(glob.glob("*.pdf")), args.pages)
+    if not case:
+        print("no OCR words to build a case from")
+        return 1
+    raw_pages = copy.deepcopy(case)
+    headers = headers_for(case, args.fields)
+    words = sum(len(page) for page in case)
+    print(f"case: {len(case)} pages, {words} words, {len(headers)} fields")
+
+    old, old_s, old_mb = measure(legacy_fields, case, raw_pages, headers)
+    new, new_s, new_mb = measure(shared_fields, case, raw_pages, headers)
+    print(f"{'':22s} {'seconds':>9s} {'peak MB':>9s}")
+    print(f"{'deepcopy per field':22s} {old_s:9.3f} {old_mb:9.1f}")
+    print(f"{'shared read-only':22s} {new_s:9.3f} {new_mb:9.1f}")
+    print(f"{'ratio':22s} {old_s / new_s:8.1f}x {old_mb / new_mb:8.1f}x")
+    if old != new:
+        print("\nresults differ")
+        return 1
+    print("\nresults identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
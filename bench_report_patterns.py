@@ -0,0 +1,325 @@
+# === bench_report_patterns.py ===
+"""
+Micro-benchmark of the report_patterns registry against the per-field regex
+scanning the PDF extractors did before.
+
+For every sample report the old inline implementations (copied below) and
+the current extractor functions run on the same text; their outputs must be
+identical, and the time per call of each is printed.
+
+    python bench_report_patterns.py                       # the PDFs in this directory
+    python bench_report_patterns.py report.pdf notes.txt --repeat 500
+"""
+
+import argparse
+import glob
+import re
+import sys
+import timeit
+
+import pdf_text
+from dynamic_pdf_extractor import (extract_medications_dynamic, extract_patient_info_dynamic,
+                                   extract_vital_parameters_dynamic)
+from final_pdf_extractor import parse_extracted_text
+from improved_pdf_extractor import (clean_and_parse_text, extract_biomarkers_from_lines,
+                                    extract_patient_info_from_lines, extract_vital_parameters_from_lines)
+
+
+# === The implementations before report_patterns ===
+
+def legacy_patient_info_dynamic(text):
+    patient_info = {}
+    name_patterns = [
+        r'([A-Za-z\s]+)\s*\((\d+)\s*years?,\s*(Male|Female)\)',
+        r'Patient[:\s]+([A-Za-z\s]+)',
+        r'Name[:\s]+([A-Za-z\s]+)'
+    ]
+    for pattern in name_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            if len(match.groups()) == 3:
+                patient_info["name"] = match.group(1).strip()
+                patient_info["age"] = match.group(2)
+                patient_info["gender"] = match.group(3)
+            else:
+                patient_info["name"] = match.group(1).strip()
+            break
+    date_patterns = [
+        r'Date[:\s]+(\d{2}-\d{2}-\d{4})',
+        r'Assessment Date[:\s]+(\d{2}-\d{2}-\d{4})',
+        r'(\d{2}-\d{2}-\d{4})'
+    ]
+    for pattern in date_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            patient_info["assessment_date"] = match.group(1)
+            break
+    for key in ("name", "age", "gender", "assessment_date", "location", "occupation", "dob", "zip_code", "diet"):
+        patient_info.setdefault(key, "")
+    return patient_info
+
+
+def legacy_medications_dynamic(text):
+    medications = []
+    if "Prescription" in text or "Medications" in text:
+        if "Prescription" in text:
+            prescription_section = text.split("Prescription")[1]
+        else:
+            prescription_section = text.split("Medications")[1]
+        current_med = {}
+        med_number = 0
+        for line in prescription_section.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            if re.match(r'^\d+\s+[A-Za-z]', line):
+                if current_med and current_med.get("name"):
+                    medications.append(current_med)
+                med_number += 1
+                current_med = {"med_number": med_number}
+                name_match = re.search(r'^\d+\s+([A-Za-z\s]+?)(?:\s+\d|$)', line)
+                if name_match:
+                    current_med["name"] = name_match.group(1).strip()
+            elif current_med and any(keyword in line.lower() for keyword in ['tablet', 'capsule', 'mg', 'mcg', 'cream', 'ml']):
+                dosage_match = re.search(r'(\d+)\s*(tablet|capsule|mg|mcg|cream|ml)', line, re.IGNORECASE)
+                if dosage_match:
+                    current_med["dosage"] = f"{dosage_match.group(1)} {dosage_match.group(2)}"
+                strength_match = re.search(r'(\d+[mgmcg]*)', line, re.IGNORECASE)
+                if strength_match and 'mg' in line.lower() or 'mcg' in line.lower():
+                    current_med["strength"] = strength_match.group(1)
+            elif current_med and re.match(r'[0-9-]+', line) and len(line) <= 10:
+                current_med["frequency"] = line
+            elif current_med and any(keyword in line.lower() for keyword in ['after', 'before', 'morning', 'evening', 'lunch', 'dinner', 'breakfast']):
+                current_med["timing"] = line
+                current_med["instructions"] = line
+            elif current_med and 'month' in line.lower():
+                duration_match = re.search(r'(\d+\s*months?)', line, re.IGNORECASE)
+                if duration_match:
+                    current_med["duration"] = duration_match.group(1)
+            elif current_med and 'day' in line.lower():
+                day_match = re.search(r'(Day\s*\d+)', line, re.IGNORECASE)
+                if day_match:
+                    current_med["start_from"] = day_match.group(1)
+            elif current_med and any(keyword in line.lower() for keyword in ['available', 'pmx', 'link', 'buy']):
+                current_med["availability"] = line
+                current_med["available_in_clinic"] = "pmx" in line.lower() or "available" in line.lower()
+        if current_med and current_med.get("name"):
+            medications.append(current_med)
+    return [{
+        "name": med.get("name", ""),
+        "strength": med.get("strength", ""),
+        "dosage": med.get("dosage", "1 tablet"),
+        "frequency": med.get("frequency", "1-0-0"),
+        "duration": med.get("duration", "2 months"),
+        "instructions": med.get("instructions", "After meal"),
+        "active_ingredients": "",
+        "start_from": med.get("start_from", "Day 1"),
+        "timing": med.get("timing", "After meal"),
+        "available_in_clinic": med.get("available_in_clinic", False),
+        "external_url": ""
+    } for med in medications]
+
+
+def legacy_vitals_dynamic(text):
+    vitals = {}
+    patterns = {
+        "body_temperature": r'temperature[:\s]+(\d+\.?\d*)\s*°?f',
+        "heart_rate": r'heart rate[:\s]+(\d+\.?\d*)\s*bpm',
+        "blood_pressure": r'blood pressure[:\s]+(\d+/\d+)',
+        "height": r'height[:\s]+(\d+\.?\d*)\s*cms?',
+        "weight": r'weight[:\s]+(\d+\.?\d*)\s*kg',
+        "bmi": r'bmi[:\s]+(\d+\.?\d*)',
+        "blood_oxygen": r'oxygen[:\s]+(\d+\.?\d*)\s*%',
+        "respiratory_rate": r'respiratory[:\s]+(\d+\.?\d*)\s*breaths?/min'
+    }
+    for key, pattern in patterns.items():
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            vitals[key] = match.group(1)
+    return vitals
+
+
+def legacy_parse_final(text):
+    # Hard-coded patient defaults and fallback medication list, as parse_extracted_text has them
+    default_info, _, fallback_medications = parse_extracted_text("")
+    patient_info = dict(default_info)
+    age_gender_match = re.search(r'(\d+)\s*years?,\s*(Male|Female)', text, re.IGNORECASE)
+    if age_gender_match:
+        patient_info["age"] = age_gender_match.group(1)
+        patient_info["gender"] = age_gender_match.group(2)
+    date_match = re.search(r'Date:\s*(\d{2}-\d{2}-\d{4})', text, re.IGNORECASE)
+    if date_match:
+        patient_info["assessment_date"] = date_match.group(1)
+    diagnoses = []
+    if "Diagnoses:" in text:
+        for line in text.split("Diagnoses:")[1].split("Prescription")[0].split('\n'):
+            line = line.strip()
+            if line.startswith('•'):
+                diagnosis = line.replace('•', '').strip()
+                if diagnosis:
+                    diagnoses.append(diagnosis)
+    medications = []
+    if "Prescription" in text:
+        prescription_section = text.split("Prescription")[1]
+        med_pattern = r'(\d+)\s*([A-Za-z\s]+?)\s*(\d+\s*(?:tablet|capsule|mg|mcg|cream))?\s*(\d+[mgmcg]*)?\s*([0-9-]+)\s*([A-Za-z\s]+?)\s*(\d+\s*months?)\s*(Day\s*\d+)\s*([A-Za-z\s@]+)'
+        for match in re.finditer(med_pattern, prescription_section, re.IGNORECASE | re.MULTILINE):
+            timing = match.group(6).strip() if match.group(6) else "After meal"
+            medications.append({
+                "name": match.group(2).strip(),
+                "strength": match.group(4) if match.group(4) else "",
+                "dosage": match.group(3) if match.group(3) else "1 tablet",
+                "frequency": match.group(5) if match.group(5) else "1-0-0",
+                "duration": match.group(7) if match.group(7) else "2 months",
+                "instructions": timing,
+                "active_ingredients": "",
+                "start_from": match.group(8) if match.group(8) else "Day 1",
+                "timing": timing,
+                "available_in_clinic": "PMX" in (match.group(9).strip() if match.group(9) else "Available @ PMX"),
+                "external_url": ""
+            })
+    return patient_info, diagnoses, medications or fallback_medications
+
+
+def legacy_patient_info_lines(lines):
+    patient_info = {"name": "", "age": "", "gender": "", "dob": "", "location": "", "occupation": "",
+                    "assessment_date": "", "zip_code": "", "diet": ""}
+    for line in lines:
+        if any(keyword in line.lower() for keyword in ['patient', 'name', 'client']):
+            name_match = re.search(r'(?:patient|name|client)[:\s]+([A-Za-z\s]+)', line, re.IGNORECASE)
+            if name_match:
+                patient_info["name"] = name_match.group(1).strip()
+                break
+    for line in lines:
+        age_match = re.search(r'age[:\s]+(\d+)', line, re.IGNORECASE)
+        if age_match:
+            patient_info["age"] = age_match.group(1)
+            break
+    for line in lines:
+        if 'male' in line.lower() or 'female' in line.lower():
+            gender_match = re.search(r'(male|female)', line, re.IGNORECASE)
+            if gender_match:
+                patient_info["gender"] = gender_match.group(1).title()
+                break
+    for line in lines:
+        dob_match = re.search(r'(?:dob|date of birth)[:\s]+(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})', line, re.IGNORECASE)
+        if dob_match:
+            patient_info["dob"] = dob_match.group(1)
+            break
+    for line in lines:
+        if any(city in line.lower() for city in ['mumbai', 'delhi', 'hyderabad', 'bangalore', 'chennai', 'kolkata']):
+            patient_info["location"] = line.strip()
+            break
+    return patient_info
+
+
+def legacy_vitals_lines(lines):
+    vitals = {}
+    for line in lines:
+        temp_match = re.search(r'temperature[:\s]+(\d+\.?\d*)\s*°?f', line, re.IGNORECASE)
+        if temp_match:
+            vitals["body_temperature"] = temp_match.group(1)
+        hr_match = re.search(r'heart rate[:\s]+(\d+\.?\d*)\s*bpm', line, re.IGNORECASE)
+        if hr_match:
+            vitals["heart_rate"] = hr_match.group(1)
+        bp_match = re.search(r'blood pressure[:\s]+(\d+/\d+)', line, re.IGNORECASE)
+        if bp_match:
+            vitals["blood_pressure"] = bp_match.group(1)
+        height_match = re.search(r'height[:\s]+(\d+\.?\d*)\s*cms?', line, re.IGNORECASE)
+        if height_match:
+            vitals["height"] = height_match.group(1) + " cms"
+        weight_match = re.search(r'weight[:\s]+(\d+\.?\d*)\s*kg', line, re.IGNORECASE)
+        if weight_match:
+            vitals["weight"] = weight_match.group(1) + " kg"
+        bmi_match = re.search(r'bmi[:\s]+(\d+\.?\d*)', line, re.IGNORECASE)
+        if bmi_match:
+            vitals["bmi"] = bmi_match.group(1)
+    return vitals
+
+
+def legacy_biomarkers_lines(lines):
+    biomarkers = []
+    for line in lines:
+        biomarker_match = re.search(r'([A-Za-z\s]+)[:\s]+(\d+\.?\d*)\s*([a-zA-Z/%]+)', line)
+        if biomarker_match:
+            name = biomarker_match.group(1).strip()
+            if (len(name) > 3 and
+                    not any(word in name.lower() for word in ['page', 'date', 'time', 'report', 'test', 'table', 'chart']) and
+                    not name.isdigit()):
+                biomarkers.append({"title": name, "value": biomarker_match.group(2), "suff": biomarker_match.group(3),
+                                   "pill": "", "pill_color": "", "footer": ""})
+    return biomarkers
+
+
+# name, legacy, current, input ("text" or the cleaned "lines" improved_pdf_extractor works on)
+CASES = [
+    ("dynamic patient", legacy_patient_info_dynamic, extract_patient_info_dynamic, "text"),
+    ("dynamic meds", legacy_medications_dynamic, extract_medications_dynamic, "text"),
+    ("dynamic vitals", legacy_vitals_dynamic, extract_vital_parameters_dynamic, "text"),
+    ("final parse", legacy_parse_final, parse_extracted_text, "text"),
+    ("improved patient", legacy_patient_info_lines, extract_patient_info_from_lines, "lines"),
+    ("improved vitals", legacy_vitals_lines, extract_vital_parameters_from_lines, "lines"),
+    ("improved biomarkers", legacy_biomarkers_lines, extract_biomarkers_from_lines, "lines"),
+]
+
+
+def load_text(path):
+    if path.lower().endswith(".pdf"):
+        return pdf_text.extract_text(path, backend="pypdf2", skip_empty=False)
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def time_call(func, arg, repeat):
+    """Best-of-5 time of one call, in microseconds."""
+    return min(timeit.repeat(lambda: func(arg), number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("inputs", nargs="*", help="PDFs or text files (default: *.pdf and raw_extracted_text.txt here)")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per timing")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat each text this many times (larger reports)")
+    args = parser.parse_args(argv)
+
+    inputs = args.inputs or sorted(glob.glob("*.pdf")) + ["raw_extracted_text.txt"]
+    texts = []
+    for path in inputs:
+        try:
+            text = load_text(path)
+        except Exception as e:
+            print(f"skipping {path}: {e}")
+            continue
+        if text.strip():
+            texts.append((path, "\n".join([text] * args.scale)))
+
+    totals = {name: [0.0, 0.0] for name, *_ in CASES}
+    mismatches = 0
+    print(f"{'report':42s} {'chars':>7s} {'extractor':20s} {'legacy us':>10s} {'registry us':>12s} {'speedup':>8s}")
+    for path, text in texts:
+        arguments = {"text": text, "lines": clean_and_parse_text(text)}
+        for name, legacy, current, kind in CASES:
+            arg = arguments[kind]
+            if legacy(arg) != current(arg):
+                mismatches += 1
+                print(f"MISMATCH {name} on {path}")
+            old = time_call(legacy, arg, args.repeat)
+            new = time_call(current, arg, args.repeat)
+            totals[name][0] += old
+            totals[name][1] += new
+            print(f"{path[-42:]:42s} {len(text):7d} {name:20s} {old:10.1f} {new:12.1f} {old / new:7.2f}x")
+
+    print()
+    print(f"{'total over ' + str(len(texts)) + ' reports':50s} {'extractor':20s} {'legacy us':>10s} {'registry us':>12s} "
+          f"{'speedup':>8s}")
+    for name, (old, new) in totals.items():
+        if new:
+            print(f"{'':50s} {name:20s} {old:10.1f} {new:12.1f} {old / new:7.2f}x")
+    if mismatches:
+        print(f"\n{mismatches} outputs differ")
+        return 1
+    print("\nall outputs identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# === claude_scheduler.py ===
+"""
+Request scheduler for concurrent Claude calls.
+
+The async chunk extractor used a fixed semaphore, slept ``(chunk_num - 1) * 2``
+seconds before each chunk, and on a 429 slept 30 s and dropped the chunk.
+ClaudeScheduler replaces that with three mechanisms:
+
+* token buckets for requests, input tokens and output tokens per minute,
+  sized to the account's API limits (CLAUDE_RPM / CLAUDE_ITPM / CLAUDE_OTPM),
+  so calls start as soon as the budget allows and no sooner;
+* AIMD concurrency: the number of requests in flight grows by about one per
+  round of successes and halves on a 429/529, between 1 and
+  CLAUDE_MAX_CONCURRENCY;
+* retries with full-jitter exponential backoff (or the server's
+  ``retry-after``) for rate limits, overload, 5xx and connection errors, so a
+  chunk is only given up after CLAUDE_MAX_RETRIES attempts, loudly.
+
+One AsyncAnthropic client (with the SDK's own retries off) is shared by all
+requests of a scheduler.
+
+    async with ClaudeScheduler(api_key) as scheduler:
+        message = await scheduler.create(model=..., max_tokens=4096, messages=[...])
+"""
+
+import asyncio
+import os
+import random
+import time
+
+import anthropic
+
+# === Limits (match the account's rate-limit tier) ===
+CLAUDE_RPM = float(os.environ.get("CLAUDE_RPM", 50))
+CLAUDE_ITPM = float(os.environ.get("CLAUDE_ITPM", 50000))
+CLAUDE_OTPM = float(os.environ.get("CLAUDE_OTPM", 10000))
+CLAUDE_INITIAL_CONCURRENCY = int(os.environ.get("CLAUDE_INITIAL_CONCURRENCY", 2))
+CLAUDE_MAX_CONCURRENCY = int(os.environ.get("CLAUDE_MAX_CONCURRENCY", 8))
+CLAUDE_MAX_RETRIES = int(os.environ.get("CLAUDE_MAX_RETRIES", 8))
+CLAUDE_BACKOFF_BASE = float(os.environ.get("CLAUDE_BACKOFF_BASE", 1.0))
+CLAUDE_BACKOFF_CAP = float(os.environ.get("CLAUDE_BACKOFF_CAP", 60.0))
+# Rough characters per token, for budgeting input tokens before the call
+CHARS_PER_TOKEN = 4
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class TokenBucket:
+    """Continuously refilled budget of ``rate_per_minute`` units, holding at most one minute's worth."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount):
+        """Wait until ``amount`` units are available and take them (FIFO between waiters)."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= amount:
+                        self.tokens -= amount
+                        return
+                    wait = (amount - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def refund(self, amount):
+        """Give back (or, if negative, additionally charge) units after the real cost is known."""
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds):
+        """Hand out nothing for ``seconds`` (the server said retry-after)."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on requests in flight: +1/limit per success, halved on overload (once per window).
+
+    Other failures and cancelled requests only free their slot.
+    """
+
+    def __init__(self, initial=CLAUDE_INITIAL_CONCURRENCY, maximum=CLAUDE_MAX_CONCURRENCY, minimum=1):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, overloaded=False, succeeded=True):
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                # Requests already in flight when the limit was hit fail together; count them once
+                now = time.monotonic()
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._last_decrease = now
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error):
+    if isinstance(error, (anthropic.APIConnectionError, anthropic.APITimeoutError)):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def estimate_input_tokens(kwargs):
+    """Input token estimate for a messages.create call (corrected from ``usage`` afterwards)."""
+    chars = len(str(kwargs.get("system", "")))
+    for message in kwargs.get("messages", ()):
+        content = message.get("content", "")
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+class ClaudeScheduler:
+    """Rate-limited, adaptively concurrent, retrying ``messages.create`` over one shared client."""
+
+    def __init__(self, api_key=None, client=None, rpm=CLAUDE_RPM, itpm=CLAUDE_ITPM, otpm=CLAUDE_OTPM,
+                 initial_concurrency=CLAUDE_INITIAL_CONCURRENCY, max_concurrency=CLAUDE_MAX_CONCURRENCY,
+                 max_retries=CLAUDE_MAX_RETRIES):
+        # The scheduler does the retrying, so the SDK's own retries are off
+        self.client = client or anthropic.AsyncAnthropic(api_key=api_key, max_retries=0)
+        self._owns_client = client is None
+        self.requests = TokenBucket(rpm)
+        self.input_tokens = TokenBucket(itpm)
+        self.output_tokens = TokenBucket(otpm)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.retries = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.close()
+
+    def _backoff(self, attempt, error):
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, CLAUDE_BACKOFF_BASE)
+        return random.uniform(0, min(CLAUDE_BACKOFF_CAP, CLAUDE_BACKOFF_BASE * 2 ** attempt))
+
+    async def create(self, label="request", **kwargs):
+        """``client.messages.create(**kwargs)`` once the budgets allow, retried until it succeeds."""
+        input_estimate = estimate_input_tokens(kwargs)
+        output_budget = kwargs.get("max_tokens", 0)
+        for attempt in range(self.max_retries + 1):
+            await self.requests.acquire(1)
+            await self.input_tokens.acquire(input_estimate)
+            await self.output_tokens.acquire(output_budget)
+            await self.concurrency.acquire()
+            overloaded = succeeded = False
+            try:
+                message = await self.client.messages.create(**kwargs)
+                succeeded = True
+            except anthropic.APIError as e:
+                overloaded = getattr(e, "status_code", None) in (429, 529)
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                if overloaded:
+                    for bucket in (self.requests, self.input_tokens, self.output_tokens):
+                        bucket.pause(delay)
+                self.retries += 1
+                print(f"{label}: {type(e).__name__} (attempt {attempt + 1}/{self.max_retries + 1}), "
+                      f"retrying in {delay:.1f}s")
+            else:
+                usage = getattr(message, "usage", None)
+                if usage is not None:
+                    self.input_tokens.refund(input_estimate - usage.input_tokens)
+                    self.output_tokens.refund(output_budget - usage.output_tokens)
+                return message
+            finally:
+                if not succeeded:
+                    # A failed, retried or cancelled attempt gives its token reservation back
+                    self.input_tokens.refund(input_estimate)
+                    self.output_tokens.refund(output_budget)
+                await self.concurrency.release(overloaded, succeeded)
+            await asyncio.sleep(delay)
@@ -1,17 +1,24 @@
-import PyPDF2
 import json
 import re
 from datetime import datetime
 import os
 
+import pdf_text
+from report_patterns import PATIENT_PATTERNS, PATTERNS, VITAL_FIELDS, VITAL_PATTERNS
+
+MED_START = PATTERNS["med_start"].regex
+MED_NAME = PATTERNS["med_name"].regex
+MED_DOSAGE = PATTERNS["med_dosage"].regex
+MED_STRENGTH = PATTERNS["med_strength"].regex
+MED_FREQUENCY = PATTERNS["med_frequency"].regex
+MED_DURATION = PATTERNS["med_duration"].regex
+MED_START_DAY = PATTERNS["med_start_day"].regex
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF using PyPDF2"""
     text = ""
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        text = pdf_text.extract_text(pdf_path, backend="pypdf2", skip_empty=False)
     except Exception as e:
         print(f"Error with PyPDF2: {e}")
     return text
@@ -20,36 +27,20 @@ def extract_patient_info_dynamic(text):
     """Dynamically extract patient information from text"""
     patient_info = {}
     
-    # Extract name - look for patterns like "Name (age years, gender)"
-    name_patterns = [
-        r'([A-Za-z\s]+)\s*\((\d+)\s*years?,\s*(Male|Female)\)',
-        r'Patient[:\s]+([A-Za-z\s]+)',
-        r'Name[:\s]+([A-Za-z\s]+)'
-    ]
-    
-    for pattern in name_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            if len(match.groups()) == 3:  # Name, age, gender pattern
-                patient_info["name"] = match.group(1).strip()
-                patient_info["age"] = match.group(2)
-                patient_info["gender"] = match.group(3)
-            else:  # Just name pattern
-                patient_info["name"] = match.group(1).strip()
-            break
+    hits = PATIENT_PATTERNS.scan(text)
+
+    # Extract name - look for patterns like "Name (age years, gender)", then labelled names
+    field, match = hits.first("name_age_gender", "patient_name", "labelled_name")
+    if match:
+        patient_info["name"] = match.group("name").strip()
+        if field == "name_age_gender":
+            patient_info["age"] = match.group("age")
+            patient_info["gender"] = match.group("gender")
     
     # Extract date
-    date_patterns = [
-        r'Date[:\s]+(\d{2}-\d{2}-\d{4})',
-        r'Assessment Date[:\s]+(\d{2}-\d{2}-\d{4})',
-        r'(\d{2}-\d{2}-\d{4})'
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            patient_info["assessment_date"] = match.group(1)
-            break
+    field, match = hits.first("labelled_date", "assessment_date", "any_date")
+    if match:
+        patient_info["assessment_date"] = match.group("date")
     
     # Set defaults if not found
     patient_info.setdefault("name", "")
@@ -117,7 +108,7 @@ def extract_medications_dynamic(text):
                 continue
                 
             # Check if this line starts a new medication (starts with number)
-            if re.match(r'^\d+\s+[A-Za-z]', line):
+            if MED_START.match(line):
                 # Save previous medication if exists
                 if current_med and current_med.get("name"):
                     medications.append(current_med)
@@ -127,23 +118,23 @@ def extract_medications_dynamic(text):
                 current_med = {"med_number": med_number}
                 
                 # Extract medication name (after the number)
-                name_match = re.search(r'^\d+\s+([A-Za-z\s]+?)(?:\s+\d|$)', line)
+                name_match = MED_NAME.search(line)
                 if name_match:
-                    current_med["name"] = name_match.group(1).strip()
+                    current_med["name"] = name_match.group("name").strip()
             
             # Extract dosage information
             elif current_med and any(keyword in line.lower() for keyword in ['tablet', 'capsule', 'mg', 'mcg', 'cream', 'ml']):
-                dosage_match = re.search(r'(\d+)\s*(tablet|capsule|mg|mcg|cream|ml)', line, re.IGNORECASE)
+                dosage_match = MED_DOSAGE.search(line)
                 if dosage_match:
-                    current_med["dosage"] = f"{dosage_match.group(1)} {dosage_match.group(2)}"
+                    current_med["dosage"] = f"{dosage_match.group('amount')} {dosage_match.group('unit')}"
                 
                 # Extract strength
-                strength_match = re.search(r'(\d+[mgmcg]*)', line, re.IGNORECASE)
+                strength_match = MED_STRENGTH.search(line)
                 if strength_match and 'mg' in line.lower() or 'mcg' in line.lower():
-                    current_med["strength"] = strength_match.group(1)
+                    current_med["strength"] = strength_match.group("strength")
             
             # Extract frequency
-            elif current_med and re.match(r'[0-9-]+', line) and len(line) <= 10:
+            elif current_med and MED_FREQUENCY.match(line) and len(line) <= 10:
                 current_med["frequency"] = line
             
             # Extract timing
@@ -153,15 +144,15 @@ def extract_medications_dynamic(text):
             
             # Extract duration
             elif current_med and 'month' in line.lower():
-                duration_match = re.search(r'(\d+\s*months?)', line, re.IGNORECASE)
+                duration_match = MED_DURATION.search(line)
                 if duration_match:
-                    current_med["duration"] = duration_match.group(1)
+                    current_med["duration"] = duration_match.group("duration")
             
             # Extract start day
             elif current_med and 'day' in line.lower():
-                day_match = re.search(r'(Day\s*\d+)', line, re.IGNORECASE)
+                day_match = MED_START_DAY.search(line)
                 if day_match:
-                    current_med["start_from"] = day_match.group(1)
+                    current_med["start_from"] = day_match.group("day")
             
             # Extract availability
             elif current_med and any(keyword in line.lower() for keyword in ['available', 'pmx', 'link', 'buy']):
@@ -196,22 +187,11 @@ def extract_vital_parameters_dynamic(text):
     """Dynamically extract vital parameters from text"""
     vitals = {}
     
-    # Look for various vital parameter patterns
-    patterns = {
-        "body_temperature": r'temperature[:\s]+(\d+\.?\d*)\s*°?f',
-        "heart_rate": r'heart rate[:\s]+(\d+\.?\d*)\s*bpm',
-        "blood_pressure": r'blood pressure[:\s]+(\d+/\d+)',
-        "height": r'height[:\s]+(\d+\.?\d*)\s*cms?',
-        "weight": r'weight[:\s]+(\d+\.?\d*)\s*kg',
-        "bmi": r'bmi[:\s]+(\d+\.?\d*)',
-        "blood_oxygen": r'oxygen[:\s]+(\d+\.?\d*)\s*%',
-        "respiratory_rate": r'respiratory[:\s]+(\d+\.?\d*)\s*breaths?/min'
-    }
-    
-    for key, pattern in patterns.items():
-        match = re.search(pattern, text, re.IGNORECASE)
+    hits = VITAL_PATTERNS.scan(text)
+    for key in VITAL_FIELDS:
+        match = hits[key]
         if match:
-            vitals[key] = match.group(1)
+            vitals[key] = match.group("value")
     
     return vitals
 
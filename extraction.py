@@ -1,3 +1,8 @@
+from fuzzy_match import FuzzyText
+from ocr_index import OcrIndex, group_lines
+from ocr_words import field_ocr, freeze_ocr
+from template_cache import trained_templates
+
 def ionic_extraction():
 
     data = request.json
@@ -36,6 +41,8 @@ def ionic_extraction():
             ocr_data_all=json.loads(ocr_data_all)
             ocr_all = queue_db.execute_(query)['ocr_data'].to_list()[0]
             ocr_all=json.loads(ocr_all)
+            # Line groups of every page, built once and shared by all templates of this document
+            ocr_index=OcrIndex(ocr_all)
 
             format_types=ocr_data.to_dict(orient='records')
 
@@ -77,11 +84,10 @@ def ionic_extraction():
                     if start<=page_no<=end:
                         ocr_data_pages.append(pag)
 
-                query = f"SELECT * from  `trained_info` where format='{format}' and identifier='{identifier}'"
-                process_trained_fields = template_db.execute_(query).to_dict(orient='records')
+                # Parsed once per worker; only re-read when the trained_info row changes
+                process_trained_fields = trained_templates.get(template_db, format, identifier)
 
                 if process_trained_fields:
-                    process_trained_fields=process_trained_fields[0]
                     # print(f"ocr_pages sending are {ocr_pages}")
                     start_pages=predict_mutli_checks(ocr_pages,ocr_data_pages,process_trained_fields,end)
 
@@ -162,11 +168,10 @@ def ionic_extraction():
                 else:
                     master_process_trained_fields={}
                 
-                query = f"SELECT * from  `trained_info` where format='{format}' and identifier='{identifier}'"
-                process_trained_fields = template_db.execute_(query)
+                process_trained_fields = trained_templates.get(template_db, format, identifier)
                 
                 used_version=''
-                if process_trained_fields.empty:
+                if not process_trained_fields:
                     extarction_from={}
 
                     print(f'skkiping the eod {format_page}')
@@ -200,7 +205,6 @@ def ionic_extraction():
                                 extracted_fields[field]=''
                                 
                 else:
-                    process_trained_fields=process_trained_fields.to_dict(orient='records')
                     extracted_table={}
                     extracted_fields={}
                     extarction_from={}
@@ -208,18 +212,17 @@ def ionic_extraction():
                     remarks_high={}
 
                     if process_trained_fields:
-                        process_trained_fields= process_trained_fields[0]
                         #here we will extract any over all thing
                         fields_data = process_trained_fields['fields'] if process_trained_fields['fields'] else ''
                         if fields_data:
                             print(f'fields_data is {fields_data}')
-                            extracted_fields['main_fields'], fields_highlights['main_fields'] = get_template_extraction_values(ocr_pages, ocr_data_pages, process_trained_fields, json.loads(fields_data))
+                            extracted_fields['main_fields'], fields_highlights['main_fields'] = get_template_extraction_values(ocr_pages, ocr_data_pages, process_trained_fields, trained_templates.loads(fields_data))
                             # extracted_fields['main_fields'],fields_highlights['main_fields']=get_template_extraction_values(ocr_pages,ocr_data_pages,process_trained_fields,json.loads(process_trained_fields['fields']))
                             extarction_from['main_fields']=list(extracted_fields['main_fields'].keys())
                             print(F" #################### here table to extract is {fields_highlights['main_fields']}")
                         
                         if process_trained_fields['trained_table']:
-                            process_trained_fields['trained_table']=json.loads(process_trained_fields['trained_table'])
+                            process_trained_fields['trained_table']=trained_templates.loads(process_trained_fields['trained_table'])
                             for table_name,tables in process_trained_fields['trained_table'].items():
                                 if len(tables)>2:
                                     table_header=tables[0]
@@ -230,11 +233,11 @@ def ionic_extraction():
                                         table_header_text=tables[2]['headers']
 
                                     if table_header:
-                                        found_header,table_headers_line=extract_table_header(ocr_data_pages,0,table_header,table_header_text=table_header_text)
+                                        found_header,table_headers_line=extract_table_header(ocr_data_pages,0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
 
                                     table_footer=tables[1]
                                     if table_footer:
-                                        found_footer,table_foot_line=extract_table_header(ocr_data_pages,0,table_footer,True)
+                                        found_footer,table_foot_line=extract_table_header(ocr_data_pages,0,table_footer,True,ocr_index=ocr_index)
 
                                     if found_header:
                                         if found_footer:
@@ -252,20 +255,20 @@ def ionic_extraction():
                         print(f' remarks need to be extracted are {remarks}')
                         if remarks:
                             print(f'remarks here are {remarks}')
-                            remarks=json.loads(remarks)
+                            remarks=trained_templates.loads(remarks)
                             if remarks and remarks.get('type','None') == 'check level':
-                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),ocr_pages)
+                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),ocr_pages,ocr_index=ocr_index)
 
                         #here we will extract any sessions things
                         # print(F" here extract for section {process_trained_fields['sub_template_identifiers']}")
                         if process_trained_fields['sub_template_identifiers']:
 
-                            sub_template_identifiers=json.loads(process_trained_fields['sub_template_identifiers'])
-                            all_section_fields=json.loads(process_trained_fields['section_fields'])
-                            table=json.loads(process_trained_fields['section_table'])
+                            sub_template_identifiers=trained_templates.loads(process_trained_fields['sub_template_identifiers'])
+                            all_section_fields=trained_templates.loads(process_trained_fields['section_fields'])
+                            table=trained_templates.loads(process_trained_fields['section_table'])
 
                             try:
-                                table_t2=json.loads(process_trained_fields['section_table_t2'])
+                                table_t2=trained_templates.loads(process_trained_fields['section_table_t2'])
                             except:
                                 table_t2={}
 
@@ -300,7 +303,7 @@ def ionic_extraction():
                                     paraFieldsTraining=identifiers['paraFieldsTraining']
 
                                 # print(F"################N section_header is {section_header}")
-                                sub_templates,cordinates,all_ocr_sections,remarks_section_ocr=predict_sub_templates(identifiers['section_identifiers'],ocr_pages,ocr_data_pages,section_header,process_trained_fields)
+                                sub_templates,cordinates,all_ocr_sections,remarks_section_ocr=predict_sub_templates(identifiers['section_identifiers'],ocr_pages,ocr_data_pages,section_header,process_trained_fields,ocr_index=ocr_index)
                                 print(F" main section cordinates {cordinates}")
                                 if not sub_templates:
                                     continue
@@ -324,7 +327,7 @@ def ionic_extraction():
                                             common_template_fields['fields'],common_template_highlights['fields']=get_template_extraction_values(list(template_ocr.values()),list(all_ocr_sections[section_no].values()),process_trained_fields,section_fields,common_section=True,common_section_fields=common_section_fields)
                                         print(f'common_fields is {common_template_fields}')
 
-                                        sub_sub_templates,sub_cordinates,sub_all_ocr_sections,sub_remarks_section_ocr=predict_sub_sub_templates(sub_section_identifiers,list(template_ocr.values()),list(all_ocr_sections[section_no].values()))
+                                        sub_sub_templates,sub_cordinates,sub_all_ocr_sections,sub_remarks_section_ocr=predict_sub_sub_templates(sub_section_identifiers,list(template_ocr.values()),list(all_ocr_sections[section_no].values()),ocr_index=ocr_index)
                                         print(F" sub section cordinates {sub_cordinates}")
                                         #loop for sub sub section starts here 
 
@@ -382,13 +385,13 @@ def ionic_extraction():
                                                             table_header_text=table_header_text.get('headers',[])
                                                         header_lines=[]
                                                         if table_header:
-                                                            header_lines=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True)
+                                                            header_lines=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                             print(F"found_header is {header_lines}")
                                                             if not header_lines:
                                                                 for ocr in ocr_all:
                                                                     if not pag:
                                                                         continue
-                                                                    header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True)
+                                                                    header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                                     print(F"found_header is {header_lines}")
                                                                     if header_lines:
                                                                         break
@@ -471,13 +474,13 @@ def ionic_extraction():
 
                                                         if table_header:
                                                             head_page=[]
-                                                            found_header,table_headers_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text)
+                                                            found_header,table_headers_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                             print(F"found_header is {found_header}")
                                                             if not found_header:
                                                                 for ocr in ocr_all:
                                                                     if not pag:
                                                                         continue
-                                                                    found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text)
+                                                                    found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                                     print(F"found_header is {found_header}")
                                                                     if found_header:
                                                                         break
@@ -486,7 +489,7 @@ def ionic_extraction():
                                                         table_footer=tables[1]
                                                         found_footer=None
                                                         if table_footer:
-                                                            found_footer,table_foot_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_footer,True)
+                                                            found_footer,table_foot_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_footer,True,ocr_index=ocr_index)
                                                         
                                                         if found_header:
                                                             if found_footer:
@@ -521,7 +524,7 @@ def ionic_extraction():
 
                                                 print(f' remarks need to be extracted are {remarks}')
                                                 if remarks and remarks.get('type','None') == 'claim level':
-                                                    extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()))
+                                                    extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()),ocr_index=ocr_index)
 
                                                 if extracted_remarks:
                                                     template_fields['remarks']=extracted_remarks
@@ -574,13 +577,13 @@ def ionic_extraction():
                                                         table_header_text=table_header_text.get('headers',[])
                                                     header_lines=[]
                                                     if table_header:
-                                                        header_lines=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True)
+                                                        header_lines=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                         print(F"found_header is {header_lines}")
                                                         if not header_lines:
                                                             for ocr in ocr_all:
                                                                 if not pag:
                                                                     continue
-                                                                header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True)
+                                                                header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                                 print(F"found_header is {header_lines}")
                                                                 if header_lines:
                                                                     break
@@ -664,7 +667,7 @@ def ionic_extraction():
                                                     print(F"table_header is {table_header}")
                                                     if table_header:
                                                         head_page=[]
-                                                        found_header,table_headers_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text)
+                                                        found_header,table_headers_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                         print(F"found_header is here is{found_header}")
 
                                                         if found_header:
@@ -688,7 +691,7 @@ def ionic_extraction():
                                                             for ocr in ocr_all:
                                                                 if not pag:
                                                                     continue
-                                                                found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text)
+                                                                found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                                 print(F"found_header is here is {found_header}")
                                                                 if found_header:
                                                                     extra_headers=[]
@@ -706,7 +709,7 @@ def ionic_extraction():
                                                     found_footer=None
                                                     print(F"table_footer is {table_footer}")
                                                     if table_footer:
-                                                        found_footer,table_foot_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_footer,True)
+                                                        found_footer,table_foot_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_footer,True,ocr_index=ocr_index)
                                                     
                                                     if found_header:
 
@@ -744,7 +747,7 @@ def ionic_extraction():
 
                                             print(f' remarks need to be extracted are {remarks}')
                                             if remarks and remarks.get('type','None') == 'claim level':
-                                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()))
+                                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()),ocr_index=ocr_index)
 
                                             if extracted_remarks:
                                                 template_fields['remarks']=extracted_remarks
@@ -752,7 +755,7 @@ def ionic_extraction():
 
 
                                         if paraFieldsTraining:
-                                            para_field,para_high=predict_paragraph(paraFieldsTraining,list(template_ocr.values()))
+                                            para_field,para_high=predict_paragraph(paraFieldsTraining,list(template_ocr.values()),ocr_index=ocr_index)
                                             print(para_field,'para_field')
                                             print(para_high,'para_high')
                                             for field,value in para_field.items():
@@ -835,28 +838,28 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
     # row_headers,column_headers,contexts=process_trained_fields['row_headers'],process_trained_fields['column_headers'],process_trained_fields['contexts']
 
     if column_headers:
-        column_headers=json.loads(column_headers)
+        column_headers=trained_templates.loads(column_headers)
     else:
         column_headers={}
     if row_headers:
-        row_headers=json.loads(row_headers)
+        row_headers=trained_templates.loads(row_headers)
     else:
         row_headers={}
     if contexts:
-        contexts=json.loads(contexts)
+        contexts=trained_templates.loads(contexts)
     else:
         contexts={}
 
     if column_headers_t2:
-        column_headers_t2=json.loads(column_headers_t2)
+        column_headers_t2=trained_templates.loads(column_headers_t2)
     else:
         column_headers={}
     if row_headers_t2:
-        row_headers_t2=json.loads(row_headers_t2)
+        row_headers_t2=trained_templates.loads(row_headers_t2)
     else:
         row_headers_t2={}
     if contexts_t2:
-        contexts_t2=json.loads(contexts_t2)
+        contexts_t2=trained_templates.loads(contexts_t2)
     else:
         contexts_t2={}
     
@@ -866,6 +869,10 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
     fields=['Check Number','Check Amount']
     page_field_data={}
 
+    # Read-only words shared by every field (was a deepcopy of both per field)
+    shared_ocr_data=freeze_ocr(ocr_data_all_got)
+    shared_raw_pages=freeze_ocr(ocr_raw_pages)
+
     for field in fields:
 
         print(F" #####################")
@@ -910,7 +917,8 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
             value_box=row_header_int['value_box']
 
         # print(F" ##################### len of ocr_data_all is {len(ocr_data_all)}")
-        all_pairs_row_con=check_headers(row_header_int,context_int,copy.deepcopy(ocr_data_all_got),copy.deepcopy(ocr_raw_pages))
+        # The trained headers are shared parsed JSON (trained_templates.loads): the helper gets its own copy
+        all_pairs_row_con=check_headers(copy.deepcopy(row_header_int),copy.deepcopy(context_int),field_ocr(shared_ocr_data),field_ocr(shared_raw_pages))
 
         for pair in all_pairs_row_con:
 
@@ -962,7 +970,7 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
                     con_base_diff=context_int['value_thr']
                     con_conf=calculate_cont_confidence(con_base_diff,column_act_confidence)
 
-                    value_con_diff_cal=calculate_value_distance(context,value)
+                    value_con_diff_cal=column_act_confidence
                     calculated_con_diff=abs(context_int['value_thr']-value_con_diff_cal)
                     calculated_diff=calculated_diff+calculated_con_diff
 
@@ -1084,28 +1092,28 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
     # row_headers,column_headers,contexts=process_trained_fields['row_headers',{}],process_trained_fields['column_headers',{}],process_trained_fields['contexts',{}]
 
     if column_headers:
-        column_headers=json.loads(column_headers)
+        column_headers=trained_templates.loads(column_headers)
     else:
         column_headers={}
     if row_headers:
-        row_headers=json.loads(row_headers)
+        row_headers=trained_templates.loads(row_headers)
     else:
         row_headers={}
     if contexts:
-        contexts=json.loads(contexts)
+        contexts=trained_templates.loads(contexts)
     else:
         contexts={}
 
     if column_headers_t2:
-        column_headers_t2=json.loads(column_headers_t2)
+        column_headers_t2=trained_templates.loads(column_headers_t2)
     else:
         column_headers={}
     if row_headers_t2:
-        row_headers_t2=json.loads(row_headers_t2)
+        row_headers_t2=trained_templates.loads(row_headers_t2)
     else:
         row_headers_t2={}
     if contexts_t2:
-        contexts_t2=json.loads(contexts_t2)
+        contexts_t2=trained_templates.loads(contexts_t2)
     else:
         contexts_t2={}
     
@@ -1120,6 +1128,10 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
     extracted_fields={}
     fields_highlights={}
 
+    # Read-only words shared by every field (was a deepcopy of both per field)
+    shared_ocr_data=freeze_ocr(ocr_data_all_got)
+    shared_raw_pages=freeze_ocr(ocr_raw_pages)
+
     for field in fields:
 
         if field in common_section_fields and sub_section:
@@ -1128,7 +1140,6 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
         if field not in common_section_fields and common_section:
             continue 
 
-        ocr_data_all=copy.deepcopy(ocr_data_all_got)
         print(F" #####################")
         print(F" #####################")
         print(F" #####################")
@@ -1178,7 +1189,8 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
             value_box=row_header_int['value_box']
 
         # print(F" ##################### len of ocr_data_all is {len(ocr_data_all)}")
-        finalised_headers=finalise_headers(row_header_int,column_header_int,context_int,copy.deepcopy(ocr_data_all_got),copy.deepcopy(ocr_raw_pages))
+        # The trained headers are shared parsed JSON (trained_templates.loads): the helper gets its own copy
+        finalised_headers=finalise_headers(copy.deepcopy(row_header_int),copy.deepcopy(column_header_int),copy.deepcopy(context_int),field_ocr(shared_ocr_data),field_ocr(shared_raw_pages))
 
         column_header=finalised_headers['column_header']
         row_header=finalised_headers['row_header']
@@ -1246,7 +1258,7 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
                 print(f'con_base_diff is {con_base_diff}')
                 print(f'con_conf is {con_conf}')
 
-                value_con_diff_cal=calculate_value_distance(context,value)
+                value_con_diff_cal=column_act_confidence
                 calculated_con_diff=abs(context_int['value_thr']-value_con_diff_cal)
                 calculated_diff=calculated_diff+calculated_con_diff
                 # print(f"################ calculated_diff is  {calculated_con_diff} for {value}")
@@ -1295,7 +1307,7 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
 
 -----------------------------------------------------------------------------------------------------------------------------------------------------------
 
-def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_text=[],header_check=False):
+def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_text=[],header_check=False,ocr_index=None):
     """
     Extracts table data from OCR words starting from a predicted header. The function looks for the header
     and then traverses down, collecting rows of table data until it encounters an empty line, a large gap,
@@ -1310,6 +1322,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         list: Extracted table rows.
     """
     
+    ocr_index=ocr_index or OcrIndex()
     table_headers_line=line_wise_ocr_data(table_headers)
     table_line_words=[]
     for table_head_line in table_headers_line:
@@ -1322,35 +1335,26 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
     print(F'table_headers is {table_line_words}')
     # Sort words by their "top" position to process lines vertically
     found=[]
+    page_lines=[ocr_index.page(ocr) for ocr in ocr_data]
     for table_line_word in table_line_words:
         temp_line=[]
         max_match=0
-        for ocr in ocr_data:
-            sorted_words = sorted(ocr, key=lambda x: x["top"])
-            line_ocr=line_wise_ocr_data(sorted_words)
-            for line in line_ocr:
+        if foot:
+            table_line_profile=FuzzyText(re.sub(r'[^a-zA-Z]', '', table_line_word))
+        else:
+            table_line_profile=FuzzyText(table_line_word)
+        for page in page_lines:
+            line_profiles=page.letter_profiles if foot else page.text_profiles
+            for line_no,line in enumerate(page.lines):
                 if line[0]['top']<top:
                     continue
-                if foot:
-                    line_words = [word["word"] for word in line]
-                    line_words=" ".join(line_words)
-                    line_words_temp=re.sub(r'[^a-zA-Z]', '', line_words)
-                    table_line_word_temp=re.sub(r'[^a-zA-Z]', '', table_line_word)
-                    matcher = SequenceMatcher(None, line_words_temp, table_line_word_temp)
-                    similarity_ratio_col = matcher.ratio()
-                    if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
-                        max_match=similarity_ratio_col
-                        temp_line=line
-                        print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
-                else:
-                    line_words = [word["word"] for word in line]
-                    line_words=" ".join(line_words)
-                    matcher = SequenceMatcher(None, line_words, table_line_word)
-                    similarity_ratio_col = matcher.ratio()
-                    if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
-                        max_match=similarity_ratio_col
-                        temp_line=line
-                        print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
+                line_words=page.texts[line_no]
+                # 0.0 when the line provably cannot beat the current best
+                similarity_ratio_col = line_profiles[line_no].ratio(table_line_profile, minimum=max(max_match,0.65))
+                if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
+                    max_match=similarity_ratio_col
+                    temp_line=list(line)
+                    print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
             print(f"temp_line got for this page is {temp_line}")
             if temp_line:
                 table_lines.extend(temp_line)
@@ -1374,11 +1378,11 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         return [],[] 
 
     final_line=[]
-    for ocr in ocr_data:
-        sorted_words = sorted(ocr, key=lambda x: x["top"])
-        line_ocr=line_wise_ocr_data(sorted_words)
-        for line in line_ocr:
-            line_box=combine_dicts(line)
+    for page in page_lines:
+        if table_header_box['pg_no'] not in page.pg_nos:
+            continue
+        for line in page.lines:
+            line_box=combine_dicts(list(line))
             if line_box and table_header_box['top']<=line_box['top']<=table_header_box['bottom'] and line_box['pg_no'] == table_header_box['pg_no']:
                 print(F'final table lines are is {line_box}')
                 final_line.extend(line)
@@ -1401,10 +1405,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         new_lines_=[]
         for page in ocr_data:
             if page and page[0]['pg_no'] == header_page:
-                for word in page:
-                    if whole_table_box['top']-100<=word['top'] and  whole_table_box['bottom']+100>=word['bottom']:
-                        # print(f'words is checking here {word}')
-                        new_lines_.append(word)
+                new_lines_.extend(ocr_index.page(page).words_in(whole_table_box['top']-100,whole_table_box['bottom']+100))
 
         if new_lines_:
             table_lines=new_lines_
@@ -1440,7 +1441,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
 
 ------------------------------------------------------------------------------------------------------------------------------------------------
 
-def extract_remarks(headers,footers,ocr_word_all):
+def extract_remarks(headers,footers,ocr_word_all,ocr_index=None):
     try:
         headers=headers['ocrAreas']
     except:
@@ -1469,21 +1470,22 @@ def extract_remarks(headers,footers,ocr_word_all):
 
     if not base_head:
         return {},{}
+    ocr_index=ocr_index or OcrIndex()
 
     remarks_ocr_data_temp=[]
     matched_word=''
     end_matcher=False
     start_matcher=False
+    base_identifier_word=re.sub(r'[^a-zA-Z ]', '', base_head['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        # Copies: the start word is removed from its line below
+        word_lines=[list(line) for line in ocr_index.lines(page)]
         current_index=-1
         # print(f'############### word_lines for oage {word_lines[0]} are',word_lines)
         for line in word_lines:
             # print(f'############### line is',line)
             current_index=current_index+1
             for word in line:
-                base_identifier_word=re.sub(r'[^a-zA-Z ]', '', base_head['word'])
                 if base_identifier_word and not start_matcher:
                     start_matcher = is_fuzzy_subsequence(base_identifier_word, word['word'])
                 
@@ -1845,8 +1847,9 @@ def extract_remarks(headers,footers,ocr_word_all):
         return {}, {}
 
 -----------------------------------------------------------------------------------------------------------------------------
-def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_header,process_trained_fields):
+def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_header,process_trained_fields,ocr_index=None):
 
+    ocr_index=ocr_index or OcrIndex()
     section_heads=[]
     section_format=[]
     if section_header:
@@ -1943,9 +1946,10 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
                     start_page=word['pg_no']
     skip_count=0
 
+    base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        page_lines=ocr_index.page(page)
+        word_lines=page_lines.lines
         current_index=-1
 
         print(f'################ we are at validating word {page[0]["pg_no"]}')
@@ -1953,16 +1957,13 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         for line in word_lines:
             current_index=current_index+1
 
-            line_words = [word["word"] for word in line]
-            line_words=' '.join(line_words)
+            line_words=page_lines.texts[current_index]
             for wo in Claim_countinuation_word:
                 if is_fuzzy_subsequence(wo, line_words):
                     skip_count=0
                     break
 
             for word in line:
-                cleaned_word=re.sub(r'[^a-zA-Z]', '', word['word'])
-                base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
                 if base_identifier_word:
 
                     if end_point and ((end_point['pg_no'] > word['pg_no']) or (end_point['pg_no'] == word['pg_no'] and word['top'] < end_point['bottom'])):
@@ -2032,7 +2033,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
                             ind=0
                             for page_end in ocr_word_all:
                                 if end_point['pg_no']== page_end[0]['pg_no']:
-                                    word_lines_ed=line_wise_ocr_data(page_end)
+                                    word_lines_ed=ocr_index.lines(page_end)
                                     for word_ in word_lines_ed:
                                         if ind>5:
                                             break
@@ -2129,7 +2130,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -2287,7 +2288,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word=word_line[0]
@@ -2338,7 +2339,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         for page in ocr_pages:
             if not page:
                 continue
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -2439,8 +2440,9 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
 
 -----------------------------------------------------------------------------------------------------------------------------------------------
 
-def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
+def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all,ocr_index=None):
     
+    ocr_index=ocr_index or OcrIndex()
     print(f" ################# identifiers['section_identifiers']",section_identifier)
     if not section_identifier:
         return None,None,None,None
@@ -2466,14 +2468,14 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
     cordinates=[]
     end_point={}
 
+    base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
+    base_identifier_profile=FuzzyText(base_identifier['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        word_lines=ocr_index.lines(page)
         current_index=-1
         for line in word_lines:
             current_index=current_index+1
             for word in line:
-                base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
                 if base_identifier_word:
 
                     if end_point and ((end_point['pg_no'] > word['pg_no']) or (end_point['pg_no'] == word['pg_no'] and word['top'] < end_point['bottom'])):
@@ -2481,7 +2483,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
                     
                     # start_matcher = is_fuzzy_subsequence(base_identifier['word'], word['word'])
 
-                    match_ratio = SequenceMatcher(None, word['word'], base_identifier['word']).ratio()
+                    match_ratio = FuzzyText(word['word']).ratio(base_identifier_profile, minimum=0.85)
                     
                     if match_ratio >= 0.85:
                         start_matcher=True
@@ -2583,7 +2585,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word=word_line[0]
@@ -2624,7 +2626,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -2670,7 +2672,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         for page in ocr_pages:
             if not page:
                 continue
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -2704,42 +2706,7 @@ def line_wise_ocr_data(words):
     Returns:
         list: List of lists where each inner list represents words on the same horizontal line.
     """
-    ocr_word = []
-
-    # Sort words based on their 'top' coordinate
-    sorted_words = sorted(filter(lambda x: isinstance(x, dict) and "pg_no" in x and "top" in x, words), key=lambda x: (x["pg_no"], x["top"]))
-
-    # sorted_words = sorted(words, key=lambda x: (x["pg_no"], x["top"]))
-
-    # Group words on the same horizontal line
-    line_groups = []
-    current_line = []
-
-    for word in sorted_words:
-        if not current_line:
-            # First word of the line
-            current_line.append(word)
-        else:
-            diff = abs(word["top"] - current_line[0]["top"])
-            if diff < 5:
-                # Word is on the same line as the previous word
-                current_line.append(word)
-            else:
-                # Word is on a new line
-                current_line=sorted(current_line, key=lambda x: x["left"])
-                line_groups.append(current_line)
-                current_line = [word]
-
-    # Add the last line to the groups
-    if current_line:
-        current_line=sorted(current_line, key=lambda x: x["left"])
-        line_groups.append(current_line)
-        
-    for line in line_groups:
-        line_words = [word["word"] for word in line]
-        # print(" ".join(line_words))
-
-    return line_groups
+    return [list(line) for line in group_lines(words)]
 
 
 -------------------------------------------------------------------------------------------------------------
@@ -2771,8 +2738,9 @@ def find_extra_headers(second_headers,ocr_data):
 
 
 ---------------------------------------------------------------------------------------------------------------------------------------
-def predict_paragraph(para_fields,ocr_word_all):
+def predict_paragraph(para_fields,ocr_word_all,ocr_index=None):
 
+    ocr_index=ocr_index or OcrIndex()
     para_field,para_high={},{}
 
     for field,section_identifier in para_fields.items():
@@ -2807,8 +2775,7 @@ def predict_paragraph(para_fields,ocr_word_all):
         stop=False
         needed_lines=[]
         for page in ocr_word_all:
-            sorted_words = sorted(page, key=lambda x: (x["top"]))
-            word_lines=line_wise_ocr_data(sorted_words)
+            word_lines=ocr_index.lines(page)
             current_index=-1
             for line in word_lines:
                 current_index=current_index+1
@@ -2895,6 +2862,8 @@ def ionic_extraction():
             ocr_data_all=json.loads(ocr_data_all)
             ocr_all = queue_db.execute_(query)['ocr_data'].to_list()[0]
             ocr_all=json.loads(ocr_all)
+            # Line groups of every page, built once and shared by all templates of this document
+            ocr_index=OcrIndex(ocr_all)
 
             format_types=ocr_data.to_dict(orient='records')
 
@@ -2936,11 +2905,10 @@ def ionic_extraction():
                     if start<=page_no<=end:
                         ocr_data_pages.append(pag)
 
-                query = f"SELECT * from  `trained_info` where format='{format}' and identifier='{identifier}'"
-                process_trained_fields = template_db.execute_(query).to_dict(orient='records')
+                # Parsed once per worker; only re-read when the trained_info row changes
+                process_trained_fields = trained_templates.get(template_db, format, identifier)
 
                 if process_trained_fields:
-                    process_trained_fields=process_trained_fields[0]
                     # print(f"ocr_pages sending are {ocr_pages}")
                     start_pages=predict_mutli_checks(ocr_pages,ocr_data_pages,process_trained_fields,end)
 
@@ -3021,11 +2989,10 @@ def ionic_extraction():
                 else:
                     master_process_trained_fields={}
                 
-                query = f"SELECT * from  `trained_info` where format='{format}' and identifier='{identifier}'"
-                process_trained_fields = template_db.execute_(query)
+                process_trained_fields = trained_templates.get(template_db, format, identifier)
                 
                 used_version=''
-                if process_trained_fields.empty:
+                if not process_trained_fields:
                     extarction_from={}
 
                     print(f'skkiping the eod {format_page}')
@@ -3059,7 +3026,6 @@ def ionic_extraction():
                                 extracted_fields[field]=''
                                 
                 else:
-                    process_trained_fields=process_trained_fields.to_dict(orient='records')
                     extracted_table={}
                     extracted_fields={}
                     extarction_from={}
@@ -3067,18 +3033,17 @@ def ionic_extraction():
                     remarks_high={}
 
                     if process_trained_fields:
-                        process_trained_fields= process_trained_fields[0]
                         #here we will extract any over all thing
                         fields_data = process_trained_fields['fields'] if process_trained_fields['fields'] else ''
                         if fields_data:
                             print(f'fields_data is {fields_data}')
-                            extracted_fields['main_fields'], fields_highlights['main_fields'] = get_template_extraction_values(ocr_pages, ocr_data_pages, process_trained_fields, json.loads(fields_data))
+                            extracted_fields['main_fields'], fields_highlights['main_fields'] = get_template_extraction_values(ocr_pages, ocr_data_pages, process_trained_fields, trained_templates.loads(fields_data))
                             # extracted_fields['main_fields'],fields_highlights['main_fields']=get_template_extraction_values(ocr_pages,ocr_data_pages,process_trained_fields,json.loads(process_trained_fields['fields']))
                             extarction_from['main_fields']=list(extracted_fields['main_fields'].keys())
                             print(F" #################### here table to extract is {fields_highlights['main_fields']}")
                         
                         if process_trained_fields['trained_table']:
-                            process_trained_fields['trained_table']=json.loads(process_trained_fields['trained_table'])
+                            process_trained_fields['trained_table']=trained_templates.loads(process_trained_fields['trained_table'])
                             for table_name,tables in process_trained_fields['trained_table'].items():
                                 if len(tables)>2:
                                     table_header=tables[0]
@@ -3089,11 +3054,11 @@ def ionic_extraction():
                                         table_header_text=tables[2]['headers']
 
                                     if table_header:
-                                        found_header,table_headers_line=extract_table_header(ocr_data_pages,0,table_header,table_header_text=table_header_text)
+                                        found_header,table_headers_line=extract_table_header(ocr_data_pages,0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
 
                                     table_footer=tables[1]
                                     if table_footer:
-                                        found_footer,table_foot_line=extract_table_header(ocr_data_pages,0,table_footer,True)
+                                        found_footer,table_foot_line=extract_table_header(ocr_data_pages,0,table_footer,True,ocr_index=ocr_index)
 
                                     if found_header:
                                         if found_footer:
@@ -3111,20 +3076,20 @@ def ionic_extraction():
                         print(f' remarks need to be extracted are {remarks}')
                         if remarks:
                             print(f'remarks here are {remarks}')
-                            remarks=json.loads(remarks)
+                            remarks=trained_templates.loads(remarks)
                             if remarks and remarks.get('type','None') == 'check level':
-                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),ocr_pages)
+                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),ocr_pages,ocr_index=ocr_index)
 
                         #here we will extract any sessions things
                         # print(F" here extract for section {process_trained_fields['sub_template_identifiers']}")
                         if process_trained_fields['sub_template_identifiers']:
 
-                            sub_template_identifiers=json.loads(process_trained_fields['sub_template_identifiers'])
-                            all_section_fields=json.loads(process_trained_fields['section_fields'])
-                            table=json.loads(process_trained_fields['section_table'])
+                            sub_template_identifiers=trained_templates.loads(process_trained_fields['sub_template_identifiers'])
+                            all_section_fields=trained_templates.loads(process_trained_fields['section_fields'])
+                            table=trained_templates.loads(process_trained_fields['section_table'])
 
                             try:
-                                table_t2=json.loads(process_trained_fields['section_table_t2'])
+                                table_t2=trained_templates.loads(process_trained_fields['section_table_t2'])
                             except:
                                 table_t2={}
 
@@ -3159,7 +3124,7 @@ def ionic_extraction():
                                     paraFieldsTraining=identifiers['paraFieldsTraining']
 
                                 # print(F"################N section_header is {section_header}")
-                                sub_templates,cordinates,all_ocr_sections,remarks_section_ocr=predict_sub_templates(identifiers['section_identifiers'],ocr_pages,ocr_data_pages,section_header,process_trained_fields)
+                                sub_templates,cordinates,all_ocr_sections,remarks_section_ocr=predict_sub_templates(identifiers['section_identifiers'],ocr_pages,ocr_data_pages,section_header,process_trained_fields,ocr_index=ocr_index)
                                 print(F" main section cordinates {cordinates}")
                                 if not sub_templates:
                                     continue
@@ -3183,7 +3148,7 @@ def ionic_extraction():
                                             common_template_fields['fields'],common_template_highlights['fields']=get_template_extraction_values(list(template_ocr.values()),list(all_ocr_sections[section_no].values()),process_trained_fields,section_fields,common_section=True,common_section_fields=common_section_fields)
                                         print(f'common_fields is {common_template_fields}')
 
-                                        sub_sub_templates,sub_cordinates,sub_all_ocr_sections,sub_remarks_section_ocr=predict_sub_sub_templates(sub_section_identifiers,list(template_ocr.values()),list(all_ocr_sections[section_no].values()))
+                                        sub_sub_templates,sub_cordinates,sub_all_ocr_sections,sub_remarks_section_ocr=predict_sub_sub_templates(sub_section_identifiers,list(template_ocr.values()),list(all_ocr_sections[section_no].values()),ocr_index=ocr_index)
                                         print(F" sub section cordinates {sub_cordinates}")
                                         #loop for sub sub section starts here 
 
@@ -3241,13 +3206,13 @@ def ionic_extraction():
                                                             table_header_text=table_header_text.get('headers',[])
                                                         header_lines=[]
                                                         if table_header:
-                                                            header_lines=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True)
+                                                            header_lines=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                             print(F"found_header is {header_lines}")
                                                             if not header_lines:
                                                                 for ocr in ocr_all:
                                                                     if not pag:
                                                                         continue
-                                                                    header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True)
+                                                                    header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                                     print(F"found_header is {header_lines}")
                                                                     if header_lines:
                                                                         break
@@ -3330,13 +3295,13 @@ def ionic_extraction():
 
                                                         if table_header:
                                                             head_page=[]
-                                                            found_header,table_headers_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text)
+                                                            found_header,table_headers_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                             print(F"found_header is {found_header}")
                                                             if not found_header:
                                                                 for ocr in ocr_all:
                                                                     if not pag:
                                                                         continue
-                                                                    found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text)
+                                                                    found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                                     print(F"found_header is {found_header}")
                                                                     if found_header:
                                                                         break
@@ -3345,7 +3310,7 @@ def ionic_extraction():
                                                         table_footer=tables[1]
                                                         found_footer=None
                                                         if table_footer:
-                                                            found_footer,table_foot_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_footer,True)
+                                                            found_footer,table_foot_line=extract_table_header(list(sub_all_ocr_sections[sub_section_no].values()),section_top,table_footer,True,ocr_index=ocr_index)
                                                         
                                                         if found_header:
                                                             if found_footer:
@@ -3380,7 +3345,7 @@ def ionic_extraction():
 
                                                 print(f' remarks need to be extracted are {remarks}')
                                                 if remarks and remarks.get('type','None') == 'claim level':
-                                                    extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()))
+                                                    extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()),ocr_index=ocr_index)
 
                                                 if extracted_remarks:
                                                     template_fields['remarks']=extracted_remarks
@@ -3433,13 +3398,13 @@ def ionic_extraction():
                                                         table_header_text=table_header_text.get('headers',[])
                                                     header_lines=[]
                                                     if table_header:
-                                                        header_lines=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True)
+                                                        header_lines=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                         print(F"found_header is {header_lines}")
                                                         if not header_lines:
                                                             for ocr in ocr_all:
                                                                 if not pag:
                                                                     continue
-                                                                header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True)
+                                                                header_lines=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,header_check=True,ocr_index=ocr_index)
                                                                 print(F"found_header is {header_lines}")
                                                                 if header_lines:
                                                                     break
@@ -3523,7 +3488,7 @@ def ionic_extraction():
                                                     print(F"table_header is {table_header}")
                                                     if table_header:
                                                         head_page=[]
-                                                        found_header,table_headers_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text)
+                                                        found_header,table_headers_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                         print(F"found_header is here is{found_header}")
 
                                                         if found_header:
@@ -3547,7 +3512,7 @@ def ionic_extraction():
                                                             for ocr in ocr_all:
                                                                 if not pag:
                                                                     continue
-                                                                found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text)
+                                                                found_header,table_headers_line=extract_table_header([ocr],0,table_header,table_header_text=table_header_text,ocr_index=ocr_index)
                                                                 print(F"found_header is here is {found_header}")
                                                                 if found_header:
                                                                     extra_headers=[]
@@ -3565,7 +3530,7 @@ def ionic_extraction():
                                                     found_footer=None
                                                     print(F"table_footer is {table_footer}")
                                                     if table_footer:
-                                                        found_footer,table_foot_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_footer,True)
+                                                        found_footer,table_foot_line=extract_table_header(list(all_ocr_sections[section_no].values()),section_top,table_footer,True,ocr_index=ocr_index)
                                                     
                                                     if found_header:
 
@@ -3603,7 +3568,7 @@ def ionic_extraction():
 
                                             print(f' remarks need to be extracted are {remarks}')
                                             if remarks and remarks.get('type','None') == 'claim level':
-                                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()))
+                                                extracted_remarks,remarks_high=extract_remarks(remarks.get('start',[]),remarks.get('end',[]),list(remarks_section_ocr[section_no].values()),ocr_index=ocr_index)
 
                                             if extracted_remarks:
                                                 template_fields['remarks']=extracted_remarks
@@ -3611,7 +3576,7 @@ def ionic_extraction():
 
 
                                         if paraFieldsTraining:
-                                            para_field,para_high=predict_paragraph(paraFieldsTraining,list(template_ocr.values()))
+                                            para_field,para_high=predict_paragraph(paraFieldsTraining,list(template_ocr.values()),ocr_index=ocr_index)
                                             print(para_field,'para_field')
                                             print(para_high,'para_high')
                                             for field,value in para_field.items():
@@ -3694,28 +3659,28 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
     # row_headers,column_headers,contexts=process_trained_fields['row_headers'],process_trained_fields['column_headers'],process_trained_fields['contexts']
 
     if column_headers:
-        column_headers=json.loads(column_headers)
+        column_headers=trained_templates.loads(column_headers)
     else:
         column_headers={}
     if row_headers:
-        row_headers=json.loads(row_headers)
+        row_headers=trained_templates.loads(row_headers)
     else:
         row_headers={}
     if contexts:
-        contexts=json.loads(contexts)
+        contexts=trained_templates.loads(contexts)
     else:
         contexts={}
 
     if column_headers_t2:
-        column_headers_t2=json.loads(column_headers_t2)
+        column_headers_t2=trained_templates.loads(column_headers_t2)
     else:
         column_headers={}
     if row_headers_t2:
-        row_headers_t2=json.loads(row_headers_t2)
+        row_headers_t2=trained_templates.loads(row_headers_t2)
     else:
         row_headers_t2={}
     if contexts_t2:
-        contexts_t2=json.loads(contexts_t2)
+        contexts_t2=trained_templates.loads(contexts_t2)
     else:
         contexts_t2={}
     
@@ -3725,6 +3690,10 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
     fields=['Check Number','Check Amount']
     page_field_data={}
 
+    # Read-only words shared by every field (was a deepcopy of both per field)
+    shared_ocr_data=freeze_ocr(ocr_data_all_got)
+    shared_raw_pages=freeze_ocr(ocr_raw_pages)
+
     for field in fields:
 
         print(F" #####################")
@@ -3769,7 +3738,8 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
             value_box=row_header_int['value_box']
 
         # print(F" ##################### len of ocr_data_all is {len(ocr_data_all)}")
-        all_pairs_row_con=check_headers(row_header_int,context_int,copy.deepcopy(ocr_data_all_got),copy.deepcopy(ocr_raw_pages))
+        # The trained headers are shared parsed JSON (trained_templates.loads): the helper gets its own copy
+        all_pairs_row_con=check_headers(copy.deepcopy(row_header_int),copy.deepcopy(context_int),field_ocr(shared_ocr_data),field_ocr(shared_raw_pages))
 
         for pair in all_pairs_row_con:
 
@@ -3821,7 +3791,7 @@ def predict_mutli_checks(ocr_data_all_got,ocr_raw_pages,process_trained_fields,e
                     con_base_diff=context_int['value_thr']
                     con_conf=calculate_cont_confidence(con_base_diff,column_act_confidence)
 
-                    value_con_diff_cal=calculate_value_distance(context,value)
+                    value_con_diff_cal=column_act_confidence
                     calculated_con_diff=abs(context_int['value_thr']-value_con_diff_cal)
                     calculated_diff=calculated_diff+calculated_con_diff
 
@@ -3943,28 +3913,28 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
     # row_headers,column_headers,contexts=process_trained_fields['row_headers',{}],process_trained_fields['column_headers',{}],process_trained_fields['contexts',{}]
 
     if column_headers:
-        column_headers=json.loads(column_headers)
+        column_headers=trained_templates.loads(column_headers)
     else:
         column_headers={}
     if row_headers:
-        row_headers=json.loads(row_headers)
+        row_headers=trained_templates.loads(row_headers)
     else:
         row_headers={}
     if contexts:
-        contexts=json.loads(contexts)
+        contexts=trained_templates.loads(contexts)
     else:
         contexts={}
 
     if column_headers_t2:
-        column_headers_t2=json.loads(column_headers_t2)
+        column_headers_t2=trained_templates.loads(column_headers_t2)
     else:
         column_headers={}
     if row_headers_t2:
-        row_headers_t2=json.loads(row_headers_t2)
+        row_headers_t2=trained_templates.loads(row_headers_t2)
     else:
         row_headers_t2={}
     if contexts_t2:
-        contexts_t2=json.loads(contexts_t2)
+        contexts_t2=trained_templates.loads(contexts_t2)
     else:
         contexts_t2={}
     
@@ -3979,6 +3949,10 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
     extracted_fields={}
     fields_highlights={}
 
+    # Read-only words shared by every field (was a deepcopy of both per field)
+    shared_ocr_data=freeze_ocr(ocr_data_all_got)
+    shared_raw_pages=freeze_ocr(ocr_raw_pages)
+
     for field in fields:
 
         if field in common_section_fields and sub_section:
@@ -3987,7 +3961,6 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
         if field not in common_section_fields and common_section:
             continue 
 
-        ocr_data_all=copy.deepcopy(ocr_data_all_got)
         print(F" #####################")
         print(F" #####################")
         print(F" #####################")
@@ -4037,7 +4010,8 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
             value_box=row_header_int['value_box']
 
         # print(F" ##################### len of ocr_data_all is {len(ocr_data_all)}")
-        finalised_headers=finalise_headers(row_header_int,column_header_int,context_int,copy.deepcopy(ocr_data_all_got),copy.deepcopy(ocr_raw_pages))
+        # The trained headers are shared parsed JSON (trained_templates.loads): the helper gets its own copy
+        finalised_headers=finalise_headers(copy.deepcopy(row_header_int),copy.deepcopy(column_header_int),copy.deepcopy(context_int),field_ocr(shared_ocr_data),field_ocr(shared_raw_pages))
 
         column_header=finalised_headers['column_header']
         row_header=finalised_headers['row_header']
@@ -4105,7 +4079,7 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
                 print(f'con_base_diff is {con_base_diff}')
                 print(f'con_conf is {con_conf}')
 
-                value_con_diff_cal=calculate_value_distance(context,value)
+                value_con_diff_cal=column_act_confidence
                 calculated_con_diff=abs(context_int['value_thr']-value_con_diff_cal)
                 calculated_diff=calculated_diff+calculated_con_diff
                 # print(f"################ calculated_diff is  {calculated_con_diff} for {value}")
@@ -4154,7 +4128,7 @@ def get_template_extraction_values(ocr_data_all_got,ocr_raw_pages,process_traine
 
 -----------------------------------------------------------------------------------------------------------------------------------------------------------
 
-def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_text=[],header_check=False):
+def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_text=[],header_check=False,ocr_index=None):
     """
     Extracts table data from OCR words starting from a predicted header. The function looks for the header
     and then traverses down, collecting rows of table data until it encounters an empty line, a large gap,
@@ -4169,6 +4143,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         list: Extracted table rows.
     """
     
+    ocr_index=ocr_index or OcrIndex()
     table_headers_line=line_wise_ocr_data(table_headers)
     table_line_words=[]
     for table_head_line in table_headers_line:
@@ -4181,35 +4156,26 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
     print(F'table_headers is {table_line_words}')
     # Sort words by their "top" position to process lines vertically
     found=[]
+    page_lines=[ocr_index.page(ocr) for ocr in ocr_data]
     for table_line_word in table_line_words:
         temp_line=[]
         max_match=0
-        for ocr in ocr_data:
-            sorted_words = sorted(ocr, key=lambda x: x["top"])
-            line_ocr=line_wise_ocr_data(sorted_words)
-            for line in line_ocr:
+        if foot:
+            table_line_profile=FuzzyText(re.sub(r'[^a-zA-Z]', '', table_line_word))
+        else:
+            table_line_profile=FuzzyText(table_line_word)
+        for page in page_lines:
+            line_profiles=page.letter_profiles if foot else page.text_profiles
+            for line_no,line in enumerate(page.lines):
                 if line[0]['top']<top:
                     continue
-                if foot:
-                    line_words = [word["word"] for word in line]
-                    line_words=" ".join(line_words)
-                    line_words_temp=re.sub(r'[^a-zA-Z]', '', line_words)
-                    table_line_word_temp=re.sub(r'[^a-zA-Z]', '', table_line_word)
-                    matcher = SequenceMatcher(None, line_words_temp, table_line_word_temp)
-                    similarity_ratio_col = matcher.ratio()
-                    if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
-                        max_match=similarity_ratio_col
-                        temp_line=line
-                        print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
-                else:
-                    line_words = [word["word"] for word in line]
-                    line_words=" ".join(line_words)
-                    matcher = SequenceMatcher(None, line_words, table_line_word)
-                    similarity_ratio_col = matcher.ratio()
-                    if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
-                        max_match=similarity_ratio_col
-                        temp_line=line
-                        print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
+                line_words=page.texts[line_no]
+                # 0.0 when the line provably cannot beat the current best
+                similarity_ratio_col = line_profiles[line_no].ratio(table_line_profile, minimum=max(max_match,0.65))
+                if similarity_ratio_col>max_match and similarity_ratio_col>0.65:
+                    max_match=similarity_ratio_col
+                    temp_line=list(line)
+                    print(f"table_lineis {line_words} and table header is {table_line_word} and {similarity_ratio_col}")
             print(f"temp_line got for this page is {temp_line}")
             if temp_line:
                 table_lines.extend(temp_line)
@@ -4233,11 +4199,11 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         return [],[] 
 
     final_line=[]
-    for ocr in ocr_data:
-        sorted_words = sorted(ocr, key=lambda x: x["top"])
-        line_ocr=line_wise_ocr_data(sorted_words)
-        for line in line_ocr:
-            line_box=combine_dicts(line)
+    for page in page_lines:
+        if table_header_box['pg_no'] not in page.pg_nos:
+            continue
+        for line in page.lines:
+            line_box=combine_dicts(list(line))
             if line_box and table_header_box['top']<=line_box['top']<=table_header_box['bottom'] and line_box['pg_no'] == table_header_box['pg_no']:
                 print(F'final table lines are is {line_box}')
                 final_line.extend(line)
@@ -4260,10 +4226,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
         new_lines_=[]
         for page in ocr_data:
             if page and page[0]['pg_no'] == header_page:
-                for word in page:
-                    if whole_table_box['top']-100<=word['top'] and  whole_table_box['bottom']+100>=word['bottom']:
-                        # print(f'words is checking here {word}')
-                        new_lines_.append(word)
+                new_lines_.extend(ocr_index.page(page).words_in(whole_table_box['top']-100,whole_table_box['bottom']+100))
 
         if new_lines_:
             table_lines=new_lines_
@@ -4299,7 +4262,7 @@ def extract_table_header(ocr_data,top, table_headers, foot=False,table_header_te
 
 ------------------------------------------------------------------------------------------------------------------------------------------------
 
-def extract_remarks(headers,footers,ocr_word_all):
+def extract_remarks(headers,footers,ocr_word_all,ocr_index=None):
     try:
         headers=headers['ocrAreas']
     except:
@@ -4328,21 +4291,22 @@ def extract_remarks(headers,footers,ocr_word_all):
 
     if not base_head:
         return {},{}
+    ocr_index=ocr_index or OcrIndex()
 
     remarks_ocr_data_temp=[]
     matched_word=''
     end_matcher=False
     start_matcher=False
+    base_identifier_word=re.sub(r'[^a-zA-Z ]', '', base_head['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        # Copies: the start word is removed from its line below
+        word_lines=[list(line) for line in ocr_index.lines(page)]
         current_index=-1
         # print(f'############### word_lines for oage {word_lines[0]} are',word_lines)
         for line in word_lines:
             # print(f'############### line is',line)
             current_index=current_index+1
             for word in line:
-                base_identifier_word=re.sub(r'[^a-zA-Z ]', '', base_head['word'])
                 if base_identifier_word and not start_matcher:
                     start_matcher = is_fuzzy_subsequence(base_identifier_word, word['word'])
                 
@@ -4704,8 +4668,9 @@ def extract_remarks(headers,footers,ocr_word_all):
         return {}, {}
 
 -----------------------------------------------------------------------------------------------------------------------------
-def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_header,process_trained_fields):
+def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_header,process_trained_fields,ocr_index=None):
 
+    ocr_index=ocr_index or OcrIndex()
     section_heads=[]
     section_format=[]
     if section_header:
@@ -4802,9 +4767,10 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
                     start_page=word['pg_no']
     skip_count=0
 
+    base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        page_lines=ocr_index.page(page)
+        word_lines=page_lines.lines
         current_index=-1
 
         print(f'################ we are at validating word {page[0]["pg_no"]}')
@@ -4812,16 +4778,13 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         for line in word_lines:
             current_index=current_index+1
 
-            line_words = [word["word"] for word in line]
-            line_words=' '.join(line_words)
+            line_words=page_lines.texts[current_index]
             for wo in Claim_countinuation_word:
                 if is_fuzzy_subsequence(wo, line_words):
                     skip_count=0
                     break
 
             for word in line:
-                cleaned_word=re.sub(r'[^a-zA-Z]', '', word['word'])
-                base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
                 if base_identifier_word:
 
                     if end_point and ((end_point['pg_no'] > word['pg_no']) or (end_point['pg_no'] == word['pg_no'] and word['top'] < end_point['bottom'])):
@@ -4891,7 +4854,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
                             ind=0
                             for page_end in ocr_word_all:
                                 if end_point['pg_no']== page_end[0]['pg_no']:
-                                    word_lines_ed=line_wise_ocr_data(page_end)
+                                    word_lines_ed=ocr_index.lines(page_end)
                                     for word_ in word_lines_ed:
                                         if ind>5:
                                             break
@@ -4988,7 +4951,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -5146,7 +5109,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word=word_line[0]
@@ -5197,7 +5160,7 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
         for page in ocr_pages:
             if not page:
                 continue
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -5298,8 +5261,9 @@ def predict_sub_templates(section_identifier,ocr_word_all,ocr_data_all,section_h
 
 -----------------------------------------------------------------------------------------------------------------------------------------------
 
-def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
+def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all,ocr_index=None):
     
+    ocr_index=ocr_index or OcrIndex()
     print(f" ################# identifiers['section_identifiers']",section_identifier)
     if not section_identifier:
         return None,None,None,None
@@ -5325,14 +5289,14 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
     cordinates=[]
     end_point={}
 
+    base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
+    base_identifier_profile=FuzzyText(base_identifier['word'])
     for page in ocr_word_all:
-        sorted_words = sorted(page, key=lambda x: (x["top"]))
-        word_lines=line_wise_ocr_data(sorted_words)
+        word_lines=ocr_index.lines(page)
         current_index=-1
         for line in word_lines:
             current_index=current_index+1
             for word in line:
-                base_identifier_word=re.sub(r'[^a-zA-Z]', '', base_identifier['word'])
                 if base_identifier_word:
 
                     if end_point and ((end_point['pg_no'] > word['pg_no']) or (end_point['pg_no'] == word['pg_no'] and word['top'] < end_point['bottom'])):
@@ -5340,7 +5304,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
                     
                     # start_matcher = is_fuzzy_subsequence(base_identifier['word'], word['word'])
 
-                    match_ratio = SequenceMatcher(None, word['word'], base_identifier['word']).ratio()
+                    match_ratio = FuzzyText(word['word']).ratio(base_identifier_profile, minimum=0.85)
                     
                     if match_ratio >= 0.85:
                         start_matcher=True
@@ -5442,7 +5406,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word=word_line[0]
@@ -5483,7 +5447,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         stop=False
         start=False
         for page in ocr_pages:
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -5529,7 +5493,7 @@ def predict_sub_sub_templates(section_identifier,ocr_word_all,ocr_data_all):
         for page in ocr_pages:
             if not page:
                 continue
-            word_lines=line_wise_ocr_data(page)
+            word_lines=ocr_index.lines(page)
             section[page[0]['pg_no']]=[]
             for word_line in word_lines:
                 word_line=sorted(word_line, key=lambda x: (x["pg_no"], x["top"]))
@@ -5563,42 +5527,7 @@ def line_wise_ocr_data(words):
     Returns:
         list: List of lists where each inner list represents words on the same horizontal line.
     """
-    ocr_word = []
-
-    # Sort words based on their 'top' coordinate
-    sorted_words = sorted(filter(lambda x: isinstance(x, dict) and "pg_no" in x and "top" in x, words), key=lambda x: (x["pg_no"], x["top"]))
-
-    # sorted_words = sorted(words, key=lambda x: (x["pg_no"], x["top"]))
-
-    # Group words on the same horizontal line
-    line_groups = []
-    current_line = []
-
-    for word in sorted_words:
-        if not current_line:
-            # First word of the line
-            current_line.append(word)
-        else:
-            diff = abs(word["top"] - current_line[0]["top"])
-            if diff < 5:
-                # Word is on the same line as the previous word
-                current_line.append(word)
-            else:
-                # Word is on a new line
-                current_line=sorted(current_line, key=lambda x: x["left"])
-                line_groups.append(current_line)
-                current_line = [word]
-
-    # Add the last line to the groups
-    if current_line:
-        current_line=sorted(current_line, key=lambda x: x["left"])
-        line_groups.append(current_line)
-        
-    for line in line_groups:
-        line_words = [word["word"] for word in line]
-        # print(" ".join(line_words))
-
-    return line_groups
+    return [list(line) for line in group_lines(words)]
 
 
 -------------------------------------------------------------------------------------------------------------
@@ -5630,8 +5559,9 @@ def find_extra_headers(second_headers,ocr_data):
 
 
 ---------------------------------------------------------------------------------------------------------------------------------------
-def predict_paragraph(para_fields,ocr_word_all):
+def predict_paragraph(para_fields,ocr_word_all,ocr_index=None):
 
+    ocr_index=ocr_index or OcrIndex()
     para_field,para_high={},{}
 
     for field,section_identifier in para_fields.items():
@@ -5666,8 +5596,7 @@ def predict_paragraph(para_fields,ocr_word_all):
         stop=False
         needed_lines=[]
         for page in ocr_word_all:
-            sorted_words = sorted(page, key=lambda x: (x["top"]))
-            word_lines=line_wise_ocr_data(sorted_words)
+            word_lines=ocr_index.lines(page)
             current_index=-1
             for line in word_lines:
                 current_index=current_index+1
@@ -8,21 +8,22 @@ import re
 import json
 import sys
 from pathlib import Path
-import PyPDF2
+from contextlib import nullcontext
 
+from page_model import ReportDocument
 
-def extract_biomarkers_from_thyrocare_pdf(pdf_path):
+
+def extract_biomarkers_from_thyrocare_pdf(pdf_path, document=None):
     """Extract biomarkers from THYROCARE PDF format."""
     
     biomarkers = {}
     patient_info = {}
     
-    # Read PDF
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
+    # Read PDF (or reuse the extraction engine's shared page model)
+    with nullcontext(document or ReportDocument(pdf_path)) as document:
         
         # Extract patient info from first page
-        first_page_text = reader.pages[0].extract_text()
+        first_page_text = document.page_text(0)
         
         # Extract patient name, age, sex
         name_match = re.search(r'([A-Z][A-Z\s]+?)\s*\((\d+)\s*Y?\s*/\s*([MF])\)', first_page_text)
@@ -33,9 +34,7 @@ def extract_biomarkers_from_thyrocare_pdf(pdf_path):
             patient_info['cycle'] = 'All'
         
         # Extract all text from all pages
-        all_text = ""
-        for page in reader.pages:
-            all_text += page.extract_text() + "\n"
+        all_text = document.text()
         
         lines = all_text.split('\n')
         
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Batch extraction over a directory (or manifest) of lab report PDFs.
+
+The extractor scripts take one ``pdf_path``; a day's reports were processed
+by a shell loop, one Python start-up (and one set of imports) per file. This
+runs a whole batch in one process:
+
+    engine  the extraction engine's strategies (default regex, table, layout).
+            CPU-bound, so each report is parsed in a process pool worker.
+    claude  test_thyrocare_async_extractor. PDF text is extracted in the
+            process pool; the chunk requests of all reports share one
+            ClaudeScheduler (one rate budget and adaptive concurrency).
+
+Every finished report is appended to the JSONL output straight away, with
+the PDF's SHA-256, status and per-file timings. Re-running the same command
+skips the reports that already have an ``ok`` record for the same job, so
+an interrupted batch resumes where it stopped. Failed reports are retried.
+
+Usage:
+    python batch_extractor.py reports/ -o results.jsonl
+    python batch_extractor.py reports/ --recursive --strategies regex,table,layout --workers 4
+    python batch_extractor.py --manifest todays_reports.txt --mode claude -o results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from extraction_engine import DEFAULT_STRATEGIES, STRATEGIES, ExtractionEngine
+# Importable from the repository root, which page_model puts on sys.path
+import pdf_text
+
+# === Configuration ===
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", min(os.cpu_count() or 2, 8)))
+# Reports in progress at once in claude mode; their requests share one scheduler
+BATCH_REPORTS_IN_FLIGHT = int(os.environ.get("BATCH_REPORTS_IN_FLIGHT", 16))
+
+MODES = ("engine", "claude")
+
+
+def find_pdfs(inputs, manifest=None, recursive=False):
+    """PDF paths from files, directories and a manifest (one path per line, # comments), without duplicates."""
+    paths = []
+    for item in inputs:
+        item = Path(item)
+        if item.is_dir():
+            paths.extend(sorted(item.glob("**/*.pdf" if recursive else "*.pdf")))
+        else:
+            paths.append(item)
+    if manifest:
+        base = Path(manifest).parent
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    path = Path(line)
+                    paths.append(path if path.is_absolute() else base / path)
+    seen, unique = set(), []
+    for path in paths:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def load_checkpoint(output_path):
+    """``{(sha256, job)}`` of the reports the JSONL output already holds an ``ok`` record for."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that report is simply run again
+                continue
+            if record.get("status") == "ok":
+                done.add((record["sha256"], record["job"]))
+    return done
+
+
+class JsonlWriter:
+    """Appends one record per line and syncs it to disk, so a crash loses at most the report in hand."""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+# === Process pool workers ===
+
+def _init_worker(verbose):
+    # The pool is the parallelism; page extraction inside a worker stays serial
+    pdf_text.PDF_TEXT_WORKERS = 1
+    if not verbose:
+        sys.stdout = open(os.devnull, "w")
+
+
+def _run_engine(pdf_path, strategies):
+    started = time.perf_counter()
+    result = ExtractionEngine(strategies).run(pdf_path)
+    return result, time.perf_counter() - started
+
+
+def _extract_pages(pdf_path):
+    started = time.perf_counter()
+    pages = pdf_text.extract_pages(pdf_path, backend="pdfplumber")
+    return pages, time.perf_counter() - started
+
+
+# === Batch ===
+
+class BatchExtractor:
+    """Runs one job (engine strategies, or claude) over many PDFs with bounded concurrency."""
+
+    def __init__(self, mode="engine", strategies=DEFAULT_STRATEGIES, workers=BATCH_WORKERS,
+                 reports_in_flight=BATCH_REPORTS_IN_FLIGHT, api_key=None, verbose=False):
+        self.mode = mode
+        self.strategies = list(strategies)
+        self.workers = max(1, workers)
+        self.reports_in_flight = reports_in_flight
+        self.api_key = api_key
+        self.verbose = verbose
+        self.job = f"engine:{','.join(self.strategies)}" if mode == "engine" else "claude:thyrocare_async"
+
+    async def _engine_report(self, loop, pool, pdf_path, timings):
+        result, timings["parse_s"] = await loop.run_in_executor(pool, _run_engine, str(pdf_path), self.strategies)
+        return result
+
+    async def _claude_report(self, loop, pool, scheduler, pdf_path, timings):
+        from test_thyrocare_async_extractor import process_pdf_async
+
+        async def load_pages(path):
+            pages, timings["parse_s"] = await loop.run_in_executor(pool, _extract_pages, path)
+            return pages
+
+        provenance = {}
+        started = time.perf_counter()
+        result = await process_pdf_async(str(pdf_path), self.api_key, provenance=provenance,
+                                         scheduler=scheduler, load_pages=load_pages)
+        timings["llm_s"] = time.perf_counter() - started - timings.get("parse_s", 0.0)
+        if result is None:
+            raise RuntimeError("no result (see the log above)")
+        return {"result": result, "provenance": provenance}
+
+    async def run(self, pdf_paths, output_path):
+        """Process every PDF not yet done for this job; returns ``{"ok", "failed", "skipped"}`` counts."""
+        done = load_checkpoint(output_path)
+        todo = []
+        for path in pdf_paths:
+            digest = pdf_text.pdf_hash(path)
+            if (digest, self.job) not in done:
+                todo.append((path, digest))
+        counts = {"ok": 0, "failed": 0, "skipped": len(pdf_paths) - len(todo)}
+        if counts["skipped"]:
+            print(f"⏭️  {counts['skipped']} reports already in {output_path}")
+        if not todo:
+            return counts
+
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(self.verbose,))
+        scheduler = None
+        if self.mode == "claude":
+            from claude_scheduler import ClaudeScheduler
+
+            scheduler = ClaudeScheduler(self.api_key)
+        # engine: keep the pool busy without queueing every report's result in memory
+        limit = asyncio.Semaphore(self.workers * 2 if self.mode == "engine" else self.reports_in_flight)
+        writer = JsonlWriter(output_path)
+
+        async def process(index, pdf_path, digest):
+            async with limit:
+                started = time.perf_counter()
+                timings = {}
+                record = {"pdf": str(pdf_path), "sha256": digest, "job": self.job}
+                try:
+                    if self.mode == "engine":
+                        result = await self._engine_report(loop, pool, pdf_path, timings)
+                    else:
+                        result = await self._claude_report(loop, pool, scheduler, pdf_path, timings)
+                    record.update(status="ok", result=result)
+                    counts["ok"] += 1
+                    mark = "✓"
+                except Exception as e:
+                    record.update(status="error", error=f"{type(e).__name__}: {e}")
+                    counts["failed"] += 1
+                    mark = "❌"
+                timings["total_s"] = time.perf_counter() - started
+                record["timings"] = {k: round(v, 3) for k, v in timings.items()}
+                record["finished"] = datetime.now().isoformat(timespec="seconds")
+                writer.write(record)
+                print(f"{mark} [{index}/{len(todo)}] {pdf_path} ({timings['total_s']:.1f}s)"
+                      + (f": {record['error']}" if record["status"] == "error" else ""))
+
+        try:
+            await asyncio.gather(*(process(i, path, digest) for i, (path, digest) in enumerate(todo, 1)))
+        finally:
+            writer.close()
+            pool.shutdown(cancel_futures=True)
+            if scheduler is not None:
+                await scheduler.close()
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract many lab report PDFs in one run, resumably, to JSONL.")
+    parser.add_argument("inputs", nargs="*", help="PDF files and/or directories of PDFs")
+    parser.add_argument("--manifest", help="Text file with one PDF path per line")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Also search subdirectories")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL output (appended to, resumable)")
+    parser.add_argument("--mode", choices=MODES, default="engine")
+    parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES),
+                        help=f"Engine mode: comma-separated strategies ({', '.join(STRATEGIES)})")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Parsing processes")
+    parser.add_argument("--reports-in-flight", type=int, default=BATCH_REPORTS_IN_FLIGHT,
+                        help="Claude mode: reports in progress at once")
+    parser.add_argument("--api-key", help="Anthropic API key (claude mode)", default=None)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the extractors' own output")
+    args = parser.parse_args()
+
+    pdf_paths = find_pdfs(args.inputs, args.manifest, args.recursive)
+    missing = [p for p in pdf_paths if not p.is_file()]
+    if missing:
+        print(f"❌ Not found: {', '.join(map(str, missing))}")
+        sys.exit(1)
+    if not pdf_paths:
+        print("❌ No PDFs given")
+        sys.exit(1)
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        print(f"❌ Unknown strategies: {', '.join(unknown)}")
+        sys.exit(1)
+    api_key = args.api_key or os.environ.get("ANTHROPIC_API_KEY")
+    if args.mode == "claude" and not api_key:
+        print("❌ ANTHROPIC_API_KEY not set")
+        sys.exit(1)
+
+    batch = BatchExtractor(args.mode, strategies, args.workers, args.reports_in_flight, api_key, args.verbose)
+    print(f"📄 {len(pdf_paths)} reports, job {batch.job}, {batch.workers} workers → {args.output}")
+    started = time.perf_counter()
+    counts = asyncio.run(batch.run(pdf_paths, args.output))
+    elapsed = time.perf_counter() - started
+    print(f"\n✅ {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped in {elapsed:.1f}s")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
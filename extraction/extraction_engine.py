@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Unified lab report extraction engine.
+
+The extractors in this directory each open the PDF, pull out all the text
+and run their own patterns; cross-checking a report with two or three of
+them parsed it two or three times. The engine opens the report once as a
+ReportDocument (per-page text, words and tables, cached) and runs strategy
+plug-ins over that shared page model:
+
+    regex     ThyrocareExtractor catalogue patterns (PyPDF2 text)
+    table     ThyrocareExtractorPlumber over pdfplumber tables
+    layout    ThyrocareExtractorFinal line layouts (pdfplumber text)
+    llm       Claude over the pdfplumber text (opt-in, needs ANTHROPIC_API_KEY)
+
+plus the older extractors (``thyrocare_pdf``, ``thyrocare_pdf_v2``,
+``standardized``, ``improved``, ``generic``, ``accurate``, ``final``),
+each a thin adapter over the existing class or function.
+
+Strategies report test names in their own vocabulary, so keys are first
+mapped to the Thyrocare variable codes (the catalogue pattern with the
+longest match on the name wins). Per key, strategies that agree on a value
+pool their confidence; the value with the highest pooled confidence is kept
+and reported with its sources and any disagreeing alternatives.
+
+Usage:
+    python extraction_engine.py report.pdf
+    python extraction_engine.py report.pdf --strategies regex,table,layout,llm -o merged.json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from page_model import PDFPLUMBER, ReportDocument
+from thyrocare_extractor import BIOMARKER_PATTERNS, CBC_PATTERNS
+
+# Strategies run when none are named
+DEFAULT_STRATEGIES = ("regex", "table", "layout")
+PATIENT_FIELDS = ("name", "age", "sex", "cycle")
+
+STRATEGIES = {}
+
+
+def register_strategy(cls):
+    """Class decorator adding a strategy to the registry under ``cls.name``."""
+    STRATEGIES[cls.name] = cls
+    return cls
+
+
+class ExtractionStrategy:
+    """
+    A plug-in that reads values from a ReportDocument.
+
+    ``extract(document)`` returns ``(patient_info, values)``; ``confidence``
+    (0-1) is how far the strategy's values are trusted when merging.
+    """
+
+    name = None
+    confidence = 0.5
+
+    def __init__(self, confidence=None):
+        if confidence is not None:
+            self.confidence = confidence
+
+    def extract(self, document):
+        raise NotImplementedError
+
+
+@register_strategy
+class RegexStrategy(ExtractionStrategy):
+    name = "regex"
+    confidence = 0.85
+
+    def extract(self, document):
+        from thyrocare_extractor import ThyrocareExtractor
+
+        extractor = ThyrocareExtractor(document.pdf_path, document=document)
+        extractor.extract_text()
+        extractor.extract_patient_info()
+        extractor.extract_all_biomarkers()
+        extractor.extract_cbc()
+        return extractor.patient_info, extractor.biomarkers
+
+
+@register_strategy
+class TableStrategy(ExtractionStrategy):
+    name = "table"
+    confidence = 0.9
+
+    def extract(self, document):
+        from thyrocare_extractor_pdfplumber import ThyrocareExtractorPlumber
+
+        extractor = ThyrocareExtractorPlumber(document.pdf_path, document=document)
+        pdf = document.as_pdfplumber()
+        if pdf.pages:
+            extractor.extract_patient_info(pdf.pages[0].extract_text() or "")
+        extractor.extract_from_tables(pdf)
+        return extractor.patient_info, extractor.biomarkers
+
+
+@register_strategy
+class LayoutStrategy(ExtractionStrategy):
+    name = "layout"
+    confidence = 0.75
+
+    def extract(self, document):
+        from thyrocare_pdfplumber_final import ThyrocareExtractorFinal
+
+        extractor = ThyrocareExtractorFinal(document.pdf_path, document=document)
+        pdf = document.as_pdfplumber()
+        if pdf.pages:
+            extractor.extract_patient_info(pdf.pages[0].extract_text() or "")
+        extractor.extract_biomarkers(pdf)
+        return extractor.patient_info, extractor.biomarkers
+
+
+class _LineExtractorStrategy(ExtractionStrategy):
+    """Adapter for the PyPDF2 extractor classes (extract_text_from_pdf / extract_patient_info / extract_*)."""
+
+    extractor_module = None
+    extractor_class = None
+    extract_method = "extract_all_biomarkers"
+
+    def extract(self, document):
+        module = __import__(self.extractor_module)
+        extractor = getattr(module, self.extractor_class)(document.pdf_path, document=document)
+        if not extractor.extract_text_from_pdf():
+            return {}, {}
+        extractor.extract_patient_info()
+        getattr(extractor, self.extract_method)()
+        return extractor.patient_info, extractor.biomarkers
+
+
+@register_strategy
+class ThyrocarePDFStrategy(_LineExtractorStrategy):
+    name = "thyrocare_pdf"
+    confidence = 0.6
+    extractor_module = "thyrocare_pdf_extractor"
+    extractor_class = "ThyrocarePDFExtractor"
+    extract_method = "extract_biomarkers"
+
+
+@register_strategy
+class ThyrocarePDFV2Strategy(_LineExtractorStrategy):
+    name = "thyrocare_pdf_v2"
+    confidence = 0.6
+    extractor_module = "thyrocare_pdf_extractor_v2"
+    extractor_class = "ThyrocarePDFExtractorV2"
+    extract_method = "extract_biomarkers"
+
+
+@register_strategy
+class StandardizedStrategy(_LineExtractorStrategy):
+    name = "standardized"
+    confidence = 0.8
+    extractor_module = "standardized_extractor"
+    extractor_class = "StandardizedBiomarkerExtractor"
+
+
+@register_strategy
+class ImprovedStrategy(_LineExtractorStrategy):
+    name = "improved"
+    confidence = 0.6
+    extractor_module = "improved_extractor"
+    extractor_class = "ImprovedBiomarkerExtractor"
+
+
+@register_strategy
+class GenericStrategy(_LineExtractorStrategy):
+    name = "generic"
+    confidence = 0.5
+    extractor_module = "pdf_biomarker_extractor"
+    extractor_class = "BiomarkerExtractor"
+
+
+@register_strategy
+class AccurateStrategy(ExtractionStrategy):
+    name = "accurate"
+    confidence = 0.6
+
+    def extract(self, document):
+        from accurate_extractor import extract_biomarkers_from_thyrocare_pdf
+
+        return extract_biomarkers_from_thyrocare_pdf(document.pdf_path, document=document)
+
+
+@register_strategy
+class FinalStrategy(ExtractionStrategy):
+    name = "final"
+    confidence = 0.6
+
+    def extract(self, document):
+        from final_extractor import extract_thyrocare_biomarkers
+
+        return extract_thyrocare_biomarkers(document.pdf_path, document=document)
+
+
+@register_strategy
+class LLMStrategy(ExtractionStrategy):
+    """
+    Claude over the report pages, chunked like test_thyrocare_final_extractor
+    (whole pages per chunk, no overlap; see report_chunker).
+
+    ``extract_chunk(chunk, api_key, total_chunks)`` defaults to that script's
+    process_chunk_with_claude.
+    """
+
+    name = "llm"
+    confidence = 0.7
+
+    def __init__(self, confidence=None, extract_chunk=None, api_key=None, chunk_size=40000):
+        super().__init__(confidence)
+        self.extract_chunk = extract_chunk
+        self.api_key = api_key
+        self.chunk_size = chunk_size
+
+    def extract(self, document):
+        api_key = self.api_key or os.environ.get("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise RuntimeError("ANTHROPIC_API_KEY is not set")
+        # Importable from the repository root, which page_model puts on sys.path
+        import test_thyrocare_final_extractor as claude
+        from report_chunker import chunk_report, merge_chunk_results
+
+        extract_chunk = self.extract_chunk or claude.process_chunk_with_claude
+        chunks = chunk_report(document.page_texts(PDFPLUMBER), self.chunk_size)
+        results = [(chunk, r) for chunk, r in ((chunk, extract_chunk(chunk, api_key, len(chunks)))
+                                               for chunk in chunks) if r]
+        merged, _ = merge_chunk_results(results)
+        patient_info = {k: merged[k] for k in PATIENT_FIELDS if k in merged}
+        values = {k: v for k, v in merged.items() if k not in PATIENT_FIELDS and v is not None}
+        return patient_info, values
+
+
+# === Merging ===
+
+_CATALOGUE = [(var, re.compile(pattern, re.IGNORECASE))
+              for var, pattern in {**BIOMARKER_PATTERNS, **CBC_PATTERNS}.items()]
+_VARIABLES = {var for var, _ in _CATALOGUE}
+
+
+def canonical_key(key):
+    """Thyrocare variable code for a strategy's key (a code already, or a test name), else the name."""
+    key = " ".join(str(key).split())
+    if key in _VARIABLES:
+        return key
+    best, best_length = None, 0
+    for var, regex in _CATALOGUE:
+        match = regex.search(key)
+        if match and match.end() - match.start() > best_length:
+            best, best_length = var, match.end() - match.start()
+    return best or key.upper()
+
+
+def _normalize_value(value):
+    """(comparison key, value as reported) for a raw value: numbers as floats, text upper-cased."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return round(float(value), 6), float(value)
+    text = " ".join(str(value).split())
+    try:
+        number = float(text)
+        return round(number, 6), number
+    except ValueError:
+        return text.upper(), text.upper()
+
+
+class ExtractionEngine:
+    """Runs strategy plug-ins over one shared ReportDocument and merges their values."""
+
+    def __init__(self, strategies=DEFAULT_STRATEGIES):
+        self.strategies = [STRATEGIES[s]() if isinstance(s, str) else s for s in strategies]
+
+    def run(self, pdf_path):
+        with ReportDocument(pdf_path) as document:
+            outputs = []
+            for strategy in self.strategies:
+                try:
+                    patient_info, values = strategy.extract(document)
+                except Exception as e:
+                    print(f"⚠️  Strategy '{strategy.name}' failed: {e}")
+                    continue
+                print(f"✓ {strategy.name}: {len(values)} values")
+                outputs.append((strategy, patient_info or {}, values or {}))
+        return self.merge(outputs)
+
+    def merge(self, outputs):
+        """
+        Confidence-scored merge of ``[(strategy, patient_info, values)]``.
+
+        Per key, agreeing strategies pool their confidence (1 - prod(1 - c));
+        the best-supported value wins and its confidence is scaled by its
+        share of the total support, so disagreement lowers it.
+        """
+        outputs = sorted(outputs, key=lambda o: -o[0].confidence)
+
+        patient_info = {}
+        for _, info, _ in outputs:
+            for field, value in info.items():
+                if value not in (None, "", "Unknown"):
+                    patient_info.setdefault(field, value)
+
+        candidates = {}
+        for strategy, _, values in outputs:
+            for raw_key, raw_value in values.items():
+                if raw_value is None or raw_key in PATIENT_FIELDS:
+                    continue
+                key = canonical_key(raw_key)
+                compare, value = _normalize_value(raw_value)
+                group = candidates.setdefault(key, {}).setdefault(compare, {"value": value, "sources": []})
+                if strategy.name not in group["sources"]:
+                    group["sources"].append(strategy.name)
+
+        confidence_of = {strategy.name: strategy.confidence for strategy, _, _ in outputs}
+        biomarkers, provenance = {}, {}
+        for key, groups in candidates.items():
+            scored = []
+            for group in groups.values():
+                support = sum(confidence_of[name] for name in group["sources"])
+                doubt = 1.0
+                for name in group["sources"]:
+                    doubt *= 1.0 - confidence_of[name]
+                scored.append((support, 1.0 - doubt, group))
+            # Ties go to the group holding the most trusted strategy (outputs are sorted)
+            scored.sort(key=lambda s: -s[0])
+            support, pooled, winner = scored[0]
+            total = sum(s[0] for s in scored)
+            biomarkers[key] = winner["value"]
+            provenance[key] = {
+                "value": winner["value"],
+                "confidence": round(pooled * support / total, 3),
+                "sources": winner["sources"],
+                "alternatives": [{"value": g["value"], "sources": g["sources"]} for _, _, g in scored[1:]],
+            }
+
+        return {"patient_info": patient_info, "biomarkers": biomarkers, "provenance": provenance}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract biomarkers with several strategies over one parse of the PDF.")
+    parser.add_argument("pdf_path", help="Path to PDF file")
+    parser.add_argument("--strategies", default=",".join(DEFAULT_STRATEGIES),
+                        help=f"Comma-separated strategies ({', '.join(STRATEGIES)})")
+    parser.add_argument("-o", "--output", help="Output JSON file (default: <pdf>_engine_extracted.json)")
+    args = parser.parse_args()
+
+    if not Path(args.pdf_path).exists():
+        print(f"❌ Error: File not found: {args.pdf_path}")
+        sys.exit(1)
+    names = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in names if s not in STRATEGIES]
+    if unknown:
+        print(f"❌ Unknown strategies: {', '.join(unknown)}")
+        sys.exit(1)
+
+    result = ExtractionEngine(names).run(args.pdf_path)
+    output_file = args.output or Path(args.pdf_path).stem + "_engine_extracted.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+
+    disputed = [k for k, p in result["provenance"].items() if p["alternatives"]]
+    print(f"\n💾 Saved: {output_file}")
+    print(f"✅ {len(result['biomarkers'])} biomarkers, {len(disputed)} with disagreeing strategies")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,23 @@
 Final THYROCARE Extractor - Handles the actual PDF table format
 """
 
-import PyPDF2
 import re
 import json
 import sys
 from pathlib import Path
+from contextlib import nullcontext
 
+from page_model import ReportDocument
 
-def extract_thyrocare_biomarkers(pdf_path):
+
+def extract_thyrocare_biomarkers(pdf_path, document=None):
     """Extract biomarkers from THYROCARE PDF with proper format handling."""
     
-    with open(pdf_path, 'rb') as file:
-        reader = PyPDF2.PdfReader(file)
+    # Read PDF (or reuse the extraction engine's shared page model)
+    with nullcontext(document or ReportDocument(pdf_path)) as document:
         
         # Extract patient info from first page
-        first_page = reader.pages[0].extract_text()
+        first_page = document.page_text(0)
         patient_info = {}
         
         name_match = re.search(r'([A-Z][A-Z\s]+?)\s*\((\d+)\s*Y?\s*/\s*([MF])\)', first_page)
@@ -28,9 +30,7 @@ def extract_thyrocare_biomarkers(pdf_path):
             patient_info['cycle'] = 'All'
         
         # Extract all text from all pages
-        all_text = ""
-        for page in reader.pages:
-            all_text += page.extract_text() + "\n"
+        all_text = document.text()
         
         lines = all_text.split('\n')
         
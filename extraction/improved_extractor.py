@@ -7,7 +7,8 @@ import re
 import json
 import sys
 from pathlib import Path
-import PyPDF2
+
+from page_model import ReportDocument
 
 
 class ImprovedBiomarkerExtractor:
@@ -169,8 +170,10 @@ class ImprovedBiomarkerExtractor:
         '17 OHP': '17 OH PROGESTERONE',
     }
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None):
         self.pdf_path = Path(pdf_path)
+        # Shared page model when run by the extraction engine
+        self.document = document
         self.text = ""
         self.lines = []
         self.patient_info = {}
@@ -179,12 +182,9 @@ class ImprovedBiomarkerExtractor:
     def extract_text_from_pdf(self):
         """Extract all text from PDF file."""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                self.text = ""
-                for page in reader.pages:
-                    self.text += page.extract_text() + "\n"
-                self.lines = self.text.split('\n')
+            document = self.document or ReportDocument(self.pdf_path)
+            self.text = document.text()
+            self.lines = self.text.split('\n')
             return True
         except Exception as e:
             print(f"Error reading PDF: {e}")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Single-pass multi-pattern line matcher for the biomarker catalogues.
+
+The extractors used to run ``re.search(pattern, line)`` for every biomarker
+over every line of the report (100+ patterns x thousands of lines). Here the
+catalogue is compiled once: from each pattern literal "anchors" are taken
+(plain-text runs such that every match contains one of them), all anchors
+go into one Aho-Corasick automaton, and a single pass over the text yields
+the candidate lines for every pattern. The
+full pattern is then only tried on those candidate lines, so the work grows
+with the report size and the number of real hits, not patterns x lines.
+
+Patterns without a usable anchor (e.g. ``.*`` only) fall back to being
+tried on every line, so the result is always exactly what a per-line
+``re.search`` over all lines would give.
+"""
+
+import re
+
+try:
+    import re._parser as sre_parse
+    from re._constants import LITERAL, SUBPATTERN, BRANCH
+except ImportError:  # Python < 3.11
+    import sre_parse
+    from sre_constants import LITERAL, SUBPATTERN, BRANCH
+
+# Anchors shorter than this match too many lines to be worth indexing
+MIN_ANCHOR_LENGTH = 2
+
+
+def _longest_literal(items):
+    """Longest run of consecutive literal characters in a parsed sequence."""
+    best, run = "", []
+    for op, av in items:
+        if op is LITERAL:
+            run.append(chr(av))
+            continue
+        if op is SUBPATTERN and av[-1] and all(o is LITERAL for o, _ in av[-1]):
+            # A plain group like (a) is literal too
+            run.extend(chr(c) for _, c in av[-1])
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    if len(run) > len(best):
+        best = "".join(run)
+    return best
+
+
+def _sequence_anchors(items):
+    """
+    Anchors for a parsed sequence: every match of the sequence contains at
+    least one of them. Picks whichever option has the longest shortest anchor.
+    """
+    options = []
+    literal = _longest_literal(items)
+    if len(literal) >= MIN_ANCHOR_LENGTH:
+        options.append([literal])
+    for index, (op, av) in enumerate(items):
+        if op is BRANCH:
+            # The parser hoists a common prefix out of the alternatives
+            # ("FT3|FREE T3" becomes "F(?:T3|REE T3)"); put it back
+            start = index
+            while start and items[start - 1][0] is LITERAL:
+                start -= 1
+            prefix = list(items[start:index])
+            per_alternative = [_sequence_anchors(prefix + list(alt)) for alt in av[1]]
+            if all(per_alternative):
+                options.append([a for anchors in per_alternative for a in anchors])
+        elif op is SUBPATTERN:
+            sub = _sequence_anchors(list(av[-1]))
+            if sub:
+                options.append(sub)
+    if not options:
+        return None
+    return max(options, key=lambda anchors: min(len(a) for a in anchors))
+
+
+def pattern_anchors(pattern):
+    """
+    Literal anchors for ``pattern`` (one of them occurs in every match), or
+    None if no anchor of at least MIN_ANCHOR_LENGTH chars can be derived.
+    """
+    try:
+        return _sequence_anchors(list(sre_parse.parse(pattern)))
+    except re.error:
+        return None
+
+
+class _AhoCorasick:
+    """Aho-Corasick automaton over a set of literal anchors."""
+
+    def __init__(self, words):
+        self.goto = [{}]
+        self.out = [()]
+        for word in words:
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = self.goto[state][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.out.append(())
+                state = nxt
+            self.out[state] = (word,)
+
+        # Breadth-first failure links; each state also reports its suffix anchors
+        self.fail = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_lines(self, text):
+        """Yield ``(line number, anchor)`` for every anchor occurrence in ``text``."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        line_no = 0
+        for ch in text:
+            if ch == "\n":
+                line_no += 1
+                state = 0
+                continue
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for anchor in out[state]:
+                    yield line_no, anchor
+
+
+class MultiPatternMatcher:
+    """Finds, in one pass, every line each pattern of a catalogue matches."""
+
+    def __init__(self, patterns, flags=re.IGNORECASE):
+        self.flags = flags
+        self.compiled = {}
+        self._anchors_by_pattern = {}
+        self._unanchored = []
+        self._fold = str.lower if flags & re.IGNORECASE else str
+        anchors = set()
+        for pattern in dict.fromkeys(patterns):
+            self.compiled[pattern] = re.compile(pattern, flags)
+            found = pattern_anchors(pattern)
+            if found is None:
+                self._unanchored.append(pattern)
+                continue
+            keys = {self._fold(a) for a in found}
+            self._anchors_by_pattern[pattern] = keys
+            anchors.update(found)
+
+        self._automaton = _AhoCorasick(self._fold(a) for a in anchors)
+
+    def __contains__(self, pattern):
+        return pattern in self.compiled
+
+    def scan(self, lines):
+        """Return ``{pattern: [line numbers]}`` (ascending) for every catalogue pattern."""
+        text = "\n".join(lines)
+        anchor_lines = {}
+        for line_no, anchor in self._automaton.iter_lines(self._fold(text)):
+            anchor_lines.setdefault(anchor, set()).add(line_no)
+
+        hits = {}
+        for pattern, keys in self._anchors_by_pattern.items():
+            candidates = set()
+            for key in keys:
+                candidates |= anchor_lines.get(key, set())
+            search = self.compiled[pattern].search
+            hits[pattern] = [i for i in sorted(candidates) if search(lines[i])]
+        for pattern in self._unanchored:
+            search = self.compiled[pattern].search
+            hits[pattern] = [i for i, line in enumerate(lines) if search(line)]
+        return hits
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Shared page model for one lab report PDF.
+
+Every extractor used to open the PDF itself and extract all the text again,
+so running two or three of them on the same report (to cross-check values)
+parsed it two or three times. A ReportDocument opens the file once per
+backend and extracts each page's text, words and tables on first use only;
+all strategies of the extraction engine read from the same instance.
+
+Two text backends are kept because the existing extractors were tuned
+against different ones: the PyPDF2-based extractors expect PyPDF2's line
+breaks, the pdfplumber-based ones pdfplumber's. ``as_pypdf2()`` and
+``as_pdfplumber()`` return reader-like views (``.pages[i].extract_text()``
+etc.) so those extractors can run over the cache unchanged.
+
+Page text comes from the repo's pdf_text stage: pages are extracted in
+parallel and kept on disk per PDF hash, so a re-run skips them.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import PyPDF2
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+# pdf_text lives at the repository root, next to the report templates
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pdf_text import extract_pages
+
+PYPDF2 = "pypdf2"
+PDFPLUMBER = "pdfplumber"
+
+
+class _CachedPage:
+    """One page of a backend view; every extraction result is cached on the document."""
+
+    def __init__(self, document, backend, page_no):
+        self.document = document
+        self.backend = backend
+        self.page_no = page_no
+
+    def extract_text(self):
+        return self.document.page_text(self.page_no, self.backend)
+
+    def extract_words(self):
+        return self.document.page_words(self.page_no)
+
+    def extract_tables(self):
+        return self.document.page_tables(self.page_no)
+
+
+class _BackendView:
+    """Reader-like view of a ReportDocument for code written against PdfReader / pdfplumber.PDF."""
+
+    def __init__(self, document, backend):
+        self.pages = [_CachedPage(document, backend, i) for i in range(document.page_count)]
+
+
+class ReportDocument:
+    """A lab report PDF, opened once, with per-page text, words and tables cached."""
+
+    def __init__(self, pdf_path):
+        self.pdf_path = Path(pdf_path)
+        self._reader = None
+        self._plumber = None
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    # === Backends ===
+
+    def _pypdf2(self):
+        if self._reader is None:
+            # PdfReader reads the whole file into memory, so no handle is kept open
+            self._reader = PyPDF2.PdfReader(str(self.pdf_path))
+        return self._reader
+
+    def _pdfplumber(self):
+        if pdfplumber is None:
+            raise ImportError("pdfplumber is required for word and table extraction")
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.pdf_path)
+        return self._plumber
+
+    def _cached(self, key, compute):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    @property
+    def page_count(self):
+        return self._cached("page_count", lambda: len(
+            self._plumber.pages if self._plumber is not None else self._pypdf2().pages
+        ))
+
+    # === Per-page content ===
+
+    def page_texts(self, backend=PYPDF2):
+        """Text of every page as the given backend extracts it ("" for pages without text)."""
+        return self._cached((backend, "text"), lambda: extract_pages(self.pdf_path, backend))
+
+    def page_text(self, page_no, backend=PYPDF2):
+        return self.page_texts(backend)[page_no]
+
+    def page_words(self, page_no):
+        """pdfplumber words (text plus x0/x1/top/bottom) of page ``page_no``."""
+        return self._cached((PDFPLUMBER, "words", page_no),
+                            lambda: self._pdfplumber().pages[page_no].extract_words())
+
+    def page_tables(self, page_no):
+        """pdfplumber tables (lists of rows) of page ``page_no``."""
+        return self._cached((PDFPLUMBER, "tables", page_no),
+                            lambda: self._pdfplumber().pages[page_no].extract_tables())
+
+    # === Whole document ===
+
+    def text(self, backend=PYPDF2):
+        """All pages' text, each followed by a newline (what the extractors used to build with +=)."""
+        return self._cached((backend, "full_text"), lambda: "".join(
+            [text + "\n" for text in self.page_texts(backend)]
+        ))
+
+    def lines(self, backend=PYPDF2):
+        return self._cached((backend, "lines"), lambda: self.text(backend).split("\n"))
+
+    def as_pypdf2(self):
+        return _BackendView(self, PYPDF2)
+
+    def as_pdfplumber(self):
+        return _BackendView(self, PDFPLUMBER)
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -9,7 +9,7 @@ import json
 import sys
 from pathlib import Path
 try:
-    import PyPDF2
+    from page_model import ReportDocument
 except ImportError:
     print("Error: PyPDF2 not installed. Install with: pip install PyPDF2")
     sys.exit(1)
@@ -18,8 +18,10 @@ except ImportError:
 class BiomarkerExtractor:
     """Extract and standardize biomarker data from medical lab reports."""
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None):
         self.pdf_path = Path(pdf_path)
+        # Shared page model when run by the extraction engine
+        self.document = document
         self.text = ""
         self.biomarkers = {}
         self.patient_info = {}
@@ -27,12 +29,9 @@ class BiomarkerExtractor:
     def extract_text_from_pdf(self):
         """Extract all text from PDF file."""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                self.text = ""
-                for page in reader.pages:
-                    self.text += page.extract_text() + "\n"
-            print(f"✓ Extracted text from {len(reader.pages)} pages")
+            document = self.document or ReportDocument(self.pdf_path)
+            self.text = document.text()
+            print(f"✓ Extracted text from {document.page_count} pages")
             return True
         except Exception as e:
             print(f"Error reading PDF: {e}")
@@ -10,6 +10,17 @@ from pathlib import Path
 import anthropic
 import PyPDF2
 
+# extraction_cache and pdf_text live at the repository root
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from extraction_cache import extraction_cache, file_hash, result_key
+from pdf_text import pdf_hash as hash_pdf
+
+MODEL = "claude-3-haiku-20240307"
+# Responses and results of this script are cached under this name
+EXTRACTOR = "lipomics"
+# A cached result is reused only while this script is unchanged
+CODE_HASH = file_hash(__file__)
+
 # The LIPOMICS extraction prompt
 LIPOMICS_PROMPT = """**Parse this medical laboratory report and convert it to standardized JSON format. Extract all available LIPOMICS biomarkers. Return only a single JSON object with patient information and biomarker values (skip all null/missing values).**
 
@@ -75,6 +86,13 @@ def extract_text_from_pdf(pdf_path: str) -> str:
 def process_pdf_with_claude(pdf_path: str, api_key: str) -> dict | None:
     """Process PDF and extract LIPOMICS data."""
     try:
+        pdf_hash = hash_pdf(pdf_path)
+        key = result_key(pdf_hash, EXTRACTOR, MODEL, LIPOMICS_PROMPT, CODE_HASH)
+        cached = extraction_cache.get_result(key)
+        if cached is not None:
+            print(f"✓ Result taken from the extraction cache")
+            return cached[0]
+        
         print(f"Extracting text from PDF...")
         text = extract_text_from_pdf(pdf_path)
         
@@ -88,9 +106,9 @@ def process_pdf_with_claude(pdf_path: str, api_key: str) -> dict | None:
         # Initialize client
         client = anthropic.Anthropic(api_key=api_key)
         
-        # Create message
-        message = client.messages.create(
-            model="claude-3-haiku-20240307",
+        # Create message, unless this exact request was answered before
+        request = dict(
+            model=MODEL,
             max_tokens=4096,
             temperature=0,
             messages=[
@@ -100,44 +118,18 @@ def process_pdf_with_claude(pdf_path: str, api_key: str) -> dict | None:
                 }
             ]
         )
-        
-        # Extract JSON from response
-        response_text = message.content[0].text.strip()
-        print(f"Response received: {response_text[:200]}...")
-        
-        # Parse JSON
-        json_text = None
-        
-        # Try to find JSON in code blocks
-        if "```json" in response_text:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            if json_end > json_start:
-                json_text = response_text[json_start:json_end].strip()
-        elif "```" in response_text:
-            json_start = response_text.find("```") + 3
-            json_end = response_text.find("```", json_start)
-            if json_end > json_start:
-                json_text = response_text[json_start:json_end].strip()
-        
-        # Try to find JSON object
-        if not json_text:
-            first_brace = response_text.find("{")
-            last_brace = response_text.rfind("}")
-            if first_brace >= 0 and last_brace > first_brace:
-                json_text = response_text[first_brace:last_brace + 1]
-        
-        if not json_text:
-            print("Error: Could not extract JSON from response")
-            print(f"Full response: {response_text}")
-            return None
-        
-        result = json.loads(json_text)
+        result, message = extraction_cache.response_json(
+            request, lambda request: client.messages.create(**request),
+            pdf_hash=pdf_hash, extractor=EXTRACTOR, prompt=LIPOMICS_PROMPT, chunk=text)
+        if message is None:
+            print(f"Response taken from the extraction cache")
         
         # Add default values if missing
         if "cycle" not in result:
             result["cycle"] = "All"
         
+        extraction_cache.put_result(key, result, pdf_hash=pdf_hash, extractor=EXTRACTOR, model=MODEL,
+                                    prompt=LIPOMICS_PROMPT, code_hash=CODE_HASH)
         print(f"✓ Successfully extracted data")
         return result
         
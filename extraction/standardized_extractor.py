@@ -8,7 +8,16 @@ import re
 import json
 import sys
 from pathlib import Path
-import PyPDF2
+
+from multi_pattern import MultiPatternMatcher
+from page_model import ReportDocument
+
+# Qualitative results (for tests like HBSAG, urine tests, etc.), checked before numbers
+QUALITATIVE_RES = [
+    re.compile(r'\b(NON REACTIVE|REACTIVE|POSITIVE|NEGATIVE|ABSENT|PRESENT|NIL|TRACE)\b', re.IGNORECASE),
+    re.compile(r'\b(DETECTED|NOT DETECTED|NORMAL|ABNORMAL)\b', re.IGNORECASE),
+]
+NUMBER_RE = re.compile(r'(\d+\.?\d*)')
 
 
 class StandardizedBiomarkerExtractor:
@@ -195,8 +204,10 @@ class StandardizedBiomarkerExtractor:
         'HBSAG': ('HEPATITIS B SURFACE ANTIGEN|HBSAG', 'HEPATITIS B SURFACE ANTIGEN(HBSAG) RAPID TEST', '#', None),
     }
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None):
         self.pdf_path = Path(pdf_path)
+        # Shared page model when run by the extraction engine
+        self.document = document
         self.text = ""
         self.patient_info = {}
         self.biomarkers = {}
@@ -204,11 +215,8 @@ class StandardizedBiomarkerExtractor:
     def extract_text_from_pdf(self):
         """Extract all text from PDF file."""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                self.text = ""
-                for page in reader.pages:
-                    self.text += page.extract_text() + "\n"
+            document = self.document or ReportDocument(self.pdf_path)
+            self.text = document.text()
             return True
         except Exception as e:
             print(f"Error reading PDF: {e}")
@@ -247,48 +255,53 @@ class StandardizedBiomarkerExtractor:
                     self.patient_info['cycle'] = 'All'
                     break
     
+    @classmethod
+    def matcher(cls):
+        """One-pass matcher over every search pattern of BIOMARKER_MAP, built on first use."""
+        if cls.__dict__.get('_matcher') is None:
+            cls._matcher = MultiPatternMatcher([entry[0] for entry in cls.BIOMARKER_MAP.values()])
+        return cls._matcher
+
     def find_value_for_biomarker(self, search_pattern, value_range=None):
         """Find numeric or qualitative value for a biomarker based on search pattern."""
-        lines = self.text.split('\n')
-        
-        for i, line in enumerate(lines):
-            # Check if line matches the biomarker pattern
-            if re.search(search_pattern, line, re.IGNORECASE):
-                # Look in current line and nearby lines
-                search_lines = [line] + lines[max(0, i-2):min(len(lines), i+3)]
-                
-                for search_line in search_lines:
-                    # First check for qualitative values (for tests like HBSAG, urine tests, etc.)
-                    qualitative_patterns = [
-                        r'\b(NON REACTIVE|REACTIVE|POSITIVE|NEGATIVE|ABSENT|PRESENT|NIL|TRACE)\b',
-                        r'\b(DETECTED|NOT DETECTED|NORMAL|ABNORMAL)\b'
-                    ]
-                    
-                    for qual_pattern in qualitative_patterns:
-                        qual_match = re.search(qual_pattern, search_line, re.IGNORECASE)
-                        if qual_match:
-                            return qual_match.group(1).upper()
-                    
-                    # Then check for numeric patterns (including decimals)
-                    matches = re.findall(r'(\d+\.?\d*)', search_line)
-                    
-                    for match in matches:
-                        try:
-                            value = float(match)
-                            
-                            # If value range specified, check if value is in range
-                            if value_range:
-                                if value_range[0] <= value <= value_range[1]:
-                                    return value
-                            else:
-                                # For markers without range (like categorical), return if reasonable
-                                if value < 1000000:  # Sanity check
-                                    return value
-                        except ValueError:
-                            continue
-        
+        if getattr(self, '_indexed_text', None) is not self.text:
+            self.lines = self.text.split('\n')
+            self.pattern_lines = self.matcher().scan(self.lines)
+            self._indexed_text = self.text
+        lines = self.lines
+
+        match_lines = self.pattern_lines.get(search_pattern)
+        if match_lines is None:
+            search = re.compile(search_pattern, re.IGNORECASE).search
+            match_lines = self.pattern_lines[search_pattern] = [i for i, line in enumerate(lines) if search(line)]
+
+        for i in match_lines:
+            line = lines[i]
+            # Look in current line and nearby lines
+            search_lines = [line] + lines[max(0, i-2):min(len(lines), i+3)]
+
+            for search_line in search_lines:
+                # First check for qualitative values
+                for qual_re in QUALITATIVE_RES:
+                    qual_match = qual_re.search(search_line)
+                    if qual_match:
+                        return qual_match.group(1).upper()
+
+                # Then check for numeric patterns (including decimals)
+                for match in NUMBER_RE.findall(search_line):
+                    value = float(match)
+
+                    # If value range specified, check if value is in range
+                    if value_range:
+                        if value_range[0] <= value <= value_range[1]:
+                            return value
+                    else:
+                        # For markers without range (like categorical), return if reasonable
+                        if value < 1000000:  # Sanity check
+                            return value
+
         return None
-    
+
     def extract_all_biomarkers(self):
         """Extract all biomarkers using standardized mapping."""
         for key, (search_pattern, standard_name, standard_unit, value_range) in self.BIOMARKER_MAP.items():
@@ -9,13 +9,16 @@ import re
 import json
 import sys
 from pathlib import Path
+from contextlib import nullcontext
 
 
 class ThyrocareExtractorPlumber:
     """Extract biomarkers from THYROCARE PDF using pdfplumber."""
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None):
         self.pdf_path = Path(pdf_path)
+        # Shared page model when run by the extraction engine
+        self.document = document
         self.patient_info = {}
         self.biomarkers = {}
         self.all_text = ""
@@ -202,6 +205,12 @@ class ThyrocareExtractorPlumber:
                     self.biomarkers[test_name] = value
                 continue
     
+    def open_pdf(self):
+        """The PDF, or a pdfplumber-like view of the engine's shared page model."""
+        if self.document is not None:
+            return nullcontext(self.document.as_pdfplumber())
+        return pdfplumber.open(self.pdf_path)
+    
     def process(self):
         """Main processing pipeline."""
         print(f"\n{'='*80}")
@@ -210,7 +219,7 @@ class ThyrocareExtractorPlumber:
         print(f"Processing: {self.pdf_path.name}\n")
         
         try:
-            with pdfplumber.open(self.pdf_path) as pdf:
+            with self.open_pdf() as pdf:
                 # Extract patient info from first page
                 if len(pdf.pages) > 0:
                     first_page_text = pdf.pages[0].extract_text()
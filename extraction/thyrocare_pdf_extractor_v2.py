@@ -3,18 +3,21 @@
 THYROCARE PDF Extractor v2 - Maximum accuracy with relaxed patterns
 """
 
-import PyPDF2
 import re
 import json
 import sys
 from pathlib import Path
 
+from page_model import ReportDocument
+
 
 class ThyrocarePDFExtractorV2:
     """Extract biomarkers from THYROCARE PDF reports."""
     
-    def __init__(self, pdf_path):
+    def __init__(self, pdf_path, document=None):
         self.pdf_path = Path(pdf_path)
+        # Shared page model when run by the extraction engine
+        self.document = document
         self.patient_info = {}
         self.biomarkers = {}
         self.all_text = ""
@@ -23,12 +26,10 @@ class ThyrocarePDFExtractorV2:
     def extract_text_from_pdf(self):
         """Extract all text from PDF."""
         try:
-            with open(self.pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page in reader.pages:
-                    self.all_text += page.extract_text() + "\n"
-                self.lines = self.all_text.split('\n')
-                return True
+            document = self.document or ReportDocument(self.pdf_path)
+            self.all_text += document.text()
+            self.lines = self.all_text.split('\n')
+            return True
         except Exception as e:
             print(f"Error reading PDF: {e}")
             return False
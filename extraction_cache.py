@@ -0,0 +1,379 @@
+# === extraction_cache.py ===
+"""
+Persistent cache of Claude extraction responses and merged results.
+
+Every run of the Thyrocare scripts and the extraction/prompts extractors
+sent the report to the API again, even for a byte-identical PDF. Two
+tables in one SQLite file (WAL mode, so parallel batch runs can share it)
+avoid that:
+
+* ``responses``: the raw response text of each request, keyed by the
+  SHA-256 of the whole request (model, prompt, chunk text, max_tokens,
+  temperature). The request key changes whenever the prompt, model or chunk
+  changes, so a stale answer is never served. Only responses that parse
+  (parse_response_json) are stored, so a garbled answer is asked for again
+  rather than served forever. Responses are parsed and merged again on
+  every run, so changing the merge step costs no API calls.
+* ``results``: the merged JSON (and chunk provenance) per PDF hash,
+  extractor, model, prompt and code hash of the script, returned without
+  touching the PDF text or the chunk cache. The extractors store a merged
+  result only when every chunk produced one.
+
+Both tables record the PDF hash, extractor, model and prompt hash, so they
+can be invalidated by any of them. The least recently used rows are evicted
+once the file holds more than EXTRACTION_CACHE_MAX_MB of payload.
+
+    python extraction_cache.py stats
+    python extraction_cache.py invalidate --pdf report.pdf
+    python extraction_cache.py invalidate --extractor oligoscan --results-only
+    python extraction_cache.py prune --max-mb 100
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# === Configuration ===
+EXTRACTION_CACHE_ENABLED = os.environ.get("EXTRACTION_CACHE_ENABLED", "1") == "1"
+EXTRACTION_CACHE_PATH = os.environ.get("EXTRACTION_CACHE_PATH", ".extraction_cache.sqlite3")
+EXTRACTION_CACHE_MAX_MB = float(os.environ.get("EXTRACTION_CACHE_MAX_MB", 512))
+# Check the size limit every this many writes
+EVICT_EVERY = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    pdf_hash TEXT,
+    extractor TEXT,
+    model TEXT,
+    prompt_hash TEXT,
+    chunk_hash TEXT,
+    response TEXT NOT NULL,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    pdf_hash TEXT,
+    extractor TEXT,
+    model TEXT,
+    prompt_hash TEXT,
+    code_hash TEXT,
+    result TEXT NOT NULL,
+    provenance TEXT,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_pdf ON responses (pdf_hash);
+CREATE INDEX IF NOT EXISTS responses_used ON responses (last_used);
+CREATE INDEX IF NOT EXISTS results_pdf ON results (pdf_hash);
+CREATE INDEX IF NOT EXISTS results_used ON results (last_used);
+"""
+
+TABLES = ("responses", "results")
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(*paths):
+    """SHA-256 over the contents of the given files (the code version of an extractor)."""
+    sha = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def request_key(request):
+    """Key of a ``messages.create`` request: every argument that can change the answer."""
+    return text_hash(json.dumps(request, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def result_key(pdf_hash, extractor, model, prompt, code_hash):
+    return text_hash("\0".join([pdf_hash, extractor, model, text_hash(prompt), code_hash]))
+
+
+def parse_response_json(text):
+    """
+    The JSON object of a response: the first ```json (or ```) block, else
+    everything from the first ``{`` to the last ``}``. Raises ValueError
+    (json.JSONDecodeError included) when there is none.
+    """
+    text = text.strip()
+    json_text = None
+    if "```json" in text:
+        json_start = text.find("```json") + 7
+        json_end = text.find("```", json_start)
+        if json_end > json_start:
+            json_text = text[json_start:json_end].strip()
+    elif "```" in text:
+        json_start = text.find("```") + 3
+        json_end = text.find("```", json_start)
+        if json_end > json_start:
+            json_text = text[json_start:json_end].strip()
+    if not json_text:
+        first_brace = text.find("{")
+        last_brace = text.rfind("}")
+        if first_brace >= 0 and last_brace > first_brace:
+            json_text = text[first_brace:last_brace + 1]
+    if not json_text:
+        raise ValueError(f"no JSON in the response: {text[:200]!r}")
+    return json.loads(json_text)
+
+
+class ExtractionCache:
+    """SQLite store of responses and merged results (a no-op when disabled)."""
+
+    def __init__(self, path=EXTRACTION_CACHE_PATH, max_mb=EXTRACTION_CACHE_MAX_MB,
+                 enabled=EXTRACTION_CACHE_ENABLED):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _db(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _get(self, table, column, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            db = self._db()
+            row = db.execute(f"SELECT {column} FROM {table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute(f"UPDATE {table} SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row
+
+    def _put(self, table, row):
+        if not self.enabled:
+            return
+        now = time.time()
+        row = {**row, "created": now, "last_used": now}
+        columns = ", ".join(row)
+        with self._lock:
+            self._db().execute(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({', '.join('?' * len(row))})",
+                               tuple(row.values()))
+            self._writes += 1
+            due = self._writes % EVICT_EVERY == 0
+        if due:
+            self.evict()
+
+    # === Responses ===
+
+    def get_response(self, request):
+        """Cached response text of ``request`` (the ``messages.create`` kwargs), or None."""
+        row = self._get("responses", "response", request_key(request))
+        return row[0] if row else None
+
+    def put_response(self, request, text, message=None, pdf_hash=None, extractor=None, prompt=None, chunk=None):
+        usage = getattr(message, "usage", None)
+        self._put("responses", {
+            "key": request_key(request),
+            "pdf_hash": pdf_hash,
+            "extractor": extractor,
+            "model": request.get("model"),
+            "prompt_hash": text_hash(prompt) if prompt is not None else None,
+            "chunk_hash": text_hash(chunk) if chunk is not None else None,
+            "response": text,
+            "input_tokens": getattr(usage, "input_tokens", None),
+            "output_tokens": getattr(usage, "output_tokens", None),
+            "size": len(text.encode("utf-8")),
+        })
+
+    def drop_response(self, request):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._db().execute("DELETE FROM responses WHERE key = ?", (request_key(request),))
+
+    def get_response_json(self, request, parse=None):
+        """
+        Cached response of ``request`` parsed by ``parse`` (parse_response_json),
+        or None. A stored text that does not parse is dropped, so it is asked for again.
+        """
+        text = self.get_response(request)
+        if text is None:
+            return None
+        try:
+            return (parse or parse_response_json)(text)
+        except ValueError as e:
+            print(f"[extraction_cache] dropping a cached response that does not parse: {e}")
+            self.drop_response(request)
+            return None
+
+    def response_json(self, request, send, parse=None, **labels):
+        """
+        ``(result, message)`` for ``request``: the parsed cached response
+        (message None), or the parsed first content block of ``send(request)``.
+        A new response is stored only once it parsed; otherwise the ValueError
+        is raised and nothing is kept, so a retry asks the API again.
+        ``labels`` are put_response's pdf_hash/extractor/prompt/chunk.
+        """
+        parse = parse or parse_response_json
+        result = self.get_response_json(request, parse)
+        if result is not None:
+            return result, None
+        message = send(request)
+        text = message.content[0].text
+        result = parse(text)
+        self.put_response(request, text, message, **labels)
+        return result, message
+
+    # === Merged results ===
+
+    def get_result(self, key):
+        """``(result, provenance)`` stored under ``key`` (see result_key), or None."""
+        row = self._get("results", "result, provenance", key)
+        if row is None:
+            return None
+        return json.loads(row[0]), json.loads(row[1]) if row[1] else None
+
+    def put_result(self, key, result, provenance=None, pdf_hash=None, extractor=None, model=None,
+                   prompt=None, code_hash=None):
+        result_json = json.dumps(result)
+        provenance_json = json.dumps(provenance) if provenance is not None else None
+        self._put("results", {
+            "key": key,
+            "pdf_hash": pdf_hash,
+            "extractor": extractor,
+            "model": model,
+            "prompt_hash": text_hash(prompt) if prompt is not None else None,
+            "code_hash": code_hash,
+            "result": result_json,
+            "provenance": provenance_json,
+            "size": len(result_json) + len(provenance_json or ""),
+        })
+
+    # === Maintenance ===
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used rows (of either table) until the payload fits ``max_bytes``."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            db = self._db()
+            total = sum(db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+                        for table in TABLES)
+            if total <= max_bytes:
+                return 0
+            rows = db.execute("SELECT 'responses', key, size, last_used FROM responses "
+                              "UNION ALL SELECT 'results', key, size, last_used FROM results "
+                              "ORDER BY last_used").fetchall()
+            doomed = []
+            for table, key, size, _ in rows:
+                if total <= max_bytes:
+                    break
+                doomed.append((table, key))
+                total -= size
+            db.execute("BEGIN")
+            for table, key in doomed:
+                db.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+            db.execute("COMMIT")
+        return len(doomed)
+
+    def invalidate(self, pdf_hash=None, extractor=None, model=None, prompt_hash=None, older_than=None,
+                   results_only=False):
+        """Delete matching rows (all rows if no filter is given); returns ``{table: count}``."""
+        conditions, params = [], []
+        for column, value in (("pdf_hash", pdf_hash), ("extractor", extractor), ("model", model),
+                              ("prompt_hash", prompt_hash)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if older_than is not None:
+            conditions.append("last_used < ?")
+            params.append(time.time() - older_than)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        counts = {}
+        with self._lock:
+            db = self._db()
+            for table in (("results",) if results_only else TABLES):
+                counts[table] = db.execute(f"DELETE FROM {table}{where}", params).rowcount
+        return counts
+
+    def stats(self):
+        with self._lock:
+            db = self._db()
+            return {table: dict(zip(("rows", "bytes"), db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone())) for table in TABLES}
+
+    def vacuum(self):
+        with self._lock:
+            self._db().execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+extraction_cache = ExtractionCache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and invalidate the extraction cache.")
+    parser.add_argument("--path", default=EXTRACTION_CACHE_PATH, help="Cache database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Rows and payload size per table")
+
+    invalidate = commands.add_parser("invalidate", help="Delete cached entries (all of them without filters)")
+    invalidate.add_argument("--pdf", help="PDF file whose entries to delete")
+    invalidate.add_argument("--pdf-hash", help="SHA-256 of the PDF whose entries to delete")
+    invalidate.add_argument("--extractor", help="Extractor name, e.g. thyrocare_final or oligoscan")
+    invalidate.add_argument("--model", help="Model name")
+    invalidate.add_argument("--prompt-hash", help="SHA-256 of the prompt text")
+    invalidate.add_argument("--older-than-days", type=float, help="Only entries unused for this many days")
+    invalidate.add_argument("--results-only", action="store_true",
+                            help="Keep the API responses, drop only merged results")
+
+    prune = commands.add_parser("prune", help="Evict least recently used entries down to a size")
+    prune.add_argument("--max-mb", type=float, default=EXTRACTION_CACHE_MAX_MB)
+
+    args = parser.parse_args()
+    cache = ExtractionCache(args.path, enabled=True)
+
+    if args.command == "stats":
+        for table, counts in cache.stats().items():
+            print(f"{table}: {counts['rows']} rows, {counts['bytes'] / 1024:.1f} KB")
+    elif args.command == "invalidate":
+        pdf_hash = args.pdf_hash
+        if args.pdf:
+            from pdf_text import pdf_hash as hash_pdf
+
+            pdf_hash = hash_pdf(args.pdf)
+        older_than = args.older_than_days * 86400 if args.older_than_days is not None else None
+        counts = cache.invalidate(pdf_hash=pdf_hash, extractor=args.extractor, model=args.model,
+                                  prompt_hash=args.prompt_hash, older_than=older_than,
+                                  results_only=args.results_only)
+        print(", ".join(f"{table}: {count} deleted" for table, count in counts.items()))
+        cache.vacuum()
+    elif args.command == "prune":
+        print(f"{cache.evict(int(args.max_mb * 1024 * 1024))} entries evicted")
+        cache.vacuum()
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,17 @@
-import PyPDF2
 import json
-import re
 from datetime import datetime
 import os
 
+import pdf_text
+from report_patterns import FINAL_PATIENT_PATTERNS, PATTERNS
+
+MEDICATION_ROW = PATTERNS["medication_row"].regex
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF using PyPDF2"""
     text = ""
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        text = pdf_text.extract_text(pdf_path, backend="pypdf2", skip_empty=False)
     except Exception as e:
         print(f"Error with PyPDF2: {e}")
     return text
@@ -32,16 +32,18 @@ def parse_extracted_text(text):
         "diet": "Vegetarian"
     }
     
+    hits = FINAL_PATIENT_PATTERNS.scan(text)
+
     # Extract age and gender from text
-    age_gender_match = re.search(r'(\d+)\s*years?,\s*(Male|Female)', text, re.IGNORECASE)
+    age_gender_match = hits["age_gender"]
     if age_gender_match:
-        patient_info["age"] = age_gender_match.group(1)
-        patient_info["gender"] = age_gender_match.group(2)
+        patient_info["age"] = age_gender_match.group("age")
+        patient_info["gender"] = age_gender_match.group("gender")
     
     # Extract date
-    date_match = re.search(r'Date:\s*(\d{2}-\d{2}-\d{4})', text, re.IGNORECASE)
+    date_match = hits["colon_date"]
     if date_match:
-        patient_info["assessment_date"] = date_match.group(1)
+        patient_info["assessment_date"] = date_match.group("date")
     
     # Extract diagnoses
     diagnoses = []
@@ -61,20 +63,18 @@ def parse_extracted_text(text):
         prescription_section = text.split("Prescription")[1]
         
         # Parse medication data
-        med_pattern = r'(\d+)\s*([A-Za-z\s]+?)\s*(\d+\s*(?:tablet|capsule|mg|mcg|cream))?\s*(\d+[mgmcg]*)?\s*([0-9-]+)\s*([A-Za-z\s]+?)\s*(\d+\s*months?)\s*(Day\s*\d+)\s*([A-Za-z\s@]+)'
-        
-        med_matches = re.finditer(med_pattern, prescription_section, re.IGNORECASE | re.MULTILINE)
+        med_matches = MEDICATION_ROW.finditer(prescription_section)
         
         for match in med_matches:
-            med_num = match.group(1)
-            med_name = match.group(2).strip()
-            dosage = match.group(3) if match.group(3) else "1 tablet"
-            strength = match.group(4) if match.group(4) else ""
-            frequency = match.group(5) if match.group(5) else "1-0-0"
-            timing = match.group(6).strip() if match.group(6) else "After meal"
-            duration = match.group(7) if match.group(7) else "2 months"
-            start_from = match.group(8) if match.group(8) else "Day 1"
-            availability = match.group(9).strip() if match.group(9) else "Available @ PMX"
+            med_num = match.group("number")
+            med_name = match.group("name").strip()
+            dosage = match.group("dosage") if match.group("dosage") else "1 tablet"
+            strength = match.group("strength") if match.group("strength") else ""
+            frequency = match.group("frequency") if match.group("frequency") else "1-0-0"
+            timing = match.group("timing").strip() if match.group("timing") else "After meal"
+            duration = match.group("duration") if match.group("duration") else "2 months"
+            start_from = match.group("start_from") if match.group("start_from") else "Day 1"
+            availability = match.group("availability").strip() if match.group("availability") else "Available @ PMX"
             
             medication = {
                 "name": med_name,
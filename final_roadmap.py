@@ -3,8 +3,8 @@
 import os
 import io
 from pathlib import Path
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import List
 from io import BytesIO
@@ -32,7 +32,14 @@ from reportlab.platypus import Image as RLImage
 
 # SVG Rendering
 from reportlab.graphics import renderPDF
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from page_numbering import DeferredPageCountCanvas
+from image_assets import image_store, AssetImage
+from fragment_cache import CachedFragment, draw_fragment, drawing_bounds
+from gradient_bars import GradientBar, color_at
+from style_registry import shared_stylesheet, StyleSheetOverlay, sample_styles
+from render_pool import RenderPool, render_pdf_response
+from batch_render import check_batch_payloads, render_batch_zip
 
 # JSON Handling (optional if needed)
 import json
@@ -139,7 +146,7 @@ class PDFStyleConfig:
         self.FONT_LARGE = 18
         self.FONT_MEDIUM = 12
         self.FONT_SMALL = 10
-        self.styles = getSampleStyleSheet()
+        self.styles = sample_styles()
 
         # --- Paragraph Styles (example) ---
         self.heading_style = ParagraphStyle(
@@ -174,6 +181,23 @@ class ThrivePageRenderer:
     def __init__(self, template):
         self.template = template
 
+    @staticmethod
+    def paint_cover_gradient(canvas, width, height):
+        steps = int(height)
+        for i in range(steps):
+            pos = i / steps
+            if pos <= 0.4529:
+                factor = pos / 0.4529
+                r, g, b = 0, int(32 * factor), int(30 * factor)
+            else:
+                factor = (pos - 0.4529) / (1 - 0.4529)
+                r = int(21 * factor)
+                g = int(32 + (10 * factor))
+                b = int(30 + (10 * factor))
+            canvas.setFillColorRGB(r / 255, g / 255, b / 255)
+            y = height * i / steps
+            canvas.rect(0, y, width, height / steps, fill=1, stroke=0)
+
     def draw_header(self, canvas, doc):
         width, height = A4
         canvas.saveState()
@@ -184,34 +208,31 @@ class ThrivePageRenderer:
             x = 100
             y = PAGE_HEIGHT - 200
             style.draw_glow_text(canvas, "Thrive Limitless", x, y)
-            steps = int(height)
-            for i in range(steps):
-                pos = i / steps
-                if pos <= 0.4529:
-                    factor = pos / 0.4529
-                    r, g, b = 0, int(32 * factor), int(30 * factor)
-                else:
-                    factor = (pos - 0.4529) / (1 - 0.4529)
-                    r = int(21 * factor)
-                    g = int(32 + (10 * factor))
-                    b = int(30 + (10 * factor))
-                canvas.setFillColorRGB(r / 255, g / 255, b / 255)
-                y = height * i / steps
-                canvas.rect(0, y, width, height / steps, fill=1, stroke=0)
+            # The cover gradient is the same in every report: painted once, then one Do per document
+            draw_fragment(canvas, "roadmap-cover-gradient", 0, 0, width, height,
+                          lambda c: self.paint_cover_gradient(c, width, height))
         else:
             try:
-                drawing = svg2rlg("staticfiles/reports/toc.svg")
+                def apply_opacity(d, alpha):
+                    for e in d.contents:
+                        if hasattr(e, 'fillOpacity'):
+                            e.fillOpacity = alpha
+                        if hasattr(e, 'strokeOpacity'):
+                            e.strokeOpacity = alpha
+                        if hasattr(e, 'contents'):
+                            apply_opacity(e, alpha)
+                    return d
+                # Opacity is applied once to the cached variant, not per page
+                toc_path = "staticfiles/reports/toc.svg"
+                drawing = load_svg(
+                    toc_path,
+                    variant="opacity-0.1",
+                    prepare=lambda d: apply_opacity(d, 0.1),
+                )
                 if drawing:
-                    def apply_opacity(d, alpha):
-                        for e in d.contents:
-                            if hasattr(e, 'fillOpacity'):
-                                e.fillOpacity = alpha
-                            if hasattr(e, 'strokeOpacity'):
-                                e.strokeOpacity = alpha
-                            if hasattr(e, 'contents'):
-                                apply_opacity(e, alpha)
-                    apply_opacity(drawing, 0.1)
-                    renderPDF.draw(drawing, canvas, x=0, y=0)
+                    key = ("toc-background", toc_path, os.stat(toc_path).st_mtime_ns)
+                    draw_fragment(canvas, key, 0, 0, PAGE_WIDTH, PAGE_HEIGHT,
+                                  lambda c: renderPDF.draw(drawing, c, x=0, y=0))
             except Exception as e:
                 print("SVG load failed:", e)
 
@@ -233,10 +254,12 @@ class ThrivePageRenderer:
         logo = self.template._get_logo()
 
         if isinstance(logo, ThriveRoadmapOnlySVGImage):
-            drawing = svg2rlg(logo.filename)
+            drawing = load_svg(logo.filename)
             if drawing:
                 drawing.scale(logo_width / drawing.width, logo_height / drawing.height)
-                renderPDF.draw(drawing, canvas, x=logo_x, y=logo_y)
+                key = ("footer-logo", logo.filename, os.stat(logo.filename).st_mtime_ns)
+                draw_fragment(canvas, key, logo_x, logo_y, logo_width, logo_height,
+                              lambda c: renderPDF.draw(drawing, c, x=0, y=0), drawing_bounds(drawing))
         elif isinstance(logo, Image):
             canvas.drawImage(logo.filename, logo_x, logo_y, width=logo_width, height=logo_height, mask='auto')
         else:
@@ -246,23 +269,8 @@ class ThrivePageRenderer:
 
         canvas.restoreState()
 
-class NumberedCanvas(Canvas):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        total_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(total_pages)
-            super().showPage()
-        super().save()
-
+class NumberedCanvas(DeferredPageCountCanvas):
+    # Footers are filled in at save() time via per-page forms, see page_numbering.py
     def draw_page_number(self, total_pages):
         page_number = self.getPageNumber()
         if page_number <= 2:
@@ -380,7 +388,7 @@ class RoundedPill1(Flowable):
         self.icon_drawing = None
         if self.icon_path and os.path.exists(self.icon_path):
             try:
-                drawing = svg2rlg(self.icon_path)
+                drawing = load_svg(self.icon_path)
                 if drawing.width > 0 and drawing.height > 0:
                     scale_x = self.icon_width / drawing.width
                     scale_y = self.icon_height / drawing.height
@@ -530,12 +538,6 @@ class GradientScoreBar:
                      int(hex_code[2:4], 16) / 255.0,
                      int(hex_code[4:6], 16) / 255.0)
 
-    def interpolate_color(self, c1, c2, t):
-        r = c1.red + (c2.red - c1.red) * t
-        g = c1.green + (c2.green - c1.green) * t
-        b = c1.blue + (c2.blue - c1.blue) * t
-        return Color(r, g, b)
-
     def lighten_color(self, color, factor=0.4):
         return Color(
             color.red + (1.0 - color.red) * factor,
@@ -543,13 +545,6 @@ class GradientScoreBar:
             color.blue + (1.0 - color.blue) * factor
         )
 
-    def get_multicolor_gradient(self, t):
-        for i in range(len(self.gradient_colors) - 1):
-            if self.gradient_colors[i][0] <= t <= self.gradient_colors[i + 1][0]:
-                t_local = (t - self.gradient_colors[i][0]) / (self.gradient_colors[i + 1][0] - self.gradient_colors[i][0])
-                return self.interpolate_color(self.gradient_colors[i][1], self.gradient_colors[i + 1][1], t_local)
-        return self.gradient_colors[-1][1]
-
     def draw(self):
         radius = 16
         pill_h = 20
@@ -597,13 +592,10 @@ class GradientScoreBar:
         d.add(Rect(0, bar_y, self.width, self.height, rx=radius, ry=radius, fillColor=white, strokeColor=None))
 
         # Gradient segments
-        segments = 600
-        for i in range(segments):
-            t = i / (segments - 1)
-            color = self.get_multicolor_gradient(t)
-            x = t * self.width
-            seg_width = self.width / segments
-            d.add(Rect(x, bar_y, seg_width + 1, self.height, fillColor=color, strokeColor=None))
+        # (painted to the same extent as the old 600-segment bar, whose last segment overhung)
+        gradient = GradientBar(0, bar_y, self.width, self.height, self.gradient_colors,
+                          extent=self.width + self.width / 600 + 1)
+        d.add(gradient)
 
         # Bottom labels
         if self.bottom_labels:
@@ -643,7 +635,7 @@ class GradientScoreBar:
         # Score position clamping
         score_ratio = (self.score - self.data_min) / (self.data_max - self.data_min)
         clamped_ratio = min(max(score_ratio, 0), 1)
-        score_color = self.get_multicolor_gradient(clamped_ratio)
+        score_color = color_at(gradient.stops, clamped_ratio)
 
         pill_w = 38
         score_x = clamped_ratio * self.width
@@ -669,25 +661,12 @@ class ImageWithOverlayText(Flowable):
         self.width = width
         self.height = height
         self.text_data = text_data  # List of tuples: (text, x, y, style_name)
-        self.image_stream = self.flatten_image_to_white(image_path)
-        self.styles = getSampleStyleSheet()
-        self.init_styles()
-
-    def flatten_image_to_white(self, image_path):
-        img = PILImage.open(image_path)
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            bg = PILImage.new("RGB", img.size, (255, 255, 255))  # White background
-            bg.paste(img, mask=img.split()[-1])  # Use alpha as mask
-        else:
-            bg = img.convert("RGB")
+        self.image_path = image_path
+        self.styles = OVERLAY_TEXT_STYLES
 
-        buffer = io.BytesIO()
-        bg.save(buffer, format='PNG')
-        buffer.seek(0)
-        return buffer
-
-    def init_styles(self):
-        self.styles.add(ParagraphStyle(
+    @staticmethod
+    def init_styles(styles):
+        styles.add(ParagraphStyle(
             name="ear_screening_title",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=12,
@@ -696,7 +675,7 @@ class ImageWithOverlayText(Flowable):
             backColor=None,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ear_screening_unit",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -707,8 +686,8 @@ class ImageWithOverlayText(Flowable):
         ))
 
     def draw(self):
-        img = ImageReader(self.image_stream)
-        self.canv.drawImage(img, 0, 0, width=self.width, height=self.height)
+        # Flattened onto white once per (path, size) by the shared image store
+        image_store.draw(self.canv, self.image_path, 0, 0, self.width, self.height, flatten=True)
 
         for text, x, y, style_name in self.text_data:
             val_unit = text.strip().split()
@@ -729,6 +708,9 @@ class ImageWithOverlayText(Flowable):
             w, h = para.wrapOn(self.canv, self.width, self.height)
             para.drawOn(self.canv, x, y - h)
 
+
+OVERLAY_TEXT_STYLES = shared_stylesheet(f"{__name__}.ImageWithOverlayText", ImageWithOverlayText.init_styles)
+
 class VerticalLine(Flowable):
     def __init__(self, height, x_offset=0, line_color=PMX_GREEN, thickness=1):
         Flowable.__init__(self)
@@ -821,12 +803,6 @@ class GradientScoreBarr:
                      int(hex_code[2:4], 16) / 255.0,
                      int(hex_code[4:6], 16) / 255.0)
 
-    def interpolate_color(self, c1, c2, t):
-        r = c1.red + (c2.red - c1.red) * t
-        g = c1.green + (c2.green - c1.green) * t
-        b = c1.blue + (c2.blue - c1.blue) * t
-        return Color(r, g, b)
-
     def lighten_color(self, color, factor=0.4):
         return Color(
             color.red + (1.0 - color.red) * factor,
@@ -834,13 +810,6 @@ class GradientScoreBarr:
             color.blue + (1.0 - color.blue) * factor
         )
 
-    def get_multicolor_gradient(self, t):
-        for i in range(len(self.gradient_colors) - 1):
-            if self.gradient_colors[i][0] <= t <= self.gradient_colors[i + 1][0]:
-                t_local = (t - self.gradient_colors[i][0]) / (self.gradient_colors[i + 1][0] - self.gradient_colors[i][0])
-                return self.interpolate_color(self.gradient_colors[i][1], self.gradient_colors[i + 1][1], t_local)
-        return self.gradient_colors[-1][1]
-
     def draw(self):
         radius = 16
         pill_h = 20
@@ -885,13 +854,10 @@ class GradientScoreBarr:
         d.add(Rect(0, bar_y, self.width, self.height, rx=radius, ry=radius, fillColor=white, strokeColor=None))
 
         # Gradient rendering
-        segments = 600
-        for i in range(segments):
-            t = i / (segments - 1)
-            color = self.get_multicolor_gradient(t)
-            x = t * self.width
-            seg_width = self.width / segments
-            d.add(Rect(x, bar_y, seg_width + 1, self.height, fillColor=color, strokeColor=None))
+        # (painted to the same extent as the old 600-segment bar, whose last segment overhung)
+        gradient = GradientBar(0, bar_y, self.width, self.height, self.gradient_colors,
+                          extent=self.width + self.width / 600 + 1)
+        d.add(gradient)
 
         # Bottom labels
         if self.bottom_labels:
@@ -935,7 +901,7 @@ class GradientScoreBarr:
             score_x = self.width / 2
             normalized_x = 0.5
 
-        score_color = self.get_multicolor_gradient(normalized_x)
+        score_color = color_at(gradient.stops, normalized_x)
         score_fill = self.lighten_color(score_color)
 
         pill_w = 38
@@ -966,7 +932,7 @@ class BackgroundImageCard(Flowable):
     def __init__(self, card, bg_image_path, width, height):
         super().__init__()
         self.card = card
-        self.bg_image = ImageReader(bg_image_path)
+        self.bg_image_path = bg_image_path
         self.width = width
         self.height = height
 
@@ -975,8 +941,9 @@ class BackgroundImageCard(Flowable):
 
     def draw(self):
         # Draw the background image
-        self.canv.drawImage(
-            self.bg_image,
+        image_store.draw(
+            self.canv,
+            self.bg_image_path,
             0,
             0,
             width=self.width,
@@ -990,9 +957,8 @@ class BackgroundImageCard(Flowable):
 
 class ThriveRoadmapTemplate:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
         self.base_path = Path("staticfiles/icons")
-        self.init_styles()
+        self.styles = StyleSheetOverlay(ROADMAP_STYLES)
         self.svg_dir = "staticfiles/icons/"
 
     def _get_logo(self):
@@ -1004,7 +970,7 @@ class ThriveRoadmapTemplate:
         for logo_path in possible_paths:
             if os.path.exists(logo_path):
                 try:
-                    svg = svg2rlg(logo_path)
+                    svg = load_svg(logo_path)
                     if svg:
                         return ThriveRoadmapOnlySVGImage(str(logo_path), width=60)
                     return Image(str(logo_path), width=60, height=60)
@@ -1021,8 +987,9 @@ class ThriveRoadmapTemplate:
             ),
         )
 
-    def init_styles(self):
-        self.styles.add(ParagraphStyle(
+    @staticmethod
+    def init_styles(styles):
+        styles.add(ParagraphStyle(
             name="MixedInlineStyle",
             fontName=FONT_RALEWAY_REGULAR,  # Fallback
             fontSize=75,
@@ -1033,7 +1000,7 @@ class ThriveRoadmapTemplate:
             firstLineIndent=0,
 
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="MixedRalewayLine",
             fontName=FONT_RALEWAY_REGULAR,  # fallback
             fontSize=38.426,               
@@ -1043,7 +1010,7 @@ class ThriveRoadmapTemplate:
             leftIndent=0,          
             firstLineIndent=0,  
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "FrstPageHeader",
             fontName=FONT_RALEWAY_REGULAR,        
             fontSize=30,                  
@@ -1051,7 +1018,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#B3DEDA"),
             alignment=TA_LEFT
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "FrstPageTitle",
             fontName=FONT_INTER_REGULAR,         
             fontSize=20,                  
@@ -1059,7 +1026,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#B3DEDA"),
             alignment=TA_LEFT           
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "TOCTitleStyle",
             fontName=FONT_RALEWAY_MEDIUM,
             fontSize=30,
@@ -1067,7 +1034,7 @@ class ThriveRoadmapTemplate:
             leading=38,
             alignment=TA_LEFT,
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ear_screening_unit",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -1076,14 +1043,14 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "TOCEntryText",
             fontName=FONT_INTER_REGULAR,
             fontSize=14,
             textColor=colors.HexColor("#002624"),
             leading=30,
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "toc_pagenum",
             fontName=FONT_INTER_REGULAR,                 
             fontSize=20,
@@ -1091,21 +1058,21 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             alignment=TA_RIGHT
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "profile_card_name",
             fontName=FONT_RALEWAY_MEDIUM,               # Ensure this font is registered properly
             fontSize=36,
             leading=44,                               # 122.222% of 36px
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="profile_card_otherstyles",
             fontName=FONT_INTER_REGULAR,               # Make sure Inter is registered
             fontSize=16,
             leading=24,                     # 150% line height
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "box_title_style",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=10,
@@ -1114,7 +1081,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             spaceBefore=0
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="LSTStyles",
             fontName=FONT_INTER_REGULAR,
             fontSize=12,
@@ -1123,7 +1090,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "box_value_style",
             fontName=FONT_INTER_MEDIUM,  
             fontSize=14,
@@ -1132,7 +1099,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             spaceBefore=0
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "box_decimal_style",
             fontName=FONT_INTER_REGULAR,             
             fontSize=8,
@@ -1141,7 +1108,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             spaceBefore=0
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "header_data_style",
             fontName=FONT_INTER_REGULAR,                   
             fontSize=12,
@@ -1151,14 +1118,14 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             alignment=0,                        
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SvgBulletTitle",
             fontName=FONT_INTER_MEDIUM,               # Make sure Inter is registered
             fontSize=16,
             leading=24,                     # 150% line height
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "bullet_after_text",
             fontName=FONT_INTER_REGULAR,                   # Make sure Inter-Regular is registered
             fontSize=12,
@@ -1167,7 +1134,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "eye_screening_desc_style",
             fontName=FONT_INTER_REGULAR,
             fontSize=10,
@@ -1176,7 +1143,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "ear_screening_title",
             fontName=FONT_RALEWAY_SEMI_BOLD,  # Make sure this font is registered
             fontSize=12,
@@ -1185,7 +1152,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BrainScoreTitle",
             fontName=FONT_RALEWAY_SEMI_BOLD, 
             fontSize=18.936,
@@ -1194,7 +1161,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BrainScoreStyle",
             fontName=FONT_INTER_SEMI_BOLD,  
             fontSize=16,
@@ -1203,7 +1170,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BrainScoreRange",
             fontName=FONT_RALEWAY_SEMI_BOLD,  # You must register this font
             fontSize=12,
@@ -1212,7 +1179,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "circle_fallback_style",
             fontName=FONT_INTER_REGULAR,  # built-in and supports Unicode
             fontSize=10,
@@ -1222,7 +1189,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             alignment=1,  
         ))
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableHeader",
                 fontName=FONT_RALEWAY_BOLD,
@@ -1233,7 +1200,7 @@ class ThriveRoadmapTemplate:
                 spaceBefore=5,
                 spaceAfter=3,
             ))
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableCell",
                 fontName=FONT_INTER_REGULAR,
@@ -1244,7 +1211,7 @@ class ThriveRoadmapTemplate:
                 spaceBefore=0,
                 spaceAfter=0,
             ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "homair",
             fontName=FONT_RALEWAY_MEDIUM,        # You must register this font first
             fontSize=30,
@@ -1253,7 +1220,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             spaceBefore=0
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             'BulletStyle',
             fontSize=10,
             leading=16,
@@ -1262,14 +1229,14 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#667085"),
             spaceAfter=6
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="AerobicStyle",
             fontName=FONT_RALEWAY_SEMI_BOLD,  # Make sure this font is registered
             fontSize=12,
             leading=18,  # Line height
             textColor=colors.HexColor("#000000"),
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "DigestiveHealthStyle",
             fontName=FONT_RALEWAY_MEDIUM,  # Ensure this matches your registered font
             fontSize=12,
@@ -1278,14 +1245,14 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkersStyle",
             fontName=FONT_RALEWAY_MEDIUM,               
             fontSize=16,
             leading=24,                       
             textColor=PMX_GREEN   
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkerHeader",
             fontName=FONT_INTER_SEMI_BOLD,  
             fontSize= FONT_SIZE_MEDIUM,
@@ -1294,7 +1261,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
             caseChange=1  
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkerValue",
             fontName=FONT_INTER_SEMI_BOLD,          # Make sure this font is registered
             fontSize=FONT_SIZE_MEDIUM,
@@ -1302,14 +1269,14 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#003632"),
             alignment=TA_RIGHT
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkerUnit",
             fontName=FONT_INTER_REGULAR,          # Ensure this is registered
             fontSize=10,
             leading=18,                         # 180% of 10px
             textColor=colors.HexColor("#667085")
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkerHeaderData",
             fontName=FONT_INTER_REGULAR,
             fontSize=10,
@@ -1317,7 +1284,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#667085"),
             alignment=TA_LEFT
         )),
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "AreasOfConcern",
             fontName=FONT_RALEWAY_SEMI_BOLD,  # Make sure this font is registered
             fontSize=12,
@@ -1327,7 +1294,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             alignment=TA_CENTER, 
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="RoutineStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=12,                 # or FONT_SIZE_MEDIUM
@@ -1336,9 +1303,9 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
         ))
 
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="RoutineBulletStyle",
-            parent=self.styles["RoutineStyle"],
+            parent=styles["RoutineStyle"],
             leftIndent=16,           # total indent for all lines (bullet + text)
             firstLineIndent=-8,      # bullet "hangs" to the left
             bulletFontName=FONT_INTER_REGULAR,  # preserve your font
@@ -1346,23 +1313,23 @@ class ThriveRoadmapTemplate:
             fontSize=12
         ))
 
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="RoutineSubBulletStyle",
-            parent=self.styles["RoutineStyle"],
+            parent=styles["RoutineStyle"],
             leftIndent=24,           # deeper indent
             firstLineIndent=-8,
             bulletFontName=FONT_INTER_REGULAR,  # preserve your font
             bulletFontSize=11,
             fontSize=11
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="RoutineTitleStyle",
             fontName=FONT_INTER_SEMI_BOLD,            # Inter Semibold
             fontSize= FONT_SIZE_LARGE_MEDIUM,                          # 16px
             leading=24,                           # Line height: 150%
             textColor=PMX_GREEN, # Brand-50                       # Optional spacing after paragraph
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "DiagnosisText",
             fontName=FONT_INTER_REGULAR,                      # Make sure the Inter font is registered
             fontSize=10.952,
@@ -1370,7 +1337,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#26968D"),
             alignment=TA_CENTER,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BodyWeightVal",
             fontName=FONT_INTER_SEMI_BOLD,               # Make sure the 'Inter-SemiBold' font is registered
             fontSize=18,
@@ -1378,7 +1345,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#003632"),    # Brand-800 color
             alignment=TA_LEFT,                       # Default alignment from your CSS (not explicitly center or right)
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "AdditionalDiagnostics",
             fontName=FONT_RALEWAY_SEMI_BOLD,  # Make sure this font is registered
             fontSize=12,
@@ -1387,7 +1354,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
             spaceBefore=0,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "CardioVascularStyle",
             fontName=FONT_INTER_BOLD,  # Assuming you've registered "Inter-Bold"
             fontSize=12,
@@ -1395,7 +1362,7 @@ class ThriveRoadmapTemplate:
             leftIndent=12,
             textColor=colors.HexColor("#003632"),
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SSBUlletBelowStyle",
             fontName=FONT_INTER_REGULAR,  # Ensure Inter is registered; fallback to 'Helvetica' if not
             fontSize=7.375,
@@ -1403,7 +1370,7 @@ class ThriveRoadmapTemplate:
             textColor=HexColor("#004540"),
             alignment=TA_CENTER,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="OptimizationPhasesStyle",
             fontName=FONT_INTER_REGULAR,                     # Make sure 'Inter' is registered, else fallback to 'Helvetica'
             fontSize=7.375,
@@ -1411,7 +1378,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#475467"),# Equivalent to var(--Gray-600)
             alignment=1,                          # 0=left, 1=center, 2=right, 4=justify
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "ActionPlanStyle",
             fontName=FONT_INTER_SEMI_BOLD,       # You must register this font first
             fontSize=16,
@@ -1419,7 +1386,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             spaceAfter=0                     # Optional: spacing after paragraph
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SADataStyle",
             fontName=FONT_INTER_REGULAR,           
             fontSize=8,
@@ -1486,9 +1453,18 @@ class ThriveRoadmapTemplate:
         table.setStyle(TableStyle(style))
         return table
 
+    def cached_icon(self, path, width=12, height=12):
+        """svg_icon as a CachedFragment: painted once per process, embedded once per document."""
+        drawing = self.svg_icon(path, width=width, height=height)
+        if not os.path.exists(path):
+            return drawing
+        key = ("svg-icon", path, os.stat(path).st_mtime_ns)
+        return CachedFragment(key, width, height, lambda c: renderPDF.draw(drawing, c, 0, 0),
+                              drawing_bounds(drawing))
+
     def svg_icon(self, path, width=12, height=12):
         try:
-            drawing = svg2rlg(path)
+            drawing = load_svg(path)
             if drawing is None:
                 raise FileNotFoundError(f"SVG file '{path}' could not be loaded or is invalid.")
         except Exception as e:
@@ -1530,7 +1506,8 @@ class ThriveRoadmapTemplate:
             def draw(self):
                 try:
                     # Draw image at absolute bottom-left (0, 0)
-                    self.canv.drawImage(
+                    image_store.draw(
+                        self.canv,
                         self.path,
                         x=self.x,
                         y=self.y,
@@ -3328,19 +3305,8 @@ class ThriveRoadmapTemplate:
         # icon_bmi = self.svg_icon(icon_path_bmi, width=251, height=294)
         
 
-        bg = PILImage.open(icon_path_bmi).convert("RGBA")
-        overlay = PILImage.new("RGBA", bg.size, "#02665F")  # simulate a solid overlay color
-
-        # Blend them (simulate soft-light-like effect)
-        blended = PILImage.blend(bg, overlay, alpha=0)  # adjust alpha for intensity
-
-        # Save to BytesIO stream
-        img_buffer = BytesIO()
-        blended.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-
-        # Create ReportLab image from stream
-        rl_img = RLImage(img_buffer, width=251, height=294)  # set width/height as needed
+        # Cached and embedded once per PDF by the shared image store
+        rl_img = AssetImage(icon_path_bmi, width=251, height=294)
 
 
         image_data=body_composition.get("image_data","")
@@ -3863,7 +3829,7 @@ class ThriveRoadmapTemplate:
         section.append(Spacer(1, 8))
 
         img_path = os.path.join("staticfiles", "icons", "heavy_metal_report.png")        
-        img = Image(img_path, width=561, height=342)
+        img = AssetImage(img_path, width=561, height=342)
 
         section.append(img)
         bullet_items = []
@@ -3919,7 +3885,7 @@ class ThriveRoadmapTemplate:
 
         # Image with 17pt indent
         img_path1 = os.path.join("staticfiles", "icons", "domain_in_focus_1.png")
-        img1 = Image(img_path1, width=559, height=594)
+        img1 = AssetImage(img_path1, width=559, height=594)
         flowables.append(Indenter(left=17, right=17))
         flowables.append(img1)
         flowables.append(Indenter(left=-17, right=-17))
@@ -3935,7 +3901,7 @@ class ThriveRoadmapTemplate:
         flowables.append(Indenter(left=-32, right=-32))
 
         img_path2 = os.path.join("staticfiles", "icons", "domain_in_focus_2.png")
-        img2 = Image(img_path2, width=559, height=594)
+        img2 = AssetImage(img_path2, width=559, height=594)
         flowables.append(Indenter(left=17, right=17))
         flowables.append(img2)
         flowables.append(Indenter(left=-17, right=-17))
@@ -3955,7 +3921,7 @@ class ThriveRoadmapTemplate:
         section.append(Indenter(left=-32, right=-32))
 
         img_path = os.path.join("staticfiles", "icons", "mineral_test_ratio_report.png")        
-        img = Image(img_path, width=558, height=531)
+        img = AssetImage(img_path, width=558, height=531)
         section.append(Indenter(left=17, right=17))
         section.append(img)
         section.append(Indenter(left=-17, right=-17))
@@ -4740,7 +4706,7 @@ class ThriveRoadmapTemplate:
         section.append(heading)
         section.append(Spacer(1, 16))
         icon_path = os.path.join(svg_dir, "bullet_point.svg")  
-        icon = self.svg_icon(icon_path, width=16, height=16)
+        icon = self.cached_icon(icon_path, width=16, height=16)
 
         # Extract headers and values
         header1 = biomarkers_range_data[0].get("header", "")
@@ -5859,12 +5825,11 @@ class ThriveRoadmapTemplate:
         return story
 
 
-app = FastAPI()
+ROADMAP_STYLES = shared_stylesheet(f"{__name__}.ThriveRoadmapTemplate", ThriveRoadmapTemplate.init_styles)
 
-@app.post("/generate-pdf")
-async def generate_pdf(request: Request):
-    data = await request.json()  
 
+def render_roadmap_pdf(data: dict) -> bytes:
+    """Build the roadmap PDF for ``data``; runs inside a render worker process."""
     buffer = io.BytesIO()
     template = ThriveRoadmapTemplate()
     renderer = ThrivePageRenderer(template)
@@ -5904,14 +5869,38 @@ async def generate_pdf(request: Request):
 
     # Full-page image
     img_path = os.path.join(svg_dir, "final_page.png")
-    full_page_image = Image(img_path, width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    full_page_image = AssetImage(img_path, width=PAGE_WIDTH, height=PAGE_HEIGHT)
     full_page_image.hAlign = 'CENTER'
     flowables.append(full_page_image)
     doc.build(flowables, canvasmaker=NumberedCanvas)
-    with open("output_from_buffer_stash.pdf", "wb") as f:
-        f.write(buffer.getvalue())
-    buffer.seek(0)
-    return StreamingResponse(buffer, media_type="application/pdf", headers={
-        "Content-Disposition": "inline; filename=styled_output.pdf"
+    return buffer.getvalue()
+
+
+app = FastAPI()
+render_pool = RenderPool(warm_modules=("final_roadmap",))
+
+@app.on_event("shutdown")
+def shutdown_render_pool():
+    render_pool.shutdown()
+
+@app.post("/generate-pdf")
+async def generate_pdf(request: Request):
+    data = await request.json()
+    return await render_pdf_response(request, render_pool, "final_roadmap:render_roadmap_pdf", data,
+                                     profile_sections=("final_roadmap:ThriveRoadmapTemplate",))
+
+@app.post("/generate-pdf/batch")
+async def generate_pdf_batch(request: Request):
+    """Render a JSON list of roadmap payloads (at most BATCH_MAX_DOCUMENTS) into one zip."""
+    try:
+        payloads = await request.json()
+        check_batch_payloads(payloads)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    zip_bytes, manifest = await render_batch_zip(render_pool, "final_roadmap:render_roadmap_pdf", payloads)
+    return Response(zip_bytes, media_type="application/zip", headers={
+        "Content-Disposition": "attachment; filename=roadmaps.zip",
+        "X-Batch-Succeeded": str(manifest["succeeded"]),
+        "X-Batch-Failed": str(manifest["failed"]),
     })
 
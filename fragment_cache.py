@@ -0,0 +1,273 @@
+# === fragment_cache.py ===
+"""
+Process-wide store for patient-independent report fragments (page
+backgrounds, decorative vector art, icons).
+
+Fragments like the TOC background SVG or the diagonal-line block behind every
+genome section heading are identical in every report, yet renderPDF walked
+their shape trees and wrote the same operators again for every page and every
+document. Here a fragment is painted once per process into a scratch PDF,
+parsed back with PyPDF2 and kept as ready-to-embed PDF objects (content
+stream plus its fonts, ExtGStates, shadings and images). Each document then
+embeds the fragment once as a Form XObject, and every further use is a
+single ``Do`` operator.
+
+Fonts are embedded with each fragment (TrueType subsets are numbered per
+document, so glyph codes from the scratch PDF cannot share the report's
+subset). Fragments should therefore be text-free artwork; body text stays
+in the live story so it shares the report's font subsets.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+from PyPDF2 import PdfReader
+from PyPDF2 import generic
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable
+
+# === Limits ===
+FRAGMENT_CACHE_ENABLED = os.environ.get("FRAGMENT_CACHE_ENABLED", "1") == "1"
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get("FRAGMENT_CACHE_MAX_ENTRIES", 256))
+FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get("FRAGMENT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+class _Literal(pdfdoc.PDFObject):
+    """Pre-serialised PDF token (booleans, null, strings)."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def format(self, document):
+        return self.data
+
+
+class _FragmentRef(pdfdoc.PDFObject):
+    """Reference to object ``index`` of a fragment, resolved in whichever document is being written."""
+
+    def __init__(self, digest, index):
+        self.digest = digest
+        self.index = index
+
+    def format(self, document):
+        name = document.__dict__["_fragment_objects"][(self.digest, self.index)]
+        return pdfdoc.PDFObjectReference(name).format(document)
+
+
+class _DocumentCopy(pdfdoc.PDFObject):
+    """Per-document shell around a shared fragment object (ReportLab tags registered objects)."""
+
+    __RefOnly__ = 1
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def format(self, document):
+        return pdfdoc.format(self.obj, document, toplevel=1)
+
+
+class _Converter:
+    """Turns a PyPDF2 object graph into ReportLab PDF objects, numbering indirect objects."""
+
+    def __init__(self, digest):
+        self.digest = digest
+        self.objects = []
+        self._index = {}
+
+    def convert(self, obj):
+        if isinstance(obj, generic.IndirectObject):
+            key = (obj.idnum, obj.generation)
+            index = self._index.get(key)
+            if index is None:
+                index = self._index[key] = len(self.objects)
+                self.objects.append(None)
+                self.objects[index] = self.convert(obj.get_object())
+            return _FragmentRef(self.digest, index)
+        if isinstance(obj, generic.StreamObject):
+            entries = {k[1:]: self.convert(v) for k, v in obj.items() if k != "/Length"}
+            data = obj._data if "/Filter" in obj else obj.get_data()
+            return pdfdoc.PDFStream(pdfdoc.PDFDictionary(entries), data)
+        if isinstance(obj, generic.DictionaryObject):
+            return pdfdoc.PDFDictionary({k[1:]: self.convert(v) for k, v in obj.items()})
+        if isinstance(obj, generic.ArrayObject):
+            return pdfdoc.PDFArray([self.convert(v) for v in obj])
+        if isinstance(obj, generic.NameObject):
+            return pdfdoc.PDFName(obj[1:])
+        if isinstance(obj, generic.BooleanObject):
+            return _Literal(b"true" if obj else b"false")
+        if isinstance(obj, (generic.FloatObject, generic.NumberObject)):
+            return int(obj) if isinstance(obj, generic.NumberObject) else float(obj)
+        if isinstance(obj, generic.NullObject):
+            return _Literal(b"null")
+        stream = io.BytesIO()
+        obj.write_to_stream(stream, None)
+        return _Literal(stream.getvalue())
+
+
+class Fragment:
+    """A pre-rendered fragment: its content stream and resources, ready to embed as a Form XObject."""
+
+    def __init__(self, key, bounds, paint):
+        self.key = key
+        self.bounds = x0, y0, x1, y1 = bounds
+        self.digest = hashlib.md5(repr(key).encode("utf-8")).hexdigest()
+
+        buffer = io.BytesIO()
+        scratch = Canvas(buffer, pagesize=(x1 - x0, y1 - y0), pageCompression=1)
+        scratch.translate(-x0, -y0)
+        paint(scratch)
+        scratch.showPage()
+        scratch.save()
+        self.nbytes = buffer.tell()
+
+        page = PdfReader(io.BytesIO(buffer.getvalue())).pages[0]
+        converter = _Converter(self.digest)
+        resources = converter.convert(page.get("/Resources", generic.DictionaryObject()))
+        content = page.get_contents()
+        self.objects = converter.objects
+        self._form = pdfdoc.PDFStream(
+            pdfdoc.PDFDictionary({
+                "Type": pdfdoc.PDFName("XObject"),
+                "Subtype": pdfdoc.PDFName("Form"),
+                "FormType": 1,
+                "BBox": pdfdoc.PDFArray([0, 0, x1 - x0, y1 - y0]),
+                "Resources": resources,
+                "Filter": pdfdoc.PDFName("FlateDecode"),
+            }),
+            zlib.compress(content.get_data() if content is not None else b""),
+        )
+
+    def register(self, canvas):
+        """Embed the fragment in the canvas' document (once) and return its XObject name."""
+        doc = canvas._doc
+        reg_name = doc.getXObjectName(self.digest)
+        if doc.idToObject.get(reg_name) is None:
+            names = doc.__dict__.setdefault("_fragment_objects", {})
+            for index, obj in enumerate(self.objects):
+                names[(self.digest, index)] = doc.Reference(_DocumentCopy(obj)).name
+            doc.Reference(_DocumentCopy(self._form), reg_name)
+        return reg_name
+
+
+class FragmentStore:
+    """Size-bounded LRU cache of Fragment objects with hit/miss counters."""
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_MAX_ENTRIES, max_bytes=FRAGMENT_CACHE_MAX_BYTES,
+                 enabled=FRAGMENT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, bounds, paint):
+        """Return the Fragment for ``key``, painting it with ``paint(canvas)`` on first use."""
+        bounds = tuple(round(float(v), 2) for v in bounds)
+        key = (key, bounds)
+        with self._lock:
+            fragment = self._entries.get(key)
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fragment
+            self.misses += 1
+
+        fragment = Fragment(key, bounds, paint)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = fragment
+                self._total_bytes += fragment.nbytes
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+                self.evictions += 1
+        return fragment
+
+    def draw(self, canvas, key, x, y, width, height, paint, bounds=None):
+        """
+        Draw fragment ``key`` (a ``width`` x ``height`` box painted by
+        ``paint(canvas)`` at the origin) with its lower-left corner at x, y.
+
+        ``bounds`` is the painted area as (x0, y0, x1, y1) when it reaches
+        outside the box (the Form XObject clips to it); see drawing_bounds.
+        """
+        encrypted = not isinstance(canvas._doc.encrypt, pdfdoc.NoEncryption)
+        if not self.enabled or encrypted:
+            canvas.saveState()
+            canvas.translate(x, y)
+            paint(canvas)
+            canvas.restoreState()
+            return
+        fragment = self.get(key, bounds or (0, 0, width, height), paint)
+        reg_name = fragment.register(canvas)
+        canvas.saveState()
+        canvas.translate(x + fragment.bounds[0], y + fragment.bounds[1])
+        canvas._code.append("/%s Do" % reg_name)
+        canvas.restoreState()
+        canvas._formsinuse.append(fragment.digest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Shared instance used by all report templates
+fragment_store = FragmentStore()
+
+
+def draw_fragment(canvas, key, x, y, width, height, paint, bounds=None):
+    return fragment_store.draw(canvas, key, x, y, width, height, paint, bounds)
+
+
+def drawing_bounds(drawing, margin=2):
+    """Painted area of a Drawing: its box plus any shapes outside it, padded for stroke widths."""
+    x0, y0, x1, y1 = 0, 0, drawing.width, drawing.height
+    try:
+        bx0, by0, bx1, by1 = drawing.getBounds()
+    except Exception:
+        return (x0, y0, x1, y1)
+    return (min(x0, bx0) - margin, min(y0, by0) - margin, max(x1, bx1) + margin, max(y1, by1) + margin)
+
+
+class CachedFragment(Flowable):
+    """Flowable drawing a fixed-size fragment from the fragment store."""
+
+    def __init__(self, key, width, height, paint, bounds=None, hAlign='LEFT'):
+        super().__init__()
+        self.key = key
+        self.width = width
+        self.height = height
+        self.paint = paint
+        self.bounds = bounds
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        fragment_store.draw(self.canv, self.key, 0, 0, self.width, self.height, self.paint, self.bounds)
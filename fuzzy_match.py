@@ -0,0 +1,90 @@
+# === fuzzy_match.py ===
+"""
+Pruned SequenceMatcher ratios for locating trained table headers in OCR lines.
+
+extract_table_header scored every trained header line against every OCR
+line of every page with ``SequenceMatcher(None, line, header).ratio()``,
+which is quadratic in the string lengths, and kept only scores above 0.65
+(and above the best so far). Most lines cannot get there, and that can be
+shown from cheaper upper bounds of the ratio, tried in order of cost:
+
+* the lengths: ``2 * min(len) / total``;
+* the shared characters (the unigram profile; SequenceMatcher.quick_ratio);
+* the longest common subsequence, computed bit-parallel with Python ints
+  (an edit-distance ratio: the matching blocks SequenceMatcher finds are a
+  common subsequence, so it never scores higher).
+
+Only a pair whose bounds all reach the minimum is scored by SequenceMatcher
+itself, so every decision (and every reported ratio that passes) is the
+same as before. Longer n-grams (trigrams) would prune more, but at a 0.65
+threshold the q-gram lemma gives them no safe bound, so they are not used.
+
+    header = FuzzyText("Test Name Result Units")
+    for line in page_lines.text_profiles:
+        ratio = line.ratio(header, minimum=max(best, 0.65))   # 0.0 if it cannot reach the minimum
+"""
+
+from collections import Counter
+from difflib import SequenceMatcher
+
+
+class FuzzyText:
+    """A string with the statistics used to bound its ratio against other strings; built once, reused per pair."""
+
+    __slots__ = ("text", "length", "_chars", "_masks")
+
+    def __init__(self, text):
+        self.text = text
+        self.length = len(text)
+        self._chars = None
+        self._masks = None
+
+    @property
+    def chars(self):
+        if self._chars is None:
+            self._chars = Counter(self.text)
+        return self._chars
+
+    @property
+    def masks(self):
+        """``{char: bit mask of its positions}`` for the bit-parallel LCS."""
+        if self._masks is None:
+            masks = {}
+            for position, char in enumerate(self.text):
+                masks[char] = masks.get(char, 0) | (1 << position)
+            self._masks = masks
+        return self._masks
+
+    def lcs_length(self, other):
+        """Length of the longest common subsequence of the two texts (Allison-Dix / Hyyrö bit-vector)."""
+        masks = self.masks
+        full = (1 << self.length) - 1
+        row = full
+        for char in other.text:
+            matches = row & masks.get(char, 0)
+            row = ((row + matches) | (row - matches)) & full
+        return self.length - bin(row).count("1")
+
+    def ratio(self, other, minimum=0.0):
+        """
+        ``SequenceMatcher(None, self.text, other.text).ratio()``, or 0.0 when
+        a bound shows it is below ``minimum``.
+        """
+        total = self.length + other.length
+        if total and minimum > 0:
+            if 2.0 * min(self.length, other.length) / total < minimum:
+                return 0.0
+            mine, theirs = self.chars, other.chars
+            if len(theirs) < len(mine):
+                mine, theirs = theirs, mine
+            shared = sum(min(count, theirs[char]) for char, count in mine.items() if char in theirs)
+            if 2.0 * shared / total < minimum:
+                return 0.0
+            if 2.0 * self.lcs_length(other) / total < minimum:
+                return 0.0
+        return SequenceMatcher(None, self.text, other.text).ratio()
+
+
+def fuzzy_ratio(a, b, minimum=0.0):
+    """FuzzyText.ratio for two plain strings (one-off comparisons)."""
+    return FuzzyText(a).ratio(FuzzyText(b), minimum)
@@ -4,7 +4,6 @@ from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.responses import StreamingResponse
 import pandas as pd
-import json
 from reportlab.platypus import (
     BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer,Indenter,TableStyle,Table,Flowable,Image,PageBreak,NextPageTemplate,
     KeepTogether
@@ -16,7 +15,12 @@ from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.units import mm
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from page_numbering import DeferredPageCountCanvas
+from image_assets import image_store, AssetImage
+from fragment_cache import CachedFragment, drawing_bounds
+from render_pool import RenderPool, render_pdf_response
+from style_registry import shared_stylesheet
 from reportlab.graphics.shapes import Drawing,Rect, String, Line,Circle, Path, Group
 from reportlab.graphics import renderPDF
 from reportlab.pdfgen import canvas
@@ -237,24 +241,14 @@ class MyDocTemplate(BaseDocTemplate):
         super().__init__(filename, **kwargs)
         self.allowSplitting = 0
 
-class NumberedCanvas(Canvas):
+class NumberedCanvas(DeferredPageCountCanvas):
     def __init__(self, *args, footer_label="", **kwargs):
         super().__init__(*args, **kwargs)
-        self._saved_page_states = []
         self.footer_label = footer_label
 
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        total_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(total_pages)
-            self.draw_footer_label_with_icon()
-            super().showPage()
-        super().save()
+    def draw_page_footer(self, total_pages):
+        self.draw_page_number(total_pages)
+        self.draw_footer_label_with_icon()
 
     def draw_page_number(self, total_pages):
         page_number = self.getPageNumber()
@@ -290,7 +284,7 @@ class NumberedCanvas(Canvas):
         # Draw the image after the label
         try:
             svg_path = os.path.join("staticfiles", "icons", "pmx_green_logo.svg")
-            drawing = svg2rlg(svg_path)
+            drawing = load_svg(svg_path)
 
             # Get scale factors
             target_width = 21
@@ -325,14 +319,13 @@ class ImageWithOverlaySVGAndText(Flowable):
     def draw(self):
         # Draw main image
         try:
-            main_img = ImageReader(self.main_image_path)
-            self.canv.drawImage(main_img, 0, 0, width=self.width, height=self.height, mask='auto')
+            image_store.draw(self.canv, self.main_image_path, 0, 0, width=self.width, height=self.height, mask='auto')
         except Exception as e:
             print(f"Failed to draw main image: {e}")
 
         # Draw scaled SVG overlay
         try:
-            drawing = svg2rlg(self.svg_path)
+            drawing = load_svg(self.svg_path)
             scale_x = self.svg_size[0] / drawing.width
             scale_y = self.svg_size[1] / drawing.height
 
@@ -347,7 +340,6 @@ class ImageWithOverlaySVGAndText(Flowable):
         try:
             # Load PNG image
             png_path = os.path.join("staticfiles", "icons", "pmx_x_white.png")
-            img = ImageReader(png_path)
 
             # Set position and size (x=53, y=top-162, width=181, height=84)
             x = 53
@@ -356,7 +348,7 @@ class ImageWithOverlaySVGAndText(Flowable):
             height = 18
 
             # Draw the image
-            self.canv.drawImage(img, x, y, width=width, height=height, mask='auto')
+            image_store.draw(self.canv, png_path, x, y, width=width, height=height, mask='auto')
         except Exception as e:
             print(f"Failed to render PNG: {e}")
 
@@ -389,11 +381,20 @@ class FixedSizeDrawing(Flowable):
         return self.width, self.height
 
     def draw(self):
-        self.canv.saveState()
-        self.canv.translate(0, 0)
-        self.canv.scale(self._scale_x, self._scale_y)
-        renderPDF.draw(self.drawing, self.canv, 0, 0)
-        self.canv.restoreState()
+        self.paint(self.canv)
+
+    def paint(self, canvas):
+        canvas.saveState()
+        canvas.translate(0, 0)
+        canvas.scale(self._scale_x, self._scale_y)
+        renderPDF.draw(self.drawing, canvas, 0, 0)
+        canvas.restoreState()
+
+    def cached(self, key):
+        """The same drawing as a CachedFragment: painted once per process, embedded once per document."""
+        x0, y0, x1, y1 = drawing_bounds(self.drawing)
+        bounds = (x0 * self._scale_x, y0 * self._scale_y, x1 * self._scale_x, y1 * self._scale_y)
+        return CachedFragment(key, self.width, self.height, self.paint, bounds)
 
 class ThrivePageRenderer:
     def __init__(self, template):
@@ -657,25 +658,12 @@ class ImageWithOverlayText(Flowable):
         self.width = width
         self.height = height
         self.text_data = text_data  # List of tuples: (text, x, y, style_name)
-        self.image_stream = self.flatten_image_to_white(image_path)
-        self.styles = getSampleStyleSheet()
-        self.init_styles()
-
-    def flatten_image_to_white(self, image_path):
-        img = PILImage.open(image_path)
-        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
-            bg = PILImage.new("RGB", img.size, (255, 255, 255))  # White background
-            bg.paste(img, mask=img.split()[-1])  # Use alpha as mask
-        else:
-            bg = img.convert("RGB")
-
-        buffer = io.BytesIO()
-        bg.save(buffer, format='PNG')
-        buffer.seek(0)
-        return buffer
+        self.image_path = image_path
+        self.styles = OVERLAY_TEXT_STYLES
 
-    def init_styles(self):
-        self.styles.add(ParagraphStyle(
+    @staticmethod
+    def init_styles(styles):
+        styles.add(ParagraphStyle(
             name="ear_screening_title",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=12,
@@ -684,7 +672,7 @@ class ImageWithOverlayText(Flowable):
             backColor=None,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ear_screening_unit",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -695,8 +683,8 @@ class ImageWithOverlayText(Flowable):
         ))
 
     def draw(self):
-        img = ImageReader(self.image_stream)
-        self.canv.drawImage(img, 0, 0, width=self.width, height=self.height)
+        # Flattened onto white once per (path, size) by the shared image store
+        image_store.draw(self.canv, self.image_path, 0, 0, self.width, self.height, flatten=True)
 
         for text, x, y, style_name in self.text_data:
             val_unit = text.strip().split()
@@ -717,6 +705,9 @@ class ImageWithOverlayText(Flowable):
             w, h = para.wrapOn(self.canv, self.width, self.height)
             para.drawOn(self.canv, x, y - h)
 
+
+OVERLAY_TEXT_STYLES = shared_stylesheet(f"{__name__}.ImageWithOverlayText", ImageWithOverlayText.init_styles)
+
 class ThriveRoadmapTemplate:
     def __init__(self, buffer):
         self.buffer = buffer
@@ -744,18 +735,20 @@ class ThriveRoadmapTemplate:
             line.strokeOpacity = line_opacity  # This property works in renderPDF context
             drawing.add(line)
         drawing.transform = [1, 0, 0, -1, 0, height]
-        return drawing
+        return CachedFragment(("heading-diagonal-lines", width, height), width, height,
+                              lambda c: renderPDF.draw(drawing, c, 0, 0), drawing_bounds(drawing))
 
     def svg_icon(self, path, width=12, height=12):
         try:
-            drawing = svg2rlg(path)
+            drawing = load_svg(path)
             if drawing is None:
                 raise FileNotFoundError(f"SVG file '{path}' could not be loaded or is invalid.")
         except Exception as e:
             print(f"[svg_icon] Error loading SVG: {e}")
             return Drawing(width, height)
 
-        return FixedSizeDrawing(drawing, width, height)
+        # Section icons are static artwork shared by every genome report
+        return FixedSizeDrawing(drawing, width, height).cached(("svg-icon", path, os.stat(path).st_mtime_ns))
 
     def get_heading(self, user_profile_card: str):
         title = user_profile_card.get("title", "No Title Provided")
@@ -1458,12 +1451,11 @@ class ThriveRoadmapTemplate:
         return story
 
 # === FastAPI App ===
-app = FastAPI()
+GENOME_EXCEL_FILE = r'C:\Users\Admin\Documents\GitHub\Example_repo\df_output.xlsx'
 
-@app.post("/generate-pdf")
-async def generate_pdf(request: Request):
-    # data = await request.json()
-    excel_file = r'C:\Users\Admin\Documents\GitHub\Example_repo\df_output.xlsx'
+
+def render_genome_pdf(excel_file: str) -> bytes:
+    """Build the genome PDF from the genome Excel export; runs inside a render worker process."""
     df = pd.read_excel(excel_file)
     df.fillna("", inplace=True)
 
@@ -1553,8 +1545,6 @@ async def generate_pdf(request: Request):
             "content": info["content"],
             "data": section_data
         }
-    with open("final_output.json", "w", encoding="utf-8") as f:
-        json.dump(final_output, f, ensure_ascii=False, indent=4)
     buffer = io.BytesIO()
 
     template = ThriveRoadmapTemplate(buffer)
@@ -1621,11 +1611,18 @@ async def generate_pdf(request: Request):
 
     user_name = final_output.get("user_name", "mk")
     doc.build(story, canvasmaker=lambda *args, **kwargs: NumberedCanvas(*args, footer_label=user_name, **kwargs))
+    return buffer.getvalue()
+
 
-    with open("genome.pdf", "wb") as f:
-        f.write(buffer.getvalue())
+app = FastAPI()
+render_pool = RenderPool(warm_modules=("genome",))
+
+@app.on_event("shutdown")
+def shutdown_render_pool():
+    render_pool.shutdown()
 
-    buffer.seek(0)
-    return StreamingResponse(buffer, media_type="application/pdf", headers={
-        "Content-Disposition": "inline; filename=styled_output.pdf"
-    })
+@app.post("/generate-pdf")
+async def generate_pdf(request: Request):
+    # data = await request.json()
+    return await render_pdf_response(request, render_pool, "genome:render_genome_pdf", GENOME_EXCEL_FILE,
+                                     profile_sections=("genome:ThriveRoadmapTemplate",))
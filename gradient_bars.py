@@ -0,0 +1,135 @@
+# === gradient_bars.py ===
+"""
+Gradient bars drawn as native PDF axial shadings.
+
+The score bars used to be built from hundreds of 1-2pt wide Rects, one
+interpolated colour each (600 per GradientScoreBar), so every bar added
+hundreds of fill operators to the page. ``GradientBar`` is a single shape
+that paints the same multi-stop gradient with one ``sh`` operator. The
+shading is drawn in a unit coordinate system, so every bar with the same
+colour stops reuses one shading object per document.
+
+Renderers without shading support (renderPM previews, SVG export) get the
+old segmented rendering built from the same cached colour-stop table.
+"""
+
+from functools import lru_cache
+
+from reportlab.graphics.shapes import DirectDraw, Rect
+from reportlab.lib.colors import Color, toColor
+
+# Segments used when the target canvas cannot paint shadings
+FALLBACK_SEGMENTS = 600
+
+
+def _stop_key(stops):
+    """Hashable key for a list of ``(position, colour)`` stops (hex strings or Colors)."""
+    key = []
+    for position, color in stops:
+        color = toColor(color)
+        key.append((float(position), (color.red, color.green, color.blue)))
+    return tuple(key)
+
+
+@lru_cache(maxsize=64)
+def gradient_stop_table(stop_key):
+    """
+    Return ``(positions, colors)`` for a stop key, sorted and padded so the
+    table always runs from 0 to 1 (what the PDF stitching function expects).
+    """
+    stops = sorted(stop_key)
+    if stops[0][0] > 0:
+        stops.insert(0, (0.0, stops[0][1]))
+    if stops[-1][0] < 1:
+        stops.append((1.0, stops[-1][1]))
+    positions = tuple(p for p, _ in stops)
+    colors = tuple(Color(*rgb) for _, rgb in stops)
+    return positions, colors
+
+
+def color_at(stop_key, t):
+    """Interpolated colour at ``t`` in [0, 1] (the score pills take their colour from here)."""
+    positions, colors = gradient_stop_table(stop_key)
+    for i in range(len(positions) - 1):
+        if positions[i] <= t <= positions[i + 1]:
+            span = positions[i + 1] - positions[i]
+            t_local = (t - positions[i]) / span if span else 0.0
+            c1, c2 = colors[i], colors[i + 1]
+            return Color(c1.red + (c2.red - c1.red) * t_local,
+                         c1.green + (c2.green - c1.green) * t_local,
+                         c1.blue + (c2.blue - c1.blue) * t_local)
+    return colors[-1]
+
+
+def _document_shading(canvas, stop_key):
+    """Register (once per document) a unit-space axial shading for ``stop_key``."""
+    from reportlab.pdfbase.pdfdoc import PDFAxialShading
+    from reportlab.pdfgen.canvas import _buildColorFunction, _normalizeColors
+
+    doc = canvas._doc
+    shadings = doc.__dict__.setdefault("_gradient_bar_shadings", {})
+    name = shadings.get(stop_key)
+    if name is None:
+        positions, colors = gradient_stop_table(stop_key)
+        color_space, pdf_colors = _normalizeColors(colors)
+        shading = PDFAxialShading(0, 0, 1, 0, Function=_buildColorFunction(pdf_colors, list(positions)),
+                                  ColorSpace=color_space, Extend="[true true]")
+        name = shadings[stop_key] = doc.addShading(shading)
+    return name
+
+
+class GradientBar(DirectDraw):
+    """
+    Horizontal multi-stop gradient from ``x`` (t=0) to ``x + width`` (t=1).
+
+    ``extent`` is the painted width and defaults to ``width``; past
+    ``x + width`` the last colour continues, as it did with the segmented
+    bars whose final Rect overhung the bar.
+    """
+
+    _attrMap = None
+
+    def __init__(self, x=0, y=0, width=100, height=6, stops=((0, "#000000"), (1, "#ffffff")), extent=None):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.stops = _stop_key(stops)
+        self.extent = width if extent is None else extent
+
+    def copy(self):
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def getBounds(self):
+        return (self.x, self.y, self.x + self.extent, self.y + self.height)
+
+    def drawDirectly(self, renderer):
+        canvas = renderer._canvas
+        if not self.width or not self.height:
+            return
+        if hasattr(canvas, "_doc") and hasattr(canvas, "_shadingUsed"):
+            name = _document_shading(canvas, self.stops)
+            canvas.saveState()
+            canvas.translate(self.x, self.y)
+            canvas.scale(self.width, self.height)
+            path = canvas.beginPath()
+            path.rect(0, 0, self.extent / self.width, 1)
+            canvas.clipPath(path, stroke=0, fill=0)
+            canvas._shadingUsed[name] = name
+            canvas._code.append("/%s sh" % name)
+            canvas.restoreState()
+        else:
+            for rect in self.segment_rects():
+                renderer.drawNode(rect)
+
+    def segment_rects(self, segments=FALLBACK_SEGMENTS):
+        """The old segmented rendering: ``segments`` Rects over ``width``."""
+        seg_width = self.width / segments
+        rects = []
+        for i in range(segments):
+            t = i / (segments - 1)
+            rects.append(Rect(self.x + t * self.width, self.y, seg_width + 1, self.height,
+                              fillColor=color_at(self.stops, t), strokeColor=None))
+        return rects
@@ -2,6 +2,8 @@ from reportlab.graphics.shapes import Drawing, Rect, String
 from reportlab.lib.colors import Color, white, black
 from reportlab.platypus import SimpleDocTemplate, Spacer
 
+from gradient_bars import GradientBar
+
 
 def hex_to_color(hex_code):
     hex_code = hex_code.lstrip("#")
@@ -50,13 +52,7 @@ def draw_gradient_score_bar(width=478, height=6, score=102, data_min=80, data_ma
     d.add(Rect(0, y, width, height, rx=radius, ry=radius, fillColor=white, strokeColor=None))
 
     # Gradient fill
-    segments = 600
-    for i in range(segments):
-        t = i / (segments - 1)
-        color = get_multicolor_gradient(t, gradient_colors)
-        x = t * width
-        seg_width = width / segments
-        d.add(Rect(x, y, seg_width + 1, height, fillColor=color, strokeColor=None))
+    d.add(GradientBar(0, y, width, height, gradient_colors, extent=width + width / 600 + 1))
 
     # Labels under bar
     d.add(String(0, label_y, "Low", fontSize=7, fillColor=black))
@@ -2,6 +2,8 @@ from reportlab.graphics.shapes import Drawing, Rect, String, Circle, Line
 from reportlab.lib import colors
 from reportlab.lib.colors import Color
 
+from gradient_bars import GradientBar
+
 
 def generate_heavy_metal_chart(data):
     def interpolate_color(c1, c2, t):
@@ -34,14 +36,9 @@ def generate_heavy_metal_chart(data):
     x_end = x_center + (bar_width / 2)
     y_base = 30
 
-    # Gradient Bar (-100 to 100)
-    segments = 100
-    for i in range(segments + 1):
-        pct = -100 + (i / segments) * 200
-        col = get_color(pct)
-        seg_x = x_center + (pct / 200.0) * bar_width
-        seg_width = bar_width / segments
-        d.add(Rect(seg_x, y_base, seg_width, 5, fillColor=col, strokeColor=None))
+    # Gradient Bar (-100 to 100): excess/deficit mirror around the ideal midpoint
+    gradient_stops = [(0.5 + pct / 200.0, get_color(pct)) for pct in (-100, -33, 0, 33, 100)]
+    d.add(GradientBar(x_start, y_base, bar_width, 5, gradient_stops, extent=bar_width * 1.01))
 
     # Labels below gradient
     d.add(String(x_start, y_base - 10, "Deficient", fontSize=7))
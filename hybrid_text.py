@@ -0,0 +1,189 @@
+# === hybrid_text.py ===
+"""
+Per-page routing between a PDF's text layer and OCR.
+
+ocr_pdf_extractor OCR'd every page, even digital ones, and
+improved_pdf_extractor / pdf_data_extractor never OCR'd, so scanned pages
+came out empty. Most reports are mixed (digital lab tables plus scanned
+doctor notes), so the decision is made per page:
+
+* the text layer is read for every page (pdf_text: parallel, cached);
+* a page goes to OCR when its layer is empty, garbled (mostly
+  ``(cid:N)`` / replacement / control characters, or unusual symbols), or short/sparse on a page that is largely covered by images (a
+  scan with a digital header or page number stamped on it; a digital cover
+  page with just a title keeps its text);
+* only those pages are OCR'd (ocr_pages: streaming, parallel), and their
+  OCR text is kept in the pdf_text page cache like any other backend.
+
+The result is one page-ordered list of HybridPage with per-page provenance
+(source, reason, character count and density).
+
+    pages = hybrid_pages("report.pdf")
+    text = hybrid_text("report.pdf")                  # pages joined like pdf_text.extract_text
+    [p.provenance() for p in pages]
+"""
+
+import os
+import re
+
+import pdf_text
+from ocr_pages import OCR_DPI, OCR_FIRST_PASS_DPI, OCR_LANG, iter_ocr_pages
+
+# === Routing thresholds ===
+# Fewer non-space characters than this is too little to judge (or to be a full page of text)
+HYBRID_MIN_CHARS = int(os.environ.get("HYBRID_MIN_CHARS", 25))
+# Characters per square inch below which a mostly-image page is treated as a scan
+HYBRID_MIN_DENSITY = float(os.environ.get("HYBRID_MIN_DENSITY", 1.0))
+HYBRID_MIN_IMAGE_COVERAGE = float(os.environ.get("HYBRID_MIN_IMAGE_COVERAGE", 0.3))
+# Share of unmapped/control characters above which the layer is garbled
+HYBRID_MAX_BAD_RATIO = float(os.environ.get("HYBRID_MAX_BAD_RATIO", 0.1))
+# Share of unusual symbols (not letters, digits or everyday punctuation) above which it is garbled
+HYBRID_MAX_SYMBOL_RATIO = float(os.environ.get("HYBRID_MAX_SYMBOL_RATIO", 0.3))
+
+TEXT_LAYER = "text_layer"
+OCR = "ocr"
+
+CID_RE = re.compile(r"\(cid:\d+\)")
+# Dot leaders, table rules, units and ranges are normal in reports
+COMMON_PUNCTUATION = set(".,:;!?-_/\\()[]{}%+*=<>|'\"#&@~°µ±–—•·…")
+
+
+class HybridPage:
+    """One page of the merged model: its text and where that text came from."""
+
+    def __init__(self, page_no, text, source, reason, chars=0, density=None):
+        self.page_no = page_no
+        self.text = text
+        self.source = source
+        self.reason = reason
+        self.chars = chars
+        self.density = density
+
+    def provenance(self):
+        return {"page": self.page_no + 1, "source": self.source, "reason": self.reason,
+                "chars": self.chars, "density": None if self.density is None else round(self.density, 2)}
+
+
+def page_areas(pdf_path):
+    """Area of each page in square inches (from the media boxes; PyPDF2 reads no content for this)."""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(pdf_path)
+    return [float(page.mediabox.width) * float(page.mediabox.height) / (72 * 72) for page in reader.pages]
+
+
+def image_coverage(pdf_path, page_numbers):
+    """``{page_no: share of the page covered by images}`` (overlaps counted once per image, capped at 1)."""
+    import pdfplumber
+
+    coverage = {}
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_no in page_numbers:
+            page = pdf.pages[page_no]
+            area = float(page.width * page.height) or 1.0
+            covered = sum(max(0.0, float(min(img["x1"], page.width) - max(img["x0"], 0)))
+                          * max(0.0, float(min(img["bottom"], page.height) - max(img["top"], 0)))
+                          for img in page.images)
+            coverage[page_no] = min(1.0, covered / area)
+    return coverage
+
+
+def assess_text_layer(text):
+    """``(reason, chars)``: why the layer needs OCR (None if it looks usable) and its non-space character count."""
+    cids = len(CID_RE.findall(text))
+    stripped = CID_RE.sub("", text)
+    chars = sum(1 for c in stripped if not c.isspace())
+    if chars + cids == 0:
+        return "no text layer", chars
+    if chars + cids < HYBRID_MIN_CHARS:
+        return None, chars
+    bad = cids + sum(1 for c in stripped if c == "\ufffd" or (ord(c) < 32 and c not in "\t\n\r")
+                     or 0xE000 <= ord(c) <= 0xF8FF)
+    if bad / (chars + cids) > HYBRID_MAX_BAD_RATIO:
+        return "garbled text layer", chars
+    symbols = sum(1 for c in stripped if not (c.isspace() or c.isalnum() or c in COMMON_PUNCTUATION))
+    if symbols / chars > HYBRID_MAX_SYMBOL_RATIO:
+        return "garbled text layer", chars
+    return None, chars
+
+
+def _ocr_cache_label(options):
+    return "ocr-{}-{}-{}".format(options.get("lang", OCR_LANG), options.get("dpi", OCR_DPI),
+                                 options.get("first_pass_dpi", OCR_FIRST_PASS_DPI))
+
+
+def hybrid_pages(pdf_path, backend="pdfplumber", ocr_all=False, use_cache=pdf_text.PDF_TEXT_CACHE_ENABLED,
+                 **ocr_options):
+    """
+    Page-ordered HybridPages: the text layer where it is usable, OCR text elsewhere.
+
+    ``ocr_all`` sends every page to OCR (the old ocr_pdf_extractor
+    behaviour). ``ocr_options`` go to ocr_pages.iter_ocr_pages. If OCR is
+    unavailable or fails, the text layer is kept and the reason says so.
+    """
+    pdf_path = os.fspath(pdf_path)
+    texts = pdf_text.extract_pages(pdf_path, backend, use_cache=use_cache)
+    try:
+        areas = page_areas(pdf_path)
+    except Exception:
+        areas = [None] * len(texts)
+
+    pages, sparse = [], []
+    for page_no, text in enumerate(texts):
+        reason, chars = assess_text_layer(text)
+        area = areas[page_no] if page_no < len(areas) else None
+        density = chars / area if area else None
+        if ocr_all:
+            reason = "OCR requested for all pages"
+        elif reason is None and (chars < HYBRID_MIN_CHARS
+                                 or density is not None and density < HYBRID_MIN_DENSITY):
+            sparse.append(page_no)
+        pages.append(HybridPage(page_no, text, OCR if reason else TEXT_LAYER, reason or "text layer",
+                                chars, density))
+
+    if sparse:
+        # Little text on a page can be a cover page or a scan with a stamped header; images decide
+        try:
+            coverage = image_coverage(pdf_path, sparse)
+        except Exception:
+            coverage = {}
+        for page_no in sparse:
+            if coverage.get(page_no, 0.0) >= HYBRID_MIN_IMAGE_COVERAGE:
+                pages[page_no].source = OCR
+                pages[page_no].reason = f"sparse text on image page ({coverage[page_no]:.0%} images)"
+
+    to_ocr = [page.page_no for page in pages if page.source == OCR]
+    if not to_ocr:
+        return pages
+
+    label = _ocr_cache_label(ocr_options)
+    digest = pdf_text.pdf_hash(pdf_path) if use_cache else None
+    missing = []
+    for page_no in to_ocr:
+        cached = pdf_text.page_text_cache.get(digest, label, page_no) if use_cache else None
+        if cached is None:
+            missing.append(page_no)
+        else:
+            pages[page_no].text = cached
+    if missing:
+        print(f"OCR of {len(missing)} of {len(pages)} pages: {', '.join(str(p + 1) for p in missing)}")
+        done = set()
+        try:
+            for page_no, text in iter_ocr_pages(pdf_path, missing, **ocr_options):
+                pages[page_no].text = text
+                done.add(page_no)
+                if use_cache:
+                    pdf_text.page_text_cache.put(digest, label, page_no, text)
+        except Exception as e:
+            print(f"OCR unavailable ({e}); keeping the text layer for those pages")
+            for page_no in missing:
+                if page_no not in done:
+                    pages[page_no].source = TEXT_LAYER
+                    pages[page_no].reason += f"; OCR failed: {e}"
+    return pages
+
+
+def hybrid_text(pdf_path, backend="pdfplumber", skip_empty=True, **kwargs):
+    """The whole document's text from hybrid_pages, each page followed by a newline (as pdf_text.extract_text)."""
+    pages = hybrid_pages(pdf_path, backend, **kwargs)
+    return "".join([page.text + "\n" for page in pages if page.text or not skip_empty])
@@ -0,0 +1,217 @@
+# === image_assets.py ===
+"""
+Process-wide store for raster report assets (card backgrounds, full-page
+images, overlay cards).
+
+The templates used to open each PNG with PIL, flatten it onto white and
+re-encode it to PNG for every card, and ReportLab then decoded and
+zlib-compressed the pixels again for every PDF. Here that work is done once
+per (path, mtime, box size, flatten) and the finished PDF image object is
+reused: each document embeds an asset once and every further draw is just
+a ``Do`` operator pointing at the shared XObject.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image as PILImage
+from reportlab.lib.boxstuff import aspectRatioFix
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfdoc
+from reportlab.platypus import Flowable
+
+# === Limits ===
+# Images are never stored at more than this resolution for the box they are drawn in
+IMAGE_ASSET_MAX_DPI = int(os.environ.get("IMAGE_ASSET_MAX_DPI", 300))
+IMAGE_ASSET_MAX_ENTRIES = int(os.environ.get("IMAGE_ASSET_MAX_ENTRIES", 256))
+IMAGE_ASSET_MAX_BYTES = int(os.environ.get("IMAGE_ASSET_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def flatten_image_to_white(img):
+    """Composite an image with transparency onto a white RGB background."""
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        img = img.convert("RGBA") if img.mode == 'P' else img
+        bg = PILImage.new("RGB", img.size, (255, 255, 255))
+        bg.paste(img, mask=img.split()[-1])  # Use alpha as mask
+        return bg
+    return img.convert("RGB")
+
+
+class ImageAsset:
+    """A decoded, flattened/resized image plus its ready-to-embed PDF XObject."""
+
+    def __init__(self, key, source, pixel_size, mask):
+        self.key = key
+        self.reader = ImageReader(source)
+        self.pixel_width, self.pixel_height = pixel_size
+        self.mask = mask
+        self.digest = hashlib.md5(repr(key).encode("utf-8")).hexdigest()
+        # Compress the pixel data once; documents get shallow copies of this object
+        self._xobject = pdfdoc.PDFImageXObject(self.digest, self.reader, mask=mask)
+        self._xobject.name = self.digest
+        smask = getattr(self._xobject, "_smask", None)
+        if smask is not None:
+            smask.name = self.digest + "_smask"
+        self.nbytes = len(self._xobject.streamContent) + (
+            len(smask.streamContent) if smask is not None else 0
+        )
+
+    def register(self, canvas):
+        """Embed the image in the canvas' document (once) and return its XObject name."""
+        doc = canvas._doc
+        reg_name = doc.getXObjectName(self.digest)
+        if doc.idToObject.get(reg_name) is None:
+            xobj = copy.copy(self._xobject)
+            canvas._setXObjects(xobj)
+            doc.Reference(xobj, reg_name)
+            doc.addForm(self.digest, xobj)
+            smask = getattr(xobj, "_smask", None)
+            if smask is not None:
+                smask = copy.copy(smask)
+                mask_reg_name = doc.getXObjectName(smask.name)
+                if doc.idToObject.get(mask_reg_name) is None:
+                    canvas._setXObjects(smask)
+                    xobj.smask = doc.Reference(smask, mask_reg_name)
+                else:
+                    xobj.smask = pdfdoc.PDFObjectReference(mask_reg_name)
+                del xobj._smask
+        return reg_name
+
+
+class ImageAssetStore:
+    """Size-bounded LRU cache of ImageAsset objects with hit/miss counters."""
+
+    def __init__(self, max_entries=IMAGE_ASSET_MAX_ENTRIES, max_bytes=IMAGE_ASSET_MAX_BYTES,
+                 max_dpi=IMAGE_ASSET_MAX_DPI):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_dpi = max_dpi
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self, path, size, flatten):
+        img = PILImage.open(path)
+        if img.format == "JPEG" and not flatten and not self._needs_downscale(img, size):
+            # Keep the original DCT stream; re-encoding would only make it bigger
+            return path, img.size
+        img.load()
+        if flatten:
+            img = flatten_image_to_white(img)
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+        factor = self._needs_downscale(img, size)
+        if factor:
+            new_size = (max(1, round(img.width * factor)), max(1, round(img.height * factor)))
+            img = img.resize(new_size, PILImage.LANCZOS)
+        return img, img.size
+
+    def _needs_downscale(self, img, size):
+        """Return the shrink factor needed to fit ``size`` points at max_dpi, or None."""
+        if size is None:
+            return None
+        box_w = size[0] * self.max_dpi / 72.0
+        box_h = size[1] * self.max_dpi / 72.0
+        factor = max(box_w / img.width, box_h / img.height)
+        return factor if factor < 1 else None
+
+    def get(self, path, size=None, flatten=False, mask='auto'):
+        """Return the ImageAsset for ``path`` drawn into a box of ``size`` points."""
+        path = os.path.abspath(os.fspath(path))
+        if size is not None:
+            size = (round(float(size[0]), 2), round(float(size[1]), 2))
+        key = (path, os.stat(path).st_mtime_ns, size, bool(flatten), str(mask))
+
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return asset
+            self.misses += 1
+
+        source, pixel_size = self._load(path, size, flatten)
+        asset = ImageAsset(key, source, pixel_size, None if flatten else mask)
+
+        with self._lock:
+            for old_key in [k for k in self._entries if k[0] == path and k[2:] == key[2:]]:
+                self._total_bytes -= self._entries.pop(old_key).nbytes
+            self._entries[key] = asset
+            self._total_bytes += asset.nbytes
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.nbytes
+                self.evictions += 1
+        return asset
+
+    def draw(self, canvas, path, x, y, width, height, flatten=False, mask='auto',
+             preserveAspectRatio=False, anchor='c'):
+        """Drop-in for ``canvas.drawImage(path, ...)`` using the cached asset."""
+        asset = self.get(path, (width, height), flatten=flatten, mask=mask)
+        reg_name = asset.register(canvas)
+        canvas._currentPageHasImages = 1
+        x, y, width, height, _ = aspectRatioFix(
+            preserveAspectRatio, anchor, x, y, width, height,
+            asset.pixel_width, asset.pixel_height,
+        )
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.scale(width, height)
+        canvas._code.append("/%s Do" % reg_name)
+        canvas.restoreState()
+        canvas._formsinuse.append(asset.digest)
+        return width, height
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Shared instance used by all report templates
+image_store = ImageAssetStore()
+
+
+def draw_image_asset(canvas, path, x, y, width, height, **kwargs):
+    return image_store.draw(canvas, path, x, y, width, height, **kwargs)
+
+
+class AssetImage(Flowable):
+    """Flowable equivalent of ``platypus.Image(path, width, height)`` backed by the image store."""
+
+    def __init__(self, filename, width, height, flatten=False, mask='auto', hAlign='CENTER'):
+        super().__init__()
+        self.filename = filename
+        self.drawWidth = self.width = width
+        self.drawHeight = self.height = height
+        self.flatten = flatten
+        self.mask = mask
+        self.hAlign = hAlign
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        image_store.draw(self.canv, self.filename, 0, 0, self.width, self.height,
+                         flatten=self.flatten, mask=self.mask)
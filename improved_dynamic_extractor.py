@@ -1,17 +1,15 @@
-import PyPDF2
 import json
 import re
 from datetime import datetime
 import os
 
+import pdf_text
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF using PyPDF2"""
     text = ""
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        text = pdf_text.extract_text(pdf_path, backend="pypdf2", skip_empty=False)
     except Exception as e:
         print(f"Error with PyPDF2: {e}")
     return text
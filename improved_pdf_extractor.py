@@ -1,20 +1,21 @@
-import PyPDF2
-import pdfplumber
 import json
 import re
 from datetime import datetime
 import os
-import fitz  # PyMuPDF for better text extraction
+
+import pdf_text
+from hybrid_text import hybrid_text
+from report_patterns import LINE_PATIENT_PATTERNS, PATTERNS, VITAL_PATTERNS
+
+LINE_VITAL_FIELDS = ("body_temperature", "heart_rate", "blood_pressure", "height", "weight", "bmi")
+LINE_VITAL_SUFFIXES = {"height": " cms", "weight": " kg"}
+BIOMARKER_VALUE = PATTERNS["biomarker_value"].regex
 
 def extract_text_with_pymupdf(pdf_path):
-    """Extract text using PyMuPDF for better accuracy"""
+    """Extract text using PyMuPDF for better accuracy (OCR for scanned or garbled pages)"""
     text = ""
     try:
-        doc = fitz.open(pdf_path)
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text += page.get_text() + "\n"
-        doc.close()
+        text = hybrid_text(pdf_path, backend="pymupdf", skip_empty=False)
     except Exception as e:
         print(f"Error with PyMuPDF: {e}")
     return text
@@ -31,23 +32,16 @@ def extract_text_from_pdf(pdf_path):
     except Exception as e:
         print(f"PyMuPDF not available: {e}")
     
-    # Method 2: Using pdfplumber (better for tables and structured data)
+    # Method 2: Using pdfplumber (better for tables and structured data), OCR for scanned pages
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        text += hybrid_text(pdf_path, backend="pdfplumber")
     except Exception as e:
         print(f"Error with pdfplumber: {e}")
     
     # Method 3: Using PyPDF2 as fallback
     if not text or len(text.strip()) < 100:
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            text += pdf_text.extract_text(pdf_path, backend="pypdf2", skip_empty=False)
         except Exception as e:
             print(f"Error with PyPDF2: {e}")
     
@@ -83,37 +77,30 @@ def extract_patient_info_from_lines(lines):
         "diet": ""
     }
     
-    # Look for patient name patterns
-    for line in lines:
-        # Look for name patterns
-        if any(keyword in line.lower() for keyword in ['patient', 'name', 'client']):
-            # Extract name after colon or keyword
-            name_match = re.search(r'(?:patient|name|client)[:\s]+([A-Za-z\s]+)', line, re.IGNORECASE)
-            if name_match:
-                patient_info["name"] = name_match.group(1).strip()
-                break
-    
-    # Look for age
-    for line in lines:
-        age_match = re.search(r'age[:\s]+(\d+)', line, re.IGNORECASE)
-        if age_match:
-            patient_info["age"] = age_match.group(1)
-            break
-    
-    # Look for gender
+    # First line with each field wins
+    found = set()
     for line in lines:
-        if 'male' in line.lower() or 'female' in line.lower():
-            gender_match = re.search(r'(male|female)', line, re.IGNORECASE)
-            if gender_match:
-                patient_info["gender"] = gender_match.group(1).title()
-                break
-    
-    # Look for date of birth
-    for line in lines:
-        dob_match = re.search(r'(?:dob|date of birth)[:\s]+(\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})', line, re.IGNORECASE)
-        if dob_match:
-            patient_info["dob"] = dob_match.group(1)
-            break
+        hits = LINE_PATIENT_PATTERNS.scan(line)
+        
+        # Look for name patterns ("patient", "name" or "client", then the name)
+        if "name" not in found and hits["person_name"]:
+            patient_info["name"] = hits["person_name"].group("name").strip()
+            found.add("name")
+        
+        # Look for age
+        if "age" not in found and hits["age"]:
+            patient_info["age"] = hits["age"].group("age")
+            found.add("age")
+        
+        # Look for gender
+        if "gender" not in found and hits["gender"]:
+            patient_info["gender"] = hits["gender"].group("gender").title()
+            found.add("gender")
+        
+        # Look for date of birth
+        if "dob" not in found and hits["dob"]:
+            patient_info["dob"] = hits["dob"].group("dob")
+            found.add("dob")
     
     # Look for location
     for line in lines:
@@ -128,35 +115,12 @@ def extract_vital_parameters_from_lines(lines):
     vitals = {}
     
     for line in lines:
-        # Temperature
-        temp_match = re.search(r'temperature[:\s]+(\d+\.?\d*)\s*°?f', line, re.IGNORECASE)
-        if temp_match:
-            vitals["body_temperature"] = temp_match.group(1)
-        
-        # Heart rate
-        hr_match = re.search(r'heart rate[:\s]+(\d+\.?\d*)\s*bpm', line, re.IGNORECASE)
-        if hr_match:
-            vitals["heart_rate"] = hr_match.group(1)
-        
-        # Blood pressure
-        bp_match = re.search(r'blood pressure[:\s]+(\d+/\d+)', line, re.IGNORECASE)
-        if bp_match:
-            vitals["blood_pressure"] = bp_match.group(1)
-        
-        # Height
-        height_match = re.search(r'height[:\s]+(\d+\.?\d*)\s*cms?', line, re.IGNORECASE)
-        if height_match:
-            vitals["height"] = height_match.group(1) + " cms"
-        
-        # Weight
-        weight_match = re.search(r'weight[:\s]+(\d+\.?\d*)\s*kg', line, re.IGNORECASE)
-        if weight_match:
-            vitals["weight"] = weight_match.group(1) + " kg"
-        
-        # BMI
-        bmi_match = re.search(r'bmi[:\s]+(\d+\.?\d*)', line, re.IGNORECASE)
-        if bmi_match:
-            vitals["bmi"] = bmi_match.group(1)
+        # A later line overrides an earlier one
+        hits = VITAL_PATTERNS.scan(line)
+        for key in LINE_VITAL_FIELDS:
+            match = hits[key]
+            if match:
+                vitals[key] = match.group("value") + LINE_VITAL_SUFFIXES.get(key, "")
     
     return vitals
 
@@ -167,11 +131,11 @@ def extract_biomarkers_from_lines(lines):
     # Look for common biomarker patterns
     for line in lines:
         # Pattern for biomarker: name value unit
-        biomarker_match = re.search(r'([A-Za-z\s]+)[:\s]+(\d+\.?\d*)\s*([a-zA-Z/%]+)', line)
+        biomarker_match = BIOMARKER_VALUE.search(line)
         if biomarker_match:
-            name = biomarker_match.group(1).strip()
-            value = biomarker_match.group(2)
-            unit = biomarker_match.group(3)
+            name = biomarker_match.group("name").strip()
+            value = biomarker_match.group("value")
+            unit = biomarker_match.group("unit")
             
             # Filter out non-biomarker matches
             if (len(name) > 3 and 
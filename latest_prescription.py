@@ -5,7 +5,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
-from flask import Flask, request, send_file
+from flask import Flask, Response, request, send_file
 from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import (
     SimpleDocTemplate,
@@ -34,7 +34,10 @@ from reportlab.pdfgen import canvas
 from reportlab.graphics.shapes import Drawing,Circle, String
 from reportlab.graphics import renderPDF, renderPM
 
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from page_numbering import DeferredPageCountCanvas
+from render_cache import RENDER_CACHE_ENABLED, render_cache, render_cache_key, etag_for, etag_matches
+from style_registry import shared_stylesheet, StyleSheetOverlay, sample_styles
 
 logger = logging.getLogger(__name__)
 
@@ -204,7 +207,7 @@ class PrescriptionOnlyPMXBasePage:
 
     def __init__(self):
         # Initialize ReportLab's built-in styles
-        self.styles = getSampleStyleSheet()
+        self.styles = sample_styles()
         # Set base path for static assets
         self.base_path = (
             Path(__file__).parent.parent.parent.parent.parent / "staticfiles" / "icons"
@@ -272,7 +275,7 @@ class PrescriptionOnlySVGImage(Flowable):
         super().__init__()
         # Convert SVG to ReportLab drawing
         self.filename = svg_path
-        self.svg = svg2rlg(svg_path)
+        self.svg = load_svg(svg_path)
         self.svg_width = self.svg.width
         self.svg_height = self.svg.height
 
@@ -358,7 +361,7 @@ class PrescriptionOnlyTemplate(PrescriptionOnlyPMXBasePage):
             try:
                 if os.path.exists(logo_path):
                     # Try to load SVG
-                    svg = svg2rlg(logo_path)
+                    svg = load_svg(logo_path)
                     if svg is not None:
                         return PrescriptionOnlySVGImage(logo_path, width, height)
                     # If SVG loading failed, try to load as regular image
@@ -564,23 +567,10 @@ class PrescriptionOnlyTemplate(PrescriptionOnlyPMXBasePage):
         )
         return elements
 
-class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        self._saved_pages = []
-        super().__init__(*args, **kwargs)
-
-    def showPage(self):
-        self._saved_pages.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        total_pages = len(self._saved_pages)
-        for page_num, page in enumerate(self._saved_pages, start=1):
-            self.__dict__.update(page)
-            self._template.total_pages = total_pages  # set total pages for footer
-            self._template._add_logo_to_bottom_left(self, self._doc)
-            super().showPage()
-        super().save()
+class NumberedCanvas(DeferredPageCountCanvas):
+    def draw_page_footer(self, total_pages):
+        self._template.total_pages = total_pages  # set total pages for footer
+        self._template._add_logo_to_bottom_left(self, self._doc)
 
 class RoundedPill(Flowable):
     def __init__(
@@ -623,7 +613,7 @@ class RoundedPill(Flowable):
         self.icon_drawing = None
         if self.icon_path and os.path.exists(self.icon_path):
             try:
-                drawing = svg2rlg(self.icon_path)
+                drawing = load_svg(self.icon_path)
                 scale_x = self.icon_width / drawing.width
                 scale_y = self.icon_height / drawing.height
                 drawing.scale(scale_x, scale_y)
@@ -705,7 +695,7 @@ class DoctorSignature(Flowable):
 
         try:
             signature_svg = "staticfiles/icons/dr_samatha_sign.svg"
-            drawing = svg2rlg(signature_svg)
+            drawing = load_svg(signature_svg)
 
             target_width = 77
             target_height = 21.12
@@ -727,18 +717,19 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         super().__init__()
         # Initialize with standard margins
         self.PAGE_MARGIN = 0.25 * inch  # Use consistent margins
-        self.init_styles()
+        self.styles = StyleSheetOverlay(PRESCRIPTION_STYLES)
         self.content_background_color = PMX_BACKGROUND
         logger.debug(
             "Initialized PrescriptionPage with margins: %.2f inches",
             self.PAGE_MARGIN / inch,
         )
 
-    def init_styles(self):
+    @staticmethod
+    def init_styles(styles):
         """Initialize all custom text styles used in the prescription."""
 
         #PrescriptionEnds here
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PrescriptionEnds",
                 fontName=FONT_INTER_REGULAR,
@@ -751,7 +742,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
                 leftIndent=0,
             )
         ),
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "Medicationss",
                 fontName=FONT_INTER_SEMIBOLD,   # You must register this font if custom
@@ -764,7 +755,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
                 spaceAfter=0,
             )
         )
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "PatientName",
             fontName=FONT_RALEWAY_MEDIUM,       # Must be registered manually
             fontSize=18,                     # Matches font-size: 18px
@@ -774,7 +765,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             spaceAfter=0,
         ))
         # Date style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "DateStyle",
             fontName=FONT_INTER_REGULAR,          # You need to register this if it's a TTF
             fontSize=FONT_SIZE_MEDIUM,                       # Matches font-size: 12px
@@ -785,7 +776,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         ))
         
         # Prescription title style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PrescriptionTitle",
                 fontName=FONT_INTER_REGULAR,
@@ -799,7 +790,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table header style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableHeader",
                 fontName=FONT_INTER_BOLD,
@@ -812,7 +803,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table cell style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableCell",
                 fontName=FONT_INTER_REGULAR,
@@ -826,7 +817,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "RowNumber",
                 fontName=FONT_INTER_REGULAR,
@@ -843,7 +834,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Body text style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXBodyText",
                 fontName=FONT_INTER_REGULAR,
@@ -857,21 +848,21 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         )
         # Italic text style
         
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BoxInsideData",
             fontName=FONT_INTER_REGULAR,  # Ensure 'Inter' is registered; use 'Helvetica' if fallback needed
             fontSize=12,
             leading=18,  # Line height
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SvgBulletTitle",
             fontName=FONT_INTER_MEDIUM,               # Make sure Inter is registered
             fontSize=16,
             leading=24,                     # 150% line height
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "bullet_after_text",
             fontName=FONT_INTER_REGULAR,                   # Make sure Inter-Regular is registered
             fontSize=12,
@@ -1032,7 +1023,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
 
     def svg_icon(self, path, width=12, height=12):
         try:
-            drawing = svg2rlg(path)
+            drawing = load_svg(path)
             if drawing is None:
                 raise FileNotFoundError(f"SVG file '{path}' could not be loaded or is invalid.")
         except Exception as e:
@@ -1864,7 +1855,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         # Draw PMX logo
         logo = self._get_logo()
         if isinstance(logo, PrescriptionOnlySVGImage):
-            drawing = svg2rlg(logo.filename)
+            drawing = load_svg(logo.filename)
             if drawing:
                 logo_width = drawing.width
                 renderPDF.draw(drawing, canvas, x=logo_x, y=logo_y)
@@ -1937,11 +1928,11 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
 
         return [BottomLeftImageFlowable(image_path, width, height)]
 
-# ------------------ Flask App ------------------
-app = Flask(__name__)
-@app.route("/generate_prescription", methods=["POST"])
-def generate_prescription():
-    data = request.get_json()
+
+PRESCRIPTION_STYLES = shared_stylesheet(f"{__name__}.PrescriptionPage", PrescriptionPage.init_styles)
+
+def render_prescription_pdf(data: dict) -> bytes:
+    """Build the prescription PDF for ``data`` and return its bytes."""
     buffer = io.BytesIO()
 
     template = PrescriptionPage()
@@ -1998,11 +1989,32 @@ def generate_prescription():
 
     flowables = template.generate(data)
     doc.build(flowables, canvasmaker=canvasmaker)
-    with open("output_from_buffer__.pdf", "wb") as f:
-        f.write(buffer.getvalue())
-        
-    buffer.seek(0)
-    return send_file(buffer, as_attachment=True, download_name="prescription.pdf", mimetype="application/pdf")
+    return buffer.getvalue()
+
+# ------------------ Flask App ------------------
+app = Flask(__name__)
+@app.route("/generate_prescription", methods=["POST"])
+def generate_prescription():
+    data = request.get_json()
+    if not RENDER_CACHE_ENABLED:
+        buffer = io.BytesIO(render_prescription_pdf(data))
+        return send_file(buffer, as_attachment=True, download_name="prescription.pdf", mimetype="application/pdf")
+
+    # The prescription prints today's date, so a cached PDF is only valid on the day it was rendered
+    key = render_cache_key("latest_prescription:render_prescription_pdf",
+                           {"payload": data, "date": datetime.now().date().isoformat()})
+    headers = {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("If-None-Match"), key):
+        return Response(status=304, headers=headers)
+    pdf_bytes = render_cache.get(key)
+    headers["X-Render-Cache"] = "hit" if pdf_bytes is not None else "miss"
+    if pdf_bytes is None:
+        pdf_bytes = render_prescription_pdf(data)
+        render_cache.put(key, pdf_bytes)
+    response = send_file(io.BytesIO(pdf_bytes), as_attachment=True, download_name="prescription.pdf",
+                         mimetype="application/pdf", etag=False)
+    response.headers.update(headers)
+    return response
 
 if __name__ == "__main__":
     app.run(debug=True)
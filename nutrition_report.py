@@ -32,7 +32,10 @@ from reportlab.platypus import Image as RLImage
 
 # SVG Rendering
 from reportlab.graphics import renderPDF
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from page_numbering import DeferredPageCountCanvas
+from render_pool import RenderPool, render_pdf_response
+from style_registry import shared_stylesheet, StyleSheetOverlay, sample_styles
 
 # JSON Handling (optional if needed)
 import json
@@ -197,7 +200,7 @@ class RoundedPill(Flowable):
 
         if self.icon_path and os.path.exists(self.icon_path):
             try:
-                drawing = svg2rlg(self.icon_path)
+                drawing = load_svg(self.icon_path)
                 if drawing.width > 0 and drawing.height > 0:
                     scale_x = self.icon_width / drawing.width
                     scale_y = self.icon_height / drawing.height
@@ -331,7 +334,7 @@ class PDFStyleConfig:
         self.FONT_LARGE = 18
         self.FONT_MEDIUM = 12
         self.FONT_SMALL = 10
-        self.styles = getSampleStyleSheet()
+        self.styles = sample_styles()
 
         # --- Paragraph Styles (example) ---
         self.heading_style = ParagraphStyle(
@@ -384,7 +387,7 @@ class ThrivePageRenderer:
                 target_w, target_h = 37, 80
                 y_pos = PAGE_HEIGHT - target_h
                 if logo_path_to_use.lower().endswith(".svg"):
-                    drawing = svg2rlg(logo_path_to_use)
+                    drawing = load_svg(logo_path_to_use)
                     if drawing:
                         drawing.scale(target_w / drawing.width, target_h / drawing.height)
                         drawing.width = target_w
@@ -424,7 +427,7 @@ class ThrivePageRenderer:
         logo = self.template._get_logo()
 
         if isinstance(logo, ThriveRoadmapOnlySVGImage):
-            drawing = svg2rlg(logo.filename)
+            drawing = load_svg(logo.filename)
             if drawing:
                 drawing.scale(logo_width / drawing.width, logo_height / drawing.height)
                 renderPDF.draw(drawing, canvas, x=logo_x, y=logo_y)
@@ -437,23 +440,8 @@ class ThrivePageRenderer:
 
         canvas.restoreState()
 
-class NumberedCanvas(Canvas):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._saved_page_states = []
-
-    def showPage(self):
-        self._saved_page_states.append(dict(self.__dict__))
-        self._startPage()
-
-    def save(self):
-        total_pages = len(self._saved_page_states)
-        for state in self._saved_page_states:
-            self.__dict__.update(state)
-            self.draw_page_number(total_pages)
-            super().showPage()
-        super().save()
-
+class NumberedCanvas(DeferredPageCountCanvas):
+    # Footers are filled in at save() time via per-page forms, see page_numbering.py
     def draw_page_number(self, total_pages):
         page_number = self.getPageNumber()
         # if page_number <= 2:
@@ -528,9 +516,8 @@ class SvgTitleRow(Flowable):
 class ThriveRoadmapTemplate:
     def __init__(self,buffer):
         self.buffer = buffer
-        self.styles = getSampleStyleSheet()
         self.base_path = Path("staticfiles/icons")
-        self.init_styles()
+        self.styles = StyleSheetOverlay(NUTRITION_STYLES)
         self.svg_dir = "staticfiles/icons/"
         self.doc = MyDocTemplate(buffer)
 
@@ -543,7 +530,7 @@ class ThriveRoadmapTemplate:
         for logo_path in possible_paths:
             if os.path.exists(logo_path):
                 try:
-                    svg = svg2rlg(logo_path)
+                    svg = load_svg(logo_path)
                     if svg:
                         return ThriveRoadmapOnlySVGImage(str(logo_path), width=60)
                     return Image(str(logo_path), width=60, height=60)
@@ -560,9 +547,10 @@ class ThriveRoadmapTemplate:
             ),
         )
     
-    def init_styles(self):
+    @staticmethod
+    def init_styles(styles):
         # Ear screening styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ear_screening_title",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=12,
@@ -571,7 +559,7 @@ class ThriveRoadmapTemplate:
             backColor=None,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ear_screening_unit",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -582,7 +570,7 @@ class ThriveRoadmapTemplate:
         ))
 
         # Profile card styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="profile_card_otherstyles",
             fontName=FONT_RALEWAY_MEDIUM,
             fontSize=30,
@@ -591,7 +579,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
 
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="profile_card_name",
             fontName=FONT_INTER_REGULAR,
             fontSize=16,
@@ -602,7 +590,7 @@ class ThriveRoadmapTemplate:
         ))
 
         # TOC styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="TOCTitleStyle",
             fontName=FONT_RALEWAY_MEDIUM,
             fontSize=24,
@@ -611,7 +599,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
             spaceAfter=6,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="TOCEntryText",
             fontName=FONT_INTER_REGULAR,
             fontSize=12,
@@ -619,7 +607,7 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#1F2937"),
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="toc_pagenum",
             fontName=FONT_INTER_REGULAR,
             fontSize=12,
@@ -627,7 +615,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             alignment=TA_RIGHT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "eye_screening_desc_style",
             fontName=FONT_INTER_REGULAR,
             fontSize=10,
@@ -636,7 +624,7 @@ class ThriveRoadmapTemplate:
             spaceBefore=0,
             spaceAfter=0
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="OptimizationPhasesStyle",
             fontName=FONT_INTER_REGULAR,                     # Make sure 'Inter' is registered, else fallback to 'Helvetica'
             fontSize=7.375,
@@ -644,14 +632,14 @@ class ThriveRoadmapTemplate:
             textColor=colors.HexColor("#475467"),# Equivalent to var(--Gray-600)
             alignment=1,                          # 0=left, 1=center, 2=right, 4=justify
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "BiomarkersStyle",
             fontName=FONT_RALEWAY_MEDIUM,               
             fontSize=16,
             leading=24,                       
             textColor=PMX_GREEN   
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "bullet_after_text",
             fontName=FONT_INTER_REGULAR,                   # Make sure Inter-Regular is registered
             fontSize=12,
@@ -661,7 +649,7 @@ class ThriveRoadmapTemplate:
             spaceAfter=0,
         ))
         # Small section title style for protein headings
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="SectionSmallRalewayBold",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=15.079,
@@ -670,14 +658,14 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
         # Superfoods table styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SuperfoodsHeaderStyle",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=10,
             leading=14,
             textColor=PMX_GREEN,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SuperfoodsCellStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -685,7 +673,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
         ))
         # Protein table: special style for food_item column
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "ProteinFoodItemCellStyle",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=8.989,
@@ -693,7 +681,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
         ))
         # Meal Timeline styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="MealTimelineTimeStyle",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=12.85,
@@ -702,7 +690,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
             wordWrap='CJK',
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="MealTimelineTitleStyle",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=10,
@@ -710,7 +698,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="MealTimelineDescStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -719,7 +707,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
         # Weekly Meal Plan styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="WeeklyMealHeaderStyle",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=10,
@@ -727,7 +715,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="WeeklyMealCellStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=8,
@@ -736,7 +724,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
         # Practices to Follow (bullets) styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="PracticeHeaderMediumStyle",
             fontName=FONT_RALEWAY_MEDIUM,
             fontSize=16,
@@ -744,7 +732,7 @@ class ThriveRoadmapTemplate:
             textColor=PMX_GREEN,
             alignment=TA_LEFT,
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="PracticeBulletStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=10,
@@ -754,7 +742,7 @@ class ThriveRoadmapTemplate:
             wordWrap='CJK',
         ))
         # Foods to Reintroduce styles
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ReintroItemTitleStyle",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=12,
@@ -763,7 +751,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
             wordWrap='CJK',
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="ReintroQtyStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=9.2,
@@ -773,7 +761,7 @@ class ThriveRoadmapTemplate:
             wordWrap='CJK',
         ))
         # Food Items: section header style (bullet + title)
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="FoodSectionHeaderStyle",
             fontName=FONT_RALEWAY_BOLD,
             fontSize=25.099,
@@ -782,7 +770,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
         # Food Items: title style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="FoodItemTitleStyle",
             fontName=FONT_INTER_SEMI_BOLD,
             fontSize=15.439,
@@ -791,7 +779,7 @@ class ThriveRoadmapTemplate:
             alignment=TA_LEFT,
         ))
         # Food Items: description style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name="FoodItemDescStyle",
             fontName=FONT_INTER_REGULAR,
             fontSize=10,
@@ -856,7 +844,7 @@ class ThriveRoadmapTemplate:
 
     def svg_icon(self, path, width=12, height=12):
         try:
-            drawing = svg2rlg(path)
+            drawing = load_svg(path)
             if drawing is None:
                 raise FileNotFoundError(f"SVG file '{path}' could not be loaded or is invalid.")
         except Exception as e:
@@ -1928,15 +1916,14 @@ class ThriveRoadmapTemplate:
             story.append(PageBreak())
             story.extend(self.get_foods_to_reintroduce_section(foods_to_reintroduce))       
         return story
-       
 
 
-app = FastAPI()
+NUTRITION_STYLES = shared_stylesheet(f"{__name__}.ThriveRoadmapTemplate", ThriveRoadmapTemplate.init_styles)
+       
 
-@app.post("/generate-pdf")
-async def generate_pdf(request: Request):
-    data = await request.json()
 
+def render_nutrition_pdf(data: dict) -> bytes:
+    """Build the nutrition report PDF for ``data``; runs inside a render worker process."""
     buffer = io.BytesIO()
     template = ThriveRoadmapTemplate(buffer)
     renderer = ThrivePageRenderer(template)
@@ -1965,10 +1952,18 @@ async def generate_pdf(request: Request):
     # Single-pass build without TOC
     story = template.generate(data)
     doc.build(story, canvasmaker=NumberedCanvas)
-    with open("nutirtion_report.pdf", "wb") as f:
-        f.write(buffer.getvalue())
+    return buffer.getvalue()
+
+
+app = FastAPI()
+render_pool = RenderPool(warm_modules=("nutrition_report",))
 
-    buffer.seek(0)
-    return StreamingResponse(buffer, media_type="application/pdf", headers={
-        "Content-Disposition": "inline; filename=styled_output.pdf"
-    })
+@app.on_event("shutdown")
+def shutdown_render_pool():
+    render_pool.shutdown()
+
+@app.post("/generate-pdf")
+async def generate_pdf(request: Request):
+    data = await request.json()
+    return await render_pdf_response(request, render_pool, "nutrition_report:render_nutrition_pdf", data,
+                                     profile_sections=("nutrition_report:ThriveRoadmapTemplate",))
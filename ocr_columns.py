@@ -0,0 +1,56 @@
+# === ocr_columns.py ===
+"""
+Columnar (NumPy) box coordinates of OCR words, for window searches over a page.
+
+extract_table_header filtered the header page word by word in Python for the
+words within 100 px above and below the matched header lines. PageColumns
+holds a page's left/top/right/bottom as float arrays, so ``mask_in(top,
+bottom, left, right)`` tests every word at once, and ``select`` turns the
+mask back into the page's own word dicts, in page order.
+
+bench_header_match.py checks the windows against the word-by-word scan.
+
+Not done here: the value-candidate search of predict_mutli_checks and
+get_template_extraction_values (right-of / below candidates, distance and
+alignment scores) is still word-by-word Python. Its candidates come from
+finding_possible_values and its scores from calculate_distance and
+calculate_value_distance, which extraction.py imports from outside this
+tree. Vectorising them with these arrays needs their code, to reproduce
+and check their exact rules.
+
+    columns = PageColumns(page)
+    columns.select(columns.mask_in(top - 100, bottom + 100))
+"""
+
+import numpy as np
+
+BOX_KEYS = ("left", "top", "right", "bottom")
+
+
+class PageColumns:
+    """The boxes of a page's words as arrays, with vectorised window masks."""
+
+    def __init__(self, words):
+        self.words = tuple(w for w in words if isinstance(w, dict) and all(k in w for k in BOX_KEYS))
+        boxes = np.array([[w["left"], w["top"], w["right"], w["bottom"]] for w in self.words],
+                         dtype=np.float64).reshape(-1, 4)
+        self.left, self.top, self.right, self.bottom = (np.ascontiguousarray(boxes[:, i]) for i in range(4))
+
+    def __len__(self):
+        return len(self.words)
+
+    def select(self, which):
+        """The words of a boolean mask or an index array (index order is kept)."""
+        which = np.asarray(which)
+        if which.dtype == bool:
+            which = np.flatnonzero(which)
+        return [self.words[i] for i in which]
+
+    def mask_in(self, top, bottom, left=None, right=None):
+        """Words with ``top <= word.top``, ``word.bottom <= bottom`` (and within ``left`` / ``right`` if given)."""
+        mask = (self.top >= top) & (self.bottom <= bottom)
+        if left is not None:
+            mask &= self.left >= left
+        if right is not None:
+            mask &= self.right <= right
+        return mask
@@ -0,0 +1,121 @@
+# === ocr_index.py ===
+"""
+Per-document index of OCR words for the template extraction in extraction.py.
+
+extract_table_header sorted and regrouped every page into lines once per
+header line, for every table of every section, and extract_remarks,
+predict_sub_templates, predict_sub_sub_templates and predict_paragraph
+grouped the same pages again. An OcrIndex is built once per document and
+each page (or section page) is grouped only the first time it is asked for:
+
+* ``lines``: the page's line groups, exactly as line_wise_ocr_data forms them;
+* ``texts`` / ``letters``: each line's words joined with spaces, and the same
+  with everything but ASCII letters removed (the header matching compares both,
+  through ``text_profiles`` / ``letter_profiles``, see fuzzy_match);
+* ``columns``: the words' boxes as NumPy arrays (ocr_columns.PageColumns);
+  ``words_in(top, bottom, left, right)`` selects the page's words inside a
+  box with one vectorised mask.
+
+Pages are looked up by the identity of their words, so the per-section page
+lists built from the document's words are indexed once and shared by every
+table of the section. Everything returned is a tuple; the words themselves
+are the document's dicts and must not be moved while the index is in use.
+
+    index = OcrIndex(ocr_all)
+    page = index.page(words)
+    for line, text in zip(page.lines, page.texts):
+        ...
+    index.pages[2].words_in(top - 100, bottom + 100)
+"""
+
+import re
+from functools import cached_property
+
+from fuzzy_match import FuzzyText
+from ocr_columns import PageColumns
+
+# Words whose tops differ by less than this are on the same line (line_wise_ocr_data)
+LINE_TOLERANCE = 5
+
+NON_LETTERS = re.compile(r"[^a-zA-Z]")
+
+
+def group_lines(words):
+    """Line groups of ``words``: sorted by page and top, split where the top moves, each line sorted by left."""
+    sorted_words = sorted((w for w in words if isinstance(w, dict) and "pg_no" in w and "top" in w),
+                          key=lambda x: (x["pg_no"], x["top"]))
+    lines = []
+    current_line = []
+    for word in sorted_words:
+        if current_line and abs(word["top"] - current_line[0]["top"]) >= LINE_TOLERANCE:
+            lines.append(tuple(sorted(current_line, key=lambda x: x["left"])))
+            current_line = []
+        current_line.append(word)
+    if current_line:
+        lines.append(tuple(sorted(current_line, key=lambda x: x["left"])))
+    return tuple(lines)
+
+
+class PageLines:
+    """The words of one page (or of any word list) with their lines and box arrays, derived on first use."""
+
+    def __init__(self, words):
+        self.words = tuple(words)
+
+    @cached_property
+    def lines(self):
+        return group_lines(self.words)
+
+    @cached_property
+    def texts(self):
+        return tuple(" ".join(word["word"] for word in line) for line in self.lines)
+
+    @cached_property
+    def letters(self):
+        return tuple(NON_LETTERS.sub("", text) for text in self.texts)
+
+    @cached_property
+    def text_profiles(self):
+        return tuple(FuzzyText(text) for text in self.texts)
+
+    @cached_property
+    def letter_profiles(self):
+        return tuple(FuzzyText(text) for text in self.letters)
+
+    @cached_property
+    def pg_nos(self):
+        return frozenset(word["pg_no"] for line in self.lines for word in line)
+
+    @cached_property
+    def columns(self):
+        return PageColumns(self.words)
+
+    def words_in(self, top, bottom, left=None, right=None):
+        """
+        Words with ``top <= word["top"]`` and ``word["bottom"] <= bottom`` (and,
+        if given, ``left <= word["left"]`` and ``word["right"] <= right``), in page order.
+        """
+        return self.columns.select(self.columns.mask_in(top, bottom, left, right))
+
+
+class OcrIndex:
+    """PageLines of a document's pages, and of any other word list asked for, keyed by the words' identity."""
+
+    def __init__(self, pages=()):
+        self._by_words = {}
+        self.pages = {}
+        for words in pages:
+            page = self.page(words)
+            if page.lines:
+                self.pages.setdefault(page.lines[0][0]["pg_no"], page)
+
+    def page(self, words):
+        # The index holds the words, so their ids stay unique while it lives
+        key = tuple(map(id, words))
+        page = self._by_words.get(key)
+        if page is None:
+            page = self._by_words[key] = PageLines(words)
+        return page
+
+    def lines(self, words):
+        return self.page(words).lines
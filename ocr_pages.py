@@ -0,0 +1,189 @@
+# === ocr_pages.py ===
+"""
+Streaming, page-parallel OCR of scanned PDFs.
+
+ocr_pdf_extractor used to call ``pdf2image.convert_from_path(pdf, dpi=300)``,
+which holds every page of the report in memory as a 300 dpi bitmap, and then
+PNG-encoded and decoded each page before handing it to tesseract. Here:
+
+* each page is rasterised on its own (pdftoppm ``-f N -l N``) inside a pool
+  worker, OCR'd, and dropped, so a worker holds one bitmap at a time and at
+  most ``window`` pages are in flight;
+* the PIL image goes to tesseract as is, with no PNG round trip;
+* pages are OCR'd across a spawn process pool (tesseract limited to one
+  thread per worker, so the pool does not oversubscribe the CPUs).
+
+Optionally (OCR_FIRST_PASS_DPI, or ``first_pass_dpi=``) a page is first read
+at a low resolution; only lines whose mean word confidence is below
+OCR_MIN_CONFIDENCE are then re-read from a 300 dpi rendering, cropped to
+the line. Clean digital-looking scans need just the cheap pass.
+
+    for page_no, text in iter_ocr_pages("scan.pdf"):
+        ...
+    pages = ocr_pages("scan.pdf", first_pass_dpi=150)
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from pdf_text import page_count
+
+# === Configuration ===
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", min(os.cpu_count() or 2, 8)))
+OCR_DPI = int(os.environ.get("OCR_DPI", 300))
+# 0 disables the low-resolution first pass
+OCR_FIRST_PASS_DPI = int(os.environ.get("OCR_FIRST_PASS_DPI", 0))
+OCR_MIN_CONFIDENCE = float(os.environ.get("OCR_MIN_CONFIDENCE", 60))
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+# Pixels of margin around a line cropped for the second pass (at OCR_DPI)
+LINE_CROP_MARGIN = 8
+
+
+def rasterize_page(pdf_path, page_no, dpi=OCR_DPI):
+    """One page (0-based) as a PIL image, rendered as the original single-pass OCR did."""
+    import pdf2image
+
+    return pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=page_no + 1, last_page=page_no + 1)[0]
+
+
+def _ocr_lines(image, lang):
+    """Tesseract lines of ``image``: ``[(block, text, mean confidence, (left, top, right, bottom))]``."""
+    import pytesseract
+
+    data = pytesseract.image_to_data(image, lang=lang, output_type=pytesseract.Output.DICT)
+    lines = {}
+    for i, word in enumerate(data["text"]):
+        conf = float(data["conf"][i])
+        if conf < 0 or not word.strip():
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        left, top = data["left"][i], data["top"][i]
+        right, bottom = left + data["width"][i], top + data["height"][i]
+        line = lines.get(key)
+        if line is None:
+            lines[key] = [[word], [conf], [left, top, right, bottom]]
+        else:
+            line[0].append(word)
+            line[1].append(conf)
+            box = line[2]
+            box[0], box[1] = min(box[0], left), min(box[1], top)
+            box[2], box[3] = max(box[2], right), max(box[3], bottom)
+    return [(key[0], " ".join(words), sum(confs) / len(confs), tuple(box))
+            for key, (words, confs, box) in sorted(lines.items())]
+
+
+def _two_pass_text(pdf_path, page_no, dpi, first_pass_dpi, min_confidence, lang):
+    import pytesseract
+
+    lines = _ocr_lines(rasterize_page(pdf_path, page_no, first_pass_dpi), lang)
+    weak = [i for i, (_, _, conf, _) in enumerate(lines) if conf < min_confidence]
+    if weak:
+        # Rendered once at full resolution; only the weak lines are OCR'd again
+        image = rasterize_page(pdf_path, page_no, dpi)
+        scale = dpi / first_pass_dpi
+        for i in weak:
+            block, _, _, (left, top, right, bottom) = lines[i]
+            crop = image.crop((max(0, int(left * scale) - LINE_CROP_MARGIN),
+                               max(0, int(top * scale) - LINE_CROP_MARGIN),
+                               min(image.width, int(right * scale) + LINE_CROP_MARGIN),
+                               min(image.height, int(bottom * scale) + LINE_CROP_MARGIN)))
+            text = pytesseract.image_to_string(crop, lang=lang, config="--psm 7").strip()
+            if text:
+                lines[i] = (block, text, lines[i][2], lines[i][3])
+        del image
+    # Blocks separated by a blank line, as image_to_string lays them out
+    out, previous_block = [], None
+    for block, text, _, _ in lines:
+        if previous_block is not None and block != previous_block:
+            out.append("")
+        out.append(text)
+        previous_block = block
+    return "\n".join(out)
+
+
+def ocr_page(pdf_path, page_no, dpi=OCR_DPI, first_pass_dpi=OCR_FIRST_PASS_DPI,
+             min_confidence=OCR_MIN_CONFIDENCE, lang=OCR_LANG):
+    """Text of one page (runs in a worker; only this page's bitmap is held)."""
+    if first_pass_dpi and first_pass_dpi < dpi:
+        return _two_pass_text(pdf_path, page_no, dpi, first_pass_dpi, min_confidence, lang)
+    import pytesseract
+
+    image = rasterize_page(pdf_path, page_no, dpi)
+    try:
+        return pytesseract.image_to_string(image, lang=lang)
+    finally:
+        image.close()
+
+
+def _init_worker():
+    # tesseract's OpenMP threads would oversubscribe the CPUs the pool already uses
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+def _discard_pool(workers):
+    with _pool_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_ocr_pages(pdf_path, pages=None, workers=None, window=None, **options):
+    """
+    Yield ``(page_no, text)`` in page order for ``pages`` (default: all).
+
+    At most ``window`` pages (default twice the workers) are submitted
+    ahead of the one being yielded. ``options`` are ocr_page's dpi,
+    first_pass_dpi, min_confidence and lang.
+    """
+    pdf_path = os.fspath(pdf_path)
+    workers = OCR_WORKERS if workers is None else workers
+    pages = list(range(page_count(pdf_path))) if pages is None else list(pages)
+    if workers <= 1 or len(pages) <= 1:
+        for page_no in pages:
+            yield page_no, ocr_page(pdf_path, page_no, **options)
+        return
+
+    window = window or workers * 2
+    remaining = deque(pages)
+    pending = deque()
+    pool = _get_pool(workers)
+    try:
+        while remaining or pending:
+            while remaining and len(pending) < window:
+                page_no = remaining.popleft()
+                pending.append((page_no, pool.submit(ocr_page, pdf_path, page_no, **options)))
+            page_no, future = pending[0]
+            text = future.result()
+            pending.popleft()
+            yield page_no, text
+    except BrokenProcessPool as e:
+        # A worker died (or could not start); OCR the rest here
+        print(f"[ocr_pages] process pool failed ({e}); continuing serially")
+        _discard_pool(workers)
+        for page_no in [page_no for page_no, _ in pending] + list(remaining):
+            yield page_no, ocr_page(pdf_path, page_no, **options)
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def ocr_pages(pdf_path, pages=None, **kwargs):
+    """OCR text of every page (or of ``pages``), in page order."""
+    return [text for _, text in iter_ocr_pages(pdf_path, pages, **kwargs)]
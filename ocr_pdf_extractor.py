@@ -1,34 +1,26 @@
-import pdf2image
-import pytesseract
 import json
 import re
 from datetime import datetime
 import os
-from PIL import Image
-import io
 
-def extract_text_with_ocr(pdf_path):
-    """Extract text from PDF using OCR"""
+from hybrid_text import hybrid_pages
+
+def extract_text_with_ocr(pdf_path, ocr_all=False, **ocr_options):
+    """
+    Extract text from PDF, using OCR for the pages that need it.
+
+    Pages with a usable text layer are read directly; image-only or garbled
+    pages are rasterised one at a time and OCR'd across a process pool (see
+    hybrid_text and ocr_pages). ``ocr_all`` OCRs every page; ``ocr_options``
+    go to iter_ocr_pages, e.g. ``first_pass_dpi=150``.
+    """
     text = ""
     
     try:
-        # Convert PDF to images
-        print("Converting PDF to images...")
-        images = pdf2image.convert_from_path(pdf_path, dpi=300)
-        
-        print(f"Processing {len(images)} pages...")
-        
-        for i, image in enumerate(images):
-            print(f"Processing page {i+1}...")
-            
-            # Convert PIL image to bytes for pytesseract
-            img_byte_arr = io.BytesIO()
-            image.save(img_byte_arr, format='PNG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Perform OCR on the image
-            page_text = pytesseract.image_to_string(Image.open(io.BytesIO(img_byte_arr)), lang='eng')
-            text += page_text + "\n"
+        pages = hybrid_pages(pdf_path, ocr_all=ocr_all, **ocr_options)
+        for page in pages:
+            print(f"Page {page.page_no+1}: {page.source} ({page.reason})")
+        text = "".join([page.text + "\n" for page in pages])
             
     except Exception as e:
         print(f"Error during OCR extraction: {e}")
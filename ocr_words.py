@@ -0,0 +1,86 @@
+# === ocr_words.py ===
+"""
+Read-only OCR words that per-field helpers can share instead of deep-copying.
+
+predict_mutli_checks and get_template_extraction_values passed
+``copy.deepcopy(ocr_data_all_got)`` and ``copy.deepcopy(ocr_raw_pages)`` to
+check_headers / finalise_headers once per trained field (and
+get_template_extraction_values deep-copied the pages once more per field,
+for nothing). For a 40-page case that is tens of thousands of word dicts
+copied per field, most of the time and the peak memory of the request.
+
+``freeze_ocr(pages)`` converts the pages once per call into tuples of
+OcrWord: dicts that refuse every modification (so ``word["top"]``,
+``word.get``, ``json.dumps`` and the other helpers work unchanged), shared
+by every field. A helper that tried to modify a word or a page now raises
+instead of corrupting the next field's input. With ``OCR_SHARED_WORDS=0``
+``field_ocr`` hands out private plain copies again, made by ``thaw_ocr``
+(the same result as deepcopy for OCR words, several times faster).
+
+    pages = freeze_ocr(ocr_data_all_got)
+    for field in fields:
+        check_headers(row_header_int, context_int, field_ocr(pages), field_ocr(raw_pages))
+"""
+
+import copy
+import os
+
+# === Configuration ===
+# 0: give each field private copies of the words (for a helper that modifies them)
+OCR_SHARED_WORDS = os.environ.get("OCR_SHARED_WORDS", "1") == "1"
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("OCR words are shared between fields and read-only; thaw_ocr() makes a private copy")
+
+
+class OcrWord(dict):
+    """One OCR word (word, top, bottom, left, right, pg_no, ...); a dict that cannot be modified."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+def _freeze_value(value):
+    if isinstance(value, dict):
+        return OcrWord({key: _freeze_value(v) for key, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze_value(v) for v in value)
+    return value
+
+
+def freeze_ocr(pages):
+    """``pages`` (lists of word dicts, or any nesting of them) as tuples of OcrWord; frozen input is returned as is."""
+    if isinstance(pages, tuple):
+        return pages
+    return _freeze_value(pages)
+
+
+def _thaw_value(value):
+    if isinstance(value, dict):
+        return {key: _thaw_value(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw_value(v) for v in value]
+    return value
+
+
+def thaw_ocr(pages):
+    """A private, modifiable copy of ``pages`` (frozen or not) as lists of plain dicts."""
+    return _thaw_value(pages)
+
+
+def field_ocr(pages):
+    """The pages to pass to a per-field helper: the shared frozen ones, or a private copy (OCR_SHARED_WORDS=0)."""
+    return pages if OCR_SHARED_WORDS else thaw_ocr(pages)
@@ -0,0 +1,58 @@
+# === page_numbering.py ===
+"""
+"Page X - Y" footers without keeping every page in memory.
+
+The report canvases used to implement page totals by appending
+``dict(self.__dict__)`` on every ``showPage`` and replaying all pages in
+``save()``, which held every page's raw content stream until the very end.
+
+Here each page is finished immediately. Before it is closed it references a
+per-page Form XObject (``PageFooter<n>``) that does not exist yet; PDF allows
+the forward reference. ``save()`` then defines one small form per page, now
+that the total is known. The footer bookkeeping is a single counter no
+matter how long the document is, and what ends up on the page is the same
+drawing the old replay produced.
+"""
+
+from reportlab.pdfgen.canvas import Canvas
+
+
+class DeferredPageCountCanvas(Canvas):
+    """
+    Base canvas for footers that need the total page count.
+
+    Subclasses implement ``draw_page_footer(total_pages)`` (by default it
+    calls ``draw_page_number(total_pages)``). It runs once per page from
+    ``save()``, with ``getPageNumber()`` reporting that page's number, and
+    draws in page coordinates exactly as it would at the end of the page.
+    """
+
+    FOOTER_FORM_PREFIX = "PageFooter"
+
+    def _footer_form_name(self, page_number):
+        return f"{self.FOOTER_FORM_PREFIX}{page_number}"
+
+    def showPage(self):
+        self.doForm(self._footer_form_name(self._pageNumber))
+        super().showPage()
+
+    def save(self):
+        # Same rule as Canvas.save(): a page with pending content is finished first
+        if len(self._code):
+            self.showPage()
+
+        total_pages = self._pageNumber - 1
+        next_page = self._pageNumber
+        for page_number in range(1, total_pages + 1):
+            self._pageNumber = page_number
+            self.beginForm(self._footer_form_name(page_number))
+            self.draw_page_footer(total_pages)
+            self.endForm()
+        self._pageNumber = next_page
+        super().save()
+
+    def draw_page_footer(self, total_pages):
+        self.draw_page_number(total_pages)
+
+    def draw_page_number(self, total_pages):
+        raise NotImplementedError
@@ -1,31 +1,25 @@
-import PyPDF2
-import pdfplumber
 import json
 import re
 from datetime import datetime
 import os
 
+import pdf_text
+from hybrid_text import hybrid_text
+
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF using multiple methods for better accuracy"""
     text = ""
     
-    # Method 1: Using pdfplumber (better for tables and structured data)
+    # Method 1: Using pdfplumber (better for tables and structured data), OCR for scanned pages
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        text = hybrid_text(pdf_path, backend="pdfplumber")
     except Exception as e:
         print(f"Error with pdfplumber: {e}")
     
     # Method 2: Using PyPDF2 as fallback
     if not text:
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            text = pdf_text.extract_text(pdf_path, backend="pypdf2", skip_empty=False)
         except Exception as e:
             print(f"Error with PyPDF2: {e}")
     
@@ -0,0 +1,262 @@
+# === pdf_text.py ===
+"""
+Page-parallel PDF text extraction with a per-page disk cache.
+
+Every extractor used to walk ``pdf.pages`` serially and grow the text with
+``text += page_text + "\\n"``; on 40+ page Thyrocare reports that loop is
+most of the wall time. Here the pages are split into contiguous batches
+across a process pool (each worker opens the PDF once per batch), and the
+text is assembled with a single ``"".join``.
+
+Each page's text is stored on disk under the SHA-256 of the PDF bytes, the
+backend and the page number, as soon as its batch finishes. A re-run, or a
+retry after a crash, only extracts the pages that are not stored yet.
+Reads refresh a page's mtime; after each extraction, documents not read
+within PDF_TEXT_CACHE_MAX_AGE are dropped, then the least recently used
+ones until the store fits in PDF_TEXT_CACHE_MAX_BYTES.
+
+    text = extract_text("report.pdf")                    # pdfplumber, empty pages skipped
+    pages = extract_pages("report.pdf", backend="pypdf2")  # one string per page
+"""
+
+import hashlib
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# === Configuration ===
+PDF_TEXT_WORKERS = int(os.environ.get("PDF_TEXT_WORKERS", min(os.cpu_count() or 2, 8)))
+# Below this many pages to extract, the pool's overhead outweighs the gain
+PDF_TEXT_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_TEXT_PARALLEL_MIN_PAGES", 8))
+PDF_TEXT_CACHE_ENABLED = os.environ.get("PDF_TEXT_CACHE_ENABLED", "1") == "1"
+PDF_TEXT_CACHE_DIR = os.environ.get("PDF_TEXT_CACHE_DIR", ".pdf_text_cache")
+PDF_TEXT_CACHE_MAX_BYTES = int(os.environ.get("PDF_TEXT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+PDF_TEXT_CACHE_MAX_AGE = float(os.environ.get("PDF_TEXT_CACHE_MAX_AGE", 7 * 24 * 3600))
+
+BACKENDS = ("pdfplumber", "pypdf2", "pymupdf")
+
+
+def _extract_batch(pdf_path, backend, page_numbers):
+    """Text of the given pages (runs in a worker; opens the PDF once for the whole batch)."""
+    texts = []
+    if backend == "pdfplumber":
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_no in page_numbers:
+                texts.append(pdf.pages[page_no].extract_text() or "")
+    elif backend == "pypdf2":
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(pdf_path)
+        for page_no in page_numbers:
+            texts.append(reader.pages[page_no].extract_text() or "")
+    elif backend == "pymupdf":
+        import fitz
+
+        with fitz.open(pdf_path) as doc:
+            for page_no in page_numbers:
+                texts.append(doc.load_page(page_no).get_text())
+    else:
+        raise ValueError(f"unknown PDF text backend: {backend}")
+    return texts
+
+
+def page_count(pdf_path, backend="pdfplumber"):
+    if backend == "pymupdf":
+        import fitz
+
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    import PyPDF2
+
+    try:
+        # PyPDF2 only reads the xref and page tree for this, which is the cheapest count
+        return len(PyPDF2.PdfReader(pdf_path).pages)
+    except Exception:
+        if backend == "pypdf2":
+            raise
+    import pdfplumber
+
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+
+_hashes = {}
+_hash_lock = threading.Lock()
+
+
+def pdf_hash(pdf_path):
+    """SHA-256 of the PDF bytes (memoised per path, size and mtime)."""
+    st = os.stat(pdf_path)
+    key = (os.path.abspath(pdf_path), st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        digest = _hashes.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with _hash_lock:
+            _hashes[key] = digest
+    return digest
+
+
+class PageTextCache:
+    """Per-page text files under ``<dir>/<hash[:2]>/<hash>/<backend>-<page>.txt``, evicted per document."""
+
+    def __init__(self, directory=PDF_TEXT_CACHE_DIR, max_bytes=PDF_TEXT_CACHE_MAX_BYTES,
+                 max_age=PDF_TEXT_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _path(self, digest, backend, page_no):
+        return os.path.join(self.directory, digest[:2], digest, f"{backend}-{page_no}.txt")
+
+    def get(self, digest, backend, page_no):
+        path = self._path(digest, backend, page_no)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            os.utime(path)  # mtime doubles as last-access time for LRU eviction
+        except FileNotFoundError:
+            return None
+        return text
+
+    def put(self, digest, backend, page_no, text):
+        path = self._path(digest, backend, page_no)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _documents(self):
+        """``(last used, bytes, directory)`` of every cached document."""
+        documents = []
+        try:
+            shards = [entry for entry in os.scandir(self.directory) if entry.is_dir()]
+        except FileNotFoundError:
+            return documents
+        for shard in shards:
+            for document in os.scandir(shard.path):
+                if not document.is_dir():
+                    continue
+                last_used, size = 0.0, 0
+                for entry in os.scandir(document.path):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    last_used = max(last_used, st.st_mtime)
+                    size += st.st_size
+                documents.append((last_used, size, document.path))
+        return documents
+
+    def evict(self):
+        """Drop documents not read within max_age, then least recently used ones until under max_bytes."""
+        with self._lock:
+            documents = sorted(self._documents())
+            now = time.time()
+            total = sum(size for _, size, _ in documents)
+            for last_used, size, path in documents:
+                if now - last_used <= self.max_age and total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._documents():
+                shutil.rmtree(path, ignore_errors=True)
+
+
+page_text_cache = PageTextCache()
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn, like the render pool: forking a process that runs server threads is unsafe
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+
+def _discard_pool(workers):
+    with _pool_lock:
+        pool = _pools.pop(workers, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _batches(page_numbers, count):
+    size = -(-len(page_numbers) // count)
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def extract_pages(pdf_path, backend="pdfplumber", workers=None, use_cache=PDF_TEXT_CACHE_ENABLED):
+    """Text of every page of ``pdf_path`` ("" for pages without text), in page order."""
+    pdf_path = os.fspath(pdf_path)
+    workers = PDF_TEXT_WORKERS if workers is None else workers
+    count = page_count(pdf_path, backend)
+    digest = pdf_hash(pdf_path) if use_cache else None
+
+    pages = [None] * count
+    if use_cache:
+        for page_no in range(count):
+            pages[page_no] = page_text_cache.get(digest, backend, page_no)
+    missing = [page_no for page_no, text in enumerate(pages) if text is None]
+
+    def store(batch, texts):
+        for page_no, text in zip(batch, texts):
+            pages[page_no] = text
+            if use_cache:
+                page_text_cache.put(digest, backend, page_no, text)
+
+    if len(missing) < PDF_TEXT_PARALLEL_MIN_PAGES or workers <= 1:
+        if missing:
+            store(missing, _extract_batch(pdf_path, backend, missing))
+            if use_cache:
+                page_text_cache.evict()
+        return pages
+
+    try:
+        pool = _get_pool(workers)
+        futures = [(batch, pool.submit(_extract_batch, pdf_path, backend, batch))
+                   for batch in _batches(missing, workers)]
+        for batch, future in futures:
+            store(batch, future.result())
+    except BrokenProcessPool as e:
+        # A worker died (or could not start); finish the remaining pages here
+        print(f"[pdf_text] process pool failed ({e}); extracting serially")
+        _discard_pool(workers)
+        missing = [page_no for page_no, text in enumerate(pages) if text is None]
+        store(missing, _extract_batch(pdf_path, backend, missing))
+    if use_cache:
+        page_text_cache.evict()
+    return pages
+
+
+def extract_text(pdf_path, backend="pdfplumber", skip_empty=True, **kwargs):
+    """
+    The whole document's text, each page followed by a newline.
+
+    ``skip_empty`` drops pages without text (what the pdfplumber loops did
+    with ``if page_text:``); the PyPDF2 loops kept every page.
+    """
+    pages = extract_pages(pdf_path, backend, **kwargs)
+    return "".join([text + "\n" for text in pages if text or not skip_empty])
@@ -34,7 +34,8 @@ from reportlab.pdfgen import canvas
 from reportlab.graphics.shapes import Drawing,Circle, String
 from reportlab.graphics import renderPDF, renderPM
 
-from svglib.svglib import svg2rlg
+from svg_cache import load_svg
+from style_registry import shared_stylesheet, StyleSheetOverlay, sample_styles
 
 logger = logging.getLogger(__name__)
 
@@ -134,7 +135,7 @@ class PrescriptionOnlyPMXBasePage:
 
     def __init__(self):
         # Initialize ReportLab's built-in styles
-        self.styles = getSampleStyleSheet()
+        self.styles = sample_styles()
         # Set base path for static assets
         self.base_path = (
             Path(__file__).parent.parent.parent.parent.parent / "staticfiles" / "icons"
@@ -204,7 +205,7 @@ class PrescriptionOnlySVGImage(Flowable):
         super().__init__()
         # Convert SVG to ReportLab drawing
         self.filename = svg_path
-        self.svg = svg2rlg(svg_path)
+        self.svg = load_svg(svg_path)
         self.svg_width = self.svg.width
         self.svg_height = self.svg.height
 
@@ -274,7 +275,7 @@ class RoundedPill(Flowable):
         self.icon_drawing = None
         if self.icon_path and os.path.exists(self.icon_path):
             try:
-                drawing = svg2rlg(self.icon_path)
+                drawing = load_svg(self.icon_path)
                 scale_x = self.icon_width / drawing.width
                 scale_y = self.icon_height / drawing.height
                 drawing.scale(scale_x, scale_y)
@@ -467,7 +468,7 @@ class PrescriptionOnlyTemplate(PrescriptionOnlyPMXBasePage):
             try:
                 if os.path.exists(logo_path):
                     # Try to load SVG
-                    svg = svg2rlg(logo_path)
+                    svg = load_svg(logo_path)
                     if svg is not None:
                         return PrescriptionOnlySVGImage(logo_path, width=width, height=height)
                     # If SVG loading failed, try to load as regular image
@@ -761,7 +762,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         super().__init__()
         # Initialize with standard margins
         self.PAGE_MARGIN = 0.25 * inch  # Use consistent margins
-        self.init_styles()
+        self.styles = StyleSheetOverlay(PRESCRIPTION_STYLES)
         self.content_background_color = PMX_BACKGROUND
         self.base_path = (
             Path(__file__).parent.parent.parent.parent.parent.parent / "staticfiles" / "icons"
@@ -771,10 +772,11 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             self.PAGE_MARGIN / inch,
         )
 
-    def init_styles(self):
+    @staticmethod
+    def init_styles(styles):
         """Initialize all custom text styles used in the prescription."""
         # Patient name style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "PatientName",
             fontName=FONT_RALEWAY_MEDIUM,       # Must be registered manually
             fontSize=18,                     # Matches font-size: 18px
@@ -784,7 +786,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             spaceAfter=0,
         ))
         # Date style
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "DateStyle",
             fontName=FONT_INTER_REGULAR,          # You need to register this if it's a TTF
             fontSize=FONT_SIZE_MEDIUM,                       # Matches font-size: 12px
@@ -794,7 +796,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             spaceAfter=0,
         ))
         # Patient info style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PatientInfo",
                 fontName=FONT_INTER_LIGHT,
@@ -807,7 +809,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Prescription title style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PrescriptionTitle",
                 fontName=FONT_INTER_REGULAR,
@@ -821,7 +823,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table header style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableHeader",
                 fontName=FONT_INTER_BOLD,
@@ -834,7 +836,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Table cell style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "TableCell",
                 fontName=FONT_INTER_REGULAR,
@@ -848,7 +850,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Row number style - prevents character splitting
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "RowNumber",
                 fontName=FONT_INTER_REGULAR,
@@ -862,7 +864,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Section title style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "SectionTitle",
                 fontName=FONT_INTER_BOLD,
@@ -874,7 +876,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Body text style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXBodyText",
                 fontName=FONT_INTER_REGULAR,
@@ -887,7 +889,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Italic text style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXItalicText",
                 fontName=FONT_INTER_LIGHT,
@@ -900,7 +902,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Button style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXButton",
                 fontName=FONT_INTER_REGULAR,
@@ -917,10 +919,10 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             )
         )
         # Available button style
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "PMXAvailableButton",
-                parent=self.styles["TableCell"],
+                parent=styles["TableCell"],
                 fontName=FONT_INTER_REGULAR,
                 fontSize=8,
                 textColor=PMX_GREEN,
@@ -934,7 +936,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
                 wordWrap="LTR",  # Prevent text wrapping
             )
         )
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "bullet_after_text",
             fontName=FONT_INTER_REGULAR,                   # Make sure Inter-Regular is registered
             fontSize=12,
@@ -944,14 +946,14 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
             spaceAfter=0,
             leftIndent=6
         ))
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             "SvgBulletTitle",
             fontName=FONT_INTER_MEDIUM,               # Make sure Inter is registered
             fontSize=16,
             leading=24,                     # 150% line height
             textColor=PMX_GREEN,
         ))
-        self.styles.add(
+        styles.add(
             ParagraphStyle(
                 "Medicationss",
                 fontName=FONT_INTER_SEMIBOLD,   # You must register this font if custom
@@ -1545,7 +1547,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
 
     def svg_icon(self, path, width=12, height=12):
         try:
-            drawing = svg2rlg(path)
+            drawing = load_svg(path)
             if drawing is None:
                 raise FileNotFoundError(f"SVG file '{path}' could not be loaded or is invalid.")
         except Exception as e:
@@ -1863,7 +1865,7 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
         # Draw PMX logo
         logo = self._get_logo()
         if isinstance(logo, PrescriptionOnlySVGImage):
-            drawing = svg2rlg(logo.filename)  # works because filename is now defined
+            drawing = load_svg(logo.filename)  # works because filename is now defined
 
             if drawing:
                 logo_width = drawing.width
@@ -2076,3 +2078,6 @@ class PrescriptionPage(PrescriptionOnlyTemplate):
                 elements.append(Spacer(1, 16))
 
         return elements
+
+
+PRESCRIPTION_STYLES = shared_stylesheet(f"{__name__}.PrescriptionPage", PrescriptionPage.init_styles)
@@ -23,21 +23,28 @@ from reportlab.pdfgen import canvas
 logger = logging.getLogger(__name__)
 
 class NumberedCanvas(canvas.Canvas):
-    def __init__(self, *args, **kwargs):
-        self._saved_pages = []
-        super().__init__(*args, **kwargs)
+    """
+    Adds the "Page X - Y" footer without snapshotting every page: each page
+    references a per-page footer form that is only defined in save(), once
+    the total page count is known.
+    """
 
     def showPage(self):
-        self._saved_pages.append(dict(self.__dict__))
-        self._startPage()
+        self.doForm(f"PageFooter{self._pageNumber}")
+        super().showPage()
 
     def save(self):
-        total_pages = len(self._saved_pages)
-        for page_num, page in enumerate(self._saved_pages, start=1):
-            self.__dict__.update(page)
+        if len(self._code):
+            self.showPage()
+        total_pages = self._pageNumber - 1
+        next_page = self._pageNumber
+        for page_num in range(1, total_pages + 1):
+            self._pageNumber = page_num
+            self.beginForm(f"PageFooter{page_num}")
             self._template.total_pages = total_pages  # set total pages for footer
             self._template._add_logo_to_bottom_left(self, self._doc)
-            super().showPage()
+            self.endForm()
+        self._pageNumber = next_page
         super().save()
 
 
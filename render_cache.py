@@ -0,0 +1,236 @@
+# === render_cache.py ===
+"""
+Content-addressed cache for rendered reports.
+
+Clinicians often regenerate a report with an unchanged payload. The cache
+key is a SHA-256 over:
+
+* the render target (``"final_roadmap:render_roadmap_pdf"``),
+* the canonical JSON of the payload (sorted keys, no whitespace; for the
+  genome report, whose payload is an Excel path, the file's bytes),
+* the template version: a hash of the target module's source plus the
+  shared rendering modules it draws with,
+* the asset manifest: path, size and mtime of every file under staticfiles/.
+
+So any change to the data, the template code or the icons/fonts produces a
+new key and stale PDFs are never served. Entries live on disk as
+``<dir>/<key[:2]>/<key>.pdf``; reads refresh the entry's mtime, and
+eviction drops entries older than RENDER_CACHE_MAX_AGE first, then the
+least recently used until the store fits in RENDER_CACHE_MAX_BYTES.
+
+The key doubles as the HTTP ETag: a client sending it back in
+If-None-Match gets a 304 without any rendering or disk read.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+
+# === Configuration ===
+RENDER_CACHE_ENABLED = os.environ.get("RENDER_CACHE_ENABLED", "1") == "1"
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", ".render_cache")
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+RENDER_CACHE_MAX_AGE = float(os.environ.get("RENDER_CACHE_MAX_AGE", 7 * 24 * 3600))
+ASSET_DIRS = ("staticfiles",)
+# How long an asset-manifest hash is trusted before staticfiles/ is re-scanned
+ASSET_MANIFEST_TTL = float(os.environ.get("RENDER_CACHE_ASSET_TTL", 10))
+# Modules every template renders through; a change to any of them changes the output
+SHARED_RENDER_MODULES = ("fragment_cache", "gradient_bars", "image_assets", "page_numbering", "style_registry",
+                         "svg_cache")
+
+
+def canonical_payload_hash(payload):
+    """SHA-256 of the payload's canonical JSON (or of the file, for a path payload)."""
+    digest = hashlib.sha256()
+    if isinstance(payload, str) and os.path.isfile(payload):
+        with open(payload, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+_source_hashes = {}
+
+
+def _module_source_hash(module_name):
+    spec = importlib.util.find_spec(module_name)
+    path = spec.origin if spec is not None else None
+    if not path or not os.path.isfile(path):
+        return module_name
+    mtime = os.stat(path).st_mtime_ns
+    cached = _source_hashes.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _source_hashes[path] = (mtime, hashlib.sha256(f.read()).hexdigest())
+    return cached[1]
+
+
+def template_version(target):
+    """Hash of the target module's source and the shared rendering modules."""
+    module_name = target.split(":", 1)[0]
+    digest = hashlib.sha256(target.encode("utf-8"))
+    for name in (module_name,) + SHARED_RENDER_MODULES:
+        digest.update(_module_source_hash(name).encode("ascii", "replace"))
+    return digest.hexdigest()
+
+
+_manifest_lock = threading.Lock()
+_manifest = {"hash": None, "at": 0.0}
+
+
+def _scan(directory, digest):
+    try:
+        entries = sorted(os.scandir(directory), key=lambda e: e.name)
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            _scan(entry.path, digest)
+        else:
+            st = entry.stat()
+            digest.update(f"{entry.path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8", "replace"))
+
+
+def asset_manifest_hash():
+    """Hash of (path, size, mtime) for every asset file; re-scanned every ASSET_MANIFEST_TTL s."""
+    now = time.monotonic()
+    with _manifest_lock:
+        if _manifest["hash"] is None or now - _manifest["at"] > ASSET_MANIFEST_TTL:
+            digest = hashlib.sha256()
+            for directory in ASSET_DIRS:
+                _scan(directory, digest)
+            _manifest["hash"] = digest.hexdigest()
+            _manifest["at"] = now
+        return _manifest["hash"]
+
+
+def render_cache_key(target, payload):
+    digest = hashlib.sha256()
+    for part in (target, canonical_payload_hash(payload), template_version(target), asset_manifest_hash()):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def etag_for(key):
+    return f'"{key[:40]}"'
+
+
+def etag_matches(if_none_match, key):
+    """True if an If-None-Match header value covers the ETag for ``key``."""
+    if not if_none_match:
+        return False
+    etag = etag_for(key)
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == etag:
+            return True
+    return False
+
+
+class RenderCache:
+    """On-disk store of rendered PDFs keyed by ``render_cache_key``."""
+
+    def __init__(self, directory=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_BYTES,
+                 max_age=RENDER_CACHE_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+            if time.time() - st.st_mtime > self.max_age:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # mtime doubles as last-access time for LRU eviction
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        try:
+            shards = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return entries
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".pdf"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            now = time.time()
+            total = sum(size for _, size, _ in entries)
+            for mtime, size, path in entries:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self):
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+# Shared instance used by the HTTP handlers
+render_cache = RenderCache()
@@ -0,0 +1,311 @@
+# === render_pool.py ===
+"""
+Pool of warm worker processes for ReportLab renders.
+
+The FastAPI ``/generate-pdf`` handlers used to run ``doc.build`` directly on
+the event loop, so one long roadmap blocked every other request. Handlers
+now hand the payload to a pool of pre-started worker processes: each worker
+imports the report modules once (registering fonts) and preloads the SVG
+icons, then serves render jobs for its whole lifetime.
+
+Jobs are queued with a bounded queue and a configurable concurrency limit,
+every job has a timeout, and a job whose client disconnects is cancelled by
+killing its worker and starting a fresh one in its place.
+
+Render targets are referenced as ``"module:function"`` strings; the function
+takes the JSON payload and returns the PDF bytes.
+
+With RENDER_PROFILING=1 (development only: off by default, since a profile
+exposes internal timings and module names and bypasses the render cache),
+any request can ask for a render profile instead of the PDF with
+``?profile=1`` / ``?profile=flamegraph`` or the ``X-Render-Profile`` header;
+see render_profiler.py.
+"""
+
+import asyncio
+import functools
+import glob
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from render_cache import RENDER_CACHE_ENABLED, render_cache, render_cache_key, etag_for, etag_matches
+
+# === Configuration ===
+RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", os.cpu_count() or 2))
+RENDER_MAX_QUEUE = int(os.environ.get("RENDER_MAX_QUEUE", 64))
+RENDER_TIMEOUT = float(os.environ.get("RENDER_TIMEOUT", 300))
+RENDER_PRELOAD_ASSETS = os.environ.get("RENDER_PRELOAD_ASSETS", "1") == "1"
+RENDER_PRELOAD_GLOBS = ("staticfiles/icons/*.svg", "staticfiles/reports/*.svg")
+RENDER_PROFILING = os.environ.get("RENDER_PROFILING", "0") == "1"
+PROFILE_HEADER = "X-Render-Profile"
+PROFILE_TARGET = "render_profiler:profile_render_job"
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class RenderError(Exception):
+    """A render job failed inside the worker."""
+
+
+class RenderQueueFull(Exception):
+    """More jobs are waiting than RENDER_MAX_QUEUE allows."""
+
+
+def _resolve(target):
+    module_name, func_name = target.split(":", 1)
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _preload_assets():
+    from svg_cache import load_svg
+
+    for pattern in RENDER_PRELOAD_GLOBS:
+        for path in glob.glob(pattern):
+            try:
+                load_svg(path)
+            except Exception as e:
+                print(f"[render_pool] preload failed for {path}: {e}")
+
+
+def _worker_main(conn, warm_modules):
+    """Worker process loop: warm up once, then serve jobs until the pipe closes."""
+    for module_name in warm_modules:
+        importlib.import_module(module_name)
+    if RENDER_PRELOAD_ASSETS:
+        _preload_assets()
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            target, payload = conn.recv()
+        except (EOFError, OSError):
+            break
+        started = time.perf_counter()
+        try:
+            pdf_bytes = _resolve(target)(payload)
+            conn.send(("ok", pdf_bytes, time.perf_counter() - started))
+        except Exception:
+            conn.send(("error", traceback.format_exc(), time.perf_counter() - started))
+
+
+class _Worker:
+    def __init__(self, ctx, warm_modules):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, warm_modules), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self):
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class RenderPool:
+    """Fixed set of warm render processes with async job submission."""
+
+    def __init__(self, warm_modules=(), workers=RENDER_WORKERS, max_queue=RENDER_MAX_QUEUE,
+                 timeout=RENDER_TIMEOUT):
+        self.warm_modules = tuple(warm_modules)
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        # spawn: workers never inherit the server's event loop or threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = None
+        self._waiting = 0
+        # Two threads per worker: a timed-out job's thread stays blocked in recv()
+        # until the replacement, which runs on the second one, has killed its process
+        self._io = ThreadPoolExecutor(max_workers=2 * self.workers, thread_name_prefix="render-io")
+        self._started = False
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._idle = [_Worker(self._ctx, self.warm_modules) for _ in range(self.workers)]
+            self._started = True
+
+    def _replace(self, worker):
+        worker.kill()
+        return _Worker(self._ctx, self.warm_modules)
+
+    def _replaced(self, old_worker, replacing):
+        error = "cancelled" if replacing.cancelled() else replacing.exception()
+        if error is not None:
+            # Could not spawn: keep the dead one, its next job fails and replaces it again
+            print(f"[render_pool] replacing a worker failed: {error}")
+            self._idle.append(old_worker)
+        else:
+            self._idle.append(replacing.result())
+        self._slots.release()
+
+    async def submit(self, target, payload, timeout=None):
+        """Run ``target(payload)`` in a worker and return the PDF bytes."""
+        pdf_bytes, _ = await self.submit_timed(target, payload, timeout=timeout)
+        return pdf_bytes
+
+    async def submit_timed(self, target, payload, timeout=None):
+        """Like ``submit`` but returns ``(pdf_bytes, seconds spent rendering in the worker)``."""
+        self.start()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._waiting >= self.max_queue:
+            raise RenderQueueFull(f"{self._waiting} render jobs already queued")
+
+        loop = asyncio.get_running_loop()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        worker = self._idle.pop()
+        try:
+            await loop.run_in_executor(self._io, worker.wait_ready)
+
+            def run_job():
+                worker.conn.send((target, payload))
+                return worker.conn.recv()
+
+            status, result, elapsed = await asyncio.wait_for(
+                loop.run_in_executor(self._io, run_job),
+                timeout=timeout if timeout is not None else self.timeout,
+            )
+        except BaseException:
+            # Timed out, cancelled (client went away) or the worker died:
+            # the worker may still be busy, so replace it with a fresh one.
+            # Killing (up to a 5 s join) and spawning block, so they run on an
+            # io thread; the slot is handed back once the new worker exists.
+            replacing = loop.run_in_executor(self._io, self._replace, worker)
+            replacing.add_done_callback(functools.partial(self._replaced, worker))
+            worker = None
+            raise
+        finally:
+            if worker is not None:
+                self._idle.append(worker)
+                self._slots.release()
+
+        if status != "ok":
+            raise RenderError(result)
+        return result, elapsed
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._idle:
+                worker.kill()
+            self._idle = []
+            self._started = False
+        self._io.shutdown(wait=False)
+
+
+async def _cancel_on_disconnect(request, task):
+    while not task.done():
+        if await request.is_disconnected():
+            task.cancel()
+            return
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+
+
+def requested_profile(request):
+    """
+    Profile mode asked for with ``?profile=`` or the X-Render-Profile header:
+    ``"json"`` (any truthy value) or ``"flamegraph"``; None when not asked for.
+    """
+    if not RENDER_PROFILING:
+        return None
+    value = (request.query_params.get("profile") or request.headers.get(PROFILE_HEADER) or "").strip().lower()
+    if value in ("", "0", "false", "no", "off"):
+        return None
+    return "flamegraph" if value == "flamegraph" else "json"
+
+
+async def _render_cancellable(request, pool, target, payload):
+    """Run a pool job, mapping failures to HTTP errors; returns None if the client went away."""
+    task = asyncio.ensure_future(pool.submit(target, payload))
+    watcher = asyncio.ensure_future(_cancel_on_disconnect(request, task))
+    try:
+        return await task
+    except RenderQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="PDF render timed out")
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled():
+            # Client is gone; nobody will read this response
+            return None
+        raise
+    except RenderError as e:
+        print(f"[render_pool] render failed:\n{e}")
+        raise HTTPException(status_code=500, detail="PDF render failed")
+    finally:
+        watcher.cancel()
+
+
+def _pdf_response(pdf_bytes, filename, headers):
+    return Response(pdf_bytes, media_type="application/pdf", headers={
+        "Content-Disposition": f"inline; filename={filename}",
+        **headers,
+    })
+
+
+async def render_pdf_response(request, pool, target, payload, filename="styled_output.pdf",
+                              profile_sections=(), cache=render_cache):
+    """
+    Render ``payload`` through ``pool`` and return an inline PDF response.
+
+    The job is cancelled if the client disconnects while it is queued or running.
+    Finished PDFs are stored in ``cache`` (see render_cache.py): a repeat of the
+    same payload is served from disk, and a client that sends the ETag back in
+    If-None-Match gets a 304. Pass ``cache=None`` to always render.
+
+    If the request asks for a profile (see ``requested_profile``) the render
+    runs under render_profiler and the response is its report instead;
+    ``profile_sections`` names the template classes whose methods are the
+    section builders, e.g. ``("final_roadmap:ThriveRoadmapTemplate",)``.
+    """
+    profile_mode = requested_profile(request)
+    if profile_mode:
+        job = {"target": target, "sections": tuple(profile_sections), "payload": payload, "mode": profile_mode}
+        report = await _render_cancellable(request, pool, PROFILE_TARGET, job)
+        if report is None:
+            return Response(status_code=499)
+        media_type = "text/plain" if profile_mode == "flamegraph" else "application/json"
+        return Response(report, media_type=media_type)
+
+    key = None
+    headers = {}
+    if cache is not None and RENDER_CACHE_ENABLED:
+        key = await asyncio.to_thread(render_cache_key, target, payload)
+        headers = {"ETag": etag_for(key), "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), key):
+            return Response(status_code=304, headers=headers)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return _pdf_response(cached, filename, {**headers, "X-Render-Cache": "hit"})
+
+    pdf_bytes = await _render_cancellable(request, pool, target, payload)
+    if pdf_bytes is None:
+        return Response(status_code=499)
+    if key is not None:
+        await asyncio.to_thread(cache.put, key, pdf_bytes)
+        headers["X-Render-Cache"] = "miss"
+    return _pdf_response(pdf_bytes, filename, headers)
@@ -0,0 +1,356 @@
+# === render_profiler.py ===
+"""
+Opt-in render profiler for the report templates.
+
+Records, for every section builder of a template (``get_vital_params``,
+``get_areas_of_concern``, ...) and every Flowable class, the time spent in
+``generate`` (building the story) and in ``wrap`` / ``split`` / ``draw``
+(laying it out and painting it), together with call and instance counts
+and the number of content-stream operators and bytes each ``draw`` emitted.
+
+Timings are self-times: a Table's ``wrap`` does not include the Paragraphs
+it wraps, so the per-section and per-class totals add up to the build time.
+The report is plain JSON; its ``flamegraph`` entry holds collapsed stacks
+("generate;get_vital_params 1234", values in microseconds) that
+flamegraph.pl / speedscope read directly.
+
+Nothing is instrumented unless a profile is running: the patched methods
+are installed for the duration of ``profile_render`` only.
+
+    python render_profiler.py --target final_roadmap:render_roadmap_pdf \\
+        --sections final_roadmap:ThriveRoadmapTemplate --input payload.json \\
+        --out profile.json --flamegraph profile.folded
+"""
+
+import argparse
+import functools
+import importlib
+import inspect
+import json
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+
+from reportlab.platypus.flowables import Flowable
+
+FLOWABLE_METHODS = ("wrap", "split", "draw")
+PROFILE_MODES = ("json", "flamegraph")
+UNATTRIBUTED = "(story)"
+
+_local = threading.local()
+# Only one profile at a time may patch the classes
+_patch_lock = threading.Lock()
+
+
+def _active():
+    return getattr(_local, "profiler", None)
+
+
+def _resolve(ref):
+    module_name, attr = ref.split(":", 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class _Frame:
+    __slots__ = ("label", "section", "child_seconds", "child_ops", "child_bytes")
+
+    def __init__(self, label, section):
+        self.label = label
+        self.section = section
+        self.child_seconds = 0.0
+        self.child_ops = 0
+        self.child_bytes = 0
+
+
+def _section_stats():
+    return {"calls": 0, "flowables": 0, "generate": 0.0, "wrap": 0.0, "split": 0.0, "draw": 0.0,
+            "draw_ops": 0, "draw_bytes": 0}
+
+
+def _method_stats():
+    return {"calls": 0, "seconds": 0.0, "self_seconds": 0.0}
+
+
+class RenderProfiler:
+    """Collects section / flowable timings for one render."""
+
+    def __init__(self):
+        self.sections = defaultdict(_section_stats)
+        self.methods = defaultdict(_method_stats)
+        self.instances = defaultdict(set)
+        self.draw_output = defaultdict(lambda: {"ops": 0, "bytes": 0})
+        self.stacks = defaultdict(float)
+        self._stack = []
+        self.total_seconds = 0.0
+
+    # --- recording -------------------------------------------------------
+
+    def _current_section(self):
+        return self._stack[-1].section if self._stack else None
+
+    def _record(self, kind, label, section, func, args, kwargs, canvas=None):
+        frame = _Frame(label, section)
+        parent = self._stack[-1] if self._stack else None
+        self._stack.append(frame)
+        code = getattr(canvas, "_code", None)
+        code_start = len(code) if code is not None else 0
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            ops = nbytes = 0
+            if code is not None and code is getattr(canvas, "_code", None):
+                emitted = code[code_start:]
+                ops, nbytes = len(emitted), sum(len(op) for op in emitted)
+            self_seconds = max(0.0, elapsed - frame.child_seconds)
+            if parent is not None:
+                parent.child_seconds += elapsed
+                parent.child_ops += ops
+                parent.child_bytes += nbytes
+
+            # generate;<builder>;<helper>...  /  build;<section>;<Class.method>...
+            root = ["generate"] if kind == "generate" else ["build", section]
+            path = root + [f.label for f in self._stack] + [label]
+            self.stacks[";".join(path)] += self_seconds
+
+            stats = self.sections[section]
+            stats[kind] += self_seconds
+            if kind == "draw":
+                stats["draw_ops"] += max(0, ops - frame.child_ops)
+                stats["draw_bytes"] += max(0, nbytes - frame.child_bytes)
+                out = self.draw_output[label]
+                out["ops"] += max(0, ops - frame.child_ops)
+                out["bytes"] += max(0, nbytes - frame.child_bytes)
+            method = self.methods[label]
+            method["calls"] += 1
+            method["seconds"] += elapsed
+            method["self_seconds"] += self_seconds
+
+    def call_builder(self, name, func, args, kwargs):
+        nested = bool(self._stack)
+        section = self._current_section() if nested else name
+        result = self._record("generate", name, section, func, args, kwargs)
+        if not nested:
+            self.sections[section]["calls"] += 1
+            items = result if isinstance(result, (list, tuple)) else [result]
+            for item in items:
+                if isinstance(item, Flowable):
+                    self.sections[section]["flowables"] += 1
+                    _tag(item, section)
+        return result
+
+    def call_flowable(self, kind, label, flowable, func, args, kwargs):
+        section = self._current_section() or getattr(flowable, "_profile_section", None) or UNATTRIBUTED
+        self.instances[type(flowable).__name__].add(id(flowable))
+        result = self._record(kind, label, section, func, (flowable,) + args, kwargs,
+                              canvas=getattr(flowable, "canv", None) if kind == "draw" else None)
+        if kind == "split" and result:
+            for part in result:
+                _tag(part, section)
+        return result
+
+    # --- report ----------------------------------------------------------
+
+    def report(self, pdf_bytes=None):
+        sections = []
+        for name, stats in self.sections.items():
+            entry = {"name": name, **{k: round(v, 6) if isinstance(v, float) else v for k, v in stats.items()}}
+            entry["total"] = round(stats["generate"] + stats["wrap"] + stats["split"] + stats["draw"], 6)
+            sections.append(entry)
+        sections.sort(key=lambda s: s["total"], reverse=True)
+
+        flowables = defaultdict(lambda: {"instances": 0, "wrap": None, "split": None, "draw": None,
+                                         "draw_ops": 0, "draw_bytes": 0})
+        for label, stats in self.methods.items():
+            cls, _, kind = label.rpartition(".")
+            if kind not in FLOWABLE_METHODS:
+                continue
+            entry = flowables[cls]
+            entry[kind] = {k: round(v, 6) if isinstance(v, float) else v for k, v in stats.items()}
+            if kind == "draw":
+                entry["draw_ops"] = self.draw_output[label]["ops"]
+                entry["draw_bytes"] = self.draw_output[label]["bytes"]
+        for cls, ids in self.instances.items():
+            flowables[cls]["instances"] = len(ids)
+        flowable_list = [{"class": cls, **entry} for cls, entry in flowables.items()]
+        flowable_list.sort(key=lambda f: sum((f[k] or {}).get("self_seconds", 0) for k in FLOWABLE_METHODS),
+                           reverse=True)
+
+        phase = {kind: round(sum(s[kind] for s in self.sections.values()), 6)
+                 for kind in ("generate",) + FLOWABLE_METHODS}
+        accounted = sum(phase.values())
+        report = {
+            "total_seconds": round(self.total_seconds, 6),
+            "phases": {**phase, "other": round(max(0.0, self.total_seconds - accounted), 6)},
+            "sections": sections,
+            "flowables": flowable_list,
+            "flamegraph": self.flamegraph(),
+        }
+        if pdf_bytes is not None:
+            report["pdf_bytes"] = len(pdf_bytes)
+            report["pages"] = len(re.findall(rb"/Type /Page\b", pdf_bytes))
+        return report
+
+    def flamegraph(self):
+        """Collapsed stacks, one ``frame;frame;frame microseconds`` line per stack."""
+        return [f"{stack} {round(seconds * 1e6)}" for stack, seconds in sorted(self.stacks.items())
+                if round(seconds * 1e6) > 0]
+
+
+def _tag(flowable, section):
+    if getattr(flowable, "_profile_section", None) is None:
+        try:
+            flowable._profile_section = section
+        except AttributeError:
+            pass
+
+
+# === Patching =============================================================
+
+def _flowable_wrapper(cls, kind, original):
+    label = f"{cls.__name__}.{kind}"
+
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        profiler = _active()
+        if profiler is None:
+            return original(self, *args, **kwargs)
+        return profiler.call_flowable(kind, label, self, original, args, kwargs)
+
+    wrapper._profiler_original = original
+    return wrapper
+
+
+def _builder_wrapper(name, original):
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        profiler = _active()
+        if profiler is None:
+            return original(*args, **kwargs)
+        return profiler.call_builder(name, original, args, kwargs)
+
+    wrapper._profiler_original = original
+    return wrapper
+
+
+class _Patches:
+    def __init__(self):
+        self._applied = []
+
+    def set(self, owner, name, value):
+        self._applied.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, value)
+
+    def flowable_class(self, cls):
+        for kind in FLOWABLE_METHODS:
+            original = cls.__dict__.get(kind)
+            if inspect.isfunction(original) and not hasattr(original, "_profiler_original"):
+                self.set(cls, kind, _flowable_wrapper(cls, kind, original))
+
+    def section_class(self, cls):
+        for name, original in list(cls.__dict__.items()):
+            if name.startswith("__") or name == "generate" or not inspect.isfunction(original):
+                continue
+            self.set(cls, name, _builder_wrapper(name, original))
+
+    def undo(self):
+        while self._applied:
+            owner, name, original = self._applied.pop()
+            setattr(owner, name, original)
+
+
+def _all_subclasses(cls):
+    seen, todo = [], [cls]
+    while todo:
+        c = todo.pop()
+        seen.append(c)
+        todo.extend(c.__subclasses__())
+    return seen
+
+
+def profile_render(render, payload, section_classes=()):
+    """
+    Run ``render(payload)`` with profiling and return ``(pdf_bytes, report)``.
+
+    ``section_classes`` are the template classes whose methods count as
+    section builders.
+    """
+    profiler = RenderProfiler()
+    with _patch_lock:
+        patches = _Patches()
+        for cls in _all_subclasses(Flowable):
+            patches.flowable_class(cls)
+        for cls in section_classes:
+            patches.section_class(cls)
+
+        # Flowable classes defined inside section builders are created per call
+        original_hook = Flowable.__dict__.get("__init_subclass__")
+
+        def instrument_new_subclass(cls, **kwargs):
+            super(Flowable, cls).__init_subclass__(**kwargs)
+            if _active() is not None:
+                patches.flowable_class(cls)
+
+        Flowable.__init_subclass__ = classmethod(instrument_new_subclass)
+        _local.profiler = profiler
+        started = time.perf_counter()
+        try:
+            pdf_bytes = render(payload)
+        finally:
+            profiler.total_seconds = time.perf_counter() - started
+            _local.profiler = None
+            if original_hook is None:
+                del Flowable.__init_subclass__
+            else:
+                Flowable.__init_subclass__ = original_hook
+            patches.undo()
+    return pdf_bytes, profiler.report(pdf_bytes)
+
+
+def profile_render_job(job):
+    """
+    Render-pool target: ``job`` holds ``target``, ``sections``, ``payload``
+    and ``mode``. Returns the report as UTF-8 JSON, or collapsed stacks
+    for ``mode == "flamegraph"``.
+    """
+    render = _resolve(job["target"])
+    section_classes = [_resolve(ref) for ref in job.get("sections", ())]
+    _, report = profile_render(render, job["payload"], section_classes)
+    if job.get("mode") == "flamegraph":
+        return ("\n".join(report["flamegraph"]) + "\n").encode("utf-8")
+    return json.dumps(report, indent=2).encode("utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile one report render.")
+    parser.add_argument("--target", required=True, help='render function, e.g. "final_roadmap:render_roadmap_pdf"')
+    parser.add_argument("--sections", nargs="*", default=[], help='template classes, e.g. "final_roadmap:ThriveRoadmapTemplate"')
+    parser.add_argument("--input", required=True, help="JSON payload (or xlsx path for the genome report)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--flamegraph", help="also write collapsed stacks here")
+    args = parser.parse_args(argv)
+
+    if args.input.lower().endswith(".json"):
+        with open(args.input, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    else:
+        payload = args.input
+    _, report = profile_render(_resolve(args.target), payload, [_resolve(ref) for ref in args.sections])
+
+    if args.flamegraph:
+        with open(args.flamegraph, "w", encoding="utf-8") as f:
+            f.write("\n".join(report["flamegraph"]) + "\n")
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
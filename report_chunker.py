@@ -0,0 +1,192 @@
+# === report_chunker.py ===
+"""
+Layout-aware chunking of lab report text for the Claude extractors, and the
+merge of their per-chunk answers.
+
+The Thyrocare scripts used to cut the text into 35-40k character windows
+that overlapped by 2-5k characters, and sent the whole prompt in front of
+every window. The overlap re-sent text and made the same biomarker come
+back from two chunks, and merge_results then kept whichever came last.
+
+Here:
+
+* whole pages are packed into chunks of at most ``max_chars``; a page that
+  is larger on its own is split at test-group headers ("LIPID PROFILE",
+  "COMPLETE HEMOGRAM", ...) and, failing that, at line breaks. Nothing is
+  sent twice.
+* the static prompt goes in a system block marked for prompt caching
+  (``cached_system_prompt``); after the first chunk it is read from the
+  cache. The API only caches prefixes of at least ~2048 tokens on Haiku,
+  so shorter prompts are simply sent as before.
+* ``merge_chunk_results`` is deterministic: the first chunk in page order
+  that reports a value wins, and every later differing value is kept as a
+  conflict in the provenance record (chunk and pages).
+"""
+
+import re
+import time
+
+PATIENT_FIELDS = ("name", "age", "sex", "cycle")
+UNKNOWN_VALUES = (None, "", "Unknown")
+
+# Test-group header lines of Thyrocare reports (all caps, ends in a group word)
+SECTION_HEADER_RE = re.compile(
+    r"^\s*[A-Z][A-Z0-9 &/,\-\(\)\.]{2,80}?"
+    r"(PROFILE|PANEL|FUNCTION TEST|FUNCTION|HEMOGRAM|COUNT|EXAMINATION|ANALYSIS|ELEMENTS|MARKERS|STUDIES)"
+    r"(\s*[-:(].*)?\s*$"
+)
+
+
+class Chunk:
+    """A run of consecutive report pages (or part of one oversized page) sent in one request."""
+
+    def __init__(self, index, first_page, last_page, text):
+        self.index = index
+        self.first_page = first_page
+        self.last_page = last_page
+        self.text = text
+
+    @property
+    def pages(self):
+        """1-based page range, for logs and provenance."""
+        if self.first_page == self.last_page:
+            return f"{self.first_page + 1}"
+        return f"{self.first_page + 1}-{self.last_page + 1}"
+
+    def __len__(self):
+        return len(self.text)
+
+
+def _split_page(text, max_chars):
+    """Pieces of one oversized page, cut before section headers, then at line breaks."""
+    sections, current = [], []
+    for line in text.split("\n"):
+        if current and SECTION_HEADER_RE.match(line):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    sections.append("\n".join(current))
+
+    pieces, current, size = [], [], 0
+    for section in sections:
+        parts = [section]
+        if len(section) > max_chars:
+            parts, part, part_size = [], [], 0
+            for line in section.split("\n"):
+                if part and part_size + len(line) + 1 > max_chars:
+                    parts.append("\n".join(part))
+                    part, part_size = [], 0
+                part.append(line)
+                part_size += len(line) + 1
+            parts.append("\n".join(part))
+        for part in parts:
+            if current and size + len(part) + 1 > max_chars:
+                pieces.append("\n".join(current))
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def chunk_report(pages, max_chars=35000):
+    """
+    Pack page texts into non-overlapping Chunks of at most ``max_chars``
+    (a single line longer than that is the only thing that can exceed it).
+    """
+    chunks, current, size, first, last = [], [], 0, 0, 0
+
+    def flush():
+        if current:
+            chunks.append(Chunk(len(chunks), first, last, "\n".join(current)))
+            current.clear()
+
+    for page_no, text in enumerate(pages):
+        text = (text or "").strip("\n")
+        if not text.strip():
+            continue
+        if len(text) > max_chars:
+            flush()
+            for piece in _split_page(text, max_chars):
+                chunks.append(Chunk(len(chunks), page_no, page_no, piece))
+            continue
+        if current and size + len(text) + 1 > max_chars:
+            flush()
+        if not current:
+            first, size = page_no, 0
+        current.append(text)
+        size += len(text) + 1
+        last = page_no
+    flush()
+    return chunks
+
+
+def cached_system_prompt(prompt):
+    """System blocks for ``messages.create`` with the static prompt marked for prompt caching."""
+    return [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}]
+
+
+def chunk_message(chunk, total_chunks):
+    """User message carrying one chunk's text."""
+    return {
+        "role": "user",
+        "content": f"---REPORT TEXT CHUNK {chunk.index + 1}/{total_chunks} (pages {chunk.pages})---\n{chunk.text}",
+    }
+
+
+def merge_chunk_results(chunk_results):
+    """
+    Merge ``[(Chunk, result dict)]`` into ``(merged, provenance)``.
+
+    Chunks are taken in page order; the first known value of each field
+    wins. ``provenance[key]`` is ``{"value", "chunk", "pages", "conflicts"}``
+    where conflicts lists the differing values later chunks reported.
+    """
+    merged = {"name": "Unknown", "age": None, "sex": "Unknown", "cycle": "All"}
+    provenance = {}
+    for chunk, result in sorted(chunk_results, key=lambda cr: cr[0].index):
+        for key, value in result.items():
+            if value in UNKNOWN_VALUES or (key in PATIENT_FIELDS and value == "All"):
+                continue
+            source = {"chunk": chunk.index + 1, "pages": chunk.pages}
+            record = provenance.get(key)
+            if record is None:
+                merged[key] = value
+                provenance[key] = {"value": value, **source, "conflicts": []}
+            elif value != record["value"]:
+                record["conflicts"].append({"value": value, **source})
+    return merged, provenance
+
+
+class ReportUsage:
+    """Token usage and latency of the requests for one report."""
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.input_tokens = 0
+        self.cache_write_tokens = 0
+        self.cache_read_tokens = 0
+        self.output_tokens = 0
+        self.request_seconds = 0.0
+
+    def add(self, message, started):
+        """Record one request; ``message`` None means the response came from the extraction cache."""
+        if message is None:
+            self.cache_hits += 1
+            return
+        self.requests += 1
+        self.request_seconds += time.monotonic() - started
+        usage = getattr(message, "usage", None)
+        if usage is None:
+            return
+        self.input_tokens += usage.input_tokens or 0
+        self.cache_write_tokens += getattr(usage, "cache_creation_input_tokens", 0) or 0
+        self.cache_read_tokens += getattr(usage, "cache_read_input_tokens", 0) or 0
+        self.output_tokens += usage.output_tokens or 0
+
+    def summary(self):
+        return (f"{self.requests} requests ({self.cache_hits} chunks from cache), {self.input_tokens} input tokens "
+                f"(+{self.cache_write_tokens} cache write, {self.cache_read_tokens} cache read), "
+                f"{self.output_tokens} output tokens, {self.request_seconds:.1f}s in requests")
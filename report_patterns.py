@@ -0,0 +1,257 @@
+# === report_patterns.py ===
+"""
+Precompiled field patterns for the dynamic, final and improved PDF extractors.
+
+Each extractor had its own inline ``re.search(r"...", text, re.IGNORECASE)``
+calls, one per field, and every one of them scanned the whole report text
+(per line, several times over, in improved_pdf_extractor). The patterns
+now live in one registry, PATTERNS, compiled once and with named groups.
+
+A PatternSet groups the fields one extractor reads. ``scan(text)`` folds
+the text to lower case once and looks up every distinct keyword of the set
+in it once; those positions are shared by all fields:
+
+* a field whose matches all start with a literal keyword ("heart rate",
+  "patient|name|client", ...) is searched from the first occurrence of one
+  of them, and not at all if none occurs;
+* a field without a leading keyword is skipped when a literal that every
+  match contains ("year" in "36 years, Female") is absent;
+* otherwise the compiled pattern searches the whole text.
+
+A match can never start before its leading keyword, so every result is
+exactly ``regex.search(text)`` (or ``finditer``). Fields are evaluated on
+first access, so a priority list (``first``) stops at the first hit, as the
+extractors' loops did.
+
+    hits = VITAL_PATTERNS.scan(text)
+    hits["heart_rate"]                       # re.Match or None
+    name, match = hits.first("name_age_gender", "patient_name", "labelled_name")
+"""
+
+import re
+
+try:
+    import re._parser as sre_parse
+    from re._constants import BRANCH, LITERAL, SUBPATTERN
+except ImportError:  # Python < 3.11
+    import sre_parse
+    from sre_constants import BRANCH, LITERAL, SUBPATTERN
+
+# Keywords shorter than this occur almost everywhere and are not worth looking up
+MIN_KEYWORD_LENGTH = 3
+
+# re.IGNORECASE also matches these against ASCII letters, str.lower() does not
+# (and "İ".lower() is two characters, which would shift every position after it)
+_CASE_FOLD = {"İ": "i", "ı": "i", "ſ": "s"}
+
+
+def _fold(text):
+    """Lower-cased ``text`` with its characters at the same positions."""
+    if not text.isascii():
+        for char, ascii_char in _CASE_FOLD.items():
+            if char in text:
+                text = text.replace(char, ascii_char)
+    return text.lower()
+
+
+def _literal_run(items):
+    """The plain characters at the start of a parsed sequence and the index of the first other item."""
+    chars = []
+    for index, (op, av) in enumerate(items):
+        if op is LITERAL:
+            chars.append(chr(av))
+        elif op is SUBPATTERN and av[-1] and all(o is LITERAL for o, _ in av[-1]):
+            chars.extend(chr(c) for _, c in av[-1])
+        else:
+            return "".join(chars), index
+    return "".join(chars), len(items)
+
+
+def _leading_keywords(items):
+    """Literals one of which every match starts with (``(?:dob|date of birth)`` gives both), or None."""
+    prefix, index = _literal_run(items)
+    alternatives = None
+    if index < len(items):
+        op, av = items[index]
+        if op is BRANCH:
+            alternatives = av[1]
+        elif op is SUBPATTERN and len(av[-1]) == 1 and av[-1][0][0] is BRANCH:
+            alternatives = av[-1][0][1][1]
+    if alternatives:
+        keywords = []
+        for alternative in alternatives:
+            sub = _leading_keywords(list(alternative))
+            if sub is None:
+                break
+            keywords.extend(prefix + k for k in sub)
+        else:
+            return keywords
+    return [prefix] if prefix else None
+
+
+def _required_literal(items):
+    """The longest literal that every match contains (top level of the pattern only), or None."""
+    best, run = "", []
+    for op, av in items:
+        if op is LITERAL:
+            run.append(chr(av))
+        elif op is SUBPATTERN and av[-1] and all(o is LITERAL for o, _ in av[-1]):
+            run.extend(chr(c) for _, c in av[-1])
+        else:
+            if len(run) > len(best):
+                best = "".join(run)
+            run = []
+    if len(run) > len(best):
+        best = "".join(run)
+    return best if len(best) >= MIN_KEYWORD_LENGTH else None
+
+
+class FieldPattern:
+    """One named, compiled field pattern and the keywords used to skip or shorten its search."""
+
+    def __init__(self, name, pattern, flags=re.IGNORECASE):
+        self.name = name
+        self.regex = re.compile(pattern, flags)
+        self.ignore_case = bool(self.regex.flags & re.IGNORECASE)
+        items = list(sre_parse.parse(pattern, flags))
+        fold = str.lower if self.ignore_case else str
+        # Keywords are looked up with str.find, so only ASCII ones fold exactly like re.IGNORECASE
+        leading = _leading_keywords(items)
+        if leading and all(len(k) >= MIN_KEYWORD_LENGTH and k.isascii() for k in leading):
+            self.leading = tuple(dict.fromkeys(fold(k) for k in leading))
+        else:
+            self.leading = None
+        required = None if self.leading else _required_literal(items)
+        self.required = fold(required) if required and required.isascii() else None
+
+    def __repr__(self):
+        return f"FieldPattern({self.name!r}, {self.regex.pattern!r})"
+
+
+class ReportScan:
+    """The matches of a PatternSet over one text; each field is searched on first access."""
+
+    def __init__(self, patterns, text):
+        self.text = text
+        self._patterns = patterns
+        self._folded = None
+        self._positions = {}
+        self._matches = {}
+
+    def _find(self, keyword, ignore_case):
+        key = (keyword, ignore_case)
+        position = self._positions.get(key)
+        if position is None:
+            if ignore_case:
+                if self._folded is None:
+                    self._folded = _fold(self.text)
+                position = self._folded.find(keyword)
+            else:
+                position = self.text.find(keyword)
+            self._positions[key] = position
+        return position
+
+    def _start(self, field):
+        """Where the first match can start, or None if the text cannot contain one."""
+        if field.leading:
+            positions = [p for p in (self._find(k, field.ignore_case) for k in field.leading) if p >= 0]
+            return min(positions) if positions else None
+        if field.required and self._find(field.required, field.ignore_case) < 0:
+            return None
+        return 0
+
+    def __getitem__(self, name):
+        """First match of field ``name`` (same as its regex's ``search``), or None."""
+        if name in self._matches:
+            return self._matches[name]
+        field = self._patterns.fields[name]
+        start = self._start(field)
+        match = None if start is None else field.regex.search(self.text, start)
+        self._matches[name] = match
+        return match
+
+    def all(self, name):
+        """Every match of field ``name``, as its regex's ``finditer`` gives them."""
+        field = self._patterns.fields[name]
+        start = self._start(field)
+        return [] if start is None else list(field.regex.finditer(self.text, start))
+
+    def first(self, *names):
+        """``(name, match)`` of the first of ``names`` that matches, or ``(None, None)``."""
+        for name in names:
+            match = self[name]
+            if match:
+                return name, match
+        return None, None
+
+
+class PatternSet:
+    """The fields an extractor reads, scanned together."""
+
+    def __init__(self, names):
+        self.fields = {name: PATTERNS[name] for name in names}
+
+    def scan(self, text):
+        return ReportScan(self, text)
+
+
+# === Registry ===
+# Value groups are named after what they hold; the numbering is unchanged
+# from the extractors' old patterns.
+
+_NUMBER = r"(?P<value>\d+\.?\d*)"
+_DATE = r"(?P<date>\d{2}-\d{2}-\d{4})"
+
+PATTERNS = {field.name: field for field in (
+    # dynamic_pdf_extractor: patient name (first pattern that matches wins) and date
+    FieldPattern("name_age_gender", r"(?P<name>[A-Za-z\s]+)\s*\((?P<age>\d+)\s*years?,\s*(?P<gender>Male|Female)\)"),
+    FieldPattern("patient_name", r"Patient[:\s]+(?P<name>[A-Za-z\s]+)"),
+    FieldPattern("labelled_name", r"Name[:\s]+(?P<name>[A-Za-z\s]+)"),
+    FieldPattern("labelled_date", r"Date[:\s]+" + _DATE),
+    FieldPattern("assessment_date", r"Assessment Date[:\s]+" + _DATE),
+    FieldPattern("any_date", _DATE),
+
+    # Vitals (dynamic_pdf_extractor and improved_pdf_extractor)
+    FieldPattern("body_temperature", r"temperature[:\s]+" + _NUMBER + r"\s*°?f"),
+    FieldPattern("heart_rate", r"heart rate[:\s]+" + _NUMBER + r"\s*bpm"),
+    FieldPattern("blood_pressure", r"blood pressure[:\s]+(?P<value>\d+/\d+)"),
+    FieldPattern("height", r"height[:\s]+" + _NUMBER + r"\s*cms?"),
+    FieldPattern("weight", r"weight[:\s]+" + _NUMBER + r"\s*kg"),
+    FieldPattern("bmi", r"bmi[:\s]+" + _NUMBER),
+    FieldPattern("blood_oxygen", r"oxygen[:\s]+" + _NUMBER + r"\s*%"),
+    FieldPattern("respiratory_rate", r"respiratory[:\s]+" + _NUMBER + r"\s*breaths?/min"),
+
+    # dynamic_pdf_extractor: one prescription line at a time (used through .regex)
+    FieldPattern("med_start", r"^\d+\s+[A-Za-z]", 0),
+    FieldPattern("med_name", r"^\d+\s+(?P<name>[A-Za-z\s]+?)(?:\s+\d|$)", 0),
+    FieldPattern("med_dosage", r"(?P<amount>\d+)\s*(?P<unit>tablet|capsule|mg|mcg|cream|ml)"),
+    FieldPattern("med_strength", r"(?P<strength>\d+[mgmcg]*)"),
+    FieldPattern("med_frequency", r"[0-9-]+", 0),
+    FieldPattern("med_duration", r"(?P<duration>\d+\s*months?)"),
+    FieldPattern("med_start_day", r"(?P<day>Day\s*\d+)"),
+
+    # final_pdf_extractor
+    FieldPattern("age_gender", r"(?P<age>\d+)\s*years?,\s*(?P<gender>Male|Female)"),
+    FieldPattern("colon_date", r"Date:\s*" + _DATE),
+    FieldPattern("medication_row",
+                 r"(?P<number>\d+)\s*(?P<name>[A-Za-z\s]+?)\s*(?P<dosage>\d+\s*(?:tablet|capsule|mg|mcg|cream))?"
+                 r"\s*(?P<strength>\d+[mgmcg]*)?\s*(?P<frequency>[0-9-]+)\s*(?P<timing>[A-Za-z\s]+?)"
+                 r"\s*(?P<duration>\d+\s*months?)\s*(?P<start_from>Day\s*\d+)\s*(?P<availability>[A-Za-z\s@]+)",
+                 re.IGNORECASE | re.MULTILINE),
+
+    # improved_pdf_extractor: one cleaned line at a time
+    FieldPattern("person_name", r"(?:patient|name|client)[:\s]+(?P<name>[A-Za-z\s]+)"),
+    FieldPattern("age", r"age[:\s]+(?P<age>\d+)"),
+    FieldPattern("gender", r"(?P<gender>male|female)"),
+    FieldPattern("dob", r"(?:dob|date of birth)[:\s]+(?P<dob>\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})"),
+    FieldPattern("biomarker_value", r"(?P<name>[A-Za-z\s]+)[:\s]+" + _NUMBER + r"\s*(?P<unit>[a-zA-Z/%]+)", 0),
+)}
+
+VITAL_FIELDS = ("body_temperature", "heart_rate", "blood_pressure", "height", "weight", "bmi",
+                "blood_oxygen", "respiratory_rate")
+
+PATIENT_PATTERNS = PatternSet(("name_age_gender", "patient_name", "labelled_name",
+                               "labelled_date", "assessment_date", "any_date"))
+VITAL_PATTERNS = PatternSet(VITAL_FIELDS)
+FINAL_PATIENT_PATTERNS = PatternSet(("age_gender", "colon_date"))
+LINE_PATIENT_PATTERNS = PatternSet(("person_name", "age", "gender", "dob"))
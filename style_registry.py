@@ -0,0 +1,139 @@
+# === style_registry.py ===
+"""
+Process-wide, read-only paragraph stylesheets.
+
+Every template used to call ``getSampleStyleSheet()`` and then its own
+``init_styles`` in ``__init__``, rebuilding dozens of ParagraphStyle objects
+per request (and per overlay card). Here each stylesheet is built once per
+process by its builder, frozen, and shared by every template instance.
+
+Templates get a ``StyleSheetOverlay`` over the shared sheet: lookups fall
+through to the frozen styles, while ``add`` and ``override`` only touch the
+overlay, so per-report changes are copy-on-write and never leak into other
+reports.
+
+    ROADMAP_STYLES = shared_stylesheet(f"{__name__}.ThriveRoadmapTemplate", ThriveRoadmapTemplate.init_styles)
+    self.styles = StyleSheetOverlay(ROADMAP_STYLES)
+    self.styles.override("SectionTitle", textColor=colors.red)
+"""
+
+import copy
+import threading
+
+from reportlab.lib.styles import StyleSheet1, getSampleStyleSheet
+
+
+class FrozenStyleError(TypeError):
+    """A shared style or stylesheet was modified in place."""
+
+
+class _FrozenStyleMixin:
+    def __setattr__(self, name, value):
+        raise FrozenStyleError(
+            f"style '{self.name}' is shared between reports; "
+            f"use styles.override('{self.name}', {name}=...) instead"
+        )
+
+    def __delattr__(self, name):
+        raise FrozenStyleError(f"style '{self.name}' is shared between reports")
+
+    # ParagraphStyle(parent=...) asserts parent.__class__ == self.__class__,
+    # and clone() builds its (mutable) copy from __class__
+    @property
+    def __class__(self):
+        return type(self).__mro__[2]
+
+    # Copies are private to the caller, so they come back mutable
+    # (the paragraph parser deep-copies the style for <para alignment=...>)
+    def __copy__(self):
+        new = object.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        return new
+
+    def __deepcopy__(self, memo):
+        new = object.__new__(self.__class__)
+        memo[id(self)] = new
+        for key, value in self.__dict__.items():
+            new.__dict__[key] = copy.deepcopy(value, memo)
+        return new
+
+
+_frozen_classes = {}
+
+
+def _freeze_style(style):
+    while style is not None and not isinstance(style, _FrozenStyleMixin):
+        cls = type(style)
+        frozen_cls = _frozen_classes.get(cls)
+        if frozen_cls is None:
+            frozen_cls = _frozen_classes[cls] = type("Frozen" + cls.__name__, (_FrozenStyleMixin, cls), {})
+        object.__setattr__(style, "__class__", frozen_cls)
+        style = style.parent
+
+
+class FrozenStyleSheet(StyleSheet1):
+    """A built stylesheet that can no longer be added to."""
+
+    def add(self, style, alias=None):
+        raise FrozenStyleError(
+            f"cannot add '{style.name}' to a shared stylesheet; add it to a StyleSheetOverlay"
+        )
+
+
+class StyleSheetOverlay(StyleSheet1):
+    """Per-template view of a shared stylesheet with copy-on-write changes."""
+
+    def __init__(self, base):
+        super().__init__()
+        self.base = base
+
+    def __getitem__(self, key):
+        try:
+            return StyleSheet1.__getitem__(self, key)
+        except KeyError:
+            return self.__dict__["base"][key]
+
+    def __contains__(self, key):
+        base = self.__dict__.get("base")
+        return StyleSheet1.__contains__(self, key) or (base is not None and key in base)
+
+    def override(self, name, **changes):
+        """Replace style ``name`` in this overlay only, with ``changes`` applied."""
+        style = self[name].clone(name, **changes)
+        self.byName[name] = style
+        for alias, aliased in list(self.byAlias.items()):
+            if aliased.name == name:
+                self.byAlias[alias] = style
+        return style
+
+
+_sheets = {}
+_lock = threading.Lock()
+
+
+def shared_stylesheet(name, builder=None):
+    """
+    Return the frozen stylesheet registered as ``name``, building it on first use.
+
+    ``builder(styles)`` receives a fresh ``getSampleStyleSheet()`` and adds
+    the template's own styles to it.
+    """
+    sheet = _sheets.get(name)
+    if sheet is not None:
+        return sheet
+    with _lock:
+        sheet = _sheets.get(name)
+        if sheet is None:
+            sheet = getSampleStyleSheet()
+            if builder is not None:
+                builder(sheet)
+            for style in list(sheet.byName.values()) + list(sheet.byAlias.values()):
+                _freeze_style(style)
+            sheet.__class__ = FrozenStyleSheet
+            _sheets[name] = sheet
+    return sheet
+
+
+def sample_styles():
+    """Copy-on-write view of ReportLab's sample stylesheet."""
+    return StyleSheetOverlay(shared_stylesheet("sample"))
@@ -0,0 +1,141 @@
+# === svg_cache.py ===
+"""
+Process-wide cache for parsed SVG drawings.
+
+Every report template used to call ``svg2rlg(path)`` for each icon, logo and
+page background on every request (the header logo once per page). Parsing is
+by far the most expensive part of drawing an icon, so the parsed ``Drawing``
+is kept here, keyed by (path, mtime, variant), and callers get a cheap
+shallow copy they are free to scale and resize.
+
+Callers must not mutate the *children* of a returned drawing (fill colours,
+opacities, ...). If a modified version is needed, register it as a variant
+with a ``prepare`` callback so the modification is done once and cached too.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from reportlab.graphics.shapes import Drawing
+from svglib.svglib import svg2rlg
+
+# === Limits ===
+SVG_CACHE_MAX_ENTRIES = int(os.environ.get("SVG_CACHE_MAX_ENTRIES", 512))
+SVG_CACHE_MAX_BYTES = int(os.environ.get("SVG_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def _shallow_copy(drawing):
+    """Return a new Drawing sharing the (read-only) child shapes of ``drawing``."""
+    clone = Drawing(drawing.width, drawing.height)
+    clone.__dict__.update(drawing.__dict__)
+    clone.contents = list(drawing.contents)
+    return clone
+
+
+class SVGAssetCache:
+    """Size-bounded LRU cache of parsed SVG drawings with hit/miss counters."""
+
+    def __init__(self, max_entries=SVG_CACHE_MAX_ENTRIES, max_bytes=SVG_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (drawing, size_in_bytes)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, path, variant):
+        path = os.path.abspath(os.fspath(path))
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, variant), stat.st_size
+
+    def _store(self, key, drawing, size):
+        # Drop stale entries for the same path/variant (file changed on disk)
+        for old_key in [k for k in self._entries if k[0] == key[0] and k[2] == key[2]]:
+            self._total_bytes -= self._entries.pop(old_key)[1]
+
+        self._entries[key] = (drawing, size)
+        self._total_bytes += size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            if len(self._entries) == 1:
+                break
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, path, variant=None, prepare=None):
+        """
+        Return a private shallow copy of the drawing parsed from ``path``,
+        or None if the file is missing or cannot be parsed.
+
+        ``variant``/``prepare`` let callers cache a modified drawing: on a
+        miss, ``prepare(drawing)`` is applied to a freshly parsed drawing and
+        the result is stored under ``variant``.
+        """
+        try:
+            key, size = self._key(path, variant)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _shallow_copy(entry[0])
+            self.misses += 1
+
+        # Parse outside the lock so slow files don't serialise other lookups
+        drawing = svg2rlg(key[0])
+        if drawing is None:
+            return None
+        if prepare is not None:
+            drawing = prepare(drawing) or drawing
+
+        with self._lock:
+            self._store(key, drawing, size)
+        return _shallow_copy(drawing)
+
+    def scaled(self, path, width, height):
+        """Return a copy of the drawing scaled to exactly ``width`` x ``height``, or None."""
+        drawing = self.get(path)
+        if drawing is None:
+            return None
+        drawing.scale(width / (drawing.width or 1), height / (drawing.height or 1))
+        drawing.width = width
+        drawing.height = height
+        return drawing
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Shared instance used by all report templates
+svg_cache = SVGAssetCache()
+
+
+def load_svg(path, variant=None, prepare=None):
+    """Drop-in replacement for ``svg2rlg(path)`` backed by the shared cache."""
+    return svg_cache.get(path, variant=variant, prepare=prepare)
+
+
+def scaled_svg(path, width, height):
+    return svg_cache.scaled(path, width, height)
@@ -0,0 +1,186 @@
+# === template_cache.py ===
+"""
+In-memory cache of trained templates and models for ionic_extraction.
+
+For every document and every format, ionic_extraction read the whole
+``trained_info`` row again (``SELECT *``: the row/column header, context and
+``*_t2`` JSON blobs), and predict_mutli_checks and get_template_extraction_values
+(once per section) parsed the same blobs again. Here:
+
+* ``get(db, format, identifier)`` keeps the row per (format, identifier)
+  with a version: the MD5 of its columns, computed by MySQL. Each lookup
+  sends only that 32-character probe (or nothing, within
+  TEMPLATE_CACHE_REVALIDATE_SECONDS of the last one) and reads the row again
+  only when the version changed, i.e. when the template was retrained;
+* ``loads(text)`` parses a JSON column once per distinct value; a new
+  version of a row brings new strings, so its blobs are parsed again;
+* ``model(path)`` keeps joblib models (vectorizers, logistic regressions)
+  loaded, keyed by path, mtime and size, so a model rewritten by
+  create_models_real_time is loaded again.
+
+Each ``get`` returns a fresh copy of the row, so callers can keep replacing
+its columns with parsed values; the parsed JSON and the models are shared
+and must be treated as read-only.
+
+    process_trained_fields = trained_templates.get(template_db, format, identifier)
+    row_headers = trained_templates.loads(process_trained_fields['row_headers'])
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# === Configuration ===
+TEMPLATE_CACHE_ENABLED = os.environ.get("TEMPLATE_CACHE_ENABLED", "1") == "1"
+TEMPLATE_CACHE_SIZE = int(os.environ.get("TEMPLATE_CACHE_SIZE", 256))
+# Parsed JSON values kept (several per template)
+TEMPLATE_JSON_CACHE_SIZE = int(os.environ.get("TEMPLATE_JSON_CACHE_SIZE", 2048))
+TEMPLATE_MODEL_CACHE_SIZE = int(os.environ.get("TEMPLATE_MODEL_CACHE_SIZE", 64))
+# A cached row is used without asking the database for this long after its last check (0: always check)
+TEMPLATE_CACHE_REVALIDATE_SECONDS = float(os.environ.get("TEMPLATE_CACHE_REVALIDATE_SECONDS", 0))
+
+TRAINED_INFO_QUERY = "SELECT * from `trained_info` where format=%s and identifier=%s"
+
+
+def version_query(columns):
+    """Query for the MD5 of a trained_info row's columns (NULLs and separators cannot collide)."""
+    parts = ", ".join(f"IFNULL(MD5(`{column}`), 'null')" for column in columns)
+    return f"SELECT MD5(CONCAT_WS('|', {parts})) AS version from `trained_info` where format=%s and identifier=%s"
+
+
+class CachedTemplate:
+    def __init__(self, row, version, columns):
+        self.row = row
+        self.version = version
+        self.columns = columns
+        self.checked = time.monotonic()
+
+
+class TemplateCache:
+    """Versioned trained_info rows, their parsed JSON columns and loaded models, shared by the worker's requests."""
+
+    def __init__(self, max_templates=TEMPLATE_CACHE_SIZE, max_json=TEMPLATE_JSON_CACHE_SIZE,
+                 max_models=TEMPLATE_MODEL_CACHE_SIZE, revalidate_seconds=TEMPLATE_CACHE_REVALIDATE_SECONDS,
+                 enabled=TEMPLATE_CACHE_ENABLED):
+        self.max_templates = max_templates
+        self.max_json = max_json
+        self.max_models = max_models
+        self.revalidate_seconds = revalidate_seconds
+        self.enabled = enabled
+        self._templates = OrderedDict()
+        self._json = OrderedDict()
+        self._models = OrderedDict()
+        # trained_info's columns, known after the first read (the version query needs them)
+        self._columns = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "reloads": 0, "misses": 0}
+
+    @staticmethod
+    def _put(cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _version(self, db, columns, format, identifier):
+        result = db.execute_(version_query(columns), params=[format, identifier])
+        if result is None or isinstance(result, bool) or result.empty:
+            return None
+        return result["version"].iloc[0]
+
+    def _load(self, db, format, identifier):
+        """``(row, columns)`` of the trained_info row, or ``(None, None)``."""
+        result = db.execute_(TRAINED_INFO_QUERY, params=[format, identifier])
+        if result is None or isinstance(result, bool) or result.empty:
+            return None, None
+        return result.to_dict(orient="records")[0], list(result.columns)
+
+    def get(self, db, format, identifier):
+        """A copy of the trained_info row for ``format`` / ``identifier``, or None if there is none."""
+        if not self.enabled:
+            row, _ = self._load(db, format, identifier)
+            return row
+        key = (format, identifier)
+        with self._lock:
+            cached = self._templates.get(key)
+        if cached is not None:
+            if time.monotonic() - cached.checked < self.revalidate_seconds:
+                self._count("hits")
+                return dict(cached.row)
+            version = self._version(db, cached.columns, format, identifier)
+            if version is None:
+                self.invalidate(format, identifier)
+                return None
+            if version == cached.version:
+                cached.checked = time.monotonic()
+                self._count("hits")
+                return dict(cached.row)
+            if cached.version is not None:
+                print(f"[template_cache] trained_info for {format}/{identifier} changed; reloading")
+            self._count("reloads")
+        else:
+            self._count("misses")
+
+        # Versioned before the read, so a retrain during it is picked up next time. The
+        # worker's very first read learns the columns from the row and versions it right after.
+        columns = self._columns or (cached.columns if cached is not None else None)
+        version = self._version(db, columns, format, identifier) if columns else None
+        row, columns = self._load(db, format, identifier)
+        if row is None:
+            self.invalidate(format, identifier)
+            return None
+        self._columns = columns
+        if version is None:
+            version = self._version(db, columns, format, identifier)
+        with self._lock:
+            self._put(self._templates, key, CachedTemplate(row, version, columns), self.max_templates)
+        return dict(row)
+
+    def loads(self, text):
+        """``json.loads(text)``, parsed once per distinct text (the result is shared: do not modify it)."""
+        if not self.enabled or not isinstance(text, (str, bytes)):
+            return json.loads(text)
+        with self._lock:
+            value = self._json.get(text, self)
+            if value is not self:
+                self._json.move_to_end(text)
+                return value
+        value = json.loads(text)
+        with self._lock:
+            self._put(self._json, text, value, self.max_json)
+        return value
+
+    def model(self, path):
+        """The joblib object at ``path``, loaded again only when the file changes."""
+        import joblib
+
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            model = self._models.get(key)
+        if model is None:
+            model = joblib.load(path)
+            with self._lock:
+                self._put(self._models, key, model, self.max_models)
+        return model
+
+    def invalidate(self, format=None, identifier=None):
+        """Forget the rows of ``format`` (and ``identifier``), or every row and parsed value."""
+        with self._lock:
+            if format is None and identifier is None:
+                self._templates.clear()
+                self._json.clear()
+                self._models.clear()
+                return
+            for key in [k for k in self._templates
+                        if (format is None or k[0] == format) and (identifier is None or k[1] == identifier)]:
+                del self._templates[key]
+
+
+trained_templates = TemplateCache()
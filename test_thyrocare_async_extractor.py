@@ -10,7 +10,18 @@ import time
 from pathlib import Path
 
 import anthropic
-import pdfplumber
+
+import pdf_text
+from claude_scheduler import CLAUDE_MAX_CONCURRENCY, ClaudeScheduler
+from extraction_cache import extraction_cache, file_hash, parse_response_json, result_key
+from report_chunker import (Chunk, ReportUsage, cached_system_prompt, chunk_message, chunk_report,
+                            merge_chunk_results)
+
+MODEL = "claude-3-haiku-20240307"
+# Responses and merged results of this script are cached under this name
+EXTRACTOR = "thyrocare_async"
+# A merged result is reused only while this script and the merge step are unchanged
+CODE_HASH = file_hash(__file__, Path(__file__).with_name("report_chunker.py"))
 
 # Full Thyrocare prompt for async processing
 ASYNC_PROMPT = """**Parse this medical laboratory report and convert it to standardized JSON format. Extract all available biomarkers and convert them to the specified units below. Return only a single JSON object with patient information and biomarker values (skip all null/missing values).**
@@ -222,177 +233,136 @@ Example output format:
 **Return JSON with patient info and ALL biomarkers found.**"""
 
 def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF file using pdfplumber."""
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+    """Extract text from PDF file using pdfplumber (pages in parallel, cached per page)."""
+    return pdf_text.extract_text(pdf_path, backend="pdfplumber")
 
-def split_text_into_chunks(text: str, chunk_size: int = 35000) -> list[str]:
-    """Split text into overlapping chunks."""
-    chunks = []
-    start = 0
+async def process_chunk_async(chunk: Chunk, scheduler: ClaudeScheduler, total_chunks: int,
+                              usage: ReportUsage | None = None, pdf_hash: str | None = None) -> dict | None:
+    """Process a single chunk with Claude API; the scheduler handles rate limits and retries."""
+    chunk_num = chunk.index + 1
+    print(f"Processing chunk {chunk_num}/{total_chunks} (pages {chunk.pages}, {len(chunk)} chars)...")
     
-    while start < len(text):
-        end = start + chunk_size
-        
-        # Try to break at a reasonable point
-        if end < len(text):
-            break_point = end
-            for i in range(min(500, chunk_size // 10)):
-                if text[end - i] in ['\n', '.', ' ']:
-                    break_point = end - i
-                    break
-            end = break_point
-        
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - 2000  # Overlap for better coverage
-        
-    return chunks
+    # The static prompt is a cached system prefix shared by all chunks
+    request = dict(
+        model=MODEL,
+        max_tokens=4096,
+        temperature=0,
+        system=cached_system_prompt(ASYNC_PROMPT),
+        messages=[chunk_message(chunk, total_chunks)]
+    )
+    started = time.monotonic()
+    message = None
+    try:
+        result = extraction_cache.get_response_json(request)
+        if result is None:
+            # Raises once the scheduler has exhausted its retries, so the chunk is never silently lost
+            message = await scheduler.create(label=f"Chunk {chunk_num}", **request)
+            # Stored only once it parses, so a garbled response is asked for again next run
+            result = parse_response_json(message.content[0].text)
+            extraction_cache.put_response(request, message.content[0].text, message, pdf_hash=pdf_hash,
+                                          extractor=EXTRACTOR, prompt=ASYNC_PROMPT, chunk=chunk.text)
+    except ValueError as e:
+        print(f"Error parsing response for chunk {chunk_num}: {e}")
+        result = None
+    if usage is not None:
+        usage.add(message, started)
+    
+    if result is not None:
+        print(f"✓ Chunk {chunk_num} processed successfully")
+    return result
 
-async def process_chunk_async(chunk: str, api_key: str, chunk_num: int, total_chunks: int, semaphore: asyncio.Semaphore) -> dict | None:
-    """Process a single chunk asynchronously with Claude API."""
-    async with semaphore:  # Limit concurrent requests
-        try:
-            print(f"Processing chunk {chunk_num}/{total_chunks} ({len(chunk)} chars)...")
-            
-            # Add delay to avoid rate limits
-            if chunk_num > 1:
-                delay = (chunk_num - 1) * 2  # 2 seconds delay between chunks
-                print(f"Waiting {delay} seconds to avoid rate limits...")
-                await asyncio.sleep(delay)
-            
-            # Create client for this request
-            client = anthropic.AsyncAnthropic(api_key=api_key)
-            
-            # Create message
-            message = await client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=4096,
-                temperature=0,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"{ASYNC_PROMPT}\n\n---REPORT TEXT CHUNK {chunk_num}---\n{chunk}"
-                    }
-                ]
-            )
-        
-            # Extract JSON from response
-            response_text = message.content[0].text.strip()
-            
-            # Parse JSON
-            json_text = None
-            
-            # Try to find JSON in code blocks
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                if json_end > json_start:
-                    json_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                if json_end > json_start:
-                    json_text = response_text[json_start:json_end].strip()
-            
-            # Try to find JSON object
-            if not json_text:
-                first_brace = response_text.find("{")
-                last_brace = response_text.rfind("}")
-                if first_brace >= 0 and last_brace > first_brace:
-                    json_text = response_text[first_brace:last_brace + 1]
-            
-            if not json_text:
-                print(f"Warning: Could not extract JSON from chunk {chunk_num}")
-                return None
-            
-            result = json.loads(json_text)
-            print(f"✓ Chunk {chunk_num} processed successfully")
-            return result
-            
-        except anthropic.RateLimitError as e:
-            print(f"Rate limit hit on chunk {chunk_num}. Waiting 30 seconds...")
-            await asyncio.sleep(30)
-            return None
-        except Exception as e:
-            print(f"Error processing chunk {chunk_num}: {e}")
-            return None
+async def process_pdf_async(pdf_path: str, api_key: str, max_concurrent: int = CLAUDE_MAX_CONCURRENCY,
+                            provenance: dict | None = None, scheduler: ClaudeScheduler | None = None,
+                            load_pages=None) -> dict | None:
+    """
+    Process PDF asynchronously with multiple chunks.
 
-def merge_results(results: list[dict]) -> dict:
-    """Merge results from multiple chunks."""
-    if not results:
-        return {}
-    
-    merged = {
-        "name": "Unknown",
-        "age": None,
-        "sex": "Unknown",
-        "cycle": "All"
-    }
-    
-    for result in results:
-        # Extract patient info
-        if "name" in result:
-            merged["name"] = result["name"]
-        if "age" in result:
-            merged["age"] = result["age"]
-        if "sex" in result:
-            merged["sex"] = result["sex"]
-        
-        # Merge biomarkers
-        for key, value in result.items():
-            if key not in ["name", "age", "sex", "cycle"] and value is not None:
-                merged[key] = value
+    A batch passes its shared ``scheduler`` (one rate budget for all reports)
+    and ``load_pages``, an async ``pdf_path -> page texts`` that runs the
+    parsing off the event loop.
+    """
+    pdf_hash = pdf_text.pdf_hash(pdf_path)
+    key = result_key(pdf_hash, EXTRACTOR, MODEL, ASYNC_PROMPT, CODE_HASH)
+    cached = extraction_cache.get_result(key)
+    if cached is not None:
+        merged, chunk_provenance = cached
+        print("✓ Merged result taken from the extraction cache")
+        if provenance is not None:
+            provenance.update(chunk_provenance or {})
+        return merged
     
-    return merged
-
-async def process_pdf_async(pdf_path: str, api_key: str, max_concurrent: int = 2) -> dict | None:
-    """Process PDF asynchronously with multiple chunks."""
     print(f"Extracting text from PDF...")
-    full_text = extract_text_from_pdf(pdf_path)
+    if load_pages is None:
+        pages = pdf_text.extract_pages(pdf_path, backend="pdfplumber")
+    else:
+        pages = await load_pages(pdf_path)
     
-    if not full_text.strip():
+    if not any(page.strip() for page in pages):
         print("Error: Could not extract text from PDF")
         return None
     
-    print(f"Extracted {len(full_text)} characters")
+    print(f"Extracted {sum(len(page) for page in pages)} characters from {len(pages)} pages")
     
-    chunks = split_text_into_chunks(full_text, 35000)
+    # Whole pages per chunk, no overlap
+    chunks = chunk_report(pages, 35000)
     print(f"Split into {len(chunks)} chunks")
+    usage = ReportUsage()
     
-    # Create semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    # Process all chunks concurrently
-    tasks = [
-        process_chunk_async(chunk, api_key, i+1, len(chunks), semaphore)
-        for i, chunk in enumerate(chunks)
-    ]
+    # One client and one rate budget for all chunks; concurrency adapts up to max_concurrent
+    owns_scheduler = scheduler is None
+    if owns_scheduler:
+        scheduler = ClaudeScheduler(api_key, max_concurrency=max_concurrent)
+    try:
+        tasks = [
+            process_chunk_async(chunk, scheduler, len(chunks), usage=usage, pdf_hash=pdf_hash)
+            for chunk in chunks
+        ]
+        
+        print(f"Processing {len(tasks)} chunks concurrently (up to {scheduler.concurrency.maximum} at a time)...")
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        if owns_scheduler:
+            await scheduler.close()
     
-    print(f"Processing {len(tasks)} chunks concurrently (max {max_concurrent} at a time)...")
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    print(f"Usage: {usage.summary()}")
+    failed = [i + 1 for i, r in enumerate(results) if isinstance(r, BaseException)]
+    for i in failed:
+        print(f"Error: chunk {i} failed after retries: {results[i - 1]}")
+    if failed:
+        print(f"Error: {len(failed)} of {len(chunks)} chunks could not be processed; not merging a partial result")
+        return None
     
-    # Filter out exceptions and None results
-    valid_results = [r for r in results if isinstance(r, dict) and r is not None]
+    # Filter out chunks whose response had no JSON
+    valid_results = [(chunk, r) for chunk, r in zip(chunks, results) if isinstance(r, dict)]
+    missing = [chunk.index + 1 for chunk, r in zip(chunks, results) if not isinstance(r, dict)]
     
     if not valid_results:
         print("No data extracted from any chunk.")
         return None
     
     print(f"✓ Successfully processed {len(valid_results)} chunks")
-    return merge_results(valid_results)
+    merged, chunk_provenance = merge_chunk_results(valid_results)
+    conflicts = [key for key, record in chunk_provenance.items() if record["conflicts"]]
+    if conflicts:
+        print(f"Chunks disagreed on {len(conflicts)} fields (first chunk kept): {', '.join(conflicts)}")
+    if provenance is not None:
+        provenance.update(chunk_provenance)
+    if missing:
+        # A partial merge is returned, but not cached: the next run asks for the failed chunks again
+        print(f"Warning: no data from chunk(s) {', '.join(map(str, missing))}; the merged result is not cached")
+    else:
+        extraction_cache.put_result(key, merged, chunk_provenance, pdf_hash=pdf_hash, extractor=EXTRACTOR,
+                                    model=MODEL, prompt=ASYNC_PROMPT, code_hash=CODE_HASH)
+    return merged
 
 async def main_async():
     parser = argparse.ArgumentParser(description="Extract Thyrocare data using asynchronous processing.")
     parser.add_argument("pdf_path", help="Path to PDF file")
     parser.add_argument("-o", "--output", help="Output JSON file path", default=None)
     parser.add_argument("--api-key", help="Anthropic API key", default=None)
-    parser.add_argument("--max-concurrent", type=int, default=2, help="Maximum concurrent requests")
+    parser.add_argument("--provenance", help="Also write which chunk/pages each value came from to this JSON file", default=None)
+    parser.add_argument("--max-concurrent", type=int, default=CLAUDE_MAX_CONCURRENCY,
+                        help="Maximum concurrent requests (the scheduler adapts below this to the rate limits)")
     
     args = parser.parse_args()
     
@@ -409,12 +379,16 @@ async def main_async():
     print("-" * 50)
     
     start_time = time.time()
-    result = await process_pdf_async(args.pdf_path, api_key, args.max_concurrent)
+    provenance = {}
+    result = await process_pdf_async(args.pdf_path, api_key, args.max_concurrent, provenance=provenance)
     end_time = time.time()
     
     if result:
         with open(output_path, 'w') as f:
             json.dump(result, f, indent=2)
+        if args.provenance:
+            with open(args.provenance, 'w') as f:
+                json.dump(provenance, f, indent=2)
         
         print("\n" + "="*50)
         print("SUCCESS!")
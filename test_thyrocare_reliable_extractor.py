@@ -9,7 +9,17 @@ import time
 from pathlib import Path
 
 import anthropic
-import pdfplumber
+
+import pdf_text
+from extraction_cache import extraction_cache, file_hash, result_key
+from report_chunker import (Chunk, ReportUsage, cached_system_prompt, chunk_message, chunk_report,
+                            merge_chunk_results)
+
+MODEL = "claude-3-haiku-20240307"
+# Responses and merged results of this script are cached under this name
+EXTRACTOR = "thyrocare_reliable"
+# A merged result is reused only while this script and the merge step are unchanged
+CODE_HASH = file_hash(__file__, Path(__file__).with_name("report_chunker.py"))
 
 # Reliable prompt for consistent extraction
 RELIABLE_PROMPT = """**Extract ALL Thyrocare biomarkers from this medical report. Return JSON with patient info and ALL biomarker values found.**
@@ -47,90 +57,37 @@ RELIABLE_PROMPT = """**Extract ALL Thyrocare biomarkers from this medical report
 **Return JSON with patient info and ALL biomarkers found.**"""
 
 def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from PDF file using pdfplumber."""
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
-
-def split_text_into_chunks(text: str, chunk_size: int = 35000) -> list[str]:
-    """Split text into chunks with better overlap."""
-    chunks = []
-    start = 0
-    
-    while start < len(text):
-        end = start + chunk_size
-        
-        # Try to break at a reasonable point
-        if end < len(text):
-            break_point = end
-            for i in range(min(1000, chunk_size // 10)):
-                if text[end - i] in ['\n', '.', ' ']:
-                    break_point = end - i
-                    break
-            end = break_point
-        
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start = end - 4000  # Larger overlap for better coverage
-        
-    return chunks
+    """Extract text from PDF file using pdfplumber (pages in parallel, cached per page)."""
+    return pdf_text.extract_text(pdf_path, backend="pdfplumber")
 
-def process_chunk_with_claude(chunk: str, api_key: str, chunk_num: int, total_chunks: int, max_retries: int = 5) -> dict | None:
+def process_chunk_with_claude(chunk: Chunk, api_key: str, total_chunks: int, max_retries: int = 5,
+                              usage: ReportUsage | None = None, pdf_hash: str | None = None) -> dict | None:
     """Process a single chunk with Claude API with robust retry logic."""
+    chunk_num = chunk.index + 1
     for attempt in range(max_retries):
         try:
-            print(f"Processing chunk {chunk_num}/{total_chunks} ({len(chunk)} chars)... (attempt {attempt + 1}/{max_retries})")
+            print(f"Processing chunk {chunk_num}/{total_chunks} (pages {chunk.pages}, {len(chunk)} chars)... (attempt {attempt + 1}/{max_retries})")
             
             # Initialize client
             client = anthropic.Anthropic(api_key=api_key)
             
-            # Create message
-            message = client.messages.create(
-                model="claude-3-haiku-20240307",
+            # Create message, unless this exact request was answered before; the static
+            # prompt is a cached system prefix shared by all chunks
+            request = dict(
+                model=MODEL,
                 max_tokens=4096,
                 temperature=0,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"{RELIABLE_PROMPT}\n\n---REPORT TEXT CHUNK {chunk_num}---\n{chunk}"
-                    }
-                ]
+                system=cached_system_prompt(RELIABLE_PROMPT),
+                messages=[chunk_message(chunk, total_chunks)]
             )
+            # Stored only once it parses: a response without JSON raises and is retried
+            started = time.monotonic()
+            result, message = extraction_cache.response_json(
+                request, lambda request: client.messages.create(**request),
+                pdf_hash=pdf_hash, extractor=EXTRACTOR, prompt=RELIABLE_PROMPT, chunk=chunk.text)
+            if usage is not None:
+                usage.add(message, started)
             
-            # Extract JSON from response
-            response_text = message.content[0].text.strip()
-            
-            # Parse JSON
-            json_text = None
-            
-            # Try to find JSON in code blocks
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                if json_end > json_start:
-                    json_text = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                if json_end > json_start:
-                    json_text = response_text[json_start:json_end].strip()
-            
-            # Try to find JSON object
-            if not json_text:
-                first_brace = response_text.find("{")
-                last_brace = response_text.rfind("}")
-                if first_brace >= 0 and last_brace > first_brace:
-                    json_text = response_text[first_brace:last_brace + 1]
-            
-            if not json_text:
-                print(f"Warning: Could not extract JSON from chunk {chunk_num}")
-                return None
-            
-            result = json.loads(json_text)
             print(f"✓ Chunk {chunk_num} processed successfully")
             return result
             
@@ -156,74 +113,75 @@ def process_chunk_with_claude(chunk: str, api_key: str, chunk_num: int, total_ch
     
     return None
 
-def merge_results(results: list[dict]) -> dict:
-    """Merge results from multiple chunks with better conflict resolution."""
-    if not results:
-        return {}
-    
-    merged = {
-        "name": "Unknown",
-        "age": None,
-        "sex": "Unknown",
-        "cycle": "All"
-    }
-    
-    for result in results:
-        # Extract patient info (use first non-unknown value)
-        if "name" in result and result["name"] != "Unknown":
-            merged["name"] = result["name"]
-        if "age" in result and result["age"] is not None:
-            merged["age"] = result["age"]
-        if "sex" in result and result["sex"] != "Unknown":
-            merged["sex"] = result["sex"]
-        
-        # Merge biomarkers (prefer non-null values)
-        for key, value in result.items():
-            if key not in ["name", "age", "sex", "cycle"] and value is not None:
-                # If key already exists, prefer non-null values
-                if key not in merged or merged[key] is None:
-                    merged[key] = value
-    
-    return merged
-
-def process_pdf_reliable(pdf_path: str, api_key: str) -> dict | None:
+def process_pdf_reliable(pdf_path: str, api_key: str, provenance: dict | None = None) -> dict | None:
     """Process PDF using reliable approach with better error handling."""
+    pdf_hash = pdf_text.pdf_hash(pdf_path)
+    key = result_key(pdf_hash, EXTRACTOR, MODEL, RELIABLE_PROMPT, CODE_HASH)
+    cached = extraction_cache.get_result(key)
+    if cached is not None:
+        merged, chunk_provenance = cached
+        print("✓ Merged result taken from the extraction cache")
+        if provenance is not None:
+            provenance.update(chunk_provenance or {})
+        return merged
+    
     print(f"Extracting text from PDF...")
-    full_text = extract_text_from_pdf(pdf_path)
+    pages = pdf_text.extract_pages(pdf_path, backend="pdfplumber")
     
-    if not full_text.strip():
+    if not any(page.strip() for page in pages):
         print("Error: Could not extract text from PDF")
         return None
     
-    print(f"Extracted {len(full_text)} characters")
+    print(f"Extracted {sum(len(page) for page in pages)} characters from {len(pages)} pages")
     
-    chunks = split_text_into_chunks(full_text, 35000)
+    # Whole pages per chunk, no overlap
+    chunks = chunk_report(pages, 35000)
     print(f"Split into {len(chunks)} chunks")
     
     results = []
+    missing = []
+    usage = ReportUsage()
     
-    for i, chunk in enumerate(chunks, 1):
-        # Delay between requests to avoid rate limits
-        if i > 1:
+    previous_requests = 0
+    for chunk in chunks:
+        # Delay between API requests to avoid rate limits (none after a cached response)
+        if usage.requests > previous_requests:
             print("Waiting 25 seconds to avoid rate limits...")
             time.sleep(25)
+        previous_requests = usage.requests
         
-        result = process_chunk_with_claude(chunk, api_key, i, len(chunks))
-        if result:
-            results.append(result)
+        result = process_chunk_with_claude(chunk, api_key, len(chunks), usage=usage, pdf_hash=pdf_hash)
+        if result is None:
+            missing.append(chunk.index + 1)
+        elif result:
+            results.append((chunk, result))
     
+    print(f"Usage: {usage.summary()}")
     if not results:
         print("No data extracted from any chunk.")
         return None
     
     print(f"✓ Successfully processed {len(results)} chunks")
-    return merge_results(results)
+    merged, chunk_provenance = merge_chunk_results(results)
+    conflicts = [key for key, record in chunk_provenance.items() if record["conflicts"]]
+    if conflicts:
+        print(f"Chunks disagreed on {len(conflicts)} fields (first chunk kept): {', '.join(conflicts)}")
+    if provenance is not None:
+        provenance.update(chunk_provenance)
+    if missing:
+        # A partial merge is returned, but not cached: the next run asks for the failed chunks again
+        print(f"Warning: no data from chunk(s) {', '.join(map(str, missing))}; the merged result is not cached")
+    else:
+        extraction_cache.put_result(key, merged, chunk_provenance, pdf_hash=pdf_hash, extractor=EXTRACTOR,
+                                    model=MODEL, prompt=RELIABLE_PROMPT, code_hash=CODE_HASH)
+    return merged
 
 def main():
     parser = argparse.ArgumentParser(description="Extract Thyrocare data using reliable approach.")
     parser.add_argument("pdf_path", help="Path to PDF file")
     parser.add_argument("-o", "--output", help="Output JSON file path", default=None)
     parser.add_argument("--api-key", help="Anthropic API key", default=None)
+    parser.add_argument("--provenance", help="Also write which chunk/pages each value came from to this JSON file", default=None)
     
     args = parser.parse_args()
     
@@ -239,12 +197,16 @@ def main():
     print("-" * 50)
     
     start_time = time.time()
-    result = process_pdf_reliable(args.pdf_path, api_key)
+    provenance = {}
+    result = process_pdf_reliable(args.pdf_path, api_key, provenance=provenance)
     end_time = time.time()
     
     if result:
         with open(output_path, 'w') as f:
             json.dump(result, f, indent=2)
+        if args.provenance:
+            with open(args.provenance, 'w') as f:
+                json.dump(provenance, f, indent=2)
         
         print("\n" + "="*50)
         print("SUCCESS!")